@@ -8,6 +8,7 @@ Can be instantiated by any module that needs caching.
 import time
 import threading
 import logging
+from collections.abc import Iterable
 from typing import Any
 
 logger = logging.getLogger(__name__)
@@ -99,6 +100,28 @@ class TTLCache:
                 )
             return len(keys_to_delete)
 
+    def invalidate_prefixes(self, prefixes: Iterable[str]) -> int:
+        """
+        Invalidate the entries whose key starts with any of *prefixes*
+        (e.g. every projection of one market), in a single pass.
+
+        Returns:
+            Number of entries cleared.
+        """
+        prefixes = tuple(prefixes)
+        if not prefixes:
+            return 0
+        with self._lock:
+            keys_to_delete = [k for k in self._store if k.startswith(prefixes)]
+            for k in keys_to_delete:
+                del self._store[k]
+            if keys_to_delete:
+                logger.debug(
+                    "[%s] Cleared %d entries for %d prefixes",
+                    self.name, len(keys_to_delete), len(prefixes),
+                )
+            return len(keys_to_delete)
+
     def stats(self) -> dict:
         """Return cache statistics."""
         with self._lock:
@@ -99,6 +99,10 @@ class Settings:
     # --- Data staleness threshold ---
     data_stale_days: int = field(default_factory=lambda: env_int("DATA_STALE_DAYS", 10))
 
+    # --- Background jobs ---
+    # Run the COT pipeline / price update in a worker process instead of an API thread
+    worker_process: bool = field(default_factory=lambda: env_bool("WORKER_PROCESS", True))
+
     # --- PostgreSQL (async, for auth + journal) ---
     @cached_property
     def database_url(self) -> str:
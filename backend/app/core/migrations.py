@@ -90,6 +90,171 @@ _MIGRATIONS: list[tuple[int, str, str]] = [
         ALTER TABLE cot_data ADD COLUMN conc_top8_short REAL;
         """,
     ),
+    (
+        3,
+        "Add screener_snapshots (per-week screener values for as_of lookups)",
+        """
+        CREATE TABLE IF NOT EXISTS screener_snapshots (
+            report_type     TEXT NOT NULL,
+            subtype         TEXT NOT NULL,
+            cftc_contract_code TEXT NOT NULL,
+            report_date     TEXT NOT NULL,
+
+            open_interest   REAL,
+            oi_change       REAL,
+
+            g1_long INTEGER, g1_short INTEGER, g1_net INTEGER,
+            g1_change INTEGER, g1_change_long INTEGER, g1_change_short INTEGER,
+            g1_pct_oi REAL, g1_pct_oi_change REAL, g1_cot_1y REAL,
+
+            g2_long INTEGER, g2_short INTEGER, g2_net INTEGER,
+            g2_change INTEGER, g2_change_long INTEGER, g2_change_short INTEGER,
+            g2_pct_oi REAL, g2_pct_oi_change REAL, g2_cot_1y REAL,
+
+            g3_long INTEGER, g3_short INTEGER, g3_net INTEGER,
+            g3_change INTEGER, g3_change_long INTEGER, g3_change_short INTEGER,
+            g3_pct_oi REAL, g3_pct_oi_change REAL, g3_cot_1y REAL,
+
+            g4_long INTEGER, g4_short INTEGER, g4_net INTEGER,
+            g4_change INTEGER, g4_change_long INTEGER, g4_change_short INTEGER,
+            g4_pct_oi REAL, g4_pct_oi_change REAL, g4_cot_1y REAL,
+
+            g5_long INTEGER, g5_short INTEGER, g5_net INTEGER,
+            g5_change INTEGER, g5_change_long INTEGER, g5_change_short INTEGER,
+            g5_pct_oi REAL, g5_pct_oi_change REAL, g5_cot_1y REAL,
+
+            PRIMARY KEY (report_type, subtype, cftc_contract_code, report_date)
+        ) WITHOUT ROWID;
+        """,
+    ),
+    (
+        4,
+        "Add sector_series (per-sector aggregate positioning per week)",
+        """
+        CREATE TABLE IF NOT EXISTS sector_series (
+            report_type     TEXT NOT NULL,
+            subtype         TEXT NOT NULL,
+            sector          TEXT NOT NULL,
+            report_date     TEXT NOT NULL,
+
+            markets         INTEGER NOT NULL,
+            open_interest   REAL,
+
+            g1_net INTEGER, g1_pct_oi REAL, g1_cot_1y REAL,
+            g2_net INTEGER, g2_pct_oi REAL, g2_cot_1y REAL,
+            g3_net INTEGER, g3_pct_oi REAL, g3_cot_1y REAL,
+            g4_net INTEGER, g4_pct_oi REAL, g4_cot_1y REAL,
+            g5_net INTEGER, g5_pct_oi REAL, g5_cot_1y REAL,
+
+            PRIMARY KEY (report_type, subtype, sector, report_date)
+        ) WITHOUT ROWID;
+        """,
+    ),
+    (
+        5,
+        "Add alert_rules / alerts (per-user rules evaluated after each pipeline run)",
+        """
+        CREATE TABLE IF NOT EXISTS alert_rules (
+            id              INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id         TEXT NOT NULL,
+            name            TEXT,
+            report_type     TEXT NOT NULL,
+            subtype         TEXT NOT NULL,
+            kind            TEXT NOT NULL,      -- threshold | signal_flip
+            column_name     TEXT,               -- threshold: screener column
+            op              TEXT,               -- threshold: gt gte lt lte eq
+            value           REAL,               -- threshold: bound
+            group_key       TEXT,               -- signal_flip: g1-g5 (NULL = any)
+            signal          TEXT,               -- signal_flip: BUY / SELL (NULL = either)
+            cftc_contract_code TEXT,            -- NULL = every market
+            enabled         INTEGER NOT NULL DEFAULT 1,
+            created_at      TEXT NOT NULL DEFAULT (datetime('now'))
+        );
+        CREATE INDEX IF NOT EXISTS idx_alert_rules_user ON alert_rules(user_id);
+        CREATE INDEX IF NOT EXISTS idx_alert_rules_variant ON alert_rules(report_type, subtype, enabled);
+
+        CREATE TABLE IF NOT EXISTS alerts (
+            id              INTEGER PRIMARY KEY AUTOINCREMENT,
+            rule_id         INTEGER NOT NULL,
+            user_id         TEXT NOT NULL,
+            report_type     TEXT NOT NULL,
+            subtype         TEXT NOT NULL,
+            cftc_contract_code TEXT NOT NULL,
+            report_date     TEXT NOT NULL,
+            value           REAL,
+            previous        REAL,
+            group_key       TEXT,
+            signal          TEXT,
+            is_read         INTEGER NOT NULL DEFAULT 0,
+            created_at      TEXT NOT NULL DEFAULT (datetime('now')),
+            UNIQUE (rule_id, cftc_contract_code, report_date)
+        );
+        CREATE INDEX IF NOT EXISTS idx_alerts_user ON alerts(user_id, report_date DESC);
+        """,
+    ),
+    (
+        6,
+        "Add pipeline_runs (per-run timings, volumes and per-stage / per-variant metrics)",
+        """
+        CREATE TABLE IF NOT EXISTS pipeline_runs (
+            id              INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at      TEXT NOT NULL,
+            finished_at     TEXT,
+            status          TEXT NOT NULL,      -- success | partial | error
+            error           TEXT,
+            mode            TEXT,               -- pipelined | serial
+            force_reload    INTEGER NOT NULL DEFAULT 0,
+            duration_sec    REAL,
+
+            bytes_downloaded    INTEGER,
+            rows_parsed         INTEGER,
+            rows_upserted       INTEGER,
+            rows_changed        INTEGER,
+            export_files_written INTEGER,
+            export_bytes_written INTEGER,
+            years_skipped       INTEGER,        -- cache hits: download_log
+            price_cache_hits    INTEGER,        -- cache hits: in-memory price cache
+            export_files_unchanged INTEGER,     -- cache hits: export manifest
+            peak_rss_mb     REAL,
+
+            stages          TEXT,               -- JSON: {stage: {busy, items, errors}}
+            variants        TEXT                -- JSON: {"legacy_fo": {...}}
+        );
+        CREATE INDEX IF NOT EXISTS idx_pipeline_runs_started ON pipeline_runs(started_at DESC);
+        """,
+    ),
+    (
+        7,
+        "Add pipeline_checkpoints (completed units of an unfinished pipeline run)",
+        """
+        CREATE TABLE IF NOT EXISTS pipeline_checkpoints (
+            report_type     TEXT NOT NULL,
+            subtype         TEXT NOT NULL,
+            unit            TEXT NOT NULL,      -- reset | year:YYYY | current | compute | export
+            state           TEXT NOT NULL,      -- downloaded | parsed | stored | exported
+            artifact        TEXT,               -- downloaded file kept for a resume
+            rows_count      INTEGER,
+            updated         TEXT NOT NULL,
+            PRIMARY KEY (report_type, subtype, unit)
+        ) WITHOUT ROWID;
+        """,
+    ),
+    (
+        8,
+        "Add price_bars (persistent daily OHLCV per Yahoo ticker)",
+        """
+        CREATE TABLE IF NOT EXISTS price_bars (
+            ticker          TEXT NOT NULL,
+            date            TEXT NOT NULL,      -- YYYY-MM-DD
+            open            REAL,
+            high            REAL,
+            low             REAL,
+            close           REAL,
+            volume          INTEGER,
+            PRIMARY KEY (ticker, date)
+        ) WITHOUT ROWID;
+        """,
+    ),
 ]
 
 
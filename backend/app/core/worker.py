@@ -0,0 +1,104 @@
+"""
+Out-of-process job runner.
+============================
+Runs a long job (COT pipeline, daily price update) in a spawned worker
+process, so its CPU work and memory stay out of the API process: no GIL
+contention with request handlers, and the memory is returned to the OS
+when the job ends.
+
+The job is named by import path (``"package.module:function"``) and
+called as ``function(progress=..., **kwargs)`` in the worker.  Progress
+events (plain dicts) and the return value come back over a one-way
+``multiprocessing.Pipe``; ``run_in_worker`` blocks the calling thread
+(a scheduler thread) until the job ends.
+
+Usage::
+
+    from app.core.worker import run_in_worker
+    result = run_in_worker("app.modules.cot.scheduler:pipeline_job",
+                           on_progress=print, force=False)
+"""
+
+import importlib
+import logging
+import multiprocessing
+import threading
+from collections.abc import Callable
+from multiprocessing.connection import Connection
+
+logger = logging.getLogger(__name__)
+
+# Seconds between liveness checks while waiting for the worker
+POLL_INTERVAL = 1.0
+
+
+def run_in_worker(
+    target: str,
+    on_progress: Callable[[dict], None] | None = None,
+    name: str = "worker",
+    **kwargs,
+):
+    """Run *target* in a worker process and return its result.
+
+    Raises:
+        RuntimeError: If the job raised, or the worker died without a
+            result (e.g. killed for running out of memory).
+    """
+    ctx = multiprocessing.get_context("spawn")
+    receiver, sender = ctx.Pipe(duplex=False)
+    # Not a daemon: daemonic processes may not start the export process pool
+    proc = ctx.Process(target=_worker_main, args=(sender, target, kwargs), name=name)
+    proc.start()
+    sender.close()  # the worker holds the only write end, so EOF means it is gone
+    logger.info("Started worker '%s' (pid %d) for %s", name, proc.pid, target)
+
+    message: tuple | None = None
+    try:
+        while True:
+            try:
+                if not receiver.poll(POLL_INTERVAL):
+                    if proc.is_alive():
+                        continue
+                    break
+                kind, payload = receiver.recv()
+            except EOFError:
+                break
+            if kind == "progress":
+                if on_progress is not None:
+                    try:
+                        on_progress(payload)
+                    except Exception as e:
+                        logger.warning("Progress callback failed: %s", e)
+            else:
+                message = (kind, payload)
+                break
+    finally:
+        receiver.close()
+        proc.join()
+
+    if message is None:
+        raise RuntimeError(f"Worker '{name}' exited without a result (exit code {proc.exitcode})")
+    kind, payload = message
+    if kind == "error":
+        raise RuntimeError(payload)
+    return payload
+
+
+def _worker_main(conn: Connection, target: str, kwargs: dict) -> None:
+    """Worker process entry point."""
+    send_lock = threading.Lock()  # jobs may report progress from several threads
+
+    def progress(event: dict) -> None:
+        with send_lock:
+            conn.send(("progress", event))
+
+    try:
+        module_name, func_name = target.split(":")
+        func = getattr(importlib.import_module(module_name), func_name)
+        message = ("result", func(progress=progress, **kwargs))
+    except BaseException as e:
+        logger.error("Worker job %s failed: %s", target, e, exc_info=True)
+        message = ("error", f"{type(e).__name__}: {e}")
+    with send_lock:
+        conn.send(message)
+    conn.close()
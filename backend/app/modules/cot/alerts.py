@@ -0,0 +1,369 @@
+"""
+COT module — Alert rules.
+===========================
+User-defined rules evaluated over the newest report week of every market
+once the pipeline has run (``evaluate_alerts`` is a pipeline-complete
+callback).  Two kinds:
+
+  - ``threshold``: ``condition="cot_g3_1y:lt:10"`` — a screener column,
+    op and value in the screener's ``filter`` syntax.  Fires the week
+    the condition starts to hold (it did not hold, or had no value, the
+    week before).
+  - ``signal_flip``: fires the week a Crowded Level BUY / SELL signal
+    starts (new, or reversed), optionally for one group / direction.
+
+Rules may watch one market (``code``) or every market of the variant.
+Values come from ``screener_snapshots`` (latest two report weeks), and
+each trigger is stored once per (rule, market, week) in ``alerts``.
+After a pipeline run only the variants with changed markets are
+evaluated (the others have no new week).
+
+Rules are not checked one by one: ``CompiledRules`` groups them into
+array predicates.  Threshold rules on every market are grouped by
+(column, op) into one ascending threshold array; the rules a market
+newly satisfies are then the slice between the ``searchsorted``
+positions of its previous and current value, so a group costs two
+binary searches per market whatever its rule count.  Single-market
+rules are one gather-and-compare per (column, op), and flip rules one
+mask per (group, direction).
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.modules.cot.backtest import signals
+from app.modules.cot.changes import MarketChanges, codes_by_variant
+from app.modules.cot.config import cot_settings
+from app.modules.cot.screener_index import SIGNALS, ScreenerFilter
+from app.modules.cot.storage import SNAPSHOT_GROUP_FIELDS, CotStorage
+
+logger = logging.getLogger(__name__)
+
+RULE_KINDS: tuple[str, ...] = ("threshold", "signal_flip")
+MAX_RULES_PER_USER = 200
+
+# Screener column → snapshot column (crowded level is the 1Y COT Index)
+ALERT_COLUMNS: dict[str, str] = {
+    "open_interest": "open_interest",
+    "oi_change": "oi_change",
+    **{
+        f"g{gi}_{f}": f"g{gi}_{f}"
+        for gi in range(1, 6) for f in SNAPSHOT_GROUP_FIELDS if f != "cot_1y"
+    },
+    **{f"cot_g{gi}_1y": f"g{gi}_cot_1y" for gi in range(1, 6)},
+    **{f"crowded_g{gi}": f"g{gi}_cot_1y" for gi in range(1, 6)},
+}
+
+_COLUMN_GROUP_RE = re.compile(r"(?:^|_)(g[1-5])(?:_|$)")
+
+# BUY when the index is high for commercials, low for speculators / small traders
+_ROLE_SIGN: dict[str, int] = {"commercial": 1, "speculative": -1, "small": -1}
+_SIGNAL_VALUE: dict[str, int] = {"BUY": 1, "SELL": -1}
+
+_COMPARE = {
+    "gt": np.greater, "gte": np.greater_equal,
+    "lt": np.less, "lte": np.less_equal, "eq": np.equal,
+}
+
+
+def column_group(column: str) -> str | None:
+    """Group key a screener column belongs to (None for market-level columns)."""
+    m = _COLUMN_GROUP_RE.search(column)
+    return m.group(1) if m else None
+
+
+def validate_rule(
+    report_type: str,
+    kind: str,
+    condition: str | None = None,
+    group: str | None = None,
+    signal: str | None = None,
+) -> dict:
+    """``alert_rules`` fields of a rule definition.
+
+    Raises:
+        ValueError: On an unknown kind, column, op or group, or a
+            condition / group / signal that does not fit the kind.
+    """
+    group_keys = [g["key"] for g in cot_settings.report_groups[report_type]]
+    if kind == "threshold":
+        if not condition:
+            raise ValueError("A threshold rule needs a 'condition' (column:op:value)")
+        if group is not None or signal is not None:
+            raise ValueError("'group' / 'signal' only apply to signal_flip rules")
+        parsed = ScreenerFilter.parse(condition)
+        if parsed.column not in ALERT_COLUMNS:
+            raise ValueError(f"Unknown alert column '{parsed.column}'")
+        gk = column_group(parsed.column)
+        if gk is not None and gk not in group_keys:
+            raise ValueError(f"Unknown group '{gk}' for {report_type}")
+        return {
+            "kind": kind, "column_name": parsed.column, "op": parsed.op, "value": parsed.value,
+            "group_key": None, "signal": None,
+        }
+    if kind == "signal_flip":
+        if condition is not None:
+            raise ValueError("'condition' only applies to threshold rules")
+        if group is not None and group not in group_keys:
+            raise ValueError(f"Unknown group '{group}' for {report_type}")
+        if signal is not None and signal not in SIGNALS:
+            raise ValueError(f"'signal' must be one of {', '.join(SIGNALS)}")
+        return {
+            "kind": kind, "column_name": None, "op": None, "value": None,
+            "group_key": group, "signal": signal,
+        }
+    raise ValueError(f"'kind' must be one of {', '.join(RULE_KINDS)}")
+
+
+def newly_satisfied(
+    thresholds: np.ndarray, op: str, current: np.ndarray, previous: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Per value, the ``[start, end)`` slice of ascending *thresholds* whose
+    condition ``value <op> threshold`` holds for *current* but did not
+    for *previous* (NaN satisfies nothing).
+    """
+    def bounds(values: np.ndarray, empty: int) -> tuple[np.ndarray, np.ndarray]:
+        left = np.searchsorted(thresholds, values, side="left")
+        right = np.searchsorted(thresholds, values, side="right")
+        missing = np.isnan(values)
+        return np.where(missing, empty, left), np.where(missing, empty, right)
+
+    n = len(thresholds)
+    if op in ("gt", "gte"):
+        # Satisfied thresholds are a prefix: t < v (gt) / t <= v (gte)
+        cl, cr = bounds(current, 0)
+        pl, pr = bounds(previous, 0)
+        start, end = (pl, cl) if op == "gt" else (pr, cr)
+    elif op in ("lt", "lte"):
+        # … a suffix: t > v (lt) / t >= v (lte)
+        cl, cr = bounds(current, n)
+        pl, pr = bounds(previous, n)
+        start, end = (cr, pr) if op == "lt" else (cl, pl)
+    else:
+        # … a run of equal thresholds, disjoint for different values
+        cl, cr = bounds(current, n)
+        pl, pr = bounds(previous, n)
+        start, end = cl, np.where((cl == pl) & (cr == pr), cl, cr)
+    return start, np.maximum(start, end)
+
+
+def expand_slices(start: np.ndarray, end: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(row, position) pairs covering ``start[i] .. end[i] - 1`` of every row *i*."""
+    lengths = end - start
+    rows = np.repeat(np.arange(len(start)), lengths)
+    first = np.cumsum(lengths) - lengths
+    positions = np.arange(int(lengths.sum())) + np.repeat(start - first, lengths)
+    return rows, positions
+
+
+@dataclass(frozen=True)
+class _RuleGroup:
+    """Rules sharing one predicate, sorted by threshold."""
+
+    rule_ids: np.ndarray
+    thresholds: np.ndarray
+    codes: list[str | None]  # per rule; None = every market
+
+
+@dataclass(frozen=True)
+class CompiledRules:
+    """Enabled rules of one report variant as grouped array predicates."""
+
+    rules: dict[int, dict]
+    watching: dict[tuple[str, str], _RuleGroup]  # every market, by (column, op)
+    pinned: dict[tuple[str, str], _RuleGroup]    # one market each, by (column, op)
+    flips: dict[tuple[str | None, str | None], _RuleGroup]  # by (group, signal)
+
+    @classmethod
+    def compile(cls, rules: list[dict]) -> "CompiledRules":
+        buckets: dict[str, dict[tuple, list[dict]]] = {"watching": {}, "pinned": {}, "flips": {}}
+        for r in rules:
+            if r["kind"] == "signal_flip":
+                bucket, key = "flips", (r["group_key"], r["signal"])
+            else:
+                bucket = "pinned" if r["cftc_contract_code"] else "watching"
+                key = (r["column_name"], r["op"])
+            buckets[bucket].setdefault(key, []).append(r)
+
+        def pack(members: list[dict]) -> _RuleGroup:
+            members = sorted(members, key=lambda r: (r["value"] or 0.0, r["id"]))
+            return _RuleGroup(
+                rule_ids=np.array([r["id"] for r in members], dtype=np.int64),
+                thresholds=np.array([r["value"] or 0.0 for r in members], dtype=np.float64),
+                codes=[r["cftc_contract_code"] for r in members],
+            )
+
+        return cls(
+            rules={r["id"]: r for r in rules},
+            watching={k: pack(v) for k, v in buckets["watching"].items()},
+            pinned={k: pack(v) for k, v in buckets["pinned"].items()},
+            flips={k: pack(v) for k, v in buckets["flips"].items()},
+        )
+
+    def columns(self) -> set[str]:
+        """Snapshot columns the threshold rules read."""
+        return {ALERT_COLUMNS[column] for column, _ in (*self.watching, *self.pinned)}
+
+    def evaluate(
+        self,
+        codes: list[str],
+        current: dict[str, np.ndarray],
+        previous: dict[str, np.ndarray],
+        groups: list[dict],
+    ) -> list[tuple[int, int, str | None, str | None, str]]:
+        """Triggered ``(rule_id, market, group, signal, column)`` tuples.
+
+        *current* / *previous* map snapshot columns to one value per
+        market of *codes* (NaN where missing); *column* is the snapshot
+        column whose value the alert reports.
+        """
+        hits: list[tuple[int, int, str | None, str | None, str]] = []
+        position = {code: i for i, code in enumerate(codes)}
+
+        def pinned_markets(group: _RuleGroup) -> tuple[np.ndarray, np.ndarray]:
+            """Rule positions whose market reported this week, and those markets."""
+            markets = np.array([position.get(c, -1) for c in group.codes], dtype=np.int64)
+            keep = np.flatnonzero(markets >= 0)
+            return keep, markets[keep]
+
+        for (column, op), group in self.watching.items():
+            col = ALERT_COLUMNS[column]
+            start, end = newly_satisfied(group.thresholds, op, current[col], previous[col])
+            markets, positions = expand_slices(start, end)
+            gk = column_group(column)
+            hits.extend(
+                (rid, m, gk, None, col)
+                for rid, m in zip(group.rule_ids[positions].tolist(), markets.tolist())
+            )
+
+        for (column, op), group in self.pinned.items():
+            col = ALERT_COLUMNS[column]
+            keep, markets = pinned_markets(group)
+            t = group.thresholds[keep]
+            with np.errstate(invalid="ignore"):
+                fired = _COMPARE[op](current[col][markets], t) & ~_COMPARE[op](previous[col][markets], t)
+            gk = column_group(column)
+            hits.extend(
+                (rid, m, gk, None, col)
+                for rid, m in zip(group.rule_ids[keep][fired].tolist(), markets[fired].tolist())
+            )
+
+        if not self.flips:
+            return hits
+
+        # Signal onsets per group: (groups × markets), 0 = none
+        n = len(codes)
+        onset = np.zeros((len(groups), n), dtype=np.int8)
+        buy, sell = cot_settings.crowded_buy_threshold, cot_settings.crowded_sell_threshold
+        for gi, g in enumerate(groups):
+            col = f"{g['key']}_cot_1y"
+            sign = np.full(n, _ROLE_SIGN.get(g["role"], 0), dtype=np.int8)
+            now = signals(current[col], sign, buy, sell)
+            onset[gi] = np.where(now != signals(previous[col], sign, buy, sell), now, 0)
+        group_keys = [g["key"] for g in groups]
+
+        for (group_key, signal), group in self.flips.items():
+            matches = onset != 0 if signal is None else onset == _SIGNAL_VALUE[signal]
+            if group_key is not None:
+                only = np.zeros_like(matches)
+                if group_key in group_keys:
+                    gi = group_keys.index(group_key)
+                    only[gi] = matches[gi]
+                matches = only
+            fired = matches.any(axis=0)
+            first_group = matches.argmax(axis=0)  # the first flipping group reports
+
+            every = np.array([c is None for c in group.codes], dtype=bool)
+            markets = np.flatnonzero(fired)
+            rule_ids = group.rule_ids[every]
+            pairs = zip(np.repeat(rule_ids, len(markets)).tolist(), np.tile(markets, len(rule_ids)).tolist())
+
+            keep, pinned = pinned_markets(group)
+            keep, pinned = keep[~every[keep]], pinned[~every[keep]]
+            on = fired[pinned]
+            pairs = [*pairs, *zip(group.rule_ids[keep][on].tolist(), pinned[on].tolist())]
+
+            for rid, m in pairs:
+                gi = int(first_group[m])
+                hits.append((
+                    rid, m, group_keys[gi], "BUY" if onset[gi, m] > 0 else "SELL",
+                    f"{group_keys[gi]}_cot_1y",
+                ))
+        return hits
+
+
+class AlertEngine:
+    """Evaluates every enabled rule against the newest week of its variant."""
+
+    def __init__(self, store: CotStorage) -> None:
+        self.store = store
+
+    def run(self, variants: set[tuple[str, str]] | None = None) -> int:
+        """Evaluate all enabled rules (of *variants*, if given); returns
+        the number of new alerts."""
+        by_variant: dict[tuple[str, str], list[dict]] = {}
+        for rule in self.store.get_alert_rules(enabled_only=True):
+            variant = (rule["report_type"], rule["subtype"])
+            if variants is None or variant in variants:
+                by_variant.setdefault(variant, []).append(rule)
+        created = 0
+        for (report_type, subtype), rules in sorted(by_variant.items()):
+            created += self.evaluate(report_type, subtype, rules)
+        return created
+
+    def evaluate(self, report_type: str, subtype: str, rules: list[dict]) -> int:
+        """Evaluate *rules* of one variant and store what they trigger."""
+        snapshots = self.store.get_recent_snapshots(report_type, subtype, weeks=2)
+        if not snapshots or not rules:
+            return 0
+        latest = max(s["report_date"] for s in snapshots)
+        codes = sorted({s["cftc_contract_code"] for s in snapshots if s["report_date"] == latest})
+        position = {code: i for i, code in enumerate(codes)}
+
+        compiled = CompiledRules.compile(rules)
+        groups = cot_settings.report_groups[report_type]
+        columns = compiled.columns() | {f"{g['key']}_cot_1y" for g in groups}
+        current = {c: np.full(len(codes), np.nan) for c in columns}
+        previous = {c: np.full(len(codes), np.nan) for c in columns}
+        for s in snapshots:
+            i = position.get(s["cftc_contract_code"])
+            if i is None:
+                continue
+            target = current if s["report_date"] == latest else previous
+            for c in columns:
+                if s[c] is not None:
+                    target[c][i] = s[c]
+
+        hits = compiled.evaluate(codes, current, previous, groups)
+        alerts = []
+        for rule_id, m, group_key, signal, column in hits:
+            value, prev = current[column][m], previous[column][m]
+            alerts.append({
+                "rule_id": rule_id,
+                "user_id": compiled.rules[rule_id]["user_id"],
+                "report_type": report_type,
+                "subtype": subtype,
+                "cftc_contract_code": codes[m],
+                "report_date": latest,
+                "value": None if np.isnan(value) else float(value),
+                "previous": None if np.isnan(prev) else float(prev),
+                "group_key": group_key,
+                "signal": signal,
+            })
+        created = self.store.insert_alerts(alerts)
+        logger.info(
+            "Alerts %s/%s %s: %d rules, %d markets, %d triggered, %d new",
+            report_type, subtype, latest, len(rules), len(codes), len(alerts), created,
+        )
+        return created
+
+
+def evaluate_alerts(changes: MarketChanges | None = None) -> None:
+    """Pipeline-complete callback: evaluate the rules of the changed
+    variants (all rules without *changes*) against the new data."""
+    variants = None if changes is None else set(codes_by_variant(changes))
+    created = AlertEngine(CotStorage()).run(variants)
+    logger.info("Alert evaluation complete: %d new alerts", created)
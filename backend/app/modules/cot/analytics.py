@@ -0,0 +1,497 @@
+"""
+COT module — Dashboard analytics.
+===================================
+Server-side port of the dashboard calculations that used to run in the
+browser (``frontend/src/apps/cot/utils/calculations.ts``):
+  - Percentile rank, Z-score, COT Index (current value and rolling series)
+  - Position velocity, FLIP detection, OI signal matrix
+  - Sentiment divergence, market power, long/short bias
+  - Triple lookback, spread percentile, percentile thresholds
+  - Distribution histogram
+  - Concentration ratio series and percentile ranks
+
+Series are numpy arrays, newest first, with NaN for missing weeks; the
+window of week ``i`` is ``series[i : i + lookback]`` with missing values
+skipped.  Rounding follows JS ``Math.round`` (halves round up) and sums
+are accumulated left to right, so results are identical to the
+frontend formulas.
+"""
+
+import logging
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+# Display range → weeks shown (and lookback used) by the dashboard
+DISPLAY_RANGES: dict[str, int] = {
+    "1M": 4,
+    "3M": 13,
+    "6M": 26,
+    "1Y": 52,
+    "2Y": 104,
+    "3Y": 156,
+    "5Y": 260,
+}
+DEFAULT_DISPLAY_RANGE = "2Y"
+NO_COMM_GROUP = "none"  # comm_group value for markets without a commercial side
+
+TRIPLE_LOOKBACKS: tuple[tuple[str, int], ...] = (
+    ("1 Year", 52),
+    ("3 Years", 156),
+    ("5 Years", 260),
+)
+HISTOGRAM_BINS = 25
+DIVERGENCE_HIGH = 90.0  # spec/comm percentiles on opposite extremes
+DIVERGENCE_LOW = 10.0
+THRESHOLD_PERCENTILES = (5, 95)  # p5 / p95 zone lines of the net analysis chart
+
+# Concentration ratio → cot_data column (% of OI held by the largest traders)
+CONCENTRATION_COLUMNS: dict[str, str] = {
+    "top4_long": "conc_top4_long",
+    "top4_short": "conc_top4_short",
+    "top8_long": "conc_top8_long",
+    "top8_short": "conc_top8_short",
+}
+
+PERCENTILE_DEFAULT = 50.0
+COT_INDEX_DEFAULT = 50.0
+
+
+# ------------------------------------------------------------------
+# Primitives
+# ------------------------------------------------------------------
+
+def js_round(x):
+    """``Math.round``: nearest integer, halves toward +inf (NaN stays NaN)."""
+    r = np.floor(x)
+    return r + (x - r >= 0.5)
+
+
+def _valid(window: np.ndarray) -> np.ndarray:
+    return window[~np.isnan(window)]
+
+
+def _windows(series: np.ndarray, lookback: int) -> np.ndarray:
+    """``(len(series), lookback)`` view; row ``i`` is ``series[i : i + lookback]``, NaN-padded."""
+    padded = np.concatenate((series, np.full(lookback - 1, np.nan)))
+    return sliding_window_view(padded, lookback)
+
+
+def _left_sum(values: np.ndarray) -> np.ndarray:
+    """Row sums of a 2-D array, accumulated column by column (JS ``reduce`` order)."""
+    total = np.zeros(values.shape[0])
+    for k in range(values.shape[1]):
+        total += values[:, k]
+    return total
+
+
+def clamp_percentile(pct):
+    return np.clip(js_round(pct * 10) / 10, 1, 99)
+
+
+# ------------------------------------------------------------------
+# Single value vs window
+# ------------------------------------------------------------------
+
+def percentile(value: float, window: np.ndarray) -> float:
+    """Percentile (1–99) of *value* in *window*: "≤" count with a 0.5 offset."""
+    n = len(window)
+    if n == 0:
+        return PERCENTILE_DEFAULT
+    count = int((window <= value).sum())
+    return float(clamp_percentile(((count - 0.5) / n) * 100))
+
+
+def z_score(value: float, window: np.ndarray) -> float:
+    """Population Z-score of *value* in *window*, rounded to 0.01."""
+    n = len(window)
+    if n < 2:
+        return 0.0
+    mean = sum(window.tolist()) / n
+    std = math.sqrt(sum(((window - mean) ** 2).tolist()) / n)
+    if std == 0:
+        return 0.0
+    return float(js_round(((value - mean) / std) * 100) / 100)
+
+
+def cot_index(value: float, window: np.ndarray) -> float:
+    """Min-max position (0–100) of *value* in *window*, rounded to 0.1."""
+    if len(window) < 2:
+        return COT_INDEX_DEFAULT
+    mn, mx = window.min(), window.max()
+    if mx == mn:
+        return COT_INDEX_DEFAULT
+    return float(js_round(((value - mn) / (mx - mn)) * 100 * 10) / 10)
+
+
+def series_metrics(series: np.ndarray, lookback: int) -> dict | None:
+    """Percentile, Z-score and COT Index of the current (first) value.
+
+    None if the current week is missing or its window has fewer than two
+    values.
+    """
+    if not len(series) or np.isnan(series[0]):
+        return None
+    current = float(series[0])
+    window = _valid(series[:lookback])
+    if len(window) < 2:
+        return None
+    prev = float(series[1]) if len(series) > 1 and not np.isnan(series[1]) else current
+    return {
+        "value": current,
+        "percentile": percentile(current, window),
+        "z_score": z_score(current, window),
+        "cot_index": cot_index(current, window),
+        "weekly_change": current - prev,
+    }
+
+
+# ------------------------------------------------------------------
+# Rolling series
+# ------------------------------------------------------------------
+
+def percentile_series(series: np.ndarray, lookback: int) -> np.ndarray:
+    """Percentile of every week within its own window (NaN where undefined)."""
+    if not len(series):
+        return np.empty(0)
+    windows = _windows(series, lookback)
+    n = (~np.isnan(windows)).sum(axis=1)
+    count = (windows <= series[:, None]).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = clamp_percentile(((count - 0.5) / n) * 100)
+    out[np.isnan(series) | (n < 2)] = np.nan
+    return out
+
+
+def z_score_series(series: np.ndarray, lookback: int) -> np.ndarray:
+    """Z-score of every week within its own window (NaN where undefined)."""
+    if not len(series):
+        return np.empty(0)
+    windows = _windows(series, lookback)
+    present = ~np.isnan(windows)
+    n = present.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = _left_sum(np.where(present, windows, 0.0)) / n
+        sq = np.where(present, (windows - mean[:, None]) ** 2, 0.0)
+        std = np.sqrt(_left_sum(sq) / n)
+        out = np.where(std == 0, 0.0, js_round(((series - mean) / std) * 100) / 100)
+    out[np.isnan(series) | (n < 2)] = np.nan
+    return out
+
+
+def percentile_threshold(
+    series: np.ndarray, start: int, lookback: int, pct: float,
+) -> float | None:
+    """Value at the *pct* percentile of ``series[start : start + lookback]``."""
+    window = np.sort(_valid(series[start:start + lookback]))
+    if len(window) < 2:
+        return None
+    idx = min(int(np.floor((pct / 100) * len(window))), len(window) - 1)
+    return float(window[idx])
+
+
+# ------------------------------------------------------------------
+# Event / point lists (``dates`` aligned with the series, newest first)
+# ------------------------------------------------------------------
+
+def velocity(dates: list[str], net: np.ndarray) -> list[dict]:
+    """Second difference of the net position, flagged when it opposes the position."""
+    if len(net) < 3:
+        return []
+    n0, n1, n2 = net[:-2], net[1:-1], net[2:]
+    vel = (n0 - n1) - (n1 - n2)
+    warning = ((n0 > 0) & (vel < 0)) | ((n0 < 0) & (vel > 0))
+    rounded = js_round(vel)
+    ok = ~(np.isnan(n0) | np.isnan(n1) | np.isnan(n2))
+    return [
+        {
+            "date": dates[i],
+            "velocity": float(rounded[i]),
+            "net_position": float(n0[i]),
+            "warning": bool(warning[i]),
+        }
+        for i in np.flatnonzero(ok)
+    ]
+
+
+def flips(dates: list[str], net: np.ndarray, prices: dict[str, float]) -> list[dict]:
+    """Weeks where the net position crossed zero (LONG: ≤0 → >0, SHORT: ≥0 → <0)."""
+    if len(net) < 2:
+        return []
+    curr, prev = net[:-1], net[1:]
+    to_long = (prev <= 0) & (curr > 0)
+    to_short = (prev >= 0) & (curr < 0) & ~to_long
+    magnitude = np.abs(curr - prev)
+    return [
+        {
+            "date": dates[i],
+            "type": "LONG" if to_long[i] else "SHORT",
+            "magnitude": float(magnitude[i]),
+            "price": prices.get(dates[i]),
+            "net_before": float(prev[i]),
+            "net_after": float(curr[i]),
+        }
+        for i in np.flatnonzero(to_long | to_short)
+    ]
+
+
+def oi_signals(dates: list[str], oi: np.ndarray, prices: dict[str, float]) -> list[dict]:
+    """Price change × OI change quadrant of every week that has both prices."""
+    if len(oi) < 2:
+        return []
+    close = np.array([prices.get(d, np.nan) for d in dates], dtype=np.float64)
+    price_change = close[:-1] - close[1:]
+    oi_change = oi[:-1] - oi[1:]
+    signal = np.select(
+        [
+            (price_change > 0) & (oi_change > 0),
+            (price_change < 0) & (oi_change < 0),
+            (price_change > 0) & (oi_change < 0),
+        ],
+        ["strong_demand", "long_liquidation", "short_covering"],
+        default="new_supply",
+    )
+    ok = ~(np.isnan(price_change) | np.isnan(oi_change))
+    return [
+        {
+            "date": dates[i],
+            "signal": str(signal[i]),
+            "price_change": float(price_change[i]),
+            "oi_change": float(oi_change[i]),
+        }
+        for i in np.flatnonzero(ok)
+    ]
+
+
+def sentiment_divergence(
+    dates: list[str], spec_net: np.ndarray, comm_net: np.ndarray, lookback: int,
+) -> list[dict]:
+    """Spec vs comm net percentiles, flagged when they sit on opposite extremes."""
+    spec_pct = percentile_series(spec_net, lookback)
+    comm_pct = percentile_series(comm_net, lookback)
+    divergent = (
+        ((spec_pct >= DIVERGENCE_HIGH) & (comm_pct <= DIVERGENCE_LOW))
+        | ((spec_pct <= DIVERGENCE_LOW) & (comm_pct >= DIVERGENCE_HIGH))
+    )
+    ok = ~(np.isnan(spec_pct) | np.isnan(comm_pct))
+    return [
+        {
+            "date": dates[i],
+            "spec_percentile": float(spec_pct[i]),
+            "comm_percentile": float(comm_pct[i]),
+            "divergent": bool(divergent[i]),
+        }
+        for i in np.flatnonzero(ok)
+    ]
+
+
+def market_power(
+    dates: list[str], longs: np.ndarray, shorts: np.ndarray, oi: np.ndarray,
+) -> list[dict]:
+    """Spec longs / shorts as % of open interest (weeks with OI > 0)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        long_power = js_round((longs / oi) * 1000) / 10
+        short_power = js_round((shorts / oi) * 1000) / 10
+    ok = ~(np.isnan(longs) | np.isnan(shorts)) & (oi > 0)
+    return [
+        {
+            "date": dates[i],
+            "long_power": float(long_power[i]),
+            "short_power": float(short_power[i]),
+        }
+        for i in np.flatnonzero(ok)
+    ]
+
+
+def long_short_bias(dates: list[str], longs: np.ndarray, shorts: np.ndarray) -> list[dict]:
+    """Longs as % of longs + shorts (weeks with a positive total)."""
+    total = longs + shorts
+    with np.errstate(divide="ignore", invalid="ignore"):
+        long_pct = js_round((longs / total) * 1000) / 10
+    short_pct = js_round((100 - long_pct) * 10) / 10
+    ok = total > 0  # False for NaN
+    return [
+        {
+            "date": dates[i],
+            "long_pct": float(long_pct[i]),
+            "short_pct": float(short_pct[i]),
+        }
+        for i in np.flatnonzero(ok)
+    ]
+
+
+# ------------------------------------------------------------------
+# Current-value summaries
+# ------------------------------------------------------------------
+
+def triple_lookback(series: np.ndarray) -> list[dict]:
+    """Current net position, percentile and Z-score over 1, 3 and 5 years."""
+    rows = []
+    for label, lookback in TRIPLE_LOOKBACKS:
+        if not len(series) or np.isnan(series[0]):
+            rows.append({
+                "label": label, "lookback_weeks": lookback,
+                "net_position": 0.0, "percentile": PERCENTILE_DEFAULT, "z_score": 0.0,
+            })
+            continue
+        value = float(series[0])
+        window = _valid(series[:lookback])
+        enough = len(window) >= 2
+        rows.append({
+            "label": label,
+            "lookback_weeks": lookback,
+            "net_position": value,
+            "percentile": percentile(value, window) if enough else PERCENTILE_DEFAULT,
+            "z_score": z_score(value, window) if enough else 0.0,
+        })
+    return rows
+
+
+def spread_percentile(spec_net: np.ndarray, comm_net: np.ndarray, lookback: int) -> float | None:
+    """Percentile of the current |spec net − comm net| spread."""
+    spreads = np.abs(spec_net - comm_net)
+    if not len(spreads) or np.isnan(spreads[0]):
+        return None
+    window = _valid(spreads[:lookback])
+    if len(window) < 2:
+        return None
+    return percentile(float(spreads[0]), window)
+
+
+def histogram(series: np.ndarray, lookback: int, bin_count: int = HISTOGRAM_BINS) -> list[dict]:
+    """Equal-width distribution of the window, marking the bin of the current value."""
+    values = _valid(series[:lookback])
+    if len(values) < 2:
+        return []
+    mn, mx = float(values.min()), float(values.max())
+    if mn == mx:
+        return [{"min": mn, "max": mx, "count": len(values), "is_current": True}]
+
+    step = (mx - mn) / bin_count
+    idx = np.minimum(np.floor((values - mn) / step).astype(np.int64), bin_count - 1)
+    counts = np.bincount(idx, minlength=bin_count)
+    current = None
+    if not np.isnan(series[0]):
+        current = min(int(np.floor((series[0] - mn) / step)), bin_count - 1)
+    return [
+        {
+            "min": mn + step * i,
+            "max": mn + step * (i + 1),
+            "count": int(counts[i]),
+            "is_current": i == current,
+        }
+        for i in range(bin_count)
+    ]
+
+
+# ------------------------------------------------------------------
+# Concentration ratios
+# ------------------------------------------------------------------
+
+def concentration(
+    shown: list[str], series: dict[str, np.ndarray], display: int, lookback: int,
+) -> dict | None:
+    """Concentration ratios of the shown weeks and their percentile rank in the lookback.
+
+    *series* maps ratio name → newest-first array; None when the market
+    has no concentration data at all.
+    """
+    if all(np.isnan(values).all() for values in series.values()):
+        return None
+    out: dict = {"dates": shown[::-1]}
+    for key, values in series.items():
+        ranks = percentile_series(values, lookback)
+        out[key] = {
+            "values": _nullable(values[:display][::-1]),
+            "percentile": _nullable(ranks[:display][::-1]),
+            "current": None if not len(values) or np.isnan(values[0]) else float(values[0]),
+            "current_percentile": None if not len(ranks) or np.isnan(ranks[0]) else float(ranks[0]),
+        }
+    return out
+
+
+def _nullable(values: np.ndarray) -> list[float | None]:
+    return [None if np.isnan(v) else v for v in values.tolist()]
+
+
+def dashboard_analytics(
+    dates: list[str],
+    columns: dict[str, list],
+    prices: list[dict],
+    spec_group: str,
+    comm_group: str | None,
+    display_range: str = DEFAULT_DISPLAY_RANGE,
+) -> dict:
+    """Everything the dashboard page derives from the raw weekly series.
+
+    *dates* / *columns* are the dashboard series (oldest → newest, None
+    for weeks where a group is missing).  The display range sets both the
+    number of weeks shown and the lookback.  Point series (velocity,
+    sentiment divergence, market power, long/short bias, net analysis,
+    concentration) are returned oldest → newest for charting; flips and
+    OI signals newest first.
+    """
+    def col(key: str | None) -> np.ndarray:
+        if key is None or key not in columns:
+            return np.full(len(dates), np.nan)
+        return np.array(columns[key], dtype=np.float64)[::-1]
+
+    all_dates = list(reversed(dates))
+    oi = col("open_interest")
+    spec_net = col(f"{spec_group}_net")
+    spec_long = col(f"{spec_group}_long")
+    spec_short = col(f"{spec_group}_short")
+    comm_net = col(f"{comm_group}_net") if comm_group else None
+    ratios = {key: col(c) for key, c in CONCENTRATION_COLUMNS.items()}
+
+    display = min(DISPLAY_RANGES.get(display_range, len(all_dates)), len(all_dates))
+    lookback = max(display, 1)
+    shown = all_dates[:display]
+    price_by_date = {p["date"]: p["close"] for p in prices}
+
+    metrics = series_metrics(spec_net, lookback)
+    divergence = (
+        sentiment_divergence(all_dates, spec_net, comm_net, lookback)[:display]
+        if comm_net is not None else []
+    )
+
+    # Net analysis: each shown week against its trailing window
+    net_analysis: dict = {"dates": shown[::-1]}
+    for side, values in (("long", spec_long), ("short", spec_short)):
+        p_lo, p_hi = (percentile_threshold(values, 0, lookback, p) for p in THRESHOLD_PERCENTILES)
+        net_analysis[side] = {
+            "position": _nullable(values[:display][::-1]),
+            "z_score": _nullable(z_score_series(values, lookback)[:display][::-1]),
+            "percentile": _nullable(percentile_series(values, lookback)[:display][::-1]),
+            "p5": p_lo,
+            "p95": p_hi,
+        }
+
+    return {
+        "range": display_range,
+        "lookback_weeks": display,
+        "current": {
+            "percentile": metrics["percentile"] if metrics else PERCENTILE_DEFAULT,
+            "z_score": metrics["z_score"] if metrics else 0.0,
+            "cot_index": metrics["cot_index"] if metrics else COT_INDEX_DEFAULT,
+            "weekly_change": metrics["weekly_change"] if metrics else 0.0,
+        },
+        "flips": flips(shown, spec_net[:display], price_by_date),
+        "oi_signals": oi_signals(shown, oi[:display], price_by_date),
+        "velocity": velocity(shown, spec_net[:display])[::-1],
+        "sentiment_divergence": divergence[::-1],
+        "market_power": market_power(
+            shown, spec_long[:display], spec_short[:display], oi[:display],
+        )[::-1],
+        "long_short_bias": long_short_bias(shown, spec_long[:display], spec_short[:display])[::-1],
+        "triple_lookback": triple_lookback(spec_net),
+        "spread_percentile": (
+            spread_percentile(spec_net, comm_net, lookback) if comm_net is not None else None
+        ),
+        "histogram": histogram(spec_net[:display], lookback),
+        "net_analysis": net_analysis,
+        "concentration": concentration(shown, ratios, display, lookback),
+    }
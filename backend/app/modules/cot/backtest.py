@@ -0,0 +1,287 @@
+"""
+COT module — Crowded-signal backtest.
+=======================================
+Measures how the Crowded Level BUY/SELL signals (1Y COT Index against
+``crowded_buy_threshold`` / ``crowded_sell_threshold``, as in
+``CotCalculator._determine_signal``) performed against price.
+
+``SignalPanel.build`` flattens every (market, group, week) of a report
+variant that has a 1Y COT Index into parallel arrays, together with the
+previous week's index and the forward price return over each horizon.
+Returns are aligned with ``searchsorted`` on the daily bar dates: entry
+is the last close on or before the report date, exit the last close on
+or before the report date + N weeks (missing when the bars end first).
+
+``SignalPanel.run`` applies one buy/sell threshold pair to the whole
+panel with array operations only, so the panel is built once per data
+version and threshold sweeps only pay for the aggregation.
+"""
+
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.modules.cot.calculator import CotCalculator
+from app.modules.cot.projection import FieldProjection
+
+logger = logging.getLogger(__name__)
+
+# Horizon label → weeks held after the report date
+HORIZONS: dict[str, int] = {"1w": 1, "4w": 4, "13w": 13}
+EVENT_MODES: tuple[str, ...] = ("onset", "weekly")
+DISTRIBUTION_PERCENTILES: tuple[int, ...] = (10, 25, 50, 75, 90)
+
+# BUY when the index is high for commercials, low for speculators / small traders
+_ROLE_SIGN: dict[str, int] = {"commercial": 1, "speculative": -1, "small": -1}
+
+# The only series the panel needs
+SIGNAL_PROJECTION = FieldProjection.parse("cot_index_1y")
+
+
+def forward_returns(
+    week_dates: np.ndarray, bar_dates: np.ndarray, close: np.ndarray, weeks: int,
+) -> np.ndarray:
+    """% return from each report date to *weeks* later (NaN when not covered).
+
+    *week_dates* / *bar_dates* are ``datetime64[D]``, *bar_dates* ascending.
+    """
+    out = np.full(len(week_dates), np.nan)
+    if not len(bar_dates) or not len(week_dates):
+        return out
+    exit_dates = week_dates + np.timedelta64(7 * weeks, "D")
+    entry = np.searchsorted(bar_dates, week_dates, side="right") - 1
+    exit_ = np.searchsorted(bar_dates, exit_dates, side="right") - 1
+    ok = (entry >= 0) & (exit_ > entry) & (exit_dates <= bar_dates[-1])
+    out[ok] = (close[exit_[ok]] / close[entry[ok]] - 1.0) * 100.0
+    return out
+
+
+def signals(index: np.ndarray, sign: np.ndarray, buy: float, sell: float) -> np.ndarray:
+    """+1 BUY / -1 SELL / 0 per row — ``_determine_signal`` over arrays.
+
+    *sign* is +1 for commercial rows, -1 for speculative / small, 0 otherwise.
+    """
+    with np.errstate(invalid="ignore"):
+        high = index >= buy
+        low = index <= sell
+    return np.where(high, sign, np.where(low, -sign, 0)).astype(np.int8)
+
+
+def _stats(values: np.ndarray) -> dict:
+    """Hit rate / mean / median / distribution of signed returns."""
+    n = len(values)
+    if not n:
+        return {
+            "count": 0, "hit_rate": None, "avg_return": None,
+            "median_return": None, "distribution": None,
+        }
+    pct = np.percentile(values, DISTRIBUTION_PERCENTILES)
+    return {
+        "count": n,
+        "hit_rate": round(float(np.count_nonzero(values > 0)) / n * 100, 1),
+        "avg_return": round(float(values.mean()), 2),
+        "median_return": round(float(pct[DISTRIBUTION_PERCENTILES.index(50)]), 2),
+        "distribution": {f"p{p}": round(float(v), 2) for p, v in zip(DISTRIBUTION_PERCENTILES, pct)},
+    }
+
+
+@dataclass(frozen=True)
+class SignalPanel:
+    """Every (market, group, week) with a 1Y COT Index, as parallel arrays."""
+
+    report_type: str
+    codes: list[str]
+    names: list[str]
+    groups: list[dict]
+    market: np.ndarray       # int32 → codes / names
+    group: np.ndarray        # int8 → groups
+    dates: np.ndarray        # datetime64[D]
+    index: np.ndarray        # 1Y COT Index
+    prev_index: np.ndarray   # previous week's index of the same market / group (NaN at start)
+    returns: dict[str, np.ndarray]  # horizon → forward % return (NaN when not covered)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @classmethod
+    def build(
+        cls,
+        report_type: str,
+        groups: list[dict],
+        market_rows: dict[str, list[dict]],
+        prices: dict[str, list[dict]],
+        calc: CotCalculator | None = None,
+    ) -> "SignalPanel":
+        """Panel from newest-first ``cot_data`` rows and daily bars per market.
+
+        Markets without bars are left out (they have nothing to measure).
+        """
+        calc = calc or CotCalculator()
+        codes: list[str] = []
+        names: list[str] = []
+        parts: dict[str, list[np.ndarray]] = {
+            k: [] for k in ("market", "group", "dates", "index", "prev_index", *HORIZONS)
+        }
+
+        for code in sorted(market_rows):
+            rows = market_rows[code]
+            bars = [b for b in prices.get(code) or () if b.get("close")]
+            if not rows or not bars:
+                continue
+            bar_dates = np.array([b["date"] for b in bars], dtype="datetime64[D]")
+            close = np.array([b["close"] for b in bars], dtype=np.float64)
+            order = np.argsort(bar_dates, kind="stable")
+            bar_dates, close = bar_dates[order], close[order]
+
+            computed = calc.compute_columns(rows, report_type, SIGNAL_PROJECTION)
+            dates = np.array(computed["dates"][::-1], dtype="datetime64[D]")  # oldest first
+            fwd = {h: forward_returns(dates, bar_dates, close, w) for h, w in HORIZONS.items()}
+
+            m = len(codes)
+            codes.append(code)
+            names.append(rows[0].get("market_and_exchange") or code)
+            for gi, g in enumerate(groups):
+                index = np.array(
+                    computed["columns"][f"cot_index_{g['key']}_1y"][::-1], dtype=np.float64,
+                )
+                prev = np.concatenate(([np.nan], index[:-1]))
+                keep = ~np.isnan(index)
+                n = int(np.count_nonzero(keep))
+                if not n:
+                    continue
+                parts["market"].append(np.full(n, m, dtype=np.int32))
+                parts["group"].append(np.full(n, gi, dtype=np.int8))
+                parts["dates"].append(dates[keep])
+                parts["index"].append(index[keep])
+                parts["prev_index"].append(prev[keep])
+                for h in HORIZONS:
+                    parts[h].append(fwd[h][keep])
+
+        def cat(key: str, dtype) -> np.ndarray:
+            return np.concatenate(parts[key]) if parts[key] else np.empty(0, dtype=dtype)
+
+        panel = cls(
+            report_type=report_type,
+            codes=codes,
+            names=names,
+            groups=groups,
+            market=cat("market", np.int32),
+            group=cat("group", np.int8),
+            dates=cat("dates", "datetime64[D]"),
+            index=cat("index", np.float64),
+            prev_index=cat("prev_index", np.float64),
+            returns={h: cat(h, np.float64) for h in HORIZONS},
+        )
+        logger.info(
+            "Signal panel %s: %d markets, %d market-group-weeks", report_type, len(codes), len(panel),
+        )
+        return panel
+
+    def run(
+        self,
+        buy: float,
+        sell: float,
+        mode: str = "onset",
+        code: str | None = None,
+        group: str | None = None,
+    ) -> dict:
+        """Backtest one threshold pair.
+
+        *mode* ``onset`` counts the week a signal starts (previous week had
+        no or the opposite signal); ``weekly`` counts every signal week.
+        Returns are signed in the signal's direction (a SELL followed by a
+        falling price is a hit).
+
+        Raises:
+            ValueError: On unknown mode, market or group.
+        """
+        if mode not in EVENT_MODES:
+            raise ValueError(f"'mode' must be one of {', '.join(EVENT_MODES)}")
+        group_keys = [g["key"] for g in self.groups]
+
+        role_sign = np.array([_ROLE_SIGN.get(g["role"], 0) for g in self.groups], dtype=np.int8)
+        sign = role_sign[self.group] if len(self) else np.empty(0, dtype=np.int8)
+        signal = signals(self.index, sign, buy, sell)
+        events = signal != 0
+        if mode == "onset":
+            events &= signal != signals(self.prev_index, sign, buy, sell)
+        if code is not None:
+            if code not in self.codes:
+                raise ValueError(f"No price-backed data for market '{code}'")
+            events &= self.market == self.codes.index(code)
+        if group is not None:
+            if group not in group_keys:
+                raise ValueError(f"Unknown group '{group}' for {self.report_type}")
+            events &= self.group == group_keys.index(group)
+
+        ids = np.flatnonzero(events)
+        ev_market, ev_group, ev_signal = self.market[ids], self.group[ids], signal[ids]
+        signed = {h: self.returns[h][ids] * ev_signal for h in HORIZONS}
+
+        group_out: list[dict] = []
+        for gi, g in enumerate(self.groups):
+            if group is not None and g["key"] != group:
+                continue
+            in_group = ev_group == gi
+            is_buy = in_group & (ev_signal > 0)
+            is_sell = in_group & (ev_signal < 0)
+            horizons: dict[str, dict] = {}
+            for h, r in signed.items():
+                valid = ~np.isnan(r)
+                horizons[h] = {
+                    "all": _stats(r[in_group & valid]),
+                    "buy": _stats(r[is_buy & valid]),
+                    "sell": _stats(r[is_sell & valid]),
+                }
+            group_out.append({
+                "key": g["key"],
+                "name": g["name"],
+                "role": g["role"],
+                "buy_signals": int(np.count_nonzero(is_buy)),
+                "sell_signals": int(np.count_nonzero(is_sell)),
+                "horizons": horizons,
+            })
+
+        # Per market × group: one bincount per measure over a combined key
+        n_groups = len(self.groups)
+        key = ev_market.astype(np.int64) * n_groups + ev_group
+        size = len(self.codes) * n_groups
+        events_per_key = np.bincount(key, minlength=size)
+        per_horizon: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for h, r in signed.items():
+            valid = ~np.isnan(r)
+            per_horizon[h] = (
+                np.bincount(key[valid], minlength=size),
+                np.bincount(key[valid], weights=(r[valid] > 0).astype(np.float64), minlength=size),
+                np.bincount(key[valid], weights=r[valid], minlength=size),
+            )
+
+        market_out: list[dict] = []
+        for k in np.flatnonzero(events_per_key).tolist():
+            m, gi = divmod(k, n_groups)
+            horizons = {}
+            for h, (count, hits, total) in per_horizon.items():
+                c = int(count[k])
+                horizons[h] = {
+                    "count": c,
+                    "hit_rate": round(float(hits[k]) / c * 100, 1) if c else None,
+                    "avg_return": round(float(total[k]) / c, 2) if c else None,
+                }
+            market_out.append({
+                "code": self.codes[m],
+                "name": self.names[m],
+                "group": group_keys[gi],
+                "signals": int(events_per_key[k]),
+                "horizons": horizons,
+            })
+
+        return {
+            "thresholds": {"buy": buy, "sell": sell},
+            "mode": mode,
+            "horizons": dict(HORIZONS),
+            "markets_tested": len(self.codes) if code is None else 1,
+            "events": len(ids),
+            "groups": group_out,
+            "markets": market_out,
+        }
@@ -0,0 +1,156 @@
+"""
+COT module — Binary payload format.
+=====================================
+Compact encoding of columnar payloads (market detail / dashboard with
+``format=columnar``, price bar lists) that a browser can map straight
+onto typed arrays without parsing:
+
+  offset 0   magic ``b"COTB"``, u16 version, u16 reserved, u32 header length
+  offset 12  header: UTF-8 JSON, space-padded so the data starts 8-aligned
+  data       little-endian typed arrays, each starting 8-aligned
+
+The header holds every non-array part of the payload under ``meta``
+(market, groups, stats…) and one descriptor per array::
+
+    {"name": "g1_net", "table": "columns", "dtype": "i4",
+     "offset": 4096, "length": 260, "missing": -2147483648}
+
+``offset`` is relative to the start of the data section.  Dtypes are
+``f4`` / ``f8`` (NaN for missing), ``i4`` (``missing`` sentinel) and,
+for the two special encodings, ``i4`` with ``"encoding"``:
+
+  - ``"days"``: dates as days since 1970-01-01 (the ``dates`` / ``date`` arrays)
+  - ``"categories"``: index into the descriptor's ``categories``, -1 for
+    missing (string series such as ``crowded_g1_signal``)
+
+Integral series are stored as ``i4`` when they fit; other numbers are
+``f4`` for weekly series and ``f8`` for price bars.
+"""
+
+import json
+import struct
+from datetime import date
+
+import numpy as np
+
+MAGIC = b"COTB"
+VERSION = 1
+MEDIA_TYPE = "application/octet-stream"
+
+INT32_MISSING = -(2 ** 31)
+
+_PREAMBLE = struct.Struct("<4sHHI")  # magic, version, reserved, header length
+_ALIGN = 8
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_DATE_NAMES = frozenset({"dates", "date"})
+_INT32_MAX = 2 ** 31 - 1
+
+
+def _encode_array(name: str, values: list, float_dtype: str) -> tuple[dict, np.ndarray]:
+    """Descriptor fields and little-endian array for one series."""
+    present = [v for v in values if v is not None]
+    if name in _DATE_NAMES:
+        days = [
+            date.fromisoformat(v[:10]).toordinal() - _EPOCH_ORDINAL if v else INT32_MISSING
+            for v in values
+        ]
+        return {"dtype": "i4", "encoding": "days", "missing": INT32_MISSING}, np.array(days, dtype="<i4")
+
+    if any(isinstance(v, str) for v in present):
+        categories = sorted(set(present))
+        index = {c: i for i, c in enumerate(categories)}
+        codes = [index[v] if v is not None else -1 for v in values]
+        return (
+            {"dtype": "i4", "encoding": "categories", "categories": categories, "missing": -1},
+            np.array(codes, dtype="<i4"),
+        )
+
+    arr = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    finite = arr[~np.isnan(arr)]
+    if (
+        finite.size == len(present)
+        and np.all(finite == np.round(finite))
+        and (finite.size == 0 or np.abs(finite).max() <= _INT32_MAX)
+    ):
+        ints = np.where(np.isnan(arr), INT32_MISSING, arr).astype("<i4")
+        return {"dtype": "i4", "missing": INT32_MISSING}, ints
+    return {"dtype": float_dtype}, arr.astype("<" + float_dtype)
+
+
+def encode(payload: dict) -> bytes:
+    """Encode a columnar payload.
+
+    ``payload["columns"]`` (series aligned with ``columns["dates"]``) and
+    ``payload["prices"]`` (list of bar dicts, or None) become arrays; every
+    other key is copied to the header's ``meta``.
+    """
+    tables: list[tuple[str, dict[str, list], str]] = []
+    columns = payload.get("columns")
+    if columns:
+        tables.append(("columns", columns, "f4"))
+    prices = payload.get("prices")
+    if prices:
+        keys = list(prices[0])
+        tables.append(("prices", {k: [bar.get(k) for bar in prices] for k in keys}, "f8"))
+
+    descriptors: list[dict] = []
+    arrays: list[np.ndarray] = []
+    offset = 0
+    for table, series, float_dtype in tables:
+        for name, values in series.items():
+            desc, arr = _encode_array(name, values, float_dtype)
+            descriptors.append({"name": name, "table": table, **desc, "offset": offset, "length": len(arr)})
+            arrays.append(arr)
+            offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+
+    header = {
+        "version": VERSION,
+        "meta": {k: v for k, v in payload.items() if k not in ("columns", "prices")},
+        "arrays": descriptors,
+    }
+    head = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    head += b" " * (-(_PREAMBLE.size + len(head)) % _ALIGN)
+
+    out = bytearray(_PREAMBLE.pack(MAGIC, VERSION, 0, len(head)))
+    out += head
+    for arr in arrays:
+        out += arr.tobytes()
+        out += b"\0" * (-arr.nbytes % _ALIGN)
+    return bytes(out)
+
+
+def decode(data: bytes) -> dict:
+    """Read an encoded payload back (the reference reader).
+
+    Returns the payload with ``columns`` / ``prices`` as dicts of numpy
+    arrays: dates as ``datetime64[D]``, categories as object arrays
+    (None for missing), integers as ``int32`` with the sentinel intact.
+
+    Raises:
+        ValueError: If *data* is not a supported COTB payload.
+    """
+    if len(data) < _PREAMBLE.size:
+        raise ValueError("Truncated COTB payload")
+    magic, version, _, head_len = _PREAMBLE.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a COTB payload")
+    if version != VERSION:
+        raise ValueError(f"Unsupported COTB version {version}")
+
+    header = json.loads(data[_PREAMBLE.size:_PREAMBLE.size + head_len])
+    base = _PREAMBLE.size + head_len
+    payload: dict = dict(header["meta"])
+    for desc in header["arrays"]:
+        arr = np.frombuffer(
+            data, dtype="<" + desc["dtype"], count=desc["length"], offset=base + desc["offset"],
+        )
+        encoding = desc.get("encoding")
+        if encoding == "days":
+            values = np.where(arr == INT32_MISSING, np.iinfo(np.int64).min, arr).astype("datetime64[D]")
+        elif encoding == "categories":
+            categories = np.array([*desc["categories"], None], dtype=object)
+            values = categories[np.where(arr < 0, len(desc["categories"]), arr)]
+        else:
+            values = arr
+        payload.setdefault(desc["table"], {})[desc["name"]] = values
+    return payload
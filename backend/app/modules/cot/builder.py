@@ -11,6 +11,7 @@ import logging
 from app.modules.cot.config import cot_settings
 from app.modules.cot.storage import CotStorage
 from app.modules.cot.calculator import CotCalculator
+from app.modules.cot.projection import FULL_PROJECTION, FieldProjection
 from app.utils.categories import categorize_market, build_market_meta, build_screener_row
 
 logger = logging.getLogger(__name__)
@@ -36,6 +37,8 @@ class CotPayloadBuilder:
         subtype: str,
         raw_rows: list[dict],
         prices: list[dict] | None = None,
+        projection: FieldProjection | None = None,
+        columnar: bool = False,
     ) -> dict | None:
         """
         Build a full market detail payload from pre-fetched raw rows.
@@ -48,6 +51,9 @@ class CotPayloadBuilder:
             subtype: e.g. "fo", "co".
             raw_rows: Pre-fetched weekly data rows (newest-first).
             prices: Optional price bars.
+            projection: Optional field/date projection (default: everything).
+            columnar: Emit ``columns`` (one array per series, plus ``dates``)
+                instead of the per-week ``weeks`` list.
 
         Returns:
             Complete payload dict or None if no computed weeks.
@@ -55,13 +61,18 @@ class CotPayloadBuilder:
         if not raw_rows:
             return None
 
-        groups = cot_settings.report_groups[report_type]
-        computed = self.calc.compute(raw_rows, report_type)
-        weeks = computed["weeks"]
-        stats = computed["stats"]
-
-        if not weeks:
-            return None
+        projection = projection or FULL_PROJECTION
+        groups = projection.select_groups(cot_settings.report_groups[report_type])
+        if columnar:
+            computed = self.calc.compute_columns(raw_rows, report_type, projection)
+            if not computed["dates"]:
+                return None
+            series = {"columns": {"dates": computed["dates"], **computed["columns"]}}
+        else:
+            computed = self.calc.compute(raw_rows, report_type, projection)
+            if not computed["weeks"]:
+                return None
+            series = {"weeks": computed["weeks"]}
 
         categories = cot_settings.market_categories
         market_meta = build_market_meta(
@@ -74,15 +85,30 @@ class CotPayloadBuilder:
         payload: dict = {
             "market": market_meta,
             "groups": groups,
-            "weeks": weeks,
-            "stats": stats,
+            **series,
+            "stats": computed["stats"],
         }
 
         if prices:
+            if projection.has_range:
+                prices = [p for p in prices if projection.in_range(p["date"])]
             payload["prices"] = prices
 
         return payload
 
+    def columnar_to_rows(self, payload: dict) -> dict:
+        """The ``weeks`` layout of a columnar market detail payload.
+
+        Lets the exporter compute a market once and write both layouts.
+        """
+        columns = dict(payload["columns"])
+        dates = columns.pop("dates")
+        weeks = self.calc.columns_to_weeks(dates, columns)
+        return {
+            ("weeks" if k == "columns" else k): (weeks if k == "columns" else v)
+            for k, v in payload.items()
+        }
+
     # ------------------------------------------------------------------
     # Screener row
     # ------------------------------------------------------------------
@@ -94,27 +120,59 @@ class CotPayloadBuilder:
         exchange_code: str,
         report_type: str,
         raw_rows: list[dict],
+        projection: FieldProjection | None = None,
     ) -> dict | None:
         """
         Build a single screener row from pre-fetched raw rows.
 
+        With a projection, ``date_to`` is expected to be pushed into the
+        query already; markets whose latest week is older than
+        ``date_from`` are treated as stale and skipped.
+
         Returns:
             Screener row dict or None if no computed weeks.
         """
         if not raw_rows:
             return None
 
-        groups = cot_settings.report_groups[report_type]
-        computed = self.calc.compute(raw_rows, report_type)
-        weeks = computed["weeks"]
+        projection = projection or FULL_PROJECTION
+        if projection.date_from and raw_rows[0].get("report_date", "") < projection.date_from:
+            return None
+
+        computed = self.calc.compute(raw_rows, report_type, projection.without_range())
+        return self.screener_entry_from_weeks(
+            code, name, exchange_code, report_type, computed["weeks"], projection,
+        )
 
+    def screener_entry_from_weeks(
+        self,
+        code: str,
+        name: str,
+        exchange_code: str,
+        report_type: str,
+        weeks: list[dict],
+        projection: FieldProjection | None = None,
+    ) -> dict | None:
+        """
+        Build a screener row from already computed weeks (newest-first).
+
+        Lets the exporter reuse a market detail payload's ``weeks``
+        instead of computing the market a second time.
+        """
         if not weeks:
             return None
 
+        projection = projection or FULL_PROJECTION
+        groups = projection.select_groups(cot_settings.report_groups[report_type])
         latest = weeks[0]
         prev = weeks[1] if len(weeks) > 1 else {}
         categories = cot_settings.market_categories
-        return build_screener_row(
+        row = build_screener_row(
             code, name, exchange_code, report_type, latest, prev, groups,
             categories=categories,
         )
+
+        allowed = projection.screener_keys(groups)
+        if allowed is not None:
+            row = {k: v for k, v in row.items() if k in allowed}
+        return row
@@ -7,88 +7,198 @@ Computes derived analytics on the generic g1–g5 group columns:
   - WCI (26w)
   - Crowded Level with BUY/SELL signals
   - Summary statistics
+
+Series are computed column-wise (one list per series, aligned with the
+report dates) with numpy rolling windows; ``compute`` pivots them into
+per-week dicts, ``compute_columns`` returns them as-is.
+
+All of the above honour an optional ``FieldProjection``: series that were
+not requested are never computed.
 """
 
 import logging
 
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
 from app.modules.cot.config import cot_settings
+from app.modules.cot.projection import FULL_PROJECTION, NET_DERIVED, FieldProjection
 
 logger = logging.getLogger(__name__)
 
+SIGNAL_SUFFIX = "_signal"  # crowded_{g} → crowded_{g}_signal in columnar output
+
 
 class CotCalculator:
     """Computes all derived COT analytics for any report type."""
 
     INDEX_MIDPOINT_DEFAULT = 50.0  # Default COT Index / WCI when min == max
 
-    def compute(self, rows: list[dict], report_type: str) -> dict:
+    def compute(
+        self,
+        rows: list[dict],
+        report_type: str,
+        projection: FieldProjection | None = None,
+    ) -> dict:
         """
         Takes sorted rows (newest first) and computes everything.
 
+        If *projection* has a ``date_from``, rows older than it are treated
+        as lookback history: they feed the rolling windows but are dropped
+        from the returned weeks and stats.
+
         Returns:
             {"weeks": [...], "stats": {...}}
         """
-        groups = cot_settings.report_groups[report_type]
+        computed = self.compute_columns(rows, report_type, projection)
+        weeks = self.columns_to_weeks(computed["dates"], computed["columns"])
+        return {"weeks": weeks, "stats": computed["stats"]}
+
+    def compute_columns(
+        self,
+        rows: list[dict],
+        report_type: str,
+        projection: FieldProjection | None = None,
+    ) -> dict:
+        """
+        Columnar ("struct of arrays") variant of :meth:`compute`.
 
-        weeks = [self._build_week(row, groups) for row in rows]
-        self._compute_indices(weeks, groups)
-        stats = self._compute_stats(weeks, groups)
+        Every series is a flat list aligned with ``dates`` (newest first).
+        Crowded Level is split into ``crowded_{g}`` (level) and
+        ``crowded_{g}_signal`` (BUY/SELL/None).
 
-        return {"weeks": weeks, "stats": stats}
+        Returns:
+            {"dates": [...], "columns": {"open_interest": [...], ...}, "stats": {...}}
+        """
+        projection = projection or FULL_PROJECTION
+        groups = projection.select_groups(cot_settings.report_groups[report_type])
+        kinds = {g["key"]: projection.group_kinds(g["key"]) for g in groups}
+
+        dates = [r.get("report_date") for r in rows]
+        columns: dict[str, list] = {}
+        nets = self._build_series(rows, groups, kinds, projection, columns)
+        self._compute_indices(nets, groups, kinds, columns)
+
+        if projection.date_from:
+            keep = [i for i, d in enumerate(dates) if d and d >= projection.date_from]
+            if len(keep) < len(dates):
+                dates = [dates[i] for i in keep]
+                columns = {k: [col[i] for i in keep] for k, col in columns.items()}
+        stats = self._compute_stats(len(dates), columns, groups, kinds, projection)
+
+        return {"dates": dates, "columns": columns, "stats": stats}
+
+    @staticmethod
+    def columns_to_weeks(dates: list, columns: dict[str, list]) -> list[dict]:
+        """Pivot columnar output into the per-week dict layout."""
+        spec = [
+            (k, col, columns.get(f"{k}{SIGNAL_SUFFIX}"))
+            for k, col in columns.items()
+            if not (k.endswith(SIGNAL_SUFFIX) and k[: -len(SIGNAL_SUFFIX)] in columns)
+        ]
+        weeks: list[dict] = []
+        for i, d in enumerate(dates):
+            w: dict = {"date": d}
+            for k, col, signals in spec:
+                w[k] = col[i] if signals is None else {"value": col[i], "signal": signals[i]}
+            weeks.append(w)
+        return weeks
 
     # ------------------------------------------------------------------
     # Per-row: net, change, % net/OI
     # ------------------------------------------------------------------
 
-    def _build_week(self, row: dict, groups: list[dict]) -> dict:
-        oi = row.get("open_interest") or 0
-
-        w: dict = {
-            "date": row.get("report_date"),
-            "open_interest": row.get("open_interest"),
-            "oi_change": row.get("oi_change"),
-            "oi_pct": (
-                round((row["oi_change"] / oi) * 100, 1)
-                if oi and row.get("oi_change") is not None and oi != 0
-                else None
-            ),
-        }
-
+    def _build_series(
+        self,
+        rows: list[dict],
+        groups: list[dict],
+        kinds: dict[str, frozenset[str]],
+        projection: FieldProjection,
+        columns: dict[str, list],
+    ) -> dict[str, list]:
+        """Fill the row-level series into *columns*.
+
+        Returns the rounded net series of every group that feeds a
+        series-based indicator (whether or not net itself was requested).
+        """
+        oi = [r.get("open_interest") for r in rows]
+        oi_change = [r.get("oi_change") for r in rows]
+
+        if projection.wants_week("open_interest"):
+            columns["open_interest"] = oi
+        if projection.wants_week("oi_change"):
+            columns["oi_change"] = oi_change
+        if projection.wants_week("oi_pct"):
+            columns["oi_pct"] = [
+                round((c / o) * 100, 1) if (o and c is not None) else None
+                for o, c in zip(oi, oi_change)
+            ]
+
+        nets: dict[str, list] = {}
         for g in groups:
             gk = g["key"]
-            g_long = row.get(f"{gk}_long")
-            g_short = row.get(f"{gk}_short")
-            g_long_change = row.get(f"{gk}_long_change")
-            g_short_change = row.get(f"{gk}_short_change")
-
-            net = (g_long - g_short) if (g_long is not None and g_short is not None) else None
-            net_change = (
-                (g_long_change - g_short_change)
-                if (g_long_change is not None and g_short_change is not None)
-                else None
-            )
-            pct_net_oi = round((net / oi) * 100, 1) if (net is not None and oi and oi != 0) else None
-
-            w[f"{gk}_long"] = round(g_long) if g_long is not None else None
-            w[f"{gk}_short"] = round(g_short) if g_short is not None else None
-            w[f"{gk}_net"] = round(net) if net is not None else None
-            w[f"{gk}_change"] = round(net_change) if net_change is not None else None
-            w[f"{gk}_change_long"] = round(g_long_change) if g_long_change is not None else None
-            w[f"{gk}_change_short"] = round(g_short_change) if g_short_change is not None else None
-            w[f"{gk}_pct_net_oi"] = pct_net_oi
-
-        return w
+            gk_kinds = kinds[gk]
+            # Net is also the input of every series-based indicator
+            want_net = not gk_kinds.isdisjoint(NET_DERIVED)
+
+            longs = shorts = raw_net = None
+            if want_net or "long" in gk_kinds or "short" in gk_kinds:
+                longs = [r.get(f"{gk}_long") for r in rows]
+                shorts = [r.get(f"{gk}_short") for r in rows]
+            if want_net:
+                raw_net = [
+                    (lo - sh) if (lo is not None and sh is not None) else None
+                    for lo, sh in zip(longs, shorts)
+                ]
+            long_changes = short_changes = None
+            if not gk_kinds.isdisjoint(("change", "change_long", "change_short")):
+                long_changes = [r.get(f"{gk}_long_change") for r in rows]
+                short_changes = [r.get(f"{gk}_short_change") for r in rows]
+
+            if "long" in gk_kinds:
+                columns[f"{gk}_long"] = [round(v) if v is not None else None for v in longs]
+            if "short" in gk_kinds:
+                columns[f"{gk}_short"] = [round(v) if v is not None else None for v in shorts]
+            if want_net:
+                nets[gk] = [round(v) if v is not None else None for v in raw_net]
+                if "net" in gk_kinds:
+                    columns[f"{gk}_net"] = nets[gk]
+            if "change" in gk_kinds:
+                columns[f"{gk}_change"] = [
+                    round(lc - sc) if (lc is not None and sc is not None) else None
+                    for lc, sc in zip(long_changes, short_changes)
+                ]
+            if "change_long" in gk_kinds:
+                columns[f"{gk}_change_long"] = [
+                    round(v) if v is not None else None for v in long_changes
+                ]
+            if "change_short" in gk_kinds:
+                columns[f"{gk}_change_short"] = [
+                    round(v) if v is not None else None for v in short_changes
+                ]
+            if "pct_net_oi" in gk_kinds:
+                columns[f"{gk}_pct_net_oi"] = [
+                    round((n / o) * 100, 1) if (n is not None and o) else None
+                    for n, o in zip(raw_net, oi)
+                ]
+
+        return nets
 
     # ------------------------------------------------------------------
     # Series-based: COT Index, WCI, Crowded Level
     # ------------------------------------------------------------------
 
-    def _compute_indices(self, weeks: list[dict], groups: list[dict]) -> None:
-        """Compute COT Index, WCI, and Crowded Level for each group in-place."""
-        n = len(weeks)
+    def _compute_indices(
+        self,
+        nets: dict[str, list],
+        groups: list[dict],
+        kinds: dict[str, frozenset[str]],
+        columns: dict[str, list],
+    ) -> None:
+        """Compute COT Index, WCI, and Crowded Level for each group into *columns*."""
         cfg = cot_settings
 
-        lookbacks = [
+        all_lookbacks = [
             ("3m", cfg.cot_index_3m),
             ("1y", cfg.cot_index_1y),
             ("3y", cfg.cot_index_3y),
@@ -96,42 +206,67 @@ class CotCalculator:
 
         for g in groups:
             gk = g["key"]
-            nets = [w.get(f"{gk}_net") for w in weeks]
-
-            for i in range(n):
-                if nets[i] is None:
-                    for suffix, _ in lookbacks:
-                        weeks[i][f"cot_index_{gk}_{suffix}"] = None
-                    weeks[i][f"wci_{gk}"] = None
-                    weeks[i][f"crowded_{gk}"] = {"value": None, "signal": None}
-                    continue
-
-                # COT Index for each lookback
-                for suffix, lookback in lookbacks:
-                    window = [v for v in nets[i : i + lookback] if v is not None]
-                    if len(window) >= 2:
-                        mn, mx = min(window), max(window)
-                        idx = ((nets[i] - mn) / (mx - mn)) * 100 if mx != mn else self.INDEX_MIDPOINT_DEFAULT
-                        weeks[i][f"cot_index_{gk}_{suffix}"] = round(idx, 1)
-                    else:
-                        weeks[i][f"cot_index_{gk}_{suffix}"] = None
-
-                # WCI
-                wci_window = [v for v in nets[i : i + cfg.wci_lookback] if v is not None]
-                if len(wci_window) >= 2:
-                    mn, mx = min(wci_window), max(wci_window)
-                    wci = ((nets[i] - mn) / (mx - mn)) * 100 if mx != mn else self.INDEX_MIDPOINT_DEFAULT
-                    weeks[i][f"wci_{gk}"] = round(wci, 1)
-                else:
-                    weeks[i][f"wci_{gk}"] = None
-
-                # Crowded Level — based on 1Y COT Index
-                cot_1y = weeks[i].get(f"cot_index_{gk}_1y")
-                if cot_1y is not None:
-                    signal = self._determine_signal(cot_1y, g["role"])
-                    weeks[i][f"crowded_{gk}"] = {"value": round(cot_1y, 1), "signal": signal}
-                else:
-                    weeks[i][f"crowded_{gk}"] = {"value": None, "signal": None}
+            gk_kinds = kinds[gk]
+            want_crowded = "crowded" in gk_kinds
+            want_wci = "wci" in gk_kinds
+            # Crowded Level is derived from the 1Y index, so compute it on demand
+            lookbacks = [
+                (suffix, lookback) for suffix, lookback in all_lookbacks
+                if f"cot_index_{suffix}" in gk_kinds or (suffix == "1y" and want_crowded)
+            ]
+            if not lookbacks and not want_wci:
+                continue
+
+            values = np.array(
+                [np.nan if v is None else v for v in nets[gk]], dtype=np.float64,
+            )
+
+            index_1y: list = []
+            for suffix, lookback in lookbacks:
+                index = self._rolling_index(values, lookback)
+                if suffix == "1y":
+                    index_1y = index
+                if f"cot_index_{suffix}" in gk_kinds:
+                    columns[f"cot_index_{gk}_{suffix}"] = index
+
+            if want_wci:
+                columns[f"wci_{gk}"] = self._rolling_index(values, cfg.wci_lookback)
+
+            # Crowded Level — based on 1Y COT Index
+            if want_crowded:
+                role = g["role"]
+                columns[f"crowded_{gk}"] = list(index_1y)
+                columns[f"crowded_{gk}{SIGNAL_SUFFIX}"] = [
+                    self._determine_signal(v, role) if v is not None else None
+                    for v in index_1y
+                ]
+
+    def _rolling_index(self, values: np.ndarray, lookback: int) -> list[float | None]:
+        """
+        Min-max position (0–100) of each value within its lookback window.
+
+        *values* is newest-first with NaN for missing weeks, so the window
+        of week ``i`` is ``values[i : i + lookback]``.  A week needs a value
+        of its own and at least two non-missing values in its window.
+        """
+        if not len(values):
+            return []
+        padded = np.concatenate((values, np.full(lookback - 1, np.nan)))
+        windows = sliding_window_view(padded, lookback)
+        count = (~np.isnan(windows)).sum(axis=1)
+        # fmin/fmax skip NaN unless the whole window is missing
+        mn = np.fmin.reduce(windows, axis=1)
+        mx = np.fmax.reduce(windows, axis=1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            index = np.where(
+                mx != mn, ((values - mn) / (mx - mn)) * 100, self.INDEX_MIDPOINT_DEFAULT,
+            )
+        valid = ~np.isnan(values) & (count >= 2)
+        return [
+            round(v, 1) if ok else None
+            for v, ok in zip(index.tolist(), valid.tolist())
+        ]
 
     @staticmethod
     def _determine_signal(cot_index: float, role: str) -> str | None:
@@ -155,36 +290,49 @@ class CotCalculator:
     # Stats: max, min, max_5y, min_5y, avg_13w
     # ------------------------------------------------------------------
 
-    def _compute_stats(self, weeks: list[dict], groups: list[dict]) -> dict:
-        if not weeks:
+    def _compute_stats(
+        self,
+        n_weeks: int,
+        columns: dict[str, list],
+        groups: list[dict],
+        kinds: dict[str, frozenset[str]],
+        projection: FieldProjection,
+    ) -> dict:
+        if not n_weeks:
             return {}
 
-        stat_keys = ["open_interest", "oi_change", "oi_pct"]
+        stat_keys = [k for k in ("open_interest", "oi_change", "oi_pct") if projection.wants_week(k)]
         pct_keys = {"oi_pct"}
 
         for g in groups:
             gk = g["key"]
-            stat_keys.extend([
-                f"{gk}_net", f"{gk}_change",
-                f"{gk}_change_long", f"{gk}_change_short",
-                f"{gk}_pct_net_oi",
-            ])
+            gk_kinds = kinds[gk]
+            stat_keys.extend(
+                f"{gk}_{kind}"
+                for kind in ("net", "change", "change_long", "change_short", "pct_net_oi")
+                if kind in gk_kinds
+            )
             pct_keys.add(f"{gk}_pct_net_oi")
 
+        if not stat_keys:
+            return {}
+
         cfg = cot_settings
         return {
-            "max": self._extreme(weeks, stat_keys, max, pct_keys),
-            "min": self._extreme(weeks, stat_keys, min, pct_keys),
-            "max_5y": self._extreme(weeks[: cfg.max_min_5y_weeks], stat_keys, max, pct_keys),
-            "min_5y": self._extreme(weeks[: cfg.max_min_5y_weeks], stat_keys, min, pct_keys),
-            "avg_13w": self._avg(weeks[: cfg.avg_13w_weeks], stat_keys, pct_keys),
+            "max": self._extreme(columns, stat_keys, max, pct_keys),
+            "min": self._extreme(columns, stat_keys, min, pct_keys),
+            "max_5y": self._extreme(columns, stat_keys, max, pct_keys, cfg.max_min_5y_weeks),
+            "min_5y": self._extreme(columns, stat_keys, min, pct_keys, cfg.max_min_5y_weeks),
+            "avg_13w": self._avg(columns, stat_keys, pct_keys, cfg.avg_13w_weeks),
         }
 
     @staticmethod
-    def _extreme(weeks: list, keys: list, fn, pct_keys: set | None = None) -> dict:
+    def _extreme(
+        columns: dict, keys: list, fn, pct_keys: set | None = None, limit: int | None = None,
+    ) -> dict:
         result: dict = {}
         for k in keys:
-            vals = [w.get(k) for w in weeks if w.get(k) is not None]
+            vals = [v for v in columns[k][:limit] if v is not None]
             if vals:
                 v = fn(vals)
                 result[k] = round(v, 1) if (pct_keys and k in pct_keys) else round(v)
@@ -193,10 +341,12 @@ class CotCalculator:
         return result
 
     @staticmethod
-    def _avg(weeks: list, keys: list, pct_keys: set | None = None) -> dict:
+    def _avg(
+        columns: dict, keys: list, pct_keys: set | None = None, limit: int | None = None,
+    ) -> dict:
         result: dict = {}
         for k in keys:
-            vals = [w.get(k) for w in weeks if w.get(k) is not None]
+            vals = [v for v in columns[k][:limit] if v is not None]
             if vals:
                 v = sum(vals) / len(vals)
                 result[k] = round(v, 1) if (pct_keys and k in pct_keys) else round(v)
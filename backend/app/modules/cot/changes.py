@@ -0,0 +1,42 @@
+"""
+COT module — Changed-markets set.
+===================================
+What a pipeline run or a daily price update actually changed, as a set
+of ``(code, variant)`` keys (variant = ``"{report_type}_{subtype}"``,
+as in the run metrics): a market whose rows were inserted or revised,
+or whose prices file was rewritten.  Wiping a variant (``force_reload``)
+or finishing an interrupted run marks every market of the variant.
+
+The set is a plain ``set`` of tuples, so it crosses the worker pipe as
+is; the completion callbacks use it to drop only the affected cache
+entries, the exporter to rewrite only those markets, and the alert
+engine to evaluate only those variants.
+"""
+
+from collections.abc import Iterable
+
+# {(cftc_contract_code, "legacy_fo"), ...}
+MarketChanges = set[tuple[str, str]]
+
+
+def variant_key(report_type: str, subtype: str) -> str:
+    return f"{report_type}_{subtype}"
+
+
+def split_variant(variant: str) -> tuple[str, str]:
+    """``"disagg_fo"`` → ``("disagg", "fo")``."""
+    report_type, subtype = variant.rsplit("_", 1)
+    return report_type, subtype
+
+
+def market_keys(codes: Iterable[str], report_type: str, subtype: str) -> MarketChanges:
+    variant = variant_key(report_type, subtype)
+    return {(code, variant) for code in codes}
+
+
+def codes_by_variant(changes: MarketChanges) -> dict[tuple[str, str], set[str]]:
+    """``{(report_type, subtype): {code, ...}}`` of *changes*."""
+    out: dict[tuple[str, str], set[str]] = {}
+    for code, variant in changes:
+        out.setdefault(split_variant(variant), set()).add(code)
+    return out
@@ -0,0 +1,112 @@
+"""
+COT module — Pipeline checkpoints.
+====================================
+Records how far each unit of a run got, so an interrupted run can be
+resumed (``run_pipeline.py --resume``) instead of redone.
+
+Units of a variant (rows of ``pipeline_checkpoints``):
+
+  - ``reset``     — ``force_reload`` wiped the variant (not repeated on resume)
+  - ``year:YYYY`` — a yearly archive: downloaded → parsed → stored
+  - ``current``   — the current-week file: stored
+  - ``compute``   — screener snapshots / sector series: stored
+  - ``export``    — the variant's JSON files: exported
+
+A downloaded archive is kept as an artifact file until its run finishes,
+so resuming re-parses it from disk instead of fetching it again.  A run
+that finishes without errors clears its variants' checkpoints and
+artifacts; a run that starts without ``resume`` discards leftovers (and
+notes the variants in ``interrupted``: what the earlier run stored was
+never exported, so they are refreshed in full).
+"""
+
+import logging
+import os
+from pathlib import Path
+
+from app.core.config import settings
+from app.modules.cot.storage import CotStorage
+
+logger = logging.getLogger(__name__)
+
+# Order of the states a unit goes through
+STATES: tuple[str, ...] = ("downloaded", "parsed", "stored", "exported")
+
+
+def year_unit(year: int) -> str:
+    return f"year:{year}"
+
+
+class Checkpoints:
+    """Checkpoint reads / writes for the variants of one run.
+
+    The state left by an interrupted run is loaded once, at construction
+    (with *resume*); marks written during the run go straight to SQLite.
+    """
+
+    def __init__(
+        self,
+        store: CotStorage,
+        variants: list[tuple[str, str]],
+        resume: bool = False,
+        artifact_dir: str | Path | None = None,
+    ) -> None:
+        self.store = store
+        self.artifact_dir = Path(artifact_dir or settings.base_dir / "data" / "checkpoints")
+        self._resumed: dict[tuple[str, str], dict[str, dict]] = {}
+        self.interrupted: set[tuple[str, str]] = set()  # leftovers discarded (no resume)
+        for rt, st in variants:
+            if resume:
+                self._resumed[(rt, st)] = store.get_checkpoints(rt, st)
+            else:
+                if store.get_checkpoints(rt, st):
+                    self.interrupted.add((rt, st))
+                self.clear(rt, st)
+
+    def reached(self, report_type: str, subtype: str, unit: str, state: str) -> bool:
+        """Whether the interrupted run took *unit* to *state* or beyond."""
+        entry = self._resumed.get((report_type, subtype), {}).get(unit)
+        return entry is not None and STATES.index(entry["state"]) >= STATES.index(state)
+
+    def resumed_units(self, report_type: str, subtype: str) -> dict[str, dict]:
+        """Checkpoints the interrupted run left for the variant."""
+        return self._resumed.get((report_type, subtype), {})
+
+    def mark(
+        self, report_type: str, subtype: str, unit: str, state: str, rows_count: int | None = None,
+    ) -> None:
+        self.store.set_checkpoint(report_type, subtype, unit, state, rows_count=rows_count)
+
+    # ------------------------------------------------------------------
+    # Download artifacts
+    # ------------------------------------------------------------------
+
+    def _artifact_path(self, report_type: str, subtype: str, unit: str) -> Path:
+        return self.artifact_dir / f"{report_type}_{subtype}_{unit.replace(':', '_')}.csv"
+
+    def save_download(self, report_type: str, subtype: str, unit: str, text: str) -> None:
+        """Keep a downloaded file and mark *unit* downloaded."""
+        path = self._artifact_path(report_type, subtype, unit)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+        self.store.set_checkpoint(report_type, subtype, unit, "downloaded", artifact=path.name)
+
+    def load_download(self, report_type: str, subtype: str, unit: str) -> str | None:
+        """The kept download of *unit*, or None if there is none."""
+        entry = self.resumed_units(report_type, subtype).get(unit)
+        if not entry or not entry["artifact"]:
+            return None
+        try:
+            return (self.artifact_dir / entry["artifact"]).read_text(encoding="utf-8")
+        except OSError as e:
+            logger.warning("Checkpoint artifact %s unreadable: %s", entry["artifact"], e)
+            return None
+
+    def clear(self, report_type: str, subtype: str) -> None:
+        """Forget the variant's checkpoints and delete its artifacts."""
+        self.store.clear_checkpoints(report_type, subtype)
+        for path in self.artifact_dir.glob(f"{report_type}_{subtype}_*.csv"):
+            path.unlink(missing_ok=True)
+        self._resumed.pop((report_type, subtype), None)
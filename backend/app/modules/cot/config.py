@@ -8,7 +8,7 @@ Report types, subtypes, URLs, display names, thresholds, categories.
 from dataclasses import dataclass, field
 from functools import cached_property
 
-from app.core.config import env_int
+from app.core.config import env_bool, env_int
 
 
 @dataclass(frozen=True)
@@ -36,6 +36,21 @@ class CotSettings:
     crowded_buy_threshold: int = field(default_factory=lambda: env_int("COT_CROWDED_BUY", 80))
     crowded_sell_threshold: int = field(default_factory=lambda: env_int("COT_CROWDED_SELL", 20))
 
+    # --- Pipeline ---
+    # Run the pipeline stages one item at a time on one thread (debugging / profiling)
+    pipeline_serial: bool = field(default_factory=lambda: env_bool("COT_PIPELINE_SERIAL", False))
+
+    # --- Export ---
+    # Worker processes for the JSON export (1 = in-process, no pool)
+    export_workers: int = field(default_factory=lambda: env_int("COT_EXPORT_WORKERS", 1))
+    # Write .gz / .br siblings of changed files for nginx gzip_static / brotli_static
+    export_precompress: bool = field(default_factory=lambda: env_bool("COT_EXPORT_PRECOMPRESS", True))
+    # Write .bin (typed-array) twins of market / prices files
+    export_binary: bool = field(default_factory=lambda: env_bool("COT_EXPORT_BINARY", True))
+
+    # --- API ---
+    batch_max_markets: int = field(default_factory=lambda: env_int("COT_BATCH_MAX_MARKETS", 50))
+
     # --- Display names ---
     @cached_property
     def report_display_names(self) -> dict[str, str]:
@@ -0,0 +1,261 @@
+"""
+COT module — Cross-market positioning correlation.
+=====================================================
+``PositioningMatrix`` holds one weekly series (net, % net/OI or a COT
+Index) of one trader group for every market of a report variant, as a
+(markets × weeks) array on the union of report dates with NaN where a
+market has no report.
+
+Correlations are pairwise-complete: each pair uses only the weeks where
+both markets have a value.  For the full matrix this is done with five
+matrix products over the value / mask arrays (counts, sums, sums of
+squares, cross products), so a 400 × 400 matrix is a handful of BLAS
+calls.  Pairs with fewer than ``min_periods`` common weeks are NaN.
+"""
+
+import logging
+import math
+from dataclasses import dataclass, replace
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.modules.cot.calculator import CotCalculator
+from app.modules.cot.projection import FieldProjection
+from app.utils.categories import categorize_market
+
+logger = logging.getLogger(__name__)
+
+# Series name → calculator column ({g} = group key)
+CORRELATION_SERIES: dict[str, str] = {
+    "net": "{g}_net",
+    "pct_net_oi": "{g}_pct_net_oi",
+    "cot_index_3m": "cot_index_{g}_3m",
+    "cot_index_1y": "cot_index_{g}_1y",
+    "cot_index_3y": "cot_index_{g}_3y",
+}
+DEFAULT_SERIES = "net"
+DEFAULT_WINDOW = 156     # weeks (3Y); 0 = full history
+DEFAULT_MIN_PERIODS = 26  # common weeks a pair needs
+
+
+def pairwise_correlation(values: np.ndarray, min_periods: int = DEFAULT_MIN_PERIODS) -> np.ndarray:
+    """Pearson correlation between the rows of *values* over common non-NaN columns.
+
+    Returns an (n × n) array, NaN where a pair has fewer than
+    *min_periods* common columns or no variance over them.
+    """
+    mask = ~np.isnan(values)
+    m = mask.astype(np.float64)
+    # Shift / scale each row first: correlation is invariant to both and
+    # the sums below stay well conditioned for large net positions.
+    count = np.maximum(m.sum(axis=1, keepdims=True), 1.0)
+    centered = np.where(mask, values - np.where(mask, values, 0.0).sum(axis=1, keepdims=True) / count, 0.0)
+    scale = np.sqrt((centered * centered).sum(axis=1, keepdims=True) / count)
+    scale[scale == 0] = 1.0
+    x = centered / scale
+
+    n = m @ m.T              # common weeks
+    sx = x @ m.T             # Σx_i over weeks where j is present
+    sxx = (x * x) @ m.T      # Σx_i² over the same weeks
+    sxy = x @ x.T            # Σx_i·x_j over common weeks
+    sy = sx.T
+    syy = sxx.T
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        corr = cov / np.sqrt(var_x * var_y)
+    tiny = 1e-12 * n
+    corr[(n < max(min_periods, 2)) | ~(var_x > tiny) | ~(var_y > tiny)] = np.nan
+    np.clip(corr, -1.0, 1.0, out=corr)
+    np.fill_diagonal(corr, np.where(np.isnan(np.diag(corr)), np.nan, 1.0))
+    return corr
+
+
+def rolling_correlation(
+    a: np.ndarray, b: np.ndarray, window: int, min_periods: int = DEFAULT_MIN_PERIODS,
+) -> np.ndarray:
+    """Correlation of *a* and *b* over each trailing *window* (NaN-aware).
+
+    Aligned with the inputs (oldest first); the first ``window - 1``
+    entries are NaN.
+    """
+    out = np.full(len(a), np.nan)
+    if window < 2 or len(a) < window:
+        return out
+    both = ~(np.isnan(a) | np.isnan(b))
+    wa = sliding_window_view(np.where(both, a, 0.0), window)
+    wb = sliding_window_view(np.where(both, b, 0.0), window)
+    wm = sliding_window_view(both, window)
+    n = wm.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        da = np.where(wm, wa - (wa.sum(axis=1) / n)[:, None], 0.0)
+        db = np.where(wm, wb - (wb.sum(axis=1) / n)[:, None], 0.0)
+        corr = (da * db).sum(axis=1) / np.sqrt((da * da).sum(axis=1) * (db * db).sum(axis=1))
+    corr[n < max(min_periods, 2)] = np.nan
+    out[window - 1:] = np.clip(corr, -1.0, 1.0)
+    return out
+
+
+@dataclass(frozen=True)
+class PositioningMatrix:
+    """One series of one group for many markets, (markets × weeks), oldest first."""
+
+    series: str
+    group: str
+    codes: list[str]
+    names: list[str]
+    categories: list[str]
+    dates: list[str]
+    values: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @classmethod
+    def build(
+        cls,
+        report_type: str,
+        group: str,
+        series: str,
+        market_rows: dict[str, list[dict]],
+        categories: dict[str, dict] | None = None,
+        calc: CotCalculator | None = None,
+    ) -> "PositioningMatrix":
+        """Matrix from newest-first ``cot_data`` rows per market.
+
+        Raises:
+            ValueError: On an unknown series.
+        """
+        calc = calc or CotCalculator()
+        projection = cls.projection(group, series)
+        column = CORRELATION_SERIES[series].format(g=group)
+
+        codes: list[str] = []
+        names: list[str] = []
+        cats: list[str] = []
+        per_market: list[tuple[list[str], list]] = []
+        for code in sorted(market_rows):
+            rows = market_rows[code]
+            if not rows:
+                continue
+            computed = calc.compute_columns(rows, report_type, projection)
+            if column not in computed["columns"]:
+                continue
+            name = rows[0].get("market_and_exchange") or code
+            codes.append(code)
+            names.append(name)
+            cats.append(categorize_market(name, categories)[0])
+            per_market.append((computed["dates"][::-1], computed["columns"][column][::-1]))
+
+        dates = np.unique(np.array([d for ds, _ in per_market for d in ds], dtype=object)).tolist()
+        axis = np.array(dates, dtype=object)
+        values = np.full((len(codes), len(dates)), np.nan)
+        for i, (ds, col) in enumerate(per_market):
+            idx = np.searchsorted(axis, np.array(ds, dtype=object))
+            values[i, idx] = np.array(col, dtype=np.float64)  # None → NaN
+
+        logger.info(
+            "Positioning matrix %s/%s/%s: %d markets × %d weeks",
+            report_type, group, series, len(codes), len(dates),
+        )
+        return cls(series=series, group=group, codes=codes, names=names,
+                   categories=cats, dates=dates, values=values)
+
+    @staticmethod
+    def projection(group: str, series: str) -> FieldProjection:
+        """Calculator projection that yields *series* for *group*.
+
+        Raises:
+            ValueError: On an unknown series.
+        """
+        if series not in CORRELATION_SERIES:
+            raise ValueError(f"Unknown series '{series}' (one of {', '.join(CORRELATION_SERIES)})")
+        return FieldProjection.parse(f"{group}_{series}")
+
+    def select(
+        self,
+        codes: list[str] | None = None,
+        categories: set[str] | None = None,
+        date_to: str | None = None,
+        window: int = 0,
+    ) -> "PositioningMatrix":
+        """Markets by code / category and the *window* weeks up to *date_to* (0 = all)."""
+        keep = np.ones(len(self.codes), dtype=bool)
+        if codes is not None:
+            wanted = set(codes)
+            keep &= np.array([c in wanted for c in self.codes], dtype=bool)
+        if categories is not None:
+            keep &= np.array([c in categories for c in self.categories], dtype=bool)
+        rows = np.flatnonzero(keep)
+        end = len(self.dates)
+        if date_to is not None:
+            end = int(np.searchsorted(np.array(self.dates, dtype=object), date_to, side="right"))
+        start = max(0, end - window) if window > 0 else 0
+        pick = rows.tolist()
+        return replace(
+            self,
+            codes=[self.codes[i] for i in pick],
+            names=[self.names[i] for i in pick],
+            categories=[self.categories[i] for i in pick],
+            dates=self.dates[start:end],
+            values=self.values[rows, start:end],
+        )
+
+    def correlation(self, min_periods: int = DEFAULT_MIN_PERIODS) -> np.ndarray:
+        return pairwise_correlation(self.values, min_periods)
+
+    def position(self, code: str) -> int:
+        """Row of *code*.
+
+        Raises:
+            ValueError: If the market is not in the matrix.
+        """
+        try:
+            return self.codes.index(code)
+        except ValueError:
+            raise ValueError(f"Market '{code}' has no {self.series} series") from None
+
+    def market(self, i: int) -> dict:
+        return {"code": self.codes[i], "name": self.names[i], "category": self.categories[i]}
+
+
+def correlation_payload(matrix: PositioningMatrix, min_periods: int = DEFAULT_MIN_PERIODS) -> dict:
+    """JSON-ready correlation matrix of *matrix* (4 decimals, None for NaN)."""
+    corr = np.round(matrix.correlation(min_periods), 4)
+    cells = np.where(np.isnan(corr), None, corr).tolist()
+    return {
+        "series": matrix.series,
+        "group": matrix.group,
+        "date_from": matrix.dates[0] if matrix.dates else None,
+        "date_to": matrix.dates[-1] if matrix.dates else None,
+        "weeks": len(matrix.dates),
+        "min_periods": min_periods,
+        "markets": [matrix.market(i) for i in range(len(matrix))],
+        "matrix": cells,
+    }
+
+
+def rolling_payload(
+    matrix: PositioningMatrix, a: str, b: str, window: int, min_periods: int = DEFAULT_MIN_PERIODS,
+) -> dict:
+    """Trailing *window*-week correlation of markets *a* and *b* (weeks with a value only).
+
+    Raises:
+        ValueError: If either market is not in the matrix.
+    """
+    ia, ib = matrix.position(a), matrix.position(b)
+    corr = rolling_correlation(matrix.values[ia], matrix.values[ib], window, min_periods)
+    return {
+        "series": matrix.series,
+        "group": matrix.group,
+        "a": matrix.market(ia),
+        "b": matrix.market(ib),
+        "points": [
+            {"date": d, "correlation": round(v, 4)}
+            for d, v in zip(matrix.dates, corr.tolist())
+            if not math.isnan(v)
+        ],
+    }
@@ -8,6 +8,7 @@ import io
 import logging
 import time
 import zipfile
+from collections.abc import Iterator
 from datetime import datetime
 
 import requests
@@ -24,6 +25,7 @@ class CotDownloader:
     def __init__(self) -> None:
         self.session = requests.Session()
         self.session.headers["User-Agent"] = settings.http_user_agent
+        self.bytes_downloaded = 0  # response bodies received, for run metrics
 
     # ------------------------------------------------------------------
     # HTTP helpers
@@ -35,6 +37,7 @@ class CotDownloader:
             try:
                 resp = self.session.get(url, timeout=settings.http_timeout)
                 resp.raise_for_status()
+                self.bytes_downloaded += len(resp.content)
                 return resp.content
             except requests.RequestException as e:
                 logger.warning(
@@ -103,9 +106,17 @@ class CotDownloader:
         skip_years: set[int] | None = None,
     ) -> dict[int, str]:
         """Download N years of data. Returns {year: csv_text}."""
+        return dict(self.iter_years(report_type, subtype, skip_years))
+
+    def iter_years(
+        self,
+        report_type: str,
+        subtype: str,
+        skip_years: set[int] | None = None,
+    ) -> Iterator[tuple[int, str]]:
+        """Yield ``(year, csv_text)`` as each yearly archive arrives."""
         current_year = datetime.now().year
         start_year = current_year - cot_settings.years_to_download + 1
-        results: dict[int, str] = {}
 
         for year in range(start_year, current_year + 1):
             if skip_years and year in skip_years:
@@ -113,6 +124,4 @@ class CotDownloader:
                 continue
             csv_text = self.download_yearly_zip(report_type, subtype, year)
             if csv_text:
-                results[year] = csv_text
-
-        return results
+                yield year, csv_text
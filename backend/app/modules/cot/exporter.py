@@ -2,25 +2,122 @@
 COT module — Static JSON exporter.
 =====================================
 Exports calculated data to JSON files for the frontend.
+
+With ``workers > 1`` (``COT_EXPORT_WORKERS``) the markets of a variant
+are sharded across a process pool: each worker loads its slice with
+``get_bulk_for_codes``, computes and writes the per-market files, and
+returns the compact market-list / screener rows, from which the parent
+writes ``markets_*.json`` and ``screener_*.json``.  The pool is created
+on first use and shared by every variant exported until ``close()``.
+
+Exports are incremental: ``manifest.json`` records the SHA-256 of every
+file written, a file whose serialized payload hashes the same is not
+rewritten, changed files are written to a temp file and swapped in with
+``os.replace`` (so a reader never sees a half-written file), and the
+detail files of markets no longer in the database are deleted.  The
+pipeline and the daily price job export from separate processes into
+the same directory, so each exporter keeps only the manifest entries it
+changed and merges them into the manifest on disk under a file lock
+(``fcntl`` where available) when saving.
+Given the changed markets of a run (``codes``), only their detail files
+are rebuilt; the aggregate files are patched with their new rows.
+
+Price bars are not embedded in the market files: each ticker's bars go
+to one ``prices_{ticker}.json`` (shared by every code and variant that
+maps to it), referenced by the market payload's ``prices_file``, and
+the daily price job rewrites only those files (``export_prices``).
+
+With ``COT_EXPORT_BINARY`` every market and prices file also gets a
+``.bin`` twin in the compact typed-array format of ``binary.py``.
+
+Each written file also gets ``.gz`` and (with the optional ``brotli``
+package) ``.br`` siblings at maximum compression, for nginx
+``gzip_static`` / ``brotli_static`` (``COT_EXPORT_PRECOMPRESS``).
 """
 
+import gzip
+import hashlib
 import json
 import logging
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
 from app.core.config import settings
+from app.modules.cot import binary
 from app.modules.cot.config import cot_settings
 from app.modules.cot.storage import CotStorage
 from app.modules.cot.calculator import CotCalculator
 from app.modules.cot.builder import CotPayloadBuilder
+from app.modules.prices.config import price_settings
 from app.modules.prices.service import PriceService
 from app.utils.categories import build_market_meta
 
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are merged, but not serialised
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
 # Log progress every N markets during export
 PROGRESS_LOG_INTERVAL = 20
 
+# Shards per worker — smaller shards even out slow markets
+SHARDS_PER_WORKER = 4
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_LOCK_FILE = ".manifest.lock"
+
+
+# Per-market / per-ticker export formats
+_EXTENSIONS = ("json", "bin")
+
+# Precompressed sibling suffix → compressor (maximum level)
+_SIBLING_SUFFIXES = (".gz", ".br")
+_COMPRESSORS = {".gz": lambda body: gzip.compress(body, compresslevel=9, mtime=0)}
+if brotli is not None:
+    _COMPRESSORS[".br"] = lambda body: brotli.compress(body, quality=11)
+
+
+def _export_shard(
+    db_path: str,
+    output_dir: str,
+    report_type: str,
+    subtype: str,
+    markets: list[dict],
+    priced: set[str],
+    hashes: dict[str, str],
+    formats: tuple[bool, bool],
+) -> tuple[list[dict], list[dict], int, dict[str, str], tuple[int, int]]:
+    """Process-pool entry point: export one slice of a variant's markets.
+
+    *hashes* are the manifest entries of the slice's files and *formats*
+    the parent's ``(precompress, binary)``; the updated entries are
+    returned with the rows, the count of files written and the
+    ``(bytes_written, files_unchanged)`` counters.
+    """
+    store = CotStorage(db_path)
+    exporter = CotExporter(store, output_dir=output_dir, workers=1, manifest=hashes)
+    exporter.precompress, exporter.binary = formats
+    rows = store.get_bulk_for_codes([m["code"] for m in markets], report_type, subtype)
+    market_list, screener_rows, written = exporter._export_markets(
+        report_type, subtype, markets, rows, priced,
+    )
+    return (
+        market_list, screener_rows, written, exporter._manifest,
+        (exporter.bytes_written, exporter.files_unchanged),
+    )
+
 
 class CotExporter:
     """Exports COT data from SQLite to JSON files for the frontend."""
@@ -29,45 +126,252 @@ class CotExporter:
         self,
         store: CotStorage | None = None,
         price_service: PriceService | None = None,
+        output_dir: str | Path | None = None,
+        workers: int | None = None,
+        manifest: dict[str, str] | None = None,
     ):
         self.store = store or CotStorage()
         self.calc = CotCalculator()
         self.price_service = price_service
         self._builder = CotPayloadBuilder(self.store, self.calc)
-        self.output_dir = Path(settings.json_output_dir)
+        self.output_dir = Path(output_dir or settings.json_output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = max(1, workers if workers is not None else cot_settings.export_workers)
+        self.precompress = cot_settings.export_precompress
+        self.binary = cot_settings.export_binary
+        self._pool: ProcessPoolExecutor | None = None
+        self._manifest = self._load_manifest() if manifest is None else dict(manifest)
+        # Entries changed since the last save (None = file deleted)
+        self._manifest_changes: dict[str, str | None] = {}
+        # Running totals over the exporter's lifetime (files + siblings / skipped files)
+        self.bytes_written = 0
+        self.files_unchanged = 0
+
+    def __enter__(self) -> "CotExporter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
 
     def export_all(
         self,
         report_type: str,
         subtype: str,
         price_data: dict | None = None,
-    ) -> None:
+        codes: set[str] | None = None,
+    ) -> dict | None:
         """
         Export all markets for a single report_type/subtype.
         Creates markets, screener, per-market detail, and group JSON files.
+
+        *codes* (the markets whose data or prices changed) limits the
+        per-market files to those markets: the other markets keep their
+        rows from the previous ``markets_*`` / ``screener_*`` files.
+        Markets missing from those files or whose files are gone are
+        exported too, and without readable previous files every market is.
+
+        Returns:
+            Throughput stats (``markets``, ``screener_rows``, ``written``,
+            ``unchanged``, ``bytes_written``, ``deleted``, ``workers``,
+            ``seconds``, ``markets_per_sec``) or None if the variant is empty.
         """
+        t0 = time.perf_counter()
+        bytes0, unchanged0 = self.bytes_written, self.files_unchanged
+        self._reload_manifest()
         groups = cot_settings.report_groups[report_type]
         markets = self.store.get_all_markets(report_type, subtype)
 
         if not markets:
             logger.warning("No markets found for %s/%s", report_type, subtype)
-            return
+            return None
+
+        previous = self._previous_rows(report_type, subtype) if codes is not None else None
+        targets = markets
+        if previous is not None:
+            targets = [
+                m for m in markets
+                if m["code"] in codes or m["code"] not in previous[0] or not all(
+                    self._exported(self._market_file(m["code"], report_type, subtype, ext))
+                    for ext in self._extensions()
+                )
+            ]
 
-        logger.info("Exporting %d markets for %s/%s...", len(markets), report_type, subtype)
+        workers = max(1, min(self.workers, len(targets)))
+        logger.info(
+            "Exporting %d/%d markets for %s/%s (%d worker%s)...",
+            len(targets), len(markets), report_type, subtype, workers, "" if workers == 1 else "s",
+        )
 
         # Download prices if needed
         if price_data is None and self.price_service:
-            codes = [m["code"] for m in markets]
-            price_data = self.price_service.download_all(codes)
+            price_data = self.price_service.download_all([m["code"] for m in targets])
         elif price_data is None:
             price_data = {}
+        # Markets whose payload references a prices file
+        priced = {code for code, bars in price_data.items() if bars}
+
+        if not targets:
+            market_list, screener_rows, written = [], [], 0
+        elif workers > 1:
+            market_list, screener_rows, written = self._export_parallel(
+                report_type, subtype, targets, priced, workers,
+            )
+        elif targets is markets:
+            # Bulk-load all rows in one query instead of per-market N+1
+            all_market_data = self.store.get_all_market_data_bulk(report_type, subtype)
+            market_list, screener_rows, written = self._export_markets(
+                report_type, subtype, markets, all_market_data, priced,
+            )
+        else:
+            market_data = self.store.get_bulk_for_codes(
+                [m["code"] for m in targets], report_type, subtype,
+            )
+            market_list, screener_rows, written = self._export_markets(
+                report_type, subtype, targets, market_data, priced,
+            )
+
+        if previous is not None:
+            exported = {m["code"] for m in targets}
+            market_list = self._merge_rows(markets, exported, market_list, previous[0])
+            screener_rows = self._merge_rows(markets, exported, screener_rows, previous[1])
+
+        written += self._write_json(f"markets_{report_type}_{subtype}.json", market_list)
+        written += self._write_json(f"screener_{report_type}_{subtype}.json", screener_rows)
+        written += self._write_json(f"groups_{report_type}.json", groups)
+        deleted = sum(
+            self._delete_files(
+                self._market_file("*", report_type, subtype, ext),
+                {self._market_file(m["code"], report_type, subtype, ext) for m in markets}
+                if ext in self._extensions() else set(),
+            )
+            for ext in _EXTENSIONS
+        )
+        self._save_manifest()
+
+        seconds = time.perf_counter() - t0
+        stats = {
+            "markets": len(market_list),
+            "screener_rows": len(screener_rows),
+            "written": written,
+            "unchanged": self.files_unchanged - unchanged0,
+            "bytes_written": self.bytes_written - bytes0,
+            "deleted": deleted,
+            "workers": workers,
+            "seconds": round(seconds, 2),
+            "markets_per_sec": round(len(market_list) / seconds, 1) if seconds > 0 else None,
+        }
+        logger.info(
+            "Done: %d markets, %d screener rows for %s/%s in %.1fs (%.1f markets/s); "
+            "%d files written, %d deleted",
+            stats["markets"], stats["screener_rows"], report_type, subtype,
+            seconds, stats["markets_per_sec"] or 0.0, written, deleted,
+        )
+        return stats
+
+    def _export_parallel(
+        self,
+        report_type: str,
+        subtype: str,
+        markets: list[dict],
+        priced: set[str],
+        workers: int,
+    ) -> tuple[list[dict], list[dict], int]:
+        """Shard *markets* across the pool; rows come back in market order."""
+        n_shards = min(len(markets), workers * SHARDS_PER_WORKER)
+        size = -(-len(markets) // n_shards)
+        shards = [markets[i:i + size] for i in range(0, len(markets), size)]
+
+        pool = self._get_pool()
+        futures = []
+        for shard in shards:
+            files = [
+                self._market_file(m["code"], report_type, subtype, ext)
+                for m in shard for ext in self._extensions()
+            ]
+            futures.append(pool.submit(
+                _export_shard, self.store.db_path, str(self.output_dir), report_type, subtype,
+                shard, {m["code"] for m in shard} & priced,
+                {f: self._manifest[f] for f in files if f in self._manifest},
+                (self.precompress, self.binary),
+            ))
+
+        market_list: list[dict] = []
+        screener_rows: list[dict] = []
+        written = 0
+        for i, future in enumerate(futures, 1):
+            metas, rows, shard_written, hashes, (shard_bytes, shard_unchanged) = future.result()
+            market_list.extend(metas)
+            screener_rows.extend(rows)
+            written += shard_written
+            for filename, digest in hashes.items():
+                if self._manifest.get(filename) != digest:
+                    self._set_manifest(filename, digest)
+            self.bytes_written += shard_bytes
+            self.files_unchanged += shard_unchanged
+            logger.debug("  shard %d/%d done", i, len(futures))
+        return market_list, screener_rows, written
+
+    def _previous_rows(
+        self, report_type: str, subtype: str,
+    ) -> tuple[dict[str, dict], dict[str, dict]] | None:
+        """Rows of the last ``markets_*`` / ``screener_*`` export by code,
+        or None if either file is missing or unreadable."""
+        previous = []
+        for prefix in ("markets", "screener"):
+            path = self.output_dir / f"{prefix}_{report_type}_{subtype}.json"
+            try:
+                with open(path, encoding="utf-8") as f:
+                    previous.append({row["code"]: row for row in json.load(f)})
+            except FileNotFoundError:
+                return None
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning("Ignoring unreadable export %s: %s", path, e)
+                return None
+        return previous[0], previous[1]
+
+    @staticmethod
+    def _merge_rows(
+        markets: list[dict], exported: set[str], fresh: list[dict], previous: dict[str, dict],
+    ) -> list[dict]:
+        """Rows in market order: *fresh* for the *exported* markets, *previous* for the rest."""
+        by_code = {row["code"]: row for row in fresh}
+        rows = []
+        for m in markets:
+            row = by_code.get(m["code"]) if m["code"] in exported else previous.get(m["code"])
+            if row is not None:
+                rows.append(row)
+        return rows
 
-        # Bulk-load all rows in one query instead of per-market N+1
-        all_market_data = self.store.get_all_market_data_bulk(report_type, subtype)
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: the callers run in scheduler threads, which fork does not survive cleanly
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
 
+    def _export_markets(
+        self,
+        report_type: str,
+        subtype: str,
+        markets: list[dict],
+        all_market_data: dict[str, list[dict]],
+        priced: set[str],
+    ) -> tuple[list[dict], list[dict], int]:
+        """Write the detail file of each market (*priced*: codes with a prices file).
+
+        Returns:
+            ``(market_list, screener_rows, files_written)``.
+        """
         market_list: list[dict] = []
         screener_rows: list[dict] = []
+        written = 0
         categories = cot_settings.market_categories
         report_dn = cot_settings.report_display_names
         subtype_dn = cot_settings.subtype_display_names
@@ -82,13 +386,16 @@ class CotExporter:
                 if not raw_rows:
                     continue
 
-                prices = price_data.get(code, [])
-                payload = self._builder.build_market_detail(
-                    code, name, exchange_code, report_type, subtype,
-                    raw_rows, prices or None,
+                # Computed once, written as rows (JSON) and columns (binary)
+                columnar = self._builder.build_market_detail(
+                    code, name, exchange_code, report_type, subtype, raw_rows, columnar=True,
                 )
-                if payload is None:
+                if columnar is None:
                     continue
+                ticker = price_settings.ticker_map.get(code)
+                if ticker and code in priced:
+                    columnar["prices_file"] = self._prices_file(ticker)
+                payload = self._builder.columnar_to_rows(columnar)
 
                 market_meta = build_market_meta(
                     code, name, exchange_code, report_type, subtype,
@@ -97,10 +404,16 @@ class CotExporter:
                     subtype_display_names=subtype_dn,
                 )
                 market_list.append(market_meta)
-                self._write_json(f"market_{code}_{report_type}_{subtype}.json", payload)
+                written += self._write_json(self._market_file(code, report_type, subtype), payload)
+                if self.binary:
+                    if "prices_file" in columnar:
+                        columnar["prices_file"] = self._prices_file(ticker, "bin")
+                    written += self._write_file(
+                        self._market_file(code, report_type, subtype, "bin"), binary.encode(columnar),
+                    )
 
-                screener_entry = self._builder.build_screener_entry(
-                    code, name, exchange_code, report_type, raw_rows,
+                screener_entry = self._builder.screener_entry_from_weeks(
+                    code, name, exchange_code, report_type, payload["weeks"],
                 )
                 if screener_entry:
                     screener_rows.append(screener_entry)
@@ -110,17 +423,205 @@ class CotExporter:
             if i % PROGRESS_LOG_INTERVAL == 0:
                 logger.info("  %d/%d done...", i, len(markets))
 
-        self._write_json(f"markets_{report_type}_{subtype}.json", market_list)
-        self._write_json(f"screener_{report_type}_{subtype}.json", screener_rows)
-        self._write_json(f"groups_{report_type}.json", groups)
+        return market_list, screener_rows, written
+
+    def export_prices(self, price_data: dict[str, list[dict]]) -> dict:
+        """
+        Write one ``prices_{ticker}.json`` per ticker in *price_data*
+        (CFTC code → bars), and delete the files of tickers no longer in
+        the ticker map.  A ticker whose download came back empty keeps
+        its previous file.
+
+        Returns:
+            Stats (``tickers``, ``written``, ``unchanged``, ``bytes_written``,
+            ``deleted``, ``seconds``) and the tickers whose files were
+            rewritten (``changed_tickers``) or are new (``new_tickers``).
+        """
+        t0 = time.perf_counter()
+        bytes0, unchanged0 = self.bytes_written, self.files_unchanged
+        self._reload_manifest()
+        ticker_map = price_settings.ticker_map
+        bars_by_ticker: dict[str, list[dict]] = {}
+        for code, bars in price_data.items():
+            ticker = ticker_map.get(code)
+            if ticker and bars and ticker not in bars_by_ticker:
+                bars_by_ticker[ticker] = bars
+
+        written = 0
+        changed: list[str] = []
+        created = [t for t in sorted(bars_by_ticker) if self._prices_file(t) not in self._manifest]
+        for ticker, bars in sorted(bars_by_ticker.items()):
+            n = self._write_json(self._prices_file(ticker), bars)
+            if self.binary:
+                n += self._write_file(
+                    self._prices_file(ticker, "bin"), binary.encode({"ticker": ticker, "prices": bars}),
+                )
+            if n:
+                changed.append(ticker)
+            written += n
 
+        deleted = sum(
+            self._delete_files(
+                f"prices_*.{ext}",
+                {self._prices_file(t, ext) for t in ticker_map.values()}
+                if ext in self._extensions() else set(),
+            )
+            for ext in _EXTENSIONS
+        )
+        self._save_manifest()
+
+        seconds = time.perf_counter() - t0
         logger.info(
-            "Done: %d markets, %d screener rows for %s/%s",
-            len(market_list), len(screener_rows), report_type, subtype,
+            "Prices: %d tickers in %.1fs; %d files written, %d deleted",
+            len(bars_by_ticker), seconds, written, deleted,
         )
+        return {
+            "tickers": len(bars_by_ticker),
+            "written": written,
+            "unchanged": self.files_unchanged - unchanged0,
+            "bytes_written": self.bytes_written - bytes0,
+            "deleted": deleted,
+            "seconds": round(seconds, 2),
+            "changed_tickers": changed,
+            "new_tickers": created,
+        }
+
+    # ------------------------------------------------------------------
+    # Files and manifest
+    # ------------------------------------------------------------------
 
-    def _write_json(self, filename: str, data) -> None:
+    def _extensions(self) -> tuple[str, ...]:
+        """Formats written for market / prices files."""
+        return _EXTENSIONS if self.binary else ("json",)
+
+    @staticmethod
+    def _market_file(code: str, report_type: str, subtype: str, ext: str = "json") -> str:
+        return f"market_{code}_{report_type}_{subtype}.{ext}"
+
+    @staticmethod
+    def _prices_file(ticker: str, ext: str = "json") -> str:
+        """``GC=F`` → ``prices_GC_F.json``."""
+        return f"prices_{re.sub(r'[^A-Za-z0-9.-]', '_', ticker)}.{ext}"
+
+    def _exported(self, filename: str) -> bool:
+        """Whether *filename* is in the manifest and still on disk."""
+        return filename in self._manifest and (self.output_dir / filename).exists()
+
+    def _write_json(self, filename: str, data) -> bool:
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return self._write_file(filename, body)
+
+    def _write_file(self, filename: str, body: bytes) -> bool:
+        """Write *body* unless the file already holds it; True if written."""
+        digest = hashlib.sha256(body).hexdigest()
         path = self.output_dir / filename
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        compressors = _COMPRESSORS if self.precompress else {}
+        if self._manifest.get(filename) == digest and path.exists() and all(
+            path.with_name(filename + suffix).exists() for suffix in compressors
+        ):
+            self.files_unchanged += 1
+            return False
+
+        # Siblings first: a reader may briefly get the new .gz with the old
+        # file, but never a sibling older than the file it stands for
+        for suffix in _SIBLING_SUFFIXES:
+            sibling = path.with_name(filename + suffix)
+            if suffix in compressors:
+                compressed = compressors[suffix](body)
+                self._replace(sibling, compressed)
+                self.bytes_written += len(compressed)
+            else:
+                sibling.unlink(missing_ok=True)  # would go stale
+        self._replace(path, body)
+        self.bytes_written += len(body)
+        self._set_manifest(filename, digest)
         logger.debug("Wrote %s", path)
+        return True
+
+    @staticmethod
+    def _replace(path: Path, body: bytes) -> None:
+        """Write *body* to a temp file and move it over *path*."""
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_bytes(body)
+        os.replace(tmp, path)
+
+    def _delete_files(self, pattern: str, keep: set[str]) -> int:
+        """Delete exports matching the glob *pattern* whose name is not in *keep*."""
+        deleted = 0
+        for path in self.output_dir.glob(pattern):
+            if path.name in keep:
+                continue
+            try:
+                path.unlink()
+                for suffix in _SIBLING_SUFFIXES:
+                    path.with_name(path.name + suffix).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning("Could not delete stale export %s: %s", path, e)
+                continue
+            self._set_manifest(path.name, None)
+            deleted += 1
+            logger.info("Deleted stale export %s", path.name)
+        return deleted
+
+    def _load_manifest(self) -> dict[str, str]:
+        """Filename → SHA-256 of the last export (empty if missing or unreadable)."""
+        path = self.output_dir / MANIFEST_FILE
+        try:
+            with open(path, encoding="utf-8") as f:
+                files = json.load(f).get("files", {})
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning("Ignoring unreadable export manifest %s: %s", path, e)
+            return {}
+        return files if isinstance(files, dict) else {}
+
+    def _set_manifest(self, filename: str, digest: str | None) -> None:
+        """Record *filename*'s new hash (None: deleted) for the next save."""
+        if digest is None:
+            self._manifest.pop(filename, None)
+        else:
+            self._manifest[filename] = digest
+        self._manifest_changes[filename] = digest
+
+    @contextmanager
+    def _manifest_lock(self):
+        """Exclusive lock on the manifest across processes (no-op without ``fcntl``)."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.output_dir / MANIFEST_LOCK_FILE, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _merged_manifest(self) -> dict[str, str]:
+        """The manifest on disk with this exporter's unsaved changes applied."""
+        files = self._load_manifest()
+        for filename, digest in self._manifest_changes.items():
+            if digest is None:
+                files.pop(filename, None)
+            else:
+                files[filename] = digest
+        return files
+
+    def _reload_manifest(self) -> None:
+        """Pick up the entries another process saved since this exporter loaded them."""
+        with self._manifest_lock():
+            self._manifest = self._merged_manifest()
+
+    def _save_manifest(self) -> None:
+        """Merge this exporter's changes into the manifest on disk and save it.
+
+        Entries the other worker process saved in the meantime are kept.
+        """
+        path = self.output_dir / MANIFEST_FILE
+        tmp = path.with_name(f".{MANIFEST_FILE}.{os.getpid()}.tmp")
+        with self._manifest_lock():
+            self._manifest = self._merged_manifest()
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"files": self._manifest}, f, separators=(",", ":"), sort_keys=True)
+            os.replace(tmp, path)
+        self._manifest_changes.clear()
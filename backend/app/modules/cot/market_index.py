@@ -0,0 +1,217 @@
+"""
+COT module — Market metadata index.
+=====================================
+Per-market metadata (available report types, name, exchange, sector,
+latest report date per variant) built from a single GROUP BY query and
+kept in memory, so request paths such as the dashboard can resolve
+availability, sector and primary report without touching the DB.
+
+The index is cached per database path and rebuilt lazily after
+``invalidate_market_index()`` (called with the other COT caches when
+the pipeline or price update completes) or after its TTL.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+
+from app.core.cache import TTLCache
+from app.modules.cot.config import cot_settings
+from app.modules.cot.storage import CotStorage
+
+logger = logging.getLogger(__name__)
+
+MARKET_INDEX_TTL = 600  # 10 min — same as the market/dashboard caches
+
+# Maps backend category → frontend sector label
+CATEGORY_TO_SECTOR: dict[str, str] = {
+    "currencies": "Currencies",
+    "crypto": "Crypto",
+    "metals": "Metals",
+    "energy": "Energy",
+    "grains": "Grains",
+    "softs": "Softs",
+    "livestock": "Livestock",
+    "indices": "Indices",
+    "rates": "Rates",
+}
+
+# Primary report type heuristic: use disagg for commodities, legacy for financial
+COMMODITY_SECTORS = {"Metals", "Energy", "Grains", "Softs", "Livestock"}
+FINANCIAL_SECTORS = {"Currencies", "Crypto", "Indices", "Rates"}
+
+
+def classify_sector(market_name: str) -> str:
+    """Classify a market into a sector using keyword matching."""
+    name_upper = market_name.upper()
+    for cat_key, cat_info in cot_settings.market_categories.items():
+        for kw in cat_info["keywords"]:
+            if kw in name_upper:
+                return CATEGORY_TO_SECTOR.get(cat_key, "Other")
+    return "Other"
+
+
+def primary_report(sector: str, available: list[str] | tuple[str, ...]) -> str:
+    """Pick the best report type for a market given available data."""
+    if sector in COMMODITY_SECTORS and "disagg" in available:
+        return "disagg"
+    if sector in FINANCIAL_SECTORS and "tff" in available:
+        return "tff"
+    # fallback
+    if "legacy" in available:
+        return "legacy"
+    return available[0] if available else "legacy"
+
+
+# ------------------------------------------------------------------
+# Index entries
+# ------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class MarketVariant:
+    """Latest identity of one market in one report_type/subtype."""
+
+    name: str
+    exchange_code: str
+    sector: str
+    last_date: str
+    commodity_code: str = ""
+
+
+@dataclass(frozen=True)
+class MarketEntry:
+    """All variants of one market code."""
+
+    code: str
+    available_reports: tuple[str, ...]  # sorted, as the UNIQUE index yields them
+    variants: dict[tuple[str, str], MarketVariant]
+
+    def resolve(self, report_type: str | None, subtype: str) -> dict | None:
+        """Dashboard target for this market, or None if it has no data.
+
+        Identity comes from the first available report type in *subtype*
+        (falling back to "co" when there is no "fo" data); *report_type*
+        is served if available, otherwise the sector's primary report.
+        ``last_date`` is the latest report date of the served variant.
+        """
+        sample_rt = self.available_reports[0]
+        variant = self.variants.get((sample_rt, subtype))
+        if variant is None:
+            subtype = "co"
+            variant = self.variants.get((sample_rt, subtype))
+            if variant is None:
+                return None
+
+        available = list(self.available_reports)
+        primary = primary_report(variant.sector, available)
+        served = report_type if report_type and report_type in available else primary
+        latest = self.variants.get((served, subtype))
+        return {
+            "code": self.code,
+            "name": variant.name,
+            "exchange_code": variant.exchange_code,
+            "sector": variant.sector,
+            "primary_report": primary,
+            "report_type": served,
+            "subtype": subtype,
+            "available_reports": available,
+            "last_date": latest.last_date if latest else None,
+        }
+
+
+class MarketIndex:
+    """In-memory code → ``MarketEntry`` lookup."""
+
+    def __init__(self, entries: dict[str, MarketEntry]) -> None:
+        self._entries = entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, code: str) -> MarketEntry | None:
+        return self._entries.get(code)
+
+    def entries(self) -> list[MarketEntry]:
+        return list(self._entries.values())
+
+    def codes(self, report_type: str, subtype: str) -> list[str]:
+        """Codes with data in *report_type* / *subtype*, sorted."""
+        return sorted(
+            code for code, entry in self._entries.items()
+            if (report_type, subtype) in entry.variants
+        )
+
+    def names(self, report_type: str, subtype: str) -> dict[str, str]:
+        """Code → latest name of every market with data in *report_type* / *subtype*."""
+        return {
+            code: v.name for code, entry in self._entries.items()
+            if (v := entry.variants.get((report_type, subtype))) is not None
+        }
+
+    def last_date(self, report_type: str, subtype: str) -> str | None:
+        """Latest report date across all markets of *report_type* / *subtype*."""
+        dates = [
+            v.last_date for entry in self._entries.values()
+            if (v := entry.variants.get((report_type, subtype))) is not None
+        ]
+        return max(dates) if dates else None
+
+    def available_reports(self, code: str) -> list[str]:
+        entry = self._entries.get(code)
+        return list(entry.available_reports) if entry else []
+
+    @classmethod
+    def build(cls, store: CotStorage) -> "MarketIndex":
+        """Build the index from one ``get_market_variants`` query."""
+        sectors: dict[str, str] = {}
+        grouped: dict[str, dict[tuple[str, str], MarketVariant]] = {}
+
+        for row in store.get_market_variants():
+            code = row["code"]
+            name = row["name"] or code
+            if name not in sectors:
+                sectors[name] = classify_sector(name)
+            grouped.setdefault(code, {})[(row["report_type"], row["subtype"])] = MarketVariant(
+                name=name,
+                exchange_code=row["exchange_code"] or "",
+                sector=sectors[name],
+                last_date=row["last_date"],
+                commodity_code=row.get("commodity_code") or "",
+            )
+
+        entries = {
+            code: MarketEntry(
+                code=code,
+                available_reports=tuple(sorted({rt for rt, _ in variants})),
+                variants=variants,
+            )
+            for code, variants in grouped.items()
+        }
+        logger.info("Market index built: %d markets", len(entries))
+        return cls(entries)
+
+
+# ------------------------------------------------------------------
+# Shared instance
+# ------------------------------------------------------------------
+
+_index_cache = TTLCache(name="cot.market_index", default_ttl=MARKET_INDEX_TTL)
+_build_lock = threading.Lock()
+
+
+def get_market_index(store: CotStorage) -> MarketIndex:
+    """Return the cached index for *store*'s database, building it if needed."""
+    index = _index_cache.get(store.db_path)
+    if index is not None:
+        return index
+    with _build_lock:
+        index = _index_cache.get(store.db_path)
+        if index is None:
+            index = MarketIndex.build(store)
+            _index_cache.set(store.db_path, index)
+    return index
+
+
+def invalidate_market_index() -> None:
+    """Drop the cached index (rebuilt on next use)."""
+    _index_cache.invalidate()
@@ -0,0 +1,148 @@
+"""
+COT module — Pipeline run metrics.
+====================================
+Collects what one pipeline run did — per variant: seconds per stage,
+bytes downloaded, rows parsed / upserted / changed, files and bytes
+exported, cache hits — plus the stage busy times of ``run_stages`` and
+the process's peak RSS, and turns them into a ``pipeline_runs`` row.
+
+Cache hits are counted where the pipeline skips work: years already in
+``download_log``, prices served from the in-memory price cache and
+export files whose manifest hash is unchanged.
+
+Stages run on different threads, so every update takes a lock.
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Per-variant counters; run totals go to the pipeline_runs columns of the same name
+VARIANT_COUNTERS: tuple[str, ...] = (
+    "bytes_downloaded", "years_fetched", "years_skipped", "years_resumed",
+    "rows_parsed", "rows_upserted", "rows_changed", "markets_changed",
+    "export_files_written", "export_files_unchanged", "export_bytes_written",
+)
+# Counters of the shared price step (stored under "prices" in ``variants``)
+PRICE_COUNTERS: tuple[str, ...] = (
+    "requested", "price_cache_hits", "downloaded",
+    "export_files_written", "export_files_unchanged", "export_bytes_written",
+)
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process or of a finished child
+    (export workers), in MiB; None where ``resource`` is unavailable."""
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is in bytes on macOS, KiB elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class RunMetrics:
+    """Thread-safe accumulator for one pipeline run."""
+
+    def __init__(self, mode: str, force_reload: bool) -> None:
+        self.mode = mode
+        self.force_reload = force_reload
+        self.started_at = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.variants: dict[str, dict] = {}
+        self.prices: dict = {key: 0 for key in PRICE_COUNTERS} | {"seconds": 0.0}
+
+    def _variant(self, report_type: str, subtype: str) -> dict:
+        key = f"{report_type}_{subtype}"
+        if key not in self.variants:
+            self.variants[key] = {name: 0 for name in VARIANT_COUNTERS} | {"seconds": {}}
+        return self.variants[key]
+
+    def add(self, report_type: str, subtype: str, **counts: int) -> None:
+        with self._lock:
+            entry = self._variant(report_type, subtype)
+            for name, n in counts.items():
+                entry[name] += n
+
+    def add_prices(self, **counts: float) -> None:
+        with self._lock:
+            for name, n in counts.items():
+                self.prices[name] += n
+
+    def add_seconds(self, report_type: str, subtype: str, stage: str, seconds: float) -> None:
+        with self._lock:
+            stages = self._variant(report_type, subtype)["seconds"]
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, report_type: str, subtype: str, stage: str):
+        """Time the block as *stage* of the variant."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_seconds(report_type, subtype, stage, time.perf_counter() - t0)
+
+    def timed(self, report_type: str, subtype: str, stage: str, items: Iterable) -> Iterator:
+        """Yield from *items*, timing only the production of each item
+        (not the time the consumer holds it)."""
+        it = iter(items)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                self.add_seconds(report_type, subtype, stage, time.perf_counter() - t0)
+            yield item
+
+    def record(self, stage_stats: dict, status: str, error: str | None = None) -> dict:
+        """The ``pipeline_runs`` row of the run (``CotStorage.PIPELINE_RUN_COLS`` keys)."""
+        with self._lock:
+            variants = {
+                key: {**entry, "seconds": {k: round(v, 2) for k, v in entry["seconds"].items()}}
+                for key, entry in self.variants.items()
+            }
+            prices = {**self.prices, "seconds": round(self.prices["seconds"], 2)}
+
+        totals = {
+            name: sum(v[name] for v in variants.values()) for name in VARIANT_COUNTERS
+        }
+        return {
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "status": status,
+            "error": error,
+            "mode": self.mode,
+            "force_reload": int(self.force_reload),
+            "duration_sec": round(time.perf_counter() - self._t0, 2),
+            "bytes_downloaded": totals["bytes_downloaded"],
+            "rows_parsed": totals["rows_parsed"],
+            "rows_upserted": totals["rows_upserted"],
+            "rows_changed": totals["rows_changed"],
+            "export_files_written": totals["export_files_written"] + prices["export_files_written"],
+            "export_bytes_written": totals["export_bytes_written"] + prices["export_bytes_written"],
+            "years_skipped": totals["years_skipped"],
+            "price_cache_hits": prices["price_cache_hits"],
+            "export_files_unchanged": (
+                totals["export_files_unchanged"] + prices["export_files_unchanged"]
+            ),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stage_stats,
+            "variants": {**variants, "prices": prices},
+        }
@@ -1,21 +1,49 @@
 """
 COT module — ETL pipeline orchestrator.
 =========================================
-Coordinates: download → parse → store → export.
+Coordinates: download → parse → store → compute → prices → export.
+
+The stages run as a pipelined chain (``stages.py``): one thread per
+stage with bounded queues between them, fed one report variant at a
+time.  Yearly archives stream through parse / store while the next one
+downloads; price downloads start immediately for the markets already in
+the database (and top up new ones as each variant is stored); each
+variant is exported as soon as it is computed and its prices are in.
+``serial=True`` (``--serial`` / ``COT_PIPELINE_SERIAL``) runs the same
+stages one item at a time on the calling thread.
+
+Each run is recorded in ``pipeline_runs`` (``metrics.RunMetrics``).
+
+The run also collects the markets it changed (``changes.py``): rows the
+store stage inserted or revised and prices files the export rewrote.
+Only those markets are re-snapshotted and re-exported, a variant with
+no changes skips compute, and the set is left in ``self.changes`` for
+the completion callbacks.
 """
 
 import logging
 import os
+import sqlite3
+import threading
 import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 
 from app.core.config import settings
+from app.modules.cot.changes import MarketChanges, market_keys
+from app.modules.cot.checkpoints import STATES, Checkpoints, year_unit
 from app.modules.cot.config import cot_settings
 from app.modules.cot.downloader import CotDownloader
+from app.modules.cot.metrics import RunMetrics
 from app.modules.cot.parser import CotParser
+from app.modules.cot.stages import Stage, run_stages
 from app.modules.cot.storage import CotStorage
 from app.modules.cot.exporter import CotExporter
+from app.modules.cot.sectors import SectorAggregates
+from app.modules.cot.snapshots import ScreenerSnapshots
+from app.modules.prices.config import price_settings
 from app.modules.prices.service import PriceService
 
 logger = logging.getLogger(__name__)
@@ -82,13 +110,31 @@ class PipelineLock:
 # Pipeline
 # =====================================================================
 
+@dataclass
+class _Chunk:
+    """Unit of work flowing from download to store.
+
+    ``kind``: "begin" / "end" bracket a variant; "year" / "current"
+    carry a downloaded file and, after parsing, its rows.
+    """
+
+    report_type: str
+    subtype: str
+    kind: str
+    year: int | None = None
+    reset: bool = False  # "begin": wipe the variant first (force_reload)
+    text: str | None = field(default=None, repr=False)
+    rows: list[dict] | None = field(default=None, repr=False)
+
+
 class CotPipeline:
-    """Full COT data pipeline: download → parse → store → export."""
+    """Full COT data pipeline: download → parse → store → compute → export."""
 
     def __init__(self) -> None:
         self.downloader = CotDownloader()
         self.parser = CotParser()
         self.store = CotStorage()
+        self._db_write = threading.Lock()  # store and compute both write SQLite
 
     def run(
         self,
@@ -96,107 +142,277 @@ class CotPipeline:
         report_types: list[str] | None = None,
         subtypes: list[str] | None = None,
         skip_prices: bool = False,
-    ) -> None:
+        rebuild_snapshots: bool = False,
+        serial: bool | None = None,
+        resume: bool = False,
+        progress: Callable[[dict], None] | None = None,
+    ) -> dict:
+        """Run the pipeline and record it in ``pipeline_runs``.
+
+        With *resume*, units an interrupted earlier run completed (see
+        ``checkpoints.py``) are skipped: the variant is not wiped again,
+        stored years are not re-downloaded, kept downloads are re-parsed
+        from disk and exported variants are left alone.
+
+        *progress* (called from the stage threads) receives an event
+        dict per stored year, computed variant and exported variant.
+        The price bars gathered are left in ``self.price_data``, the codes
+        whose stored bars the run's downloads changed in
+        ``self.price_codes``, the ``(code, variant)`` keys the run changed
+        in ``self.changes``.
+
+        Returns:
+            The stored run (``RunMetrics.record``): totals, per-stage busy
+            times and per-variant metrics.
+        """
         types = report_types or list(cot_settings.report_types)
         subs = subtypes or list(cot_settings.subtypes)
-        t0 = time.time()
+        serial = cot_settings.pipeline_serial if serial is None else serial
+        variants = [(rt, st) for rt in types for st in subs]
+        metrics = RunMetrics("serial" if serial else "pipelined", force_reload)
+        self._metrics = metrics
+        self._checkpoints = Checkpoints(self.store, variants, resume=resume)
+        self._stored_variants: set[tuple[str, str]] = set()  # got new rows this run
+        self._progress = progress or (lambda event: None)
+        self.price_data: dict[str, list[dict]] = {}
+        self.price_codes: set[str] = set()
+        self.changes: MarketChanges = set()
+        # Changed codes per variant; a variant wiped or left by an interrupted
+        # run changed as a whole, since what the earlier run stored is unknown
+        self._changed: dict[tuple[str, str], set[str]] = {}
+        self._changes_lock = threading.Lock()
+        self._full_variants = {
+            (rt, st) for rt, st in variants
+            if force_reload or (rt, st) in self._checkpoints.interrupted
+            or self._checkpoints.resumed_units(rt, st)
+        }
 
         logger.info("=" * 70)
         logger.info(
-            "Pipeline starting — types=%s, subtypes=%s, force=%s, skip_prices=%s",
-            types, subs, force_reload, skip_prices,
+            "Pipeline starting — types=%s, subtypes=%s, force=%s, skip_prices=%s, mode=%s, resume=%s",
+            types, subs, force_reload, skip_prices, metrics.mode, resume,
         )
         logger.info("=" * 70)
 
-        # Step 1: Download + parse + store each variant
-        for rt in types:
-            for st in subs:
-                try:
-                    self._process_variant(rt, st, force_reload)
-                except (OSError, ValueError, KeyError, RuntimeError) as e:
-                    logger.error("Failed %s/%s: %s", rt, st, e, exc_info=True)
-
-        # Step 2: Download prices (once, shared across variants)
-        price_data: dict = {}
-        all_codes: set[str] = set()
-        for rt in types:
-            for st in subs:
-                for m in self.store.get_all_markets(rt, st):
-                    all_codes.add(m["code"])
-
-        if all_codes:
-            price_svc = PriceService()
-
-            if not skip_prices:
-                # Full download (used on first run or manual trigger)
-                try:
-                    price_data = price_svc.refresh_all(list(all_codes))
-                    logger.info("Downloaded prices for %d markets", len(price_data))
-                except (OSError, ValueError, RuntimeError) as e:
-                    logger.warning("Price download failed: %s", e)
-            else:
-                # Use cached prices from the daily 00:00 job
-                price_data = price_svc.get_all_cached(list(all_codes))
-                logger.info(
-                    "Using %d cached price entries (skip_prices=True)",
-                    len(price_data),
+        stats: dict = {}
+        try:
+            prices = _PriceStage(self.store, variants, skip_prices, metrics)
+            with CotExporter(self.store, price_service=None) as exporter:
+                exported_codes: set[str] = set()
+                exported: list[str] = []
+                price_changed: set[str] = set()  # codes whose prices file was rewritten
+                price_new: set[str] = set()      # ... or written for the first time
+
+                def export(item: tuple[str, str, dict]) -> None:
+                    rt, st, price_data = item
+                    # Price files first, so no market file references a missing one
+                    fresh = {c: b for c, b in price_data.items() if c not in exported_codes}
+                    if fresh:
+                        result = exporter.export_prices(fresh)
+                        exported_codes.update(fresh)
+                        ticker_map = price_settings.ticker_map
+                        changed_tickers = set(result["changed_tickers"])
+                        new_tickers = set(result["new_tickers"])
+                        price_changed.update(c for c in fresh if ticker_map.get(c) in changed_tickers)
+                        price_new.update(c for c in fresh if ticker_map.get(c) in new_tickers)
+                        metrics.add_prices(
+                            export_files_written=result["written"],
+                            export_files_unchanged=result["unchanged"],
+                            export_bytes_written=result["bytes_written"],
+                        )
+                    codes = self._changed_codes(rt, st)
+                    if codes is not None:
+                        # A market file only refers to its prices file: rewrite it
+                        # when that file is new, not each time the bars change
+                        variant_codes = self._market_codes(rt, st)
+                        self._add_changes(rt, st, variant_codes & price_changed)
+                        codes |= variant_codes & price_new
+                    with metrics.timer(rt, st, "export"):
+                        result = exporter.export_all(rt, st, price_data=price_data, codes=codes)
+                    if result:
+                        metrics.add(
+                            rt, st,
+                            export_files_written=result["written"],
+                            export_files_unchanged=result["unchanged"],
+                            export_bytes_written=result["bytes_written"],
+                        )
+                    self._checkpoints.mark(rt, st, "export", "exported")
+                    exported.append(f"{rt}_{st}")
+                    self._progress({
+                        "step": "exported", "variant": f"{rt}_{st}",
+                        "done": len(exported), "total": len(variants),
+                    })
+
+                stats = run_stages(
+                    [
+                        Stage("download", lambda v: self._download(v, force_reload)),
+                        Stage("parse", self._parse),
+                        Stage("store", self._store),
+                        Stage("compute", lambda c: self._compute(c, rebuild_snapshots)),
+                        Stage("prices", prices.top_up, start=prices.seed),
+                        Stage("export", export),
+                    ],
+                    variants,
+                    serial=serial,
                 )
-                # Fallback: if cache is empty (e.g. first run after restart),
-                # download anyway so the export isn't price-less.
-                if not price_data:
-                    logger.info("Cache empty — downloading prices as fallback")
-                    try:
-                        price_data = price_svc.refresh_all(list(all_codes))
-                        logger.info("Fallback downloaded prices for %d markets", len(price_data))
-                    except (OSError, ValueError, RuntimeError) as e:
-                        logger.warning("Fallback price download failed: %s", e)
-
-        # Step 3: Export
-        exporter = CotExporter(self.store, price_service=None)
-        for rt in types:
-            for st in subs:
-                try:
-                    exporter.export_all(rt, st, price_data=price_data)
-                except (OSError, ValueError, KeyError) as e:
-                    logger.error("Export failed %s/%s: %s", rt, st, e, exc_info=True)
+        except BaseException as e:  # a stage stopped by SystemExit / KeyboardInterrupt too
+            self._save_run(metrics.record(stats.get("stages", {}), "error", str(e) or type(e).__name__))
+            raise
+
+        self.price_data = prices.price_data
+        self.price_codes = prices.changed_codes
+        for (rt, st), codes in self._changed.items():
+            self.changes |= market_keys(codes, rt, st)
+            metrics.add(rt, st, markets_changed=len(codes))
+        failed = any(s["errors"] for s in stats["stages"].values())
+        run = metrics.record(stats["stages"], "partial" if failed else "success")
+        self._save_run(run)
+        if failed:
+            logger.warning("Run had stage errors — checkpoints kept, rerun with resume to finish it")
+        else:
+            for rt, st in variants:
+                self._checkpoints.clear(rt, st)
+
+        busy = ", ".join(f"{name} {s['busy']:.1f}s" for name, s in stats["stages"].items())
+        logger.info("Pipeline complete in %.1fs (stage busy time: %s)", stats["seconds"], busy)
+        logger.info(
+            "Run: %d bytes downloaded, %d rows parsed, %d changed (%d markets), "
+            "%d files / %d bytes exported, peak RSS %s MiB",
+            run["bytes_downloaded"], run["rows_parsed"], run["rows_changed"], len(self.changes),
+            run["export_files_written"], run["export_bytes_written"], run["peak_rss_mb"],
+        )
+        return run
+
+    def _save_run(self, run: dict) -> None:
+        try:
+            run["id"] = self.store.insert_pipeline_run(run)
+        except sqlite3.Error as e:
+            logger.warning("Could not record pipeline run: %s", e)
+
+    def _add_changes(self, report_type: str, subtype: str, codes) -> None:
+        with self._changes_lock:
+            self._changed.setdefault((report_type, subtype), set()).update(codes)
+
+    def _market_codes(self, report_type: str, subtype: str) -> set[str]:
+        return {m["code"] for m in self.store.get_all_markets(report_type, subtype)}
+
+    def _changed_codes(self, report_type: str, subtype: str) -> set[str] | None:
+        """Codes of the variant changed so far (a copy); None if it changed as a whole."""
+        if (report_type, subtype) in self._full_variants:
+            return None
+        with self._changes_lock:
+            return set(self._changed.get((report_type, subtype), ()))
 
-        logger.info("Pipeline complete in %.1fs", time.time() - t0)
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
 
-    def _process_variant(self, report_type: str, subtype: str, force_reload: bool) -> None:
+    def _download(self, variant: tuple[str, str], force_reload: bool) -> Iterator[_Chunk]:
+        report_type, subtype = variant
+        metrics, checkpoints = self._metrics, self._checkpoints
         rt_name = cot_settings.report_display_names[report_type]
         st_name = cot_settings.subtype_display_names[subtype]
+        resumed = checkpoints.resumed_units(report_type, subtype)
+        pending = [u for u, e in resumed.items() if STATES.index(e["state"]) < STATES.index("stored")]
+        if checkpoints.reached(report_type, subtype, "export", "exported") and not pending:
+            logger.info("%s — %s: finished by the interrupted run, skipping", rt_name, st_name)
+            # Its changes never reached the completion callbacks
+            self._add_changes(report_type, subtype, self._market_codes(report_type, subtype))
+            return
         logger.info("Processing: %s — %s", rt_name, st_name)
-
-        if force_reload:
-            self.store.delete_report_data(report_type, subtype)
+        if (report_type, subtype) in self._full_variants:
+            # Before the store stage wipes it: markets that disappear changed too
+            self._add_changes(report_type, subtype, self._market_codes(report_type, subtype))
+        bytes0 = self.downloader.bytes_downloaded
+        reset = force_reload and not checkpoints.reached(report_type, subtype, "reset", "stored")
+        yield _Chunk(report_type, subtype, "begin", reset=reset)
 
         # Determine which years to skip
         current_year = datetime.now().year
+        years = range(current_year - cot_settings.years_to_download + 1, current_year + 1)
         skip_years: set[int] = set()
         if not force_reload:
-            for year in range(current_year - cot_settings.years_to_download + 1, current_year + 1):
+            for year in years:
                 if self.store.is_year_downloaded(year, report_type, subtype):
                     skip_years.add(year)
             if skip_years:
                 logger.info("Skipping already-downloaded years: %s", sorted(skip_years))
+        metrics.add(report_type, subtype, years_skipped=len(skip_years))
+
+        # Resume: years the interrupted run stored, or downloaded and kept
+        stored = {y for y in years if checkpoints.reached(report_type, subtype, year_unit(y), "stored")}
+        kept = {y for y in years if y not in stored and resumed.get(year_unit(y), {}).get("artifact")}
+        if stored - skip_years:
+            logger.info("Resume: years already stored: %s", sorted(stored - skip_years))
+        skip_years |= stored
+
+        try:
+            for year in sorted(kept - skip_years):
+                text = checkpoints.load_download(report_type, subtype, year_unit(year))
+                if text is not None:
+                    logger.info("Resume: re-parsing kept download of %s/%s year %d", report_type, subtype, year)
+                    skip_years.add(year)
+                    metrics.add(report_type, subtype, years_resumed=1)
+                    yield _Chunk(report_type, subtype, "year", year=year, text=text)
+
+            fetched = self.downloader.iter_years(report_type, subtype, skip_years=skip_years)
+            for year, csv_text in metrics.timed(report_type, subtype, "download", fetched):
+                metrics.add(report_type, subtype, years_fetched=1)
+                checkpoints.save_download(report_type, subtype, year_unit(year), csv_text)
+                yield _Chunk(report_type, subtype, "year", year=year, text=csv_text)
+            if not checkpoints.reached(report_type, subtype, "current", "stored"):
+                with metrics.timer(report_type, subtype, "download"):
+                    current_week_text = self.downloader.download_current_week(report_type, subtype)
+                if current_week_text:
+                    yield _Chunk(report_type, subtype, "current", text=current_week_text)
+        except (OSError, ValueError, RuntimeError) as e:
+            # Still close the variant, so what is stored gets computed and exported
+            logger.error("Download failed %s/%s: %s", report_type, subtype, e, exc_info=True)
+        metrics.add(report_type, subtype, bytes_downloaded=self.downloader.bytes_downloaded - bytes0)
+        yield _Chunk(report_type, subtype, "end")
+
+    def _parse(self, chunk: _Chunk) -> Iterator[_Chunk]:
+        rt, st = chunk.report_type, chunk.subtype
+        with self._metrics.timer(rt, st, "parse"):
+            if chunk.kind == "year":
+                chunk.rows = self.parser.parse_yearly_csv(chunk.text, rt, st)
+            elif chunk.kind == "current":
+                chunk.rows = self.parser.parse_current_week(chunk.text, rt, st)
+        chunk.text = None
+        if chunk.rows:
+            self._metrics.add(rt, st, rows_parsed=len(chunk.rows))
+        if chunk.kind == "year":
+            self._checkpoints.mark(rt, st, year_unit(chunk.year), "parsed", len(chunk.rows or ()))
+        yield chunk
 
-        # Download + parse yearly data
-        yearly_data = self.downloader.download_all_years(report_type, subtype, skip_years=skip_years)
-        for year, csv_text in sorted(yearly_data.items()):
-            rows = self.parser.parse_yearly_csv(csv_text, report_type, subtype)
-            if rows:
-                count = self.store.upsert_rows(rows)
-                self.store.log_download(report_type, subtype, year, count)
-                logger.info("Year %d: stored %d rows", year, count)
-
-        # Download + parse current week
-        current_week_text = self.downloader.download_current_week(report_type, subtype)
-        if current_week_text:
-            rows = self.parser.parse_current_week(current_week_text, report_type, subtype)
-            if rows:
-                count = self.store.upsert_rows(rows)
-                logger.info("Current week: stored %d rows", count)
+    def _store(self, chunk: _Chunk) -> Iterator[_Chunk]:
+        rt, st = chunk.report_type, chunk.subtype
+        with self._db_write, self._metrics.timer(rt, st, "store"):
+            if chunk.kind == "begin" and chunk.reset:
+                self.store.delete_report_data(rt, st)
+                self._checkpoints.mark(rt, st, "reset", "stored")
+            elif chunk.kind == "year" and not chunk.rows:
+                self._checkpoints.mark(rt, st, year_unit(chunk.year), "stored", 0)
+            elif chunk.kind in ("year", "current") and chunk.rows:
+                self._stored_variants.add((rt, st))
+                count = len(chunk.rows)
+                changed_codes = self.store.upsert_market_rows(chunk.rows)
+                changed = sum(changed_codes.values())
+                self._add_changes(rt, st, changed_codes)
+                self._metrics.add(rt, st, rows_upserted=count, rows_changed=changed)
+                if chunk.kind == "year":
+                    self.store.log_download(rt, st, chunk.year, count)
+                    self._checkpoints.mark(rt, st, year_unit(chunk.year), "stored", count)
+                    self._progress({"step": "stored", "variant": f"{rt}_{st}", "year": chunk.year, "rows": count})
+                    logger.info("%s/%s year %d: stored %d rows (%d changed)", rt, st, chunk.year, count, changed)
+                else:
+                    self._checkpoints.mark(rt, st, "current", "stored", count)
+                    logger.info("%s/%s current week: stored %d rows (%d changed)", rt, st, count, changed)
+        if chunk.kind == "end":
+            yield chunk
 
+    def _compute(self, chunk: _Chunk, rebuild_snapshots: bool) -> Iterator[tuple[str, str]]:
+        report_type, subtype = chunk.report_type, chunk.subtype
         stats = self.store.get_db_stats(report_type, subtype)
         logger.info(
             "%s/%s: %d records, %d markets, range %s — %s",
@@ -204,3 +420,111 @@ class CotPipeline:
             stats["total_records"], stats["total_markets"],
             stats["first_date"], stats["last_date"],
         )
+
+        codes = self._changed_codes(report_type, subtype)
+        if codes is None:
+            self._add_changes(report_type, subtype, self._market_codes(report_type, subtype))
+
+        # Materialise screener snapshots for the new weeks and the sector series
+        if (
+            self._checkpoints.reached(report_type, subtype, "compute", "stored")
+            and (report_type, subtype) not in self._stored_variants
+        ):
+            logger.info("Resume: %s/%s snapshots already computed", report_type, subtype)
+        elif (
+            codes == set() and not rebuild_snapshots
+            and self.store.has_screener_snapshots(report_type, subtype)
+            and self.store.has_sector_series(report_type, subtype)
+        ):
+            logger.info("%s/%s: no market changed, snapshots left as they are", report_type, subtype)
+        else:
+            with self._db_write, self._metrics.timer(report_type, subtype, "compute"):
+                ScreenerSnapshots(self.store).update(
+                    report_type, subtype, rebuild=rebuild_snapshots,
+                    codes=None if rebuild_snapshots else codes,
+                )
+                SectorAggregates(self.store).update(report_type, subtype)
+            self._checkpoints.mark(report_type, subtype, "compute", "stored")
+        self._progress({"step": "computed", "variant": f"{report_type}_{subtype}"})
+        yield report_type, subtype
+
+
+class _PriceStage:
+    """Price bars for every market the export will see.
+
+    ``seed`` downloads (or, with *skip_prices*, reads the daily job's
+    cache for) the markets already in the database — while the COT
+    ingest is still running; ``top_up`` then fetches only markets a
+    stored variant added, and passes the variant on with a snapshot of
+    the prices gathered so far.
+    """
+
+    def __init__(
+        self,
+        store: CotStorage,
+        variants: list[tuple[str, str]],
+        skip_prices: bool,
+        metrics: RunMetrics,
+    ) -> None:
+        self.store = store
+        self.metrics = metrics
+        self.variants = variants
+        self.skip_prices = skip_prices
+        self.price_data: dict[str, list[dict]] = {}
+        self.covered: set[str] = set()
+        self._service: PriceService | None = None
+
+    @property
+    def changed_codes(self) -> set[str]:
+        """Codes whose stored price bars the downloads inserted or revised."""
+        return set(self._service.changed_codes) if self._service is not None else set()
+
+    def seed(self) -> None:
+        codes = {m["code"] for rt, st in self.variants for m in self.store.get_all_markets(rt, st)}
+        self._fetch(codes)
+
+    def top_up(self, variant: tuple[str, str]) -> Iterator[tuple[str, str, dict]]:
+        rt, st = variant
+        self._fetch({m["code"] for m in self.store.get_all_markets(rt, st)})
+        yield rt, st, dict(self.price_data)
+
+    def _fetch(self, codes: set[str]) -> None:
+        codes = codes - self.covered
+        if not codes:
+            return
+        self.covered |= codes
+        t0 = time.perf_counter()
+        if self._service is None:
+            self._service = PriceService()
+        price_svc = self._service
+
+        cache_hits = 0
+        if not self.skip_prices:
+            # Full download (used on first run or manual trigger)
+            try:
+                fetched = price_svc.refresh_all(sorted(codes))
+                logger.info("Downloaded prices for %d markets", len(fetched))
+            except (OSError, ValueError, RuntimeError) as e:
+                logger.warning("Price download failed: %s", e)
+                fetched = {}
+        else:
+            # Use cached prices from the daily 00:00 job
+            fetched = price_svc.get_all_cached(sorted(codes))
+            cache_hits = len(fetched)
+            logger.info("Using %d cached price entries (skip_prices=True)", len(fetched))
+            # Fallback: if cache is empty (e.g. first run after restart),
+            # download anyway so the export isn't price-less.
+            if not fetched:
+                logger.info("Cache empty — downloading prices as fallback")
+                try:
+                    fetched = price_svc.refresh_all(sorted(codes))
+                    logger.info("Fallback downloaded prices for %d markets", len(fetched))
+                except (OSError, ValueError, RuntimeError) as e:
+                    logger.warning("Fallback price download failed: %s", e)
+        self.price_data.update(fetched)
+        self.metrics.add_prices(
+            requested=len(codes),
+            price_cache_hits=cache_hits,
+            downloaded=len(fetched) - cache_hits,
+            seconds=time.perf_counter() - t0,
+        )
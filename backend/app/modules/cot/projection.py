@@ -0,0 +1,254 @@
+"""
+COT module — Field projection and date-range slicing.
+=======================================================
+Parses the ``fields`` / ``from`` / ``to`` query parameters shared by the
+market detail, dashboard and screener endpoints into a normalised
+``FieldProjection``.  The projection is pushed down into
+``CotStorage`` (column selection, date filter) and ``CotCalculator``
+(only requested series are computed), and its ``cache_key`` is used to
+key cached variants.
+
+Field tokens:
+  - week-level: ``open_interest``, ``oi_change``, ``oi_pct``
+  - per-group kind for every group: ``net``, ``cot_index_1y``, ...
+  - per-group kind for one group: ``g3_net``, ``g1_cot_index_3y``, ...
+
+``spread`` is a raw position only the dashboard serves; the market detail
+and screener endpoints reject it (``require_computed``).
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.modules.cot.config import cot_settings
+
+WEEK_FIELDS: tuple[str, ...] = ("open_interest", "oi_change", "oi_pct")
+
+GROUP_FIELDS: tuple[str, ...] = (
+    "long", "short", "spread", "net", "change", "change_long", "change_short",
+    "pct_net_oi", "cot_index_3m", "cot_index_1y", "cot_index_3y", "wci", "crowded",
+)
+
+# Kinds the dashboard serves from raw columns but CotCalculator never computes
+DASHBOARD_ONLY_FIELDS: frozenset[str] = frozenset({"spread"})
+
+# Raw DB columns each field depends on ({g} = group key)
+_WEEK_FIELD_COLS: dict[str, tuple[str, ...]] = {
+    "open_interest": ("open_interest",),
+    "oi_change": ("oi_change",),
+    "oi_pct": ("open_interest", "oi_change"),
+}
+_NET_COLS = ("{g}_long", "{g}_short")
+_GROUP_FIELD_COLS: dict[str, tuple[str, ...]] = {
+    "long": ("{g}_long",),
+    "short": ("{g}_short",),
+    "spread": ("{g}_spread",),
+    "net": _NET_COLS,
+    "change": ("{g}_long_change", "{g}_short_change"),
+    "change_long": ("{g}_long_change",),
+    "change_short": ("{g}_short_change",),
+    "pct_net_oi": (*_NET_COLS, "open_interest"),
+    "cot_index_3m": _NET_COLS,
+    "cot_index_1y": _NET_COLS,
+    "cot_index_3y": _NET_COLS,
+    "wci": _NET_COLS,
+    "crowded": _NET_COLS,
+}
+
+# Kinds that are derived from the net position series
+NET_DERIVED: frozenset[str] = frozenset({
+    "net", "pct_net_oi", "cot_index_3m", "cot_index_1y", "cot_index_3y", "wci", "crowded",
+})
+
+_GROUP_TOKEN_RE = re.compile(r"^(g[1-5])_(.+)$")
+_DATE_FMT = "%Y-%m-%d"
+
+
+def _history_weeks(kind: str) -> int:
+    """Rows older than the first returned week that *kind*'s rolling window needs."""
+    cfg = cot_settings
+    if kind == "cot_index_3m":
+        return cfg.cot_index_3m
+    if kind in ("cot_index_1y", "crowded"):
+        return cfg.cot_index_1y
+    if kind == "cot_index_3y":
+        return cfg.cot_index_3y
+    if kind == "wci":
+        return cfg.wci_lookback
+    return 0
+
+
+@dataclass(frozen=True)
+class FieldProjection:
+    """Normalised set of requested fields plus an optional date range.
+
+    ``fields=None`` means "everything" (the historical, unprojected payload).
+    """
+
+    fields: frozenset[str] | None = None
+    date_from: str | None = None
+    date_to: str | None = None
+
+    # ------------------------------------------------------------------
+    # Parsing
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def parse(
+        cls,
+        fields: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> "FieldProjection":
+        """Build a projection from raw query parameters.
+
+        Raises:
+            ValueError: On unknown field tokens or malformed dates.
+        """
+        parsed: frozenset[str] | None = None
+        if fields is not None and fields.strip():
+            tokens = {t.strip().lower() for t in fields.split(",") if t.strip()}
+            for token in tokens:
+                if not cls._is_valid_token(token):
+                    raise ValueError(f"Unknown field '{token}'")
+            # g3_net is redundant when net (all groups) is requested
+            parsed = frozenset(
+                t for t in tokens
+                if not ((m := _GROUP_TOKEN_RE.match(t)) and m.group(2) in tokens)
+            )
+
+        date_from = cls.parse_date(date_from, "from")
+        date_to = cls.parse_date(date_to, "to")
+        if date_from and date_to and date_from > date_to:
+            raise ValueError("'from' must not be after 'to'")
+
+        return cls(fields=parsed, date_from=date_from, date_to=date_to)
+
+    @staticmethod
+    def _is_valid_token(token: str) -> bool:
+        if token in WEEK_FIELDS or token in GROUP_FIELDS:
+            return True
+        m = _GROUP_TOKEN_RE.match(token)
+        return bool(m) and m.group(2) in GROUP_FIELDS
+
+    def require_computed(self) -> None:
+        """Reject dashboard-only tokens (``spread``, ``g1_spread``) on computed payloads.
+
+        Raises:
+            ValueError: If a requested field is never computed by ``CotCalculator``.
+        """
+        for token in sorted(self.fields or ()):
+            m = _GROUP_TOKEN_RE.match(token)
+            if (m.group(2) if m else token) in DASHBOARD_ONLY_FIELDS:
+                raise ValueError(f"Field '{token}' is only available on the dashboard")
+
+    @staticmethod
+    def parse_date(value: str | None, name: str) -> str | None:
+        """Normalise an optional YYYY-MM-DD query value (None when blank)."""
+        if value is None or not value.strip():
+            return None
+        try:
+            return datetime.strptime(value.strip(), _DATE_FMT).strftime(_DATE_FMT)
+        except ValueError:
+            raise ValueError(f"'{name}' must be a date in YYYY-MM-DD format") from None
+
+    # ------------------------------------------------------------------
+    # Identity
+    # ------------------------------------------------------------------
+
+    @property
+    def is_full(self) -> bool:
+        """True when no field restriction and no date range is applied."""
+        return self.fields is None and self.date_from is None and self.date_to is None
+
+    @property
+    def has_range(self) -> bool:
+        return self.date_from is not None or self.date_to is not None
+
+    @property
+    def cache_key(self) -> str:
+        """Stable key for cached variants (token order does not matter)."""
+        f = ",".join(sorted(self.fields)) if self.fields is not None else "all"
+        return f"{f}|{self.date_from or ''}|{self.date_to or ''}"
+
+    def without_range(self) -> "FieldProjection":
+        return FieldProjection(fields=self.fields)
+
+    # ------------------------------------------------------------------
+    # Field selection
+    # ------------------------------------------------------------------
+
+    def wants_week(self, name: str) -> bool:
+        return self.fields is None or name in self.fields
+
+    def group_kinds(self, gk: str) -> frozenset[str]:
+        """All kinds requested for group *gk*."""
+        if self.fields is None:
+            return frozenset(GROUP_FIELDS)
+        return frozenset(
+            k for k in GROUP_FIELDS if k in self.fields or f"{gk}_{k}" in self.fields
+        )
+
+    def select_groups(self, groups: list[dict]) -> list[dict]:
+        """Groups with at least one requested kind (order preserved)."""
+        if self.fields is None:
+            return groups
+        return [g for g in groups if self.group_kinds(g["key"])]
+
+    def query_columns(self, groups: list[dict], always: tuple[str, ...] = ()) -> list[str] | None:
+        """Raw DB columns needed to serve this projection (None = all)."""
+        if self.fields is None:
+            return None
+        cols: set[str] = set(always)
+        for name in WEEK_FIELDS:
+            if self.wants_week(name):
+                cols.update(_WEEK_FIELD_COLS[name])
+        for g in groups:
+            gk = g["key"]
+            for kind in self.group_kinds(gk):
+                cols.update(c.format(g=gk) for c in _GROUP_FIELD_COLS[kind])
+        return sorted(cols)
+
+    def history_rows(self, groups: list[dict], extra: int = 0) -> int:
+        """Rows older than ``date_from`` needed by the longest requested window."""
+        rows = extra
+        for g in groups:
+            for kind in self.group_kinds(g["key"]):
+                rows = max(rows, _history_weeks(kind))
+        return rows
+
+    def screener_keys(self, groups: list[dict]) -> set[str] | None:
+        """Screener row keys allowed by this projection (None = all)."""
+        if self.fields is None:
+            return None
+        keys = {"code", "name", "exchange_code", "category", "category_display", "date", "signals"}
+        keys.update(n for n in ("open_interest", "oi_change") if self.wants_week(n))
+        for g in groups:
+            gk = g["key"]
+            kinds = self.group_kinds(gk)
+            for kind in ("long", "short", "net", "change", "change_long", "change_short"):
+                if kind in kinds:
+                    keys.add(f"{gk}_{kind}")
+            if "pct_net_oi" in kinds:
+                keys.update((f"{gk}_pct_oi", f"{gk}_pct_oi_change"))
+            if "cot_index_1y" in kinds:
+                keys.add(f"cot_{gk}_1y")
+            if "crowded" in kinds:
+                keys.update((f"crowded_{gk}", f"signal_{gk}"))
+        return keys
+
+    # ------------------------------------------------------------------
+    # Date range
+    # ------------------------------------------------------------------
+
+    def in_range(self, date: str | None) -> bool:
+        if date is None:
+            return False
+        if self.date_from and date < self.date_from:
+            return False
+        return not (self.date_to and date > self.date_to)
+
+
+# Shared default — the full, unprojected payload
+FULL_PROJECTION = FieldProjection()
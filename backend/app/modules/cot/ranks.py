@@ -0,0 +1,206 @@
+"""
+COT module — Percentile-rank history.
+=======================================
+Per-market lookup structures that rank a value against any trailing
+window of a group's positioning history without re-sorting the window.
+
+``RankHistory`` keeps one weekly series (oldest → newest, missing weeks
+skipped) as:
+
+  - the sorted distinct values (value → rank by ``bisect``)
+  - a wavelet matrix over the value ranks: one prefix count of zero bits
+    per level, so "how many values in positions lo..hi are ≤ v" is one
+    step per level — O(log n) per query instead of sorting the window
+  - prefix sums of the (centred) values and their squares, so a
+    window's mean and standard deviation are O(1)
+
+Percentile and Z-score follow ``analytics.percentile`` / ``z_score``
+(window ``series[i : i + lookback]`` of the newest-first series, i.e.
+the week itself and the ``lookback - 1`` weeks before it).
+"""
+
+import logging
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.modules.cot.analytics import clamp_percentile, js_round
+
+logger = logging.getLogger(__name__)
+
+RANK_KINDS: tuple[str, ...] = ("net", "long", "short")
+DEFAULT_LOOKBACKS: tuple[int, ...] = (52, 156, 260)
+
+_SERIES_KEY_RE = re.compile(rf"^g[1-5]_(?:{'|'.join(RANK_KINDS)})$")
+
+
+class RankHistory:
+    """Window rank / mean / deviation queries over one weekly series."""
+
+    def __init__(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        present = ~np.isnan(values)
+        self._weeks = np.flatnonzero(present).tolist()  # week index of each stored value
+        vals = values[present]
+        self._values = vals.tolist()
+        self._sorted = np.unique(vals).tolist()
+
+        # Wavelet matrix over value ranks, most significant bit first
+        codes = np.searchsorted(np.array(self._sorted), vals).astype(np.int64)
+        self._levels: list[tuple[list[int], int]] = []
+        for bit in reversed(range(max(1, (len(self._sorted) - 1).bit_length()))):
+            ones = (codes >> bit) & 1
+            zeros_before = np.concatenate(([0], np.cumsum(ones == 0)))
+            self._levels.append((zeros_before.tolist(), int(zeros_before[-1])))
+            codes = np.concatenate((codes[ones == 0], codes[ones == 1]))
+
+        # Prefix sums for window moments, centred for conditioning
+        self._shift = float(vals.mean()) if len(vals) else 0.0
+        centred = vals - self._shift
+        self._sum = np.concatenate(([0.0], np.cumsum(centred))).tolist()
+        self._sum_sq = np.concatenate(([0.0], np.cumsum(centred * centred))).tolist()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def window(self, week: int, lookback: int) -> tuple[int, int]:
+        """Stored positions ``[lo, hi)`` of weeks ``week - lookback + 1 .. week``."""
+        hi = bisect_right(self._weeks, week)
+        lo = bisect_right(self._weeks, week - lookback, 0, hi)
+        return lo, hi
+
+    def value(self, week: int) -> float | None:
+        i = bisect_left(self._weeks, week)
+        return self._values[i] if i < len(self._weeks) and self._weeks[i] == week else None
+
+    def count_at_most(self, lo: int, hi: int, value: float) -> int:
+        """Values at positions ``[lo, hi)`` that are ≤ *value*."""
+        code = bisect_right(self._sorted, value)  # ranks below this are ≤ value
+        if code >= len(self._sorted):
+            return hi - lo
+        below = 0
+        for bit, (zeros_before, zeros) in zip(
+            reversed(range(len(self._levels))), self._levels, strict=True,
+        ):
+            z_lo, z_hi = zeros_before[lo], zeros_before[hi]
+            if (code >> bit) & 1:
+                below += z_hi - z_lo
+                lo, hi = zeros + lo - z_lo, zeros + hi - z_hi
+            else:
+                lo, hi = z_lo, z_hi
+        return below
+
+    def is_flat(self, lo: int, hi: int) -> bool:
+        """Whether every value at positions ``[lo, hi)`` is the same.
+
+        Exact, unlike a variance from the prefix sums, which cancels to
+        a tiny non-zero value on a flat window.
+        """
+        if hi - lo < 2:
+            return True
+        value = self._values[hi - 1]
+        below = bisect_left(self._sorted, value)  # ranks below the window's last value
+        smaller = self.count_at_most(lo, hi, self._sorted[below - 1]) if below else 0
+        return smaller == 0 and self.count_at_most(lo, hi, value) == hi - lo
+
+    def percentile(self, week: int, lookback: int, value: float | None = None) -> float | None:
+        """Percentile (1–99) of *value* (default: the week's own) in the week's window."""
+        value = self.value(week) if value is None else value
+        lo, hi = self.window(week, lookback)
+        n = hi - lo
+        if value is None or n < 2:
+            return None
+        count = self.count_at_most(lo, hi, value)
+        return float(clamp_percentile(((count - 0.5) / n) * 100))
+
+    def z_score(self, week: int, lookback: int, value: float | None = None) -> float | None:
+        """Population Z-score of *value* (default: the week's own) in the week's window, to 0.01."""
+        value = self.value(week) if value is None else value
+        lo, hi = self.window(week, lookback)
+        n = hi - lo
+        if value is None or n < 2:
+            return None
+        if self.is_flat(lo, hi):
+            return 0.0
+        mean = (self._sum[hi] - self._sum[lo]) / n
+        var = max((self._sum_sq[hi] - self._sum_sq[lo]) / n - mean * mean, 0.0)
+        std = var ** 0.5
+        return float(js_round(((value - self._shift - mean) / std) * 100) / 100)
+
+
+@dataclass(frozen=True)
+class MarketRanks:
+    """``RankHistory`` of every group's net / long / short series of one market variant."""
+
+    dates: list[str]  # oldest → newest
+    series: dict[str, RankHistory]  # "g1_net" …
+
+    @classmethod
+    def build(cls, dates: list[str], columns: dict[str, list]) -> "MarketRanks":
+        """From dashboard columns (oldest → newest, None for missing weeks)."""
+        series = {
+            key: RankHistory(np.array(values, dtype=np.float64))
+            for key, values in columns.items()
+            if _SERIES_KEY_RE.match(key)
+        }
+        return cls(dates=dates, series=series)
+
+    def week(self, date: str | None = None) -> int:
+        """Index of the latest week on or before *date* (default: the latest).
+
+        Raises:
+            ValueError: If *date* is before the first week.
+        """
+        if date is None:
+            return len(self.dates) - 1
+        i = bisect_right(self.dates, date) - 1
+        if i < 0:
+            raise ValueError(f"No data on or before {date}")
+        return i
+
+    def rank(
+        self, key: str, lookback: int, date: str | None = None, value: float | None = None,
+    ) -> dict:
+        """Percentile / Z-score of *value* (default: the week's own) for one series.
+
+        Raises:
+            ValueError: On an unknown series or a date before the history.
+        """
+        history = self.series.get(key)
+        if history is None:
+            raise ValueError(f"No '{key}' series for this market")
+        week = self.week(date)
+        lo, hi = history.window(week, lookback)
+        first = max(week - lookback + 1, 0)
+        return {
+            "series": key,
+            "date": self.dates[week],
+            "lookback_weeks": lookback,
+            "window_from": self.dates[first],
+            "window_to": self.dates[week],
+            "observations": hi - lo,
+            "value": history.value(week) if value is None else value,
+            "percentile": history.percentile(week, lookback, value),
+            "z_score": history.z_score(week, lookback, value),
+        }
+
+    def summary(self, keys: list[str], lookbacks: tuple[int, ...] = DEFAULT_LOOKBACKS) -> dict:
+        """Latest week's percentile / Z-score of each series in *keys* per lookback."""
+        week = len(self.dates) - 1
+        series: dict[str, dict] = {}
+        for key in keys:
+            history = self.series.get(key)
+            if history is None:
+                continue
+            series[key] = {
+                "value": history.value(week),
+                "percentile": [history.percentile(week, lb) for lb in lookbacks],
+                "z_score": [history.z_score(week, lb) for lb in lookbacks],
+            }
+        return {
+            "date": self.dates[week] if self.dates else None,
+            "lookbacks": list(lookbacks),
+            "series": series,
+        }
@@ -8,19 +8,35 @@ import asyncio
 import logging
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 
+from app.modules.cot import binary
+from app.modules.cot.config import cot_settings
 from app.modules.cot.dependencies import get_cot_service
 from app.modules.cot.service import CotService
+from app.modules.cot.market_index import invalidate_market_index
+from app.modules.cot.search_index import invalidate_search_index
+from app.modules.cot.projection import FieldProjection
+from app.modules.cot.screener_index import ScreenerIndex, ScreenerQuery
+from app.modules.cot.alerts import evaluate_alerts
+from app.modules.cot.changes import MarketChanges, codes_by_variant
+from app.modules.cot.backtest import SignalPanel
+from app.modules.cot.correlation import (
+    DEFAULT_MIN_PERIODS, DEFAULT_WINDOW, PositioningMatrix, correlation_payload, rolling_payload,
+)
 from app.modules.cot.scheduler import get_update_status, cot_update_manager
 from app.modules.prices.scheduler import price_update_manager, get_price_update_status
 from app.modules.cot.schemas import (
-    MarketMeta, MarketDetailResponse, ScreenerRow,
+    MarketMeta, MarketDetailPayload, ScreenerRow,
     GroupDef, StatusResponse, PaginatedResponse,
-    DashboardResponse,
+    DashboardPayload, DashboardAnalyticsResponse, BatchRequest, BatchResult,
+    BacktestResponse, CorrelationResponse, RollingCorrelationResponse, SectorsResponse,
+    AlertRule, AlertRuleCreate, AlertsReadRequest, SearchResponse, RankResponse,
 )
 from app.core.cache import TTLCache
-from app.middleware.auth import require_permission
+from app.core.models import User
+from app.middleware.auth import get_current_active_user, require_permission
 
 logger = logging.getLogger(__name__)
 
@@ -38,25 +54,106 @@ MARKET_CACHE_TTL = 600       # 10 min — individual market detail
 SCREENER_CACHE_TTL = 300     # 5 min — screener table
 MARKETS_LIST_CACHE_TTL = 600 # 10 min — markets list
 DASHBOARD_CACHE_TTL = 600    # 10 min — dashboard data
+ANALYTICS_CACHE_TTL = 600    # 10 min — dashboard analytics (keyed by data version)
+BACKTEST_CACHE_TTL = 3600    # 1 h — signal panels / backtests (keyed by data version)
+CORRELATION_CACHE_TTL = 3600 # 1 h — positioning matrices / correlations (keyed by data version)
+SECTOR_CACHE_TTL = 600       # 10 min — sector aggregate series
+RANKS_CACHE_TTL = 3600       # 1 h — percentile-rank structures (keyed by data version)
 
 _market_cache = TTLCache(name="cot.market", default_ttl=MARKET_CACHE_TTL)
 _screener_cache = TTLCache(name="cot.screener", default_ttl=SCREENER_CACHE_TTL)
 _markets_list_cache = TTLCache(name="cot.markets_list", default_ttl=MARKETS_LIST_CACHE_TTL)
 _dashboard_cache = TTLCache(name="cot.dashboard", default_ttl=DASHBOARD_CACHE_TTL)
+_analytics_cache = TTLCache(name="cot.analytics", default_ttl=ANALYTICS_CACHE_TTL)
+_backtest_cache = TTLCache(name="cot.backtest", default_ttl=BACKTEST_CACHE_TTL)
+_correlation_cache = TTLCache(name="cot.correlation", default_ttl=CORRELATION_CACHE_TTL)
+_sector_cache = TTLCache(name="cot.sectors", default_ttl=SECTOR_CACHE_TTL)
+_ranks_cache = TTLCache(name="cot.ranks", default_ttl=RANKS_CACHE_TTL)
+
+
+# Subtype → requested subtypes its data may answer: a dashboard asked for
+# "fo" is served from "co" when the market has no futures-only data
+# (``MarketEntry.resolve``), and is cached under the requested one
+_SERVED_FOR: dict[str, tuple[str, ...]] = {"co": ("co", "fo")}
 
 
-def invalidate_cot_caches() -> None:
-    """Called after a pipeline update to clear all COT caches."""
-    _market_cache.invalidate()
-    _screener_cache.invalidate()
-    _markets_list_cache.invalidate()
-    _dashboard_cache.invalidate()
-    logger.info("All COT caches invalidated")
+def _market_prefixes(changes: MarketChanges, ranks: bool = True) -> dict[TTLCache, list[str]]:
+    """Cache key prefixes of the changed markets' detail / dashboard / analytics entries."""
+    prefixes: dict[TTLCache, list[str]] = {
+        _market_cache: [], _dashboard_cache: [], _analytics_cache: [], _ranks_cache: [],
+    }
+    for (rt, st), codes in codes_by_variant(changes).items():
+        for code in codes:
+            prefixes[_market_cache].append(f"market:{code}:{rt}:{st}:")
+            # Auto-detected report type: any variant of the subtype may be the primary one
+            for requested in _SERVED_FOR.get(st, (st,)):
+                prefixes[_dashboard_cache] += [
+                    f"dashboard:{code}:{rt}:{requested}:", f"dashboard:{code}:auto:{requested}:",
+                ]
+            prefixes[_analytics_cache].append(f"analytics:{code}:{rt}:{st}:")
+            if ranks:
+                prefixes[_ranks_cache].append(f"ranks:{code}:{rt}:{st}:")
+    return prefixes
+
+
+def invalidate_cot_caches(changes: MarketChanges | None = None) -> None:
+    """Called after a pipeline update to clear the COT caches.
+
+    With *changes* (the run's ``(code, variant)`` keys) only the changed
+    markets' entries and the cross-market entries of their variants are
+    dropped; without, everything is.
+    """
+    if changes is None:
+        for cache in (
+            _market_cache, _screener_cache, _markets_list_cache, _dashboard_cache, _analytics_cache,
+            _backtest_cache, _correlation_cache, _sector_cache, _ranks_cache,
+        ):
+            cache.invalidate()
+        invalidate_market_index()
+        invalidate_search_index()
+        logger.info("All COT caches invalidated")
+        return
+    if not changes:
+        logger.info("No market changed — COT caches kept")
+        return
+
+    prefixes = _market_prefixes(changes)
+    for rt, st in codes_by_variant(changes):
+        prefixes.setdefault(_markets_list_cache, []).append(f"markets:{rt}:{st}")
+        prefixes.setdefault(_screener_cache, []).extend(
+            (f"screener:{rt}:{st}:", f"concentration:{rt}:{st}", f"screener-v2:{st}")
+        )
+        prefixes.setdefault(_correlation_cache, []).extend(
+            (f"correlation-matrix:{rt}:{st}:", f"correlation:{rt}:{st}:")
+        )
+        prefixes.setdefault(_backtest_cache, []).extend(
+            (f"backtest:{rt}:{st}:", f"backtest-panel:{rt}:{st}:")
+        )
+        prefixes.setdefault(_sector_cache, []).append(f"sectors:{rt}:{st}:")
+    cleared = sum(cache.invalidate_prefixes(p) for cache, p in prefixes.items())
+    # Market / search indexes span every variant: rebuilt on next use
+    invalidate_market_index()
+    invalidate_search_index()
+    logger.info("COT caches invalidated for %d changed markets (%d entries)", len(changes), cleared)
+
+
+def invalidate_price_caches(changes: MarketChanges) -> None:
+    """Called after the daily price update: drop the entries that embed
+    the changed markets' prices (detail, dashboard, analytics) and the
+    backtests of their variants."""
+    prefixes = _market_prefixes(changes, ranks=False)
+    prefixes[_backtest_cache] = [
+        p for rt, st in codes_by_variant(changes)
+        for p in (f"backtest:{rt}:{st}:", f"backtest-panel:{rt}:{st}:")
+    ]
+    cleared = sum(cache.invalidate_prefixes(p) for cache, p in prefixes.items())
+    logger.info("Price caches invalidated for %d changed markets (%d entries)", len(changes), cleared)
 
 
 # Register so scheduler can trigger cache invalidation without importing router
 cot_update_manager.on_pipeline_complete(invalidate_cot_caches)
-price_update_manager.on_complete(invalidate_cot_caches)
+cot_update_manager.on_pipeline_complete(evaluate_alerts)
+price_update_manager.on_complete(invalidate_price_caches)
 
 
 # ------------------------------------------------------------------
@@ -65,6 +162,110 @@ price_update_manager.on_complete(invalidate_cot_caches)
 
 ReportType = Literal["legacy", "disagg", "tff"]
 SubType = Literal["fo", "co"]
+WeeksFormat = Literal["rows", "columnar"]
+DisplayRange = Literal["1M", "3M", "6M", "1Y", "2Y", "3Y", "5Y"]
+GroupKey = Literal["g1", "g2", "g3", "g4", "g5"]
+CorrelationSeries = Literal["net", "pct_net_oi", "cot_index_3m", "cot_index_1y", "cot_index_3y"]
+ConcentrationMetric = Literal[
+    "top4_long", "top4_short", "top8_long", "top8_short",
+    "top4_long_percentile", "top4_short_percentile", "top8_long_percentile", "top8_short_percentile",
+]
+
+
+def get_projection(
+    fields: str | None = Query(
+        None, description="Comma-separated fields, e.g. `net,cot_index_1y` or `g3_net`",
+    ),
+    date_from: str | None = Query(None, alias="from", description="First week (YYYY-MM-DD)"),
+    date_to: str | None = Query(None, alias="to", description="Last week (YYYY-MM-DD)"),
+) -> FieldProjection:
+    """Parse the shared ``fields`` / ``from`` / ``to`` query parameters."""
+    try:
+        return FieldProjection.parse(fields, date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from None
+
+
+def get_computed_projection(
+    projection: FieldProjection = Depends(get_projection),
+) -> FieldProjection:
+    """``get_projection`` for the calculator-backed market detail and screener."""
+    try:
+        projection.require_computed()
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from None
+    return projection
+
+
+def get_screener_query(
+    sort: str | None = Query(None, description="Screener column to sort by, e.g. `cot_g3_1y`"),
+    order: Literal["asc", "desc"] = Query("desc", description="Sort direction"),
+    category: str | None = Query(None, description="Comma-separated categories, e.g. `metals,energy`"),
+    signal: Literal["BUY", "SELL"] | None = Query(None, description="Markets with this signal"),
+    signal_group: Literal["g1", "g2", "g3", "g4", "g5"] | None = Query(
+        None, description="Restrict `signal` to one group",
+    ),
+    filter: list[str] | None = Query(
+        None, description="Numeric filter `column:op:value` (op: gt, gte, lt, lte, eq); repeatable",
+    ),
+) -> ScreenerQuery:
+    """Parse the screener filter / sort query parameters."""
+    try:
+        return ScreenerQuery.parse(sort, order, category, signal, signal_group, filter)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from None
+
+
+def _accept_quality(accept: str, media_type: str) -> float:
+    """The q-value *accept* gives *media_type*: that of the most specific
+    matching media range (``type/subtype`` over ``type/*`` over ``*/*``),
+    0 if none matches.  Ranges with a malformed q-value are skipped."""
+    main_type = media_type.split("/", 1)[0]
+    ranges = {media_type: 3, f"{main_type}/*": 2, "*/*": 1}
+    best, quality = 0, 0.0
+    for part in accept.split(","):
+        media_range, *params = (p.strip() for p in part.split(";"))
+        specificity = ranges.get(media_range.lower(), 0)
+        if specificity <= best:
+            continue
+        q: float | None = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = None
+        if q is not None:
+            best, quality = specificity, q
+    return quality
+
+
+def wants_binary(accept: str | None = Header(None)) -> bool:
+    """Whether *accept* prefers the binary payload format
+    (``application/octet-stream``) to JSON.
+
+    Compares the q-values of the two media types; on a tie (e.g.
+    ``*/*``) JSON wins, so only an explicit preference selects binary.
+    """
+    if not accept:
+        return False
+    q_binary = _accept_quality(accept, binary.MEDIA_TYPE)
+    return q_binary > 0 and q_binary > _accept_quality(accept, "application/json")
+
+
+# Extra response content type of the endpoints that honour ``wants_binary``
+_BINARY_RESPONSE = {200: {"content": {binary.MEDIA_TYPE: {}}}}
+
+
+def _dashboard_cache_key(
+    code: str,
+    report_type: str | None,
+    subtype: str,
+    format: str,
+    projection: FieldProjection,
+) -> str:
+    return f"dashboard:{code}:{report_type or 'auto'}:{subtype}:{format}:{projection.cache_key}"
 
 
 # ==================================================================
@@ -72,11 +273,17 @@ SubType = Literal["fo", "co"]
 # ==================================================================
 
 
-@router.get("/dashboard/{code}", response_model=DashboardResponse)
+@router.get(
+    "/dashboard/{code}", response_model=DashboardPayload, response_model_exclude_unset=True,
+    responses=_BINARY_RESPONSE,
+)
 async def get_dashboard(
     code: str,
     report_type: ReportType | None = None,
     subtype: SubType = "fo",
+    format: WeeksFormat = "rows",
+    projection: FieldProjection = Depends(get_projection),
+    as_binary: bool = Depends(wants_binary),
     service: CotService = Depends(get_cot_service),
 ):
     """Dashboard data for a single market.
@@ -85,20 +292,197 @@ async def get_dashboard(
     for frontend computation of percentiles, COT Index, flips, etc.
 
     If *report_type* is omitted, auto-detects the primary report
-    based on market sector.
+    based on market sector.  ``format=columnar`` returns ``columns``
+    (one array per series) instead of ``weeks``;
+    ``Accept: application/octet-stream`` returns the columnar payload
+    in the binary typed-array format.
+    """
+    if as_binary:
+        format = "columnar"
+    cache_key = _dashboard_cache_key(code, report_type, subtype, format, projection)
+    data = _dashboard_cache.get(cache_key)
+    if data is None:
+        data = await asyncio.to_thread(
+            service.get_dashboard, code, report_type, subtype, projection, format == "columnar",
+        )
+        if data is None:
+            raise HTTPException(status_code=404, detail=f"Market '{code}' not found")
+        _dashboard_cache.set(cache_key, data)
+
+    if as_binary:
+        return Response(binary.encode(data), media_type=binary.MEDIA_TYPE)
+    return data
+
+
+@router.get("/dashboard/{code}/analytics", response_model=DashboardAnalyticsResponse)
+async def get_dashboard_analytics(
+    code: str,
+    report_type: ReportType | None = None,
+    subtype: SubType = "fo",
+    range: DisplayRange = "2Y",
+    spec_group: GroupKey | None = None,
+    comm_group: GroupKey | Literal["none"] | None = None,
+    service: CotService = Depends(get_cot_service),
+):
+    """Dashboard analytics computed server-side.
+
+    Percentile / Z-score / COT Index of the spec net position, flips,
+    OI signals, velocity, sentiment divergence, market power, long/short
+    bias, triple lookback, spread percentile, histogram and the net
+    analysis series.  ``range`` sets both the weeks returned and the
+    lookback.  ``spec_group`` / ``comm_group`` override the report type's
+    default groups (``comm_group=none`` for markets without one); a group
+    the served report type does not have is a 422.
+
+    Cached per market variant and latest report date.
     """
-    cache_key = f"dashboard:{code}:{report_type or 'auto'}:{subtype}"
-    cached = _dashboard_cache.get(cache_key)
+    target = await asyncio.to_thread(service.resolve_dashboard, code, report_type, subtype)
+    if target is None:
+        raise HTTPException(status_code=404, detail=f"Market '{code}' not found")
+
+    cache_key = (
+        f"analytics:{code}:{target['report_type']}:{target['subtype']}:{target['last_date']}"
+        f":{range}:{spec_group or 'auto'}:{comm_group or 'auto'}"
+    )
+    cached = _analytics_cache.get(cache_key)
     if cached is not None:
         return cached
 
-    data = await asyncio.to_thread(service.get_dashboard, code, report_type, subtype)
+    try:
+        data = await asyncio.to_thread(
+            service.get_dashboard_analytics,
+            code, target["report_type"], target["subtype"], range, spec_group, comm_group,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from None
     if data is None:
         raise HTTPException(status_code=404, detail=f"Market '{code}' not found")
 
-    _dashboard_cache.set(cache_key, data)
+    _analytics_cache.set(cache_key, data)
     return data
 
+
+@router.get("/dashboard/{code}/rank", response_model=RankResponse)
+async def get_dashboard_rank(
+    code: str,
+    report_type: ReportType | None = None,
+    subtype: SubType = "fo",
+    group: GroupKey | None = Query(None, description="Trader group (default: the report type's spec group)"),
+    series: Literal["net", "long", "short"] = "net",
+    lookback: int = Query(52, ge=2, le=2600, description="Window length in weeks"),
+    date: str | None = Query(None, description="Rank as of this week (YYYY-MM-DD, default: latest)"),
+    value: float | None = Query(None, description="Value to rank (default: the week's own)"),
+    service: CotService = Depends(get_cot_service),
+):
+    """Percentile rank and Z-score of a position within any trailing window.
+
+    Answered from per-market sorted histories built once per data
+    version, so any lookback / week / hypothetical value is O(log n).
+    """
+    target = await asyncio.to_thread(service.resolve_dashboard, code, report_type, subtype)
+    if target is None:
+        raise HTTPException(status_code=404, detail=f"Market '{code}' not found")
+    rt, st = target["report_type"], target["subtype"]
+
+    cache_key = f"ranks:{code}:{rt}:{st}:{target['last_date']}"
+    ranks = _ranks_cache.get(cache_key)
+    if ranks is None:
+        ranks = await asyncio.to_thread(service.get_market_ranks, code, rt, st)
+        if ranks is None:
+            raise HTTPException(status_code=404, detail=f"Market '{code}' not found")
+        _ranks_cache.set(cache_key, ranks)
+
+    try:
+        result = ranks.rank(f"{group or service.spec_group(rt)}_{series}", lookback, date, value)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from None
+    return {"code": code, "report_type": rt, "subtype": st, **result}
+
+
+def _batch_line(index: int, code: str, data: dict | None, error: str | None = None) -> bytes:
+    if data is not None:
+        result = BatchResult(index=index, code=code, status=200, data=data)
+    elif error is not None:
+        result = BatchResult(index=index, code=code, status=500, error=error)
+    else:
+        result = BatchResult(
+            index=index, code=code, status=404, error=f"Market '{code}' not found",
+        )
+    return result.model_dump_json(exclude_unset=True).encode() + b"\n"
+
+
+@router.post("/batch", response_class=StreamingResponse)
+async def get_batch(
+    body: BatchRequest,
+    format: WeeksFormat = "rows",
+    projection: FieldProjection = Depends(get_projection),
+    service: CotService = Depends(get_cot_service),
+):
+    """Dashboards for several markets in one request.
+
+    Each item is ``{code, report_type?, subtype}`` as for
+    ``GET /cot/dashboard/{code}``; ``format`` / ``fields`` / ``from`` /
+    ``to`` apply to all of them.  Uncached markets are loaded with one
+    ``IN (...)`` query per report variant, then built on the executor.
+
+    The response is NDJSON: one ``{index, code, status, data | error}``
+    line per item, written as soon as that market is ready (cached
+    markets first), so lines are not in request order.
+    """
+    items = body.items
+    if len(items) > cot_settings.batch_max_markets:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {cot_settings.batch_max_markets} markets per batch",
+        )
+
+    ready: list[bytes] = []
+    pending: list[tuple[int, str]] = []  # (index, cache key)
+    for i, item in enumerate(items):
+        cache_key = _dashboard_cache_key(item.code, item.report_type, item.subtype, format, projection)
+        cached = _dashboard_cache.get(cache_key)
+        if cached is not None:
+            ready.append(_batch_line(i, item.code, cached))
+        else:
+            pending.append((i, cache_key))
+
+    # All DB reads happen here, before streaming starts
+    jobs = []
+    if pending:
+        jobs = await asyncio.to_thread(
+            service.load_dashboard_batch,
+            [(items[i].code, items[i].report_type, items[i].subtype) for i, _ in pending],
+            projection,
+        )
+
+    columnar = format == "columnar"
+
+    def build(index: int, cache_key: str, job: dict | None) -> bytes:
+        code = items[index].code
+        if job is None:
+            return _batch_line(index, code, None)
+        try:
+            data = service.build_dashboard_job(job, projection, columnar)
+        except Exception:
+            logger.exception("Batch dashboard failed for %s", code)
+            return _batch_line(index, code, None, error="Internal error")
+        _dashboard_cache.set(cache_key, data)
+        return _batch_line(index, code, data)
+
+    async def stream():
+        for line in ready:
+            yield line
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(None, build, index, cache_key, job)
+            for (index, cache_key), job in zip(pending, jobs, strict=True)
+        ]
+        for future in asyncio.as_completed(futures):
+            yield await future
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.get("/markets/{report_type}/{subtype}", response_model=list[MarketMeta])
 async def list_markets(
     report_type: ReportType,
@@ -119,33 +503,72 @@ async def list_markets(
     return markets
 
 
-@router.get("/markets/{report_type}/{subtype}/{code}", response_model=MarketDetailResponse)
+@router.get(
+    "/markets/{report_type}/{subtype}/{code}",
+    response_model=MarketDetailPayload,
+    response_model_exclude_unset=True,
+    responses=_BINARY_RESPONSE,
+)
 async def get_market(
     report_type: ReportType,
     subtype: SubType,
     code: str,
+    format: WeeksFormat = "rows",
+    projection: FieldProjection = Depends(get_computed_projection),
+    as_binary: bool = Depends(wants_binary),
     service: CotService = Depends(get_cot_service),
 ):
-    """Get full data for a single market."""
-    cache_key = f"market:{code}:{report_type}:{subtype}"
-    cached = _market_cache.get(cache_key)
-    if cached is not None:
-        return cached
+    """Get full data for a single market.
 
-    data = await asyncio.to_thread(service.get_market_detail, code, report_type, subtype)
+    ``fields`` / ``from`` / ``to`` restrict the computed series and weeks;
+    ``format=columnar`` returns ``columns`` (one array per series) instead
+    of ``weeks``; ``Accept: application/octet-stream`` returns the
+    columnar payload in the binary typed-array format.
+    """
+    if as_binary:
+        format = "columnar"
+    cache_key = f"market:{code}:{report_type}:{subtype}:{format}:{projection.cache_key}"
+    data = _market_cache.get(cache_key)
     if data is None:
-        raise HTTPException(status_code=404, detail=f"Market '{code}' not found")
+        data = await asyncio.to_thread(
+            service.get_market_detail, code, report_type, subtype, projection, format == "columnar",
+        )
+        if data is None:
+            raise HTTPException(status_code=404, detail=f"Market '{code}' not found")
+        _market_cache.set(cache_key, data)
 
-    _market_cache.set(cache_key, data)
+    if as_binary:
+        return Response(binary.encode(data), media_type=binary.MEDIA_TYPE)
     return data
 
 
+@router.get("/search", response_model=SearchResponse)
+async def search_markets(
+    q: str = Query(..., min_length=1, max_length=100, description="Name words, CFTC / commodity / exchange code or ticker"),
+    limit: int = Query(10, ge=1, le=50),
+    service: CotService = Depends(get_cot_service),
+):
+    """Find markets across all report variants.
+
+    Matches market names (word prefixes, typo-tolerant), CFTC contract
+    and commodity codes, exchange codes and Yahoo tickers; each result
+    lists the report variants it has data in.
+    """
+    items = await asyncio.to_thread(service.search_markets, q, limit)
+    return {"query": q, "items": items}
+
+
 @router.get("/screener/{report_type}/{subtype}", response_model=PaginatedResponse)
 async def get_screener(
     report_type: ReportType,
     subtype: SubType,
     limit: int = 0,
     offset: int = 0,
+    projection: FieldProjection = Depends(get_computed_projection),
+    query: ScreenerQuery = Depends(get_screener_query),
+    as_of: str | None = Query(
+        None, description="Screener as of this report date (YYYY-MM-DD), from snapshots",
+    ),
     service: CotService = Depends(get_cot_service),
 ):
     """Get screener data for all markets with optional pagination.
@@ -153,32 +576,57 @@ async def get_screener(
     Args:
         limit: Max rows to return. 0 = all (backwards compatible).
         offset: Number of rows to skip.
-
-    When limit > 0, uses SQL-level pagination (only processes the
-    requested page of markets). When limit = 0, loads everything
-    into cache and returns all rows.
+        fields: Restrict row columns (see ``FieldProjection``).
+        from / to: Screener as of ``to``; markets with no report
+            since ``from`` are skipped.
+        sort / order / category / signal / signal_group / filter:
+            Filter, sort and top-N over the cached screener
+            (see ``ScreenerQuery``), e.g. ``sort=cot_g3_1y&limit=20``.
+        as_of: Screener as of a past report date, read from the
+            per-week snapshots (cannot be combined with ``to``).
+
+    With filter / sort parameters or ``as_of``, the query runs on the
+    cached ``ScreenerIndex``.  Otherwise, when limit > 0, uses SQL-level
+    pagination (only processes the requested page of markets); when
+    limit = 0, loads everything into cache and returns all rows.
     """
+    try:
+        as_of = FieldProjection.parse_date(as_of, "as_of")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from None
+    if as_of and projection.date_to:
+        raise HTTPException(status_code=422, detail="'as_of' cannot be combined with 'to'")
+    if as_of and projection.date_from and projection.date_from > as_of:
+        raise HTTPException(status_code=422, detail="'from' must not be after 'as_of'")
+
     # SQL-paginated path: only load the requested page of markets
-    if limit > 0:
+    if limit > 0 and query.is_empty and as_of is None:
         rows, total = await asyncio.to_thread(
-            service.get_screener_page, report_type, subtype, limit, offset,
+            service.get_screener_page, report_type, subtype, limit, offset, projection,
         )
         if not rows and total == 0:
             raise HTTPException(status_code=404, detail="No screener data for this combination")
         return PaginatedResponse(items=rows, total=total, limit=limit, offset=offset)
 
-    # Full-cache path (limit=0): load everything, cache it
-    cache_key = f"screener:{report_type}:{subtype}"
-    cached = _screener_cache.get(cache_key)
-    if cached is not None:
-        rows = cached
-    else:
-        rows = await asyncio.to_thread(service.get_screener, report_type, subtype)
-        if not rows:
+    # Full-cache path: load everything, index it, cache it
+    cache_key = f"screener:{report_type}:{subtype}:{projection.cache_key}:as_of={as_of or ''}"
+    index: ScreenerIndex | None = _screener_cache.get(cache_key)
+    if index is None:
+        index = await asyncio.to_thread(
+            service.get_screener_index, report_type, subtype, projection, as_of,
+        )
+        if not index:
             raise HTTPException(status_code=404, detail="No screener data for this combination")
-        _screener_cache.set(cache_key, rows)
+        _screener_cache.set(cache_key, index)
 
-    return PaginatedResponse(items=rows, total=len(rows), limit=0, offset=0)
+    if query.is_empty and limit <= 0:
+        return PaginatedResponse(items=index.rows, total=len(index), limit=0, offset=0)
+
+    try:
+        rows, total = index.query(query, limit, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from None
+    return PaginatedResponse(items=rows, total=total, limit=limit, offset=offset)
 
 
 @router.get("/screener-v2", response_model=PaginatedResponse)
@@ -204,6 +652,235 @@ async def get_screener_v2(
     return PaginatedResponse(items=rows, total=len(rows), limit=0, offset=0)
 
 
+@router.get("/concentration/{report_type}/{subtype}", response_model=PaginatedResponse)
+async def get_concentration_ranking(
+    report_type: ReportType,
+    subtype: SubType,
+    metric: ConcentrationMetric = Query("top4_long", description="Ratio (or its 1Y percentile) to rank by"),
+    order: Literal["asc", "desc"] = Query("desc", description="Sort direction"),
+    category: str | None = Query(None, description="Comma-separated market categories"),
+    limit: int = Query(20, ge=0, description="Max rows (0 = all)"),
+    offset: int = Query(0, ge=0),
+    service: CotService = Depends(get_cot_service),
+):
+    """Markets ranked by their latest concentration ratio.
+
+    Each row has the latest top-4 / top-8 long / short ratios (% of open
+    interest held by the largest traders) and their 1Y percentile ranks;
+    e.g. ``metric=top4_short_percentile`` lists the markets whose short
+    side is unusually concentrated for them.
+    """
+    cache_key = f"concentration:{report_type}:{subtype}"
+    index: ScreenerIndex | None = _screener_cache.get(cache_key)
+    if index is None:
+        index = await asyncio.to_thread(service.get_concentration_index, report_type, subtype)
+        if not index:
+            raise HTTPException(status_code=404, detail="No concentration data for this combination")
+        _screener_cache.set(cache_key, index)
+
+    try:
+        query = ScreenerQuery.parse(sort=metric, order=order, category=category)
+        rows, total = index.query(query, limit, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from None
+    return PaginatedResponse(items=rows, total=total, limit=limit, offset=offset)
+
+
+async def _positioning_matrix(
+    service: CotService,
+    report_type: str,
+    subtype: str,
+    series: str,
+    group: str | None,
+) -> tuple[PositioningMatrix, str]:
+    """Cached (markets × weeks) matrix and the data version it was built for."""
+    version = await asyncio.to_thread(service.data_version, report_type, subtype)
+    if version is None:
+        raise HTTPException(status_code=404, detail="No data for this combination")
+
+    cache_key = f"correlation-matrix:{report_type}:{subtype}:{version}:{series}:{group or 'auto'}"
+    matrix: PositioningMatrix | None = _correlation_cache.get(cache_key)
+    if matrix is None:
+        try:
+            matrix = await asyncio.to_thread(
+                service.get_positioning_matrix, report_type, subtype, series, group,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e)) from None
+        _correlation_cache.set(cache_key, matrix)
+    return matrix, version
+
+
+@router.get("/correlation/{report_type}/{subtype}", response_model=CorrelationResponse)
+async def get_correlation(
+    report_type: ReportType,
+    subtype: SubType,
+    series: CorrelationSeries = "net",
+    group: GroupKey | None = Query(None, description="Trader group (default: the spec group)"),
+    window: int = Query(DEFAULT_WINDOW, ge=0, description="Trailing weeks; 0 = full history"),
+    to: str | None = Query(None, description="Last week of the window (YYYY-MM-DD)"),
+    min_periods: int = Query(
+        DEFAULT_MIN_PERIODS, ge=2, description="Common weeks a pair needs (capped at window)",
+    ),
+    codes: str | None = Query(None, description="Comma-separated market codes"),
+    category: str | None = Query(None, description="Comma-separated categories, e.g. `metals,rates`"),
+    service: CotService = Depends(get_cot_service),
+):
+    """Correlation matrix of one positioning series across markets.
+
+    Builds the (markets × weeks) matrix of ``series`` for ``group`` from
+    the bulk data (cached per data version) and correlates the markets
+    over the ``window`` weeks ending at ``to``, pairwise-complete (each
+    pair uses the weeks both markets reported).  Cached per window.
+    """
+    try:
+        to = FieldProjection.parse_date(to, "to")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from None
+    if window:
+        min_periods = min(min_periods, window)
+    code_list = sorted({c.strip() for c in codes.split(",") if c.strip()}) if codes else None
+    cats = sorted({c.strip().lower() for c in category.split(",") if c.strip()}) if category else None
+
+    matrix, version = await _positioning_matrix(service, report_type, subtype, series, group)
+    cache_key = (
+        f"correlation:{report_type}:{subtype}:{version}:{series}:{matrix.group}:{window}:{to or ''}"
+        f":{min_periods}:{','.join(code_list or ())}:{','.join(cats or ())}"
+    )
+    cached = _correlation_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    selected = matrix.select(code_list, set(cats) if cats else None, to, window)
+    if not selected:
+        raise HTTPException(status_code=404, detail="No markets match this selection")
+    payload = await asyncio.to_thread(correlation_payload, selected, min_periods)
+    data = {
+        "report_type": report_type, "subtype": subtype, "data_version": version,
+        "window": window, **payload,
+    }
+    _correlation_cache.set(cache_key, data)
+    return data
+
+
+@router.get(
+    "/correlation/{report_type}/{subtype}/rolling",
+    response_model=RollingCorrelationResponse,
+)
+async def get_rolling_correlation(
+    report_type: ReportType,
+    subtype: SubType,
+    a: str = Query(..., description="First market code"),
+    b: str = Query(..., description="Second market code"),
+    series: CorrelationSeries = "net",
+    group: GroupKey | None = Query(None, description="Trader group (default: the spec group)"),
+    window: int = Query(52, ge=2, description="Trailing weeks per point"),
+    min_periods: int = Query(DEFAULT_MIN_PERIODS, ge=2, description="Common weeks a point needs"),
+    service: CotService = Depends(get_cot_service),
+):
+    """Rolling correlation of two markets' positioning over their history."""
+    min_periods = min(min_periods, window)
+    matrix, version = await _positioning_matrix(service, report_type, subtype, series, group)
+    try:
+        payload = rolling_payload(matrix, a, b, window, min_periods)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from None
+    return {
+        "report_type": report_type, "subtype": subtype, "data_version": version,
+        "window": window, **payload,
+    }
+
+
+@router.get("/backtest/{report_type}/{subtype}", response_model=BacktestResponse)
+async def get_backtest(
+    report_type: ReportType,
+    subtype: SubType,
+    buy: float | None = Query(None, ge=0, le=100, description="Crowded BUY threshold (default: config)"),
+    sell: float | None = Query(None, ge=0, le=100, description="Crowded SELL threshold (default: config)"),
+    mode: Literal["onset", "weekly"] = Query("onset", description="Signal starts only, or every signal week"),
+    code: str | None = Query(None, description="Only this market"),
+    group: GroupKey | None = Query(None, description="Only this group"),
+    service: CotService = Depends(get_cot_service),
+):
+    """Backtest the Crowded Level BUY/SELL signals against price.
+
+    Every signal event of every market and group is joined with its
+    1w / 4w / 13w forward return; results are hit rate, average / median
+    return and distribution per group, and hit rate / average per market.
+    ``buy`` / ``sell`` override the configured thresholds, so they can be
+    swept: the signal panel is cached per data version and each request
+    only re-aggregates it.  Markets without cached prices are skipped.
+    """
+    buy = cot_settings.crowded_buy_threshold if buy is None else buy
+    sell = cot_settings.crowded_sell_threshold if sell is None else sell
+    if sell >= buy:
+        raise HTTPException(status_code=422, detail="'sell' must be below 'buy'")
+
+    version = await asyncio.to_thread(service.data_version, report_type, subtype)
+    if version is None:
+        raise HTTPException(status_code=404, detail="No data for this combination")
+
+    cache_key = f"backtest:{report_type}:{subtype}:{version}:{buy}:{sell}:{mode}:{code or ''}:{group or ''}"
+    cached = _backtest_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    panel_key = f"backtest-panel:{report_type}:{subtype}:{version}"
+    panel: SignalPanel | None = _backtest_cache.get(panel_key)
+    if panel is None:
+        panel = await asyncio.to_thread(service.get_signal_panel, report_type, subtype)
+        _backtest_cache.set(panel_key, panel)
+
+    try:
+        result = await asyncio.to_thread(panel.run, buy, sell, mode, code, group)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from None
+    data = {"report_type": report_type, "subtype": subtype, "data_version": version, **result}
+    _backtest_cache.set(cache_key, data)
+    return data
+
+
+@router.get("/sectors/{report_type}/{subtype}", response_model=SectorsResponse)
+async def get_sectors(
+    report_type: ReportType,
+    subtype: SubType,
+    date_from: str | None = Query(None, alias="from", description="First week (YYYY-MM-DD)"),
+    date_to: str | None = Query(None, alias="to", description="Last week (YYYY-MM-DD)"),
+    sector: str | None = Query(None, description="Comma-separated sectors, e.g. `metals,energy`"),
+    service: CotService = Depends(get_cot_service),
+):
+    """Sector aggregate positioning for every sector of a variant.
+
+    Per group: summed net position, OI-weighted % net OI and the mean 1Y
+    COT Index of the sector's markets, as columns (oldest → newest).
+    Precomputed by the pipeline.
+    """
+    try:
+        projection = FieldProjection.parse(None, date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from None
+
+    cache_key = f"sectors:{report_type}:{subtype}:{projection.cache_key}"
+    sectors = _sector_cache.get(cache_key)
+    if sectors is None:
+        sectors = await asyncio.to_thread(
+            service.get_sectors, report_type, subtype, projection.date_from, projection.date_to,
+        )
+        _sector_cache.set(cache_key, sectors)
+    if not sectors:
+        raise HTTPException(status_code=404, detail="No sector data for this combination")
+
+    if sector:
+        wanted = {s.strip().lower() for s in sector.split(",") if s.strip()}
+        sectors = [s for s in sectors if s["sector"] in wanted]
+    return {
+        "report_type": report_type,
+        "subtype": subtype,
+        "groups": cot_settings.report_groups[report_type],
+        "sectors": sectors,
+    }
+
+
 @router.get("/groups/{report_type}", response_model=list[GroupDef])
 async def get_groups(
     report_type: ReportType,
@@ -216,17 +893,90 @@ async def get_groups(
     return groups
 
 
+# ------------------------------------------------------------------
+# Alerts (per user)
+# ------------------------------------------------------------------
+
+@router.get("/alerts/rules", response_model=list[AlertRule])
+async def list_alert_rules(
+    user: User = Depends(get_current_active_user),
+    service: CotService = Depends(get_cot_service),
+):
+    """The current user's alert rules."""
+    return await asyncio.to_thread(service.get_alert_rules, str(user.id))
+
+
+@router.post("/alerts/rules", response_model=AlertRule, status_code=201)
+async def create_alert_rule(
+    body: AlertRuleCreate,
+    user: User = Depends(get_current_active_user),
+    service: CotService = Depends(get_cot_service),
+):
+    """Create an alert rule, evaluated after every pipeline run.
+
+    e.g. ``{"report_type": "tff", "condition": "cot_g3_1y:lt:10"}`` or
+    ``{"report_type": "disagg", "kind": "signal_flip", "group": "g2"}``.
+    """
+    try:
+        return await asyncio.to_thread(
+            service.create_alert_rule,
+            str(user.id), body.report_type, body.subtype, body.kind,
+            body.name, body.condition, body.group, body.signal, body.code,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from None
+
+
+@router.delete("/alerts/rules/{rule_id}", status_code=204)
+async def delete_alert_rule(
+    rule_id: int,
+    user: User = Depends(get_current_active_user),
+    service: CotService = Depends(get_cot_service),
+):
+    """Delete one of the current user's rules (and its alerts)."""
+    if not await asyncio.to_thread(service.delete_alert_rule, str(user.id), rule_id):
+        raise HTTPException(status_code=404, detail=f"Alert rule {rule_id} not found")
+
+
+@router.get("/alerts", response_model=PaginatedResponse)
+async def list_alerts(
+    limit: int = Query(50, ge=0, description="Max rows (0 = all)"),
+    offset: int = Query(0, ge=0),
+    unread: bool = Query(False, description="Only alerts not marked read"),
+    user: User = Depends(get_current_active_user),
+    service: CotService = Depends(get_cot_service),
+):
+    """The current user's triggered alerts, newest report week first."""
+    rows, total = await asyncio.to_thread(service.get_alerts, str(user.id), limit, offset, unread)
+    return PaginatedResponse(items=rows, total=total, limit=limit, offset=offset)
+
+
+@router.post("/alerts/read")
+async def mark_alerts_read(
+    body: AlertsReadRequest,
+    user: User = Depends(get_current_active_user),
+    service: CotService = Depends(get_cot_service),
+):
+    """Mark alerts as read (``ids``, or all of the user's alerts)."""
+    updated = await asyncio.to_thread(service.mark_alerts_read, str(user.id), body.ids)
+    return {"updated": updated}
+
+
 # ------------------------------------------------------------------
 # System / admin endpoints
 # ------------------------------------------------------------------
 
 @router.get("/status", response_model=StatusResponse)
-async def get_status(service: CotService = Depends(get_cot_service)):
-    """System status: DB stats, scheduler status, last update info."""
+async def get_status(
+    runs: int = Query(10, ge=0, le=100, description="Recent pipeline runs to include"),
+    service: CotService = Depends(get_cot_service),
+):
+    """System status: DB stats, scheduler status, last update info, recent pipeline runs."""
     return {
         "data": await asyncio.to_thread(service.get_status),
         "scheduler": get_update_status(),
         "price_update": get_price_update_status(),
+        "runs": await asyncio.to_thread(service.get_pipeline_runs, runs) if runs else [],
     }
 
 
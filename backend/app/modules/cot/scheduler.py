@@ -1,7 +1,9 @@
 """
 COT module — Background update scheduler.
 ============================================
-Manages the weekly COT pipeline job and manual triggers.
+Manages the weekly COT pipeline job and manual triggers.  The pipeline
+itself runs in a worker process (``pipeline_job``); progress and the
+result come back over a pipe.
 """
 
 import logging
@@ -26,11 +28,16 @@ class CotUpdateManager:
             "last_status": None,
             "last_error": None,
             "last_duration_sec": None,
+            "last_run_id": None,  # pipeline_runs row with the full metrics
+            "progress": None,     # latest progress event of the running job
         }
         self._on_complete_callbacks: list[Callable] = []
 
     def on_pipeline_complete(self, callback: Callable) -> None:
-        """Register a callback to run after a successful pipeline execution."""
+        """Register a callback to run after a successful or partial pipeline run.
+
+        Called with the run's ``(code, variant)`` change set (``changes.py``).
+        """
         self._on_complete_callbacks.append(callback)
 
     @property
@@ -44,52 +51,66 @@ class CotUpdateManager:
             return self._state.copy()
 
     def run_pipeline(self, force: bool = False) -> None:
-        """Execute the COT pipeline. Called by scheduler or manual trigger."""
+        """Execute the COT pipeline. Called by scheduler or manual trigger.
+
+        With ``WORKER_PROCESS`` (default) the pipeline runs in a worker
+        process (``app.core.worker``); this thread waits for it, records
+        its progress and fires the completion callbacks in the API process.
+        """
         with self._lock:
             if self._state["running"]:
                 logger.warning("Pipeline already running, skipping")
                 return
             self._state["running"] = True
+            self._state["progress"] = None
 
         t0 = datetime.now(timezone.utc)
         logger.info("COT pipeline job started (force=%s)", force)
 
         try:
-            from app.modules.cot.pipeline import CotPipeline, PipelineLock
-            from app.core.logging import setup_logging
-
-            log_file = settings.log_dir / "cot_update.log"
-            setup_logging(verbose=False, log_file=log_file)
-
-            lock = PipelineLock()
-            if not lock.acquire():
-                raise RuntimeError("Could not acquire pipeline lock")
-
-            try:
-                pipeline = CotPipeline()
-                pipeline.run(force_reload=force, skip_prices=False)
-            finally:
-                lock.release()
+            if settings.worker_process:
+                from app.core.worker import run_in_worker
+                result = run_in_worker(
+                    f"{__name__}:pipeline_job", on_progress=self._on_progress,
+                    name="cot-pipeline", force=force,
+                )
+            else:
+                result = pipeline_job(self._on_progress, force=force)
+
+            # Bars the worker stored are read lazily from the price store
+            from app.modules.prices.service import PriceService
+            PriceService.invalidate(result.pop("price_codes"))
 
             duration = (datetime.now(timezone.utc) - t0).total_seconds()
+            status = result["status"]
+            error = None
+            if status == "partial":
+                error = f"Stage errors, see pipeline run {result.get('run_id')}; rerun with resume"
 
             with self._lock:
                 self._state.update({
                     "running": False,
                     "last_run": t0.isoformat(),
-                    "last_status": "success",
-                    "last_error": None,
+                    "last_status": status,
+                    "last_error": error,
                     "last_duration_sec": round(duration, 1),
+                    "last_run_id": result.get("run_id"),
                 })
 
-            # Notify listeners (e.g. cache invalidation)
+            # Notify listeners (e.g. cache invalidation) of what changed,
+            # partial runs included: what they stored is served already
+            changes = result["changes"]
             for cb in self._on_complete_callbacks:
                 try:
-                    cb()
+                    cb(changes)
                 except Exception as e:
                     logger.error("Post-pipeline callback failed: %s", e)
 
-            logger.info("COT pipeline completed in %.1fs", duration)
+            if status == "partial":
+                logger.warning("COT pipeline finished partially in %.1fs (%d markets changed): %s",
+                               duration, len(changes), error)
+            else:
+                logger.info("COT pipeline completed in %.1fs (%d markets changed)", duration, len(changes))
 
         except Exception as e:
             duration = (datetime.now(timezone.utc) - t0).total_seconds()
@@ -104,6 +125,41 @@ class CotUpdateManager:
                     "last_duration_sec": round(duration, 1),
                 })
 
+    def _on_progress(self, event: dict) -> None:
+        with self._lock:
+            self._state["progress"] = event
+
+
+def pipeline_job(progress: Callable[[dict], None], force: bool = False) -> dict:
+    """The pipeline run itself (worker process entry point).
+
+    Returns:
+        ``{"run_id", "status", "price_codes", "changes"}`` — the
+        ``pipeline_runs`` id, the run status (``success`` / ``partial``),
+        the codes whose stored price bars changed and the changed
+        ``(code, variant)`` keys.  The bars themselves stay in the price
+        store rather than crossing the pipe into the API process.
+    """
+    from app.modules.cot.pipeline import CotPipeline, PipelineLock
+    from app.core.logging import setup_logging
+
+    log_file = settings.log_dir / "cot_update.log"
+    setup_logging(verbose=False, log_file=log_file)
+
+    lock = PipelineLock()
+    if not lock.acquire():
+        raise RuntimeError("Could not acquire pipeline lock")
+
+    try:
+        pipeline = CotPipeline()
+        run = pipeline.run(force_reload=force, skip_prices=False, progress=progress)
+    finally:
+        lock.release()
+    return {
+        "run_id": run.get("id"), "status": run["status"],
+        "price_codes": pipeline.price_codes, "changes": pipeline.changes,
+    }
+
 
 # Module-level singleton
 cot_update_manager = CotUpdateManager()
@@ -7,7 +7,9 @@ OpenAPI documentation, and contract enforcement.
 
 from __future__ import annotations
 
-from pydantic import BaseModel, ConfigDict
+from typing import Annotated, Any, Literal
+
+from pydantic import BaseModel, ConfigDict, Discriminator, Field, Tag
 
 
 # ------------------------------------------------------------------
@@ -99,6 +101,35 @@ class MarketDetailResponse(BaseModel):
     prices: list[PriceBar] | None = None
 
 
+class MarketDetailColumnarResponse(BaseModel):
+    """
+    Market detail with ``format=columnar``.
+
+    ``columns`` holds one array per series (``dates``, ``open_interest``,
+    ``g1_net``, ``crowded_g1`` / ``crowded_g1_signal``, ...), all aligned
+    with ``dates`` (newest first), instead of one object per week.
+    """
+
+    market: MarketMeta
+    groups: list[GroupDef]
+    columns: dict[str, list]
+    stats: MarketStats
+    prices: list[PriceBar] | None = None
+
+
+def _weeks_layout(value: Any) -> str:
+    """Union discriminator: columnar payloads carry ``columns`` instead of ``weeks``."""
+    has_columns = "columns" in value if isinstance(value, dict) else hasattr(value, "columns")
+    return "columnar" if has_columns else "rows"
+
+
+MarketDetailPayload = Annotated[
+    Annotated[MarketDetailResponse, Tag("rows")]
+    | Annotated[MarketDetailColumnarResponse, Tag("columnar")],
+    Discriminator(_weeks_layout),
+]
+
+
 # ------------------------------------------------------------------
 # Screener
 # ------------------------------------------------------------------
@@ -161,6 +192,8 @@ class UpdateState(BaseModel):
     last_status: str | None = None
     last_error: str | None = None
     last_duration_sec: float | None = None
+    last_run_id: int | None = None
+    progress: dict[str, Any] | None = None
 
 
 class SchedulerStatus(BaseModel):
@@ -173,12 +206,38 @@ class SchedulerStatus(BaseModel):
     update: UpdateState | None = None
 
 
+class PipelineRun(BaseModel):
+    """One recorded pipeline run (``pipeline_runs`` row)."""
+
+    id: int
+    started_at: str
+    finished_at: str | None = None
+    status: str
+    error: str | None = None
+    mode: str | None = None
+    force_reload: bool = False
+    duration_sec: float | None = None
+    bytes_downloaded: int | None = None
+    rows_parsed: int | None = None
+    rows_upserted: int | None = None
+    rows_changed: int | None = None
+    export_files_written: int | None = None
+    export_bytes_written: int | None = None
+    years_skipped: int | None = None
+    price_cache_hits: int | None = None
+    export_files_unchanged: int | None = None
+    peak_rss_mb: float | None = None
+    stages: dict[str, dict[str, Any]] = {}
+    variants: dict[str, dict[str, Any]] = {}
+
+
 class StatusResponse(BaseModel):
     """Full /status endpoint response."""
 
     data: DataStatus
     scheduler: SchedulerStatus
     price_update: UpdateState | None = None
+    runs: list[PipelineRun] = []
 
 
 # ------------------------------------------------------------------
@@ -243,6 +302,467 @@ class DashboardResponse(BaseModel):
     meta: DashboardMeta
 
 
+class DashboardColumnarResponse(BaseModel):
+    """Dashboard with ``format=columnar``: ``columns`` (oldest → newest) instead of ``weeks``."""
+
+    market: DashboardMarketInfo
+    groups: list[GroupDef]
+    columns: dict[str, list]
+    prices: list[DashboardPricePoint]
+    concentration: ConcentrationData | None = None
+    meta: DashboardMeta
+
+
+DashboardPayload = Annotated[
+    Annotated[DashboardResponse, Tag("rows")]
+    | Annotated[DashboardColumnarResponse, Tag("columnar")],
+    Discriminator(_weeks_layout),
+]
+
+
+# ------------------------------------------------------------------
+# Dashboard analytics (GET /cot/dashboard/{code}/analytics)
+# ------------------------------------------------------------------
+
+class AnalyticsMarketInfo(BaseModel):
+    """Market variant and groups the analytics were computed for."""
+
+    code: str
+    report_type: str
+    subtype: str
+    spec_group: str
+    comm_group: str | None = None
+
+
+class CurrentMetrics(BaseModel):
+    """Spec net position of the latest week against the display lookback."""
+
+    percentile: float
+    z_score: float
+    cot_index: float
+    weekly_change: float
+
+
+class FlipEvent(BaseModel):
+    date: str
+    type: Literal["LONG", "SHORT"]
+    magnitude: float
+    price: float | None = None
+    net_before: float
+    net_after: float
+
+
+class OISignal(BaseModel):
+    date: str
+    signal: Literal["strong_demand", "long_liquidation", "short_covering", "new_supply"]
+    price_change: float
+    oi_change: float
+
+
+class VelocityPoint(BaseModel):
+    date: str
+    velocity: float
+    net_position: float
+    warning: bool
+
+
+class SentimentDivergencePoint(BaseModel):
+    date: str
+    spec_percentile: float
+    comm_percentile: float
+    divergent: bool
+
+
+class MarketPowerPoint(BaseModel):
+    date: str
+    long_power: float
+    short_power: float
+
+
+class LongShortBiasPoint(BaseModel):
+    date: str
+    long_pct: float
+    short_pct: float
+
+
+class TripleLookbackRow(BaseModel):
+    label: str
+    lookback_weeks: int
+    net_position: float
+    percentile: float
+    z_score: float
+
+
+class HistogramBin(BaseModel):
+    min: float
+    max: float
+    count: int
+    is_current: bool
+
+
+class NetAnalysisSide(BaseModel):
+    """Spec long or short position with rolling Z-score / percentile (aligned with ``dates``)."""
+
+    position: list[float | None]
+    z_score: list[float | None]
+    percentile: list[float | None]
+    p5: float | None = None
+    p95: float | None = None
+
+
+class NetAnalysis(BaseModel):
+    dates: list[str]
+    long: NetAnalysisSide
+    short: NetAnalysisSide
+
+
+class ConcentrationSeries(BaseModel):
+    """One concentration ratio (% of OI) and its percentile rank in the lookback."""
+
+    values: list[float | None]
+    percentile: list[float | None]
+    current: float | None = None
+    current_percentile: float | None = None
+
+
+class ConcentrationAnalytics(BaseModel):
+    dates: list[str]
+    top4_long: ConcentrationSeries
+    top4_short: ConcentrationSeries
+    top8_long: ConcentrationSeries
+    top8_short: ConcentrationSeries
+
+
+class RankSummarySeries(BaseModel):
+    """Latest value's percentile / Z-score, one entry per summary lookback."""
+
+    value: float | None = None
+    percentile: list[float | None]
+    z_score: list[float | None]
+
+
+class RankSummary(BaseModel):
+    date: str | None = None
+    lookbacks: list[int]
+    series: dict[str, RankSummarySeries]
+
+
+class RankResponse(BaseModel):
+    """Percentile rank of one value within a trailing window of a group series."""
+
+    code: str
+    report_type: str
+    subtype: str
+    series: str
+    date: str
+    lookback_weeks: int
+    window_from: str
+    window_to: str
+    observations: int
+    value: float | None = None
+    percentile: float | None = None
+    z_score: float | None = None
+
+
+class DashboardAnalyticsResponse(BaseModel):
+    """Server-computed dashboard analytics.
+
+    Point series are oldest → newest; ``flips`` and ``oi_signals`` are
+    newest first.
+    """
+
+    market: AnalyticsMarketInfo
+    range: str
+    lookback_weeks: int
+    current: CurrentMetrics
+    flips: list[FlipEvent]
+    oi_signals: list[OISignal]
+    velocity: list[VelocityPoint]
+    sentiment_divergence: list[SentimentDivergencePoint]
+    market_power: list[MarketPowerPoint]
+    long_short_bias: list[LongShortBiasPoint]
+    triple_lookback: list[TripleLookbackRow]
+    spread_percentile: float | None = None
+    histogram: list[HistogramBin]
+    net_analysis: NetAnalysis
+    concentration: ConcentrationAnalytics | None = None
+    ranks: RankSummary | None = None
+    meta: DashboardMeta
+
+
+# ------------------------------------------------------------------
+# Sector aggregates (GET /cot/sectors/{report_type}/{subtype})
+# ------------------------------------------------------------------
+
+class SectorGroupSeries(BaseModel):
+    net: list[int | None]
+    pct_net_oi: list[float | None]
+    cot_index_1y: list[float | None]
+
+
+class SectorSeries(BaseModel):
+    """Aggregate positioning of one sector, oldest → newest."""
+
+    sector: str
+    display: str
+    markets: list[str]
+    dates: list[str]
+    markets_reporting: list[int]
+    open_interest: list[float | None]
+    groups: dict[str, SectorGroupSeries]
+
+
+class SectorsResponse(BaseModel):
+    """Sector-level series: summed net, OI-weighted % net OI and mean 1Y COT Index per group."""
+
+    report_type: str
+    subtype: str
+    groups: list[GroupDef]
+    sectors: list[SectorSeries]
+
+
+# ------------------------------------------------------------------
+# Cross-market correlation (GET /cot/correlation/{report_type}/{subtype})
+# ------------------------------------------------------------------
+
+class CorrelationMarket(BaseModel):
+    code: str
+    name: str
+    category: str
+
+
+class CorrelationResponse(BaseModel):
+    """Pairwise-complete correlation matrix of one positioning series.
+
+    ``matrix[i][j]`` correlates ``markets[i]`` with ``markets[j]`` over the
+    weeks both have data; None when fewer than ``min_periods`` overlap.
+    """
+
+    report_type: str
+    subtype: str
+    data_version: str
+    series: str
+    group: str
+    window: int
+    date_from: str | None = None
+    date_to: str | None = None
+    weeks: int
+    min_periods: int
+    markets: list[CorrelationMarket]
+    matrix: list[list[float | None]]
+
+
+class RollingCorrelationPoint(BaseModel):
+    date: str
+    correlation: float
+
+
+class RollingCorrelationResponse(BaseModel):
+    """Trailing-window correlation of two markets, oldest → newest."""
+
+    report_type: str
+    subtype: str
+    data_version: str
+    series: str
+    group: str
+    window: int
+    a: CorrelationMarket
+    b: CorrelationMarket
+    points: list[RollingCorrelationPoint]
+
+
+# ------------------------------------------------------------------
+# Signal backtest (GET /cot/backtest/{report_type}/{subtype})
+# ------------------------------------------------------------------
+
+class BacktestStats(BaseModel):
+    """Signed forward returns (%) of a set of signal events."""
+
+    count: int
+    hit_rate: float | None = None
+    avg_return: float | None = None
+    median_return: float | None = None
+    distribution: dict[str, float] | None = None  # p10 … p90
+
+
+class BacktestHorizonStats(BaseModel):
+    all: BacktestStats
+    buy: BacktestStats
+    sell: BacktestStats
+
+
+class BacktestGroup(BaseModel):
+    key: str
+    name: str
+    role: str
+    buy_signals: int
+    sell_signals: int
+    horizons: dict[str, BacktestHorizonStats]
+
+
+class BacktestMarketHorizon(BaseModel):
+    count: int
+    hit_rate: float | None = None
+    avg_return: float | None = None
+
+
+class BacktestMarket(BaseModel):
+    code: str
+    name: str
+    group: str
+    signals: int
+    horizons: dict[str, BacktestMarketHorizon]
+
+
+class BacktestThresholds(BaseModel):
+    buy: float
+    sell: float
+
+
+class BacktestResponse(BaseModel):
+    """Crowded-signal backtest of one report variant and threshold pair.
+
+    Returns are signed in the signal's direction, so a positive return
+    is a hit for both BUY and SELL.
+    """
+
+    report_type: str
+    subtype: str
+    data_version: str
+    thresholds: BacktestThresholds
+    mode: str
+    horizons: dict[str, int]
+    markets_tested: int
+    events: int
+    groups: list[BacktestGroup]
+    markets: list[BacktestMarket]
+
+
+# ------------------------------------------------------------------
+# Batch (POST /cot/batch)
+# ------------------------------------------------------------------
+
+class BatchItem(BaseModel):
+    """One market of a batch request (same semantics as GET /cot/dashboard/{code})."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    code: str
+    report_type: Literal["legacy", "disagg", "tff"] | None = None
+    subtype: Literal["fo", "co"] = "fo"
+
+
+class BatchRequest(BaseModel):
+    """Body of POST /cot/batch."""
+
+    items: list[BatchItem] = Field(min_length=1)
+
+
+class BatchResult(BaseModel):
+    """One NDJSON line of the batch response, emitted as each market finishes."""
+
+    index: int
+    code: str
+    status: int
+    error: str | None = None
+    data: DashboardPayload | None = None
+
+
+# ------------------------------------------------------------------
+# Market search (GET /cot/search)
+# ------------------------------------------------------------------
+
+class SearchVariant(BaseModel):
+    report_type: str
+    subtype: str
+    last_date: str
+
+
+class SearchResult(BaseModel):
+    """A market matching a search query, with where its data is available."""
+
+    code: str
+    name: str
+    exchange_code: str
+    commodity_code: str
+    ticker: str | None = None
+    sector: str
+    primary_report: str
+    available_reports: list[str]
+    variants: list[SearchVariant]
+    score: float
+    match: Literal["identifier", "name_prefix", "name", "field", "fuzzy"]
+
+
+class SearchResponse(BaseModel):
+    query: str
+    items: list[SearchResult]
+
+
+# ------------------------------------------------------------------
+# Alert rules (/cot/alerts)
+# ------------------------------------------------------------------
+
+class AlertRuleCreate(BaseModel):
+    """Body of POST /cot/alerts/rules.
+
+    ``threshold`` rules take a ``condition`` in the screener's filter
+    syntax (``cot_g3_1y:lt:10``, ``g3_pct_oi_change:gt:5``);
+    ``signal_flip`` rules an optional ``group`` and ``signal``.
+    """
+
+    name: str | None = Field(None, max_length=100)
+    report_type: Literal["legacy", "disagg", "tff"]
+    subtype: Literal["fo", "co"] = "fo"
+    kind: Literal["threshold", "signal_flip"] = "threshold"
+    condition: str | None = None
+    group: Literal["g1", "g2", "g3", "g4", "g5"] | None = None
+    signal: Literal["BUY", "SELL"] | None = None
+    code: str | None = Field(None, description="Only this market (default: every market)")
+
+
+class AlertRule(BaseModel):
+    """A stored alert rule."""
+
+    id: int
+    name: str | None = None
+    report_type: str
+    subtype: str
+    kind: str
+    condition: str | None = None
+    group: str | None = None
+    signal: str | None = None
+    code: str | None = None
+    enabled: bool
+    created_at: str
+
+
+class Alert(BaseModel):
+    """A rule triggered by one market in one report week."""
+
+    id: int
+    rule_id: int
+    rule_name: str | None = None
+    kind: str
+    report_type: str
+    subtype: str
+    code: str
+    name: str
+    date: str
+    value: float | None = None
+    previous: float | None = None
+    group: str | None = None
+    signal: str | None = None
+    read: bool
+    created_at: str
+
+
+class AlertsReadRequest(BaseModel):
+    """Body of POST /cot/alerts/read (no ids = all of the user's alerts)."""
+
+    ids: list[int] | None = None
+
+
 # ------------------------------------------------------------------
 # Paginated response wrapper
 # ------------------------------------------------------------------
@@ -0,0 +1,243 @@
+"""
+COT module — Screener query index.
+====================================
+Filtering, sorting and top-N over a cached screener without recomputing
+analytics.  ``ScreenerIndex`` is built once per screener cache entry:
+
+  - per sortable column, row ids in ascending and descending order
+    (missing values last) plus the sorted numeric values
+  - per category and per signal (any group, or one group), a row bitmap
+
+A query ANDs the bitmaps (numeric range filters become a
+``searchsorted`` slice of the sorted ids), then walks the sort order of
+the requested column and returns rows ``offset .. offset + limit``.
+
+Query parameters (``ScreenerQuery.parse``):
+  - ``sort=cot_g3_1y`` / ``order=desc``
+  - ``category=metals,energy``
+  - ``signal=BUY`` (any group) / ``signal_group=g3``
+  - ``filter=cot_g3_1y:gte:80`` (repeatable; ops ``gt gte lt lte eq``)
+"""
+
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+SIGNALS: tuple[str, ...] = ("BUY", "SELL")
+FILTER_OPS: tuple[str, ...] = ("gt", "gte", "lt", "lte", "eq")
+
+_SIGNAL_KEY_RE = re.compile(r"^signal_(g[1-5])$")
+_GROUP_RE = re.compile(r"^g[1-5]$")
+
+
+@dataclass(frozen=True)
+class ScreenerFilter:
+    """Numeric range condition ``column <op> value``."""
+
+    column: str
+    op: str
+    value: float
+
+    @classmethod
+    def parse(cls, raw: str) -> "ScreenerFilter":
+        parts = raw.strip().split(":")
+        if len(parts) != 3:
+            raise ValueError(f"Malformed filter '{raw}' (expected column:op:value)")
+        column, op, value = (p.strip() for p in parts)
+        if op not in FILTER_OPS:
+            raise ValueError(f"Unknown filter op '{op}' (one of {', '.join(FILTER_OPS)})")
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError(f"Filter value '{value}' is not a number") from None
+        return cls(column=column, op=op, value=number)
+
+
+@dataclass(frozen=True)
+class ScreenerQuery:
+    """Normalised screener filter / sort parameters (empty = plain listing)."""
+
+    sort: str | None = None
+    descending: bool = True
+    categories: frozenset[str] | None = None
+    signal: str | None = None
+    signal_group: str | None = None
+    filters: tuple[ScreenerFilter, ...] = ()
+
+    @classmethod
+    def parse(
+        cls,
+        sort: str | None = None,
+        order: str = "desc",
+        category: str | None = None,
+        signal: str | None = None,
+        signal_group: str | None = None,
+        filters: list[str] | None = None,
+    ) -> "ScreenerQuery":
+        """Build a query from raw query parameters.
+
+        Raises:
+            ValueError: On malformed values.
+        """
+        if order not in ("asc", "desc"):
+            raise ValueError("'order' must be 'asc' or 'desc'")
+        categories = None
+        if category is not None and category.strip():
+            categories = frozenset(c.strip().lower() for c in category.split(",") if c.strip())
+        if signal is not None:
+            signal = signal.strip().upper()
+            if signal not in SIGNALS:
+                raise ValueError(f"'signal' must be one of {', '.join(SIGNALS)}")
+        if signal_group is not None:
+            if not _GROUP_RE.match(signal_group):
+                raise ValueError(f"Unknown signal group '{signal_group}'")
+            if signal is None:
+                raise ValueError("'signal_group' requires 'signal'")
+        parsed = tuple(ScreenerFilter.parse(f) for f in filters or ())
+        return cls(
+            sort=sort.strip() if sort and sort.strip() else None,
+            descending=order == "desc",
+            categories=categories,
+            signal=signal,
+            signal_group=signal_group,
+            filters=parsed,
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return (
+            self.sort is None and self.categories is None
+            and self.signal is None and not self.filters
+        )
+
+
+class _SortedColumn:
+    """Row ids of one column in both orders; numeric values kept for range filters."""
+
+    __slots__ = ("asc", "desc", "values", "present", "numeric")
+
+    def __init__(self, values: list) -> None:
+        present_ids = np.array([i for i, v in enumerate(values) if v is not None], dtype=np.int64)
+        missing_ids = np.array([i for i, v in enumerate(values) if v is None], dtype=np.int64)
+        present = [values[i] for i in present_ids]
+        self.numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present)
+
+        if self.numeric:
+            arr = np.array(present, dtype=np.float64)
+            asc = np.argsort(arr, kind="stable")
+            desc = np.argsort(-arr, kind="stable")
+            self.values = arr[asc]
+        else:
+            arr = np.array([str(v) for v in present], dtype=object)
+            asc = np.argsort(arr, kind="stable")
+            desc = asc[::-1]
+            self.values = None
+        self.present = present_ids[asc]
+        self.asc = np.concatenate((present_ids[asc], missing_ids))
+        self.desc = np.concatenate((present_ids[desc], missing_ids))
+
+    def range_ids(self, op: str, value: float) -> np.ndarray:
+        """Ids of rows satisfying ``<column> <op> value`` — one ``searchsorted``."""
+        lo, hi = 0, len(self.values)
+        if op in ("gt", "gte"):
+            lo = np.searchsorted(self.values, value, side="right" if op == "gt" else "left")
+        elif op in ("lt", "lte"):
+            hi = np.searchsorted(self.values, value, side="left" if op == "lt" else "right")
+        else:  # eq
+            lo = np.searchsorted(self.values, value, side="left")
+            hi = np.searchsorted(self.values, value, side="right")
+        return self.present[lo:hi]
+
+
+class ScreenerIndex:
+    """Precomputed sort orders and bitmaps over a list of screener rows."""
+
+    def __init__(self, rows: list[dict]) -> None:
+        self.rows = rows
+        n = len(rows)
+
+        keys: dict[str, None] = {}
+        for row in rows:
+            keys.update(dict.fromkeys(row))
+        self._columns: dict[str, _SortedColumn] = {}
+        signal_cols: list[tuple[str, list]] = []
+        for key in keys:
+            values = [row.get(key) for row in rows]
+            if key == "signals" or any(isinstance(v, (list, dict)) for v in values):
+                continue
+            if m := _SIGNAL_KEY_RE.match(key):
+                signal_cols.append((m.group(1), values))
+            self._columns[key] = _SortedColumn(values)
+
+        self._categories: dict[str, np.ndarray] = {}
+        for i, row in enumerate(rows):
+            cat = row.get("category") or "other"
+            self._categories.setdefault(cat, np.zeros(n, dtype=bool))[i] = True
+
+        self._signals: dict[tuple[str | None, str], np.ndarray] = {}
+        for signal in SIGNALS:
+            any_group = np.zeros(n, dtype=bool)
+            for gk, values in signal_cols:
+                bitmap = np.array([v == signal for v in values], dtype=bool)
+                self._signals[(gk, signal)] = bitmap
+                any_group |= bitmap
+            self._signals[(None, signal)] = any_group
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _column(self, key: str, numeric: bool = False) -> _SortedColumn:
+        col = self._columns.get(key)
+        if col is None:
+            raise ValueError(f"Unknown screener column '{key}'")
+        if numeric and not col.numeric:
+            raise ValueError(f"Screener column '{key}' is not numeric")
+        return col
+
+    def _mask(self, query: ScreenerQuery) -> np.ndarray | None:
+        """AND of all filter bitmaps (None = no filter)."""
+        n = len(self.rows)
+        mask: np.ndarray | None = None
+
+        def apply(bitmap: np.ndarray) -> None:
+            nonlocal mask
+            mask = bitmap.copy() if mask is None else mask & bitmap
+
+        if query.categories is not None:
+            bitmap = np.zeros(n, dtype=bool)
+            for cat in query.categories:
+                if cat in self._categories:
+                    bitmap |= self._categories[cat]
+            apply(bitmap)
+        if query.signal is not None:
+            apply(self._signals.get(
+                (query.signal_group, query.signal), np.zeros(n, dtype=bool),
+            ))
+        for f in query.filters:
+            bitmap = np.zeros(n, dtype=bool)
+            bitmap[self._column(f.column, numeric=True).range_ids(f.op, f.value)] = True
+            apply(bitmap)
+        return mask
+
+    def query(self, query: ScreenerQuery, limit: int = 0, offset: int = 0) -> tuple[list[dict], int]:
+        """Rows matching *query* in its sort order, paginated.
+
+        Returns (rows, total_matching).
+
+        Raises:
+            ValueError: On unknown or non-numeric columns.
+        """
+        mask = self._mask(query)
+        if query.sort is not None:
+            col = self._column(query.sort)
+            ids = col.desc if query.descending else col.asc
+            if mask is not None:
+                ids = ids[mask[ids]]
+        elif mask is not None:
+            ids = np.flatnonzero(mask)
+        else:
+            ids = np.arange(len(self.rows))
+
+        end = offset + limit if limit > 0 else None
+        return [self.rows[i] for i in ids[offset:end]], len(ids)
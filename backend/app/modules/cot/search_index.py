@@ -0,0 +1,228 @@
+"""
+COT module — Market search index.
+===================================
+In-memory index over every market code across all report variants,
+searchable by name words, CFTC contract code, commodity code, exchange
+code and Yahoo ticker (``ticker_map.json``):
+
+  - exact identifiers (contract / commodity code, ticker, ticker root
+    such as ``GC`` for ``GC=F``) → bitmask of markets
+  - prefix terms: sorted term lists (name words; all fields) with one
+    market bitmask per term, so a query token is a ``bisect`` range
+    OR-ed together and a multi-word query an AND of those
+  - trigrams of the searchable text → market ids, as a typo-tolerant
+    fallback when the prefix match returns too few markets
+
+Matches are ranked: exact identifier, name starting with the query, all
+words prefixing name words, all words prefixing any field, then trigram
+similarity.  Built from the cached ``MarketIndex`` and swapped in whole,
+so a rebuild after an ingest never serves a half-built index.
+"""
+
+import logging
+import re
+import threading
+from bisect import bisect_left
+from functools import reduce
+from operator import or_
+
+import numpy as np
+
+from app.core.cache import TTLCache
+from app.modules.cot.market_index import MARKET_INDEX_TTL, MarketIndex, get_market_index
+from app.modules.cot.storage import CotStorage
+from app.modules.prices.config import price_settings
+
+logger = logging.getLogger(__name__)
+
+MIN_SIMILARITY = 0.4  # share of the query's trigrams a fuzzy match must contain
+
+# Match kind → base score
+_SCORES: dict[str, float] = {
+    "identifier": 100.0, "name_prefix": 80.0, "name": 60.0, "field": 40.0, "fuzzy": 30.0,
+}
+
+_TOKEN_RE = re.compile(r"[A-Z0-9]+")
+_PREFIX_END = "\x7f"  # sorts after every token character
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.upper())
+
+
+def _trigrams(text: str) -> set[str]:
+    """Trigrams of each word, padded with one space on both sides."""
+    return {w[i:i + 3] for w in (f" {t} " for t in _tokens(text)) for i in range(len(w) - 2)}
+
+
+def _lowest(mask: int, k: int) -> list[int]:
+    """Positions of the *k* lowest set bits of *mask*."""
+    out = []
+    while mask and len(out) < k:
+        low = mask & -mask
+        out.append(low.bit_length() - 1)
+        mask ^= low
+    return out
+
+
+class _PrefixTerms:
+    """Sorted terms with one market bitmask each."""
+
+    def __init__(self, postings: dict[str, int]) -> None:
+        self.terms = sorted(postings)
+        self.masks = [postings[t] for t in self.terms]
+
+    def match(self, token: str) -> int:
+        """Markets with a term starting with *token*."""
+        lo = bisect_left(self.terms, token)
+        hi = bisect_left(self.terms, token + _PREFIX_END, lo)
+        return reduce(or_, self.masks[lo:hi], 0)
+
+
+class MarketSearchIndex:
+    """Ranked market lookup by name, codes and ticker.
+
+    Markets are numbered in tie-break order (shorter name first), so the
+    best matches of a tier are the lowest bits of its bitmask and a
+    query only extracts ``limit`` bits, however many markets match.
+    """
+
+    def __init__(self, markets: list[dict]) -> None:
+        names = {m["code"]: " ".join(_tokens(m["name"])) for m in markets}
+        self.markets = sorted(markets, key=lambda m: (len(names[m["code"]]), names[m["code"]], m["code"]))
+        markets = self.markets
+
+        exact: dict[str, int] = {}
+        full_names: dict[str, int] = {}
+        name_terms: dict[str, int] = {}
+        any_terms: dict[str, int] = {}
+        trigrams: dict[str, list[int]] = {}
+        for i, m in enumerate(markets):
+            bit = 1 << i
+            ticker = m["ticker"] or ""
+            identifiers = {m["code"], m["commodity_code"], ticker, re.split(r"[=\-.]", ticker)[0]}
+            for key in filter(None, identifiers):
+                exact[key.upper()] = exact.get(key.upper(), 0) | bit
+
+            for name in m["names"]:
+                key = " ".join(_tokens(name))
+                full_names[key] = full_names.get(key, 0) | bit
+            words = {w for name in m["names"] for w in _tokens(name)}
+            fields = words | {*_tokens(m["exchange_code"]), *_tokens(ticker), *map(str.upper, identifiers)}
+            for w in words:
+                name_terms[w] = name_terms.get(w, 0) | bit
+            for w in filter(None, fields):
+                any_terms[w] = any_terms.get(w, 0) | bit
+
+            text = " ".join([*m["names"], m["code"], m["commodity_code"], ticker])
+            for t in _trigrams(text):
+                trigrams.setdefault(t, []).append(i)
+
+        self._exact = exact
+        self._full_names = _PrefixTerms(full_names)
+        self._name_terms = _PrefixTerms(name_terms)
+        self._any_terms = _PrefixTerms(any_terms)
+        self._trigrams = {t: np.array(ids, dtype=np.int32) for t, ids in trigrams.items()}
+
+    def __len__(self) -> int:
+        return len(self.markets)
+
+    @classmethod
+    def build(cls, market_index: MarketIndex, ticker_map: dict[str, str]) -> "MarketSearchIndex":
+        """One search entry per market code, identity from ``MarketEntry.resolve``."""
+        markets: list[dict] = []
+        for entry in sorted(market_index.entries(), key=lambda e: e.code):
+            target = entry.resolve(None, "fo")
+            if target is None:
+                continue
+            variants = sorted(entry.variants.items())
+            markets.append({
+                "code": entry.code,
+                "name": target["name"],
+                "names": sorted({v.name for _, v in variants}),
+                "exchange_code": target["exchange_code"],
+                "commodity_code": next((v.commodity_code for _, v in variants if v.commodity_code), ""),
+                "ticker": ticker_map.get(entry.code),
+                "sector": target["sector"],
+                "primary_report": target["primary_report"],
+                "available_reports": target["available_reports"],
+                "variants": [
+                    {"report_type": rt, "subtype": st, "last_date": v.last_date}
+                    for (rt, st), v in variants
+                ],
+            })
+        logger.info("Market search index built: %d markets", len(markets))
+        return cls(markets)
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """Best *limit* matches for *query*, highest score first."""
+        tokens = _tokens(query)
+        if not tokens or limit <= 0:
+            return []
+        phrase = " ".join(tokens)
+
+        def tiers():
+            yield "identifier", self._exact.get(query.strip().upper(), 0) | self._exact.get("".join(tokens), 0)
+            in_names = reduce(lambda a, t: a & self._name_terms.match(t), tokens, -1)
+            if in_names:
+                yield "name_prefix", self._full_names.match(phrase)
+                yield "name", in_names
+            yield "field", reduce(lambda a, t: a & self._any_terms.match(t), tokens, -1)
+
+        ranked: list[tuple[int, float, str]] = []
+        taken = 0
+        for kind, mask in tiers():
+            for i in _lowest(mask & ~taken, limit - len(ranked)):
+                ranked.append((i, _SCORES[kind], kind))
+                taken |= 1 << i
+            if len(ranked) >= limit:
+                break
+
+        if len(ranked) < limit:
+            wanted = _trigrams(query)
+            postings = [self._trigrams[t] for t in wanted if t in self._trigrams]
+            if postings:
+                similarity = np.bincount(np.concatenate(postings), minlength=len(self.markets)) / len(wanted)
+                candidates = np.flatnonzero(similarity >= MIN_SIMILARITY)
+                candidates = candidates[np.argsort(-similarity[candidates], kind="stable")]
+                for i in candidates.tolist():
+                    if len(ranked) >= limit:
+                        break
+                    if not taken >> i & 1:
+                        ranked.append((i, _SCORES["fuzzy"] * float(similarity[i]), "fuzzy"))
+
+        out = []
+        for i, score, kind in ranked:
+            m = self.markets[i]
+            out.append({
+                **{k: v for k, v in m.items() if k != "names"},
+                "score": round(score, 1),
+                "match": kind,
+            })
+        return out
+
+
+# ------------------------------------------------------------------
+# Shared instance
+# ------------------------------------------------------------------
+
+_search_cache = TTLCache(name="cot.search_index", default_ttl=MARKET_INDEX_TTL)
+_build_lock = threading.Lock()
+
+
+def get_search_index(store: CotStorage) -> MarketSearchIndex:
+    """Return the cached search index for *store*'s database, building it if needed."""
+    index = _search_cache.get(store.db_path)
+    if index is not None:
+        return index
+    with _build_lock:
+        index = _search_cache.get(store.db_path)
+        if index is None:
+            index = MarketSearchIndex.build(get_market_index(store), price_settings.ticker_map)
+            _search_cache.set(store.db_path, index)
+    return index
+
+
+def invalidate_search_index() -> None:
+    """Drop the cached index (rebuilt on next use)."""
+    _search_cache.invalidate()
@@ -0,0 +1,200 @@
+"""
+COT module — Sector aggregate positioning.
+============================================
+Weekly sector-level series per trader group, built from every market of
+a report variant (sectors are the ``market_categories`` the screener
+uses):
+
+  - net: summed net position of the sector's markets
+  - % net/OI: summed net over summed open interest (OI-weighted)
+  - COT Index: mean 1Y COT Index of the sector's markets
+
+Computed in one pass: each market's series go into (markets × weeks)
+arrays on the union of report dates, and a (sectors × markets)
+membership matrix sums them with one product per series.  The pipeline
+stores the result in ``sector_series`` after each variant; until a
+variant has been aggregated, reads compute it on the fly.
+"""
+
+import logging
+
+import numpy as np
+
+from app.modules.cot.calculator import CotCalculator
+from app.modules.cot.config import cot_settings
+from app.modules.cot.projection import FieldProjection
+from app.modules.cot.storage import CotStorage
+from app.utils.categories import categorize_market
+
+logger = logging.getLogger(__name__)
+
+# Everything the sector series need, nothing else
+SECTOR_PROJECTION = FieldProjection.parse("open_interest,net,cot_index_1y")
+
+# Stored column suffix → API series name
+SECTOR_SERIES: dict[str, str] = {"net": "net", "pct_oi": "pct_net_oi", "cot_1y": "cot_index_1y"}
+
+
+def sector_rows(
+    report_type: str,
+    market_rows: dict[str, list[dict]],
+    categories: dict[str, dict] | None = None,
+    calc: CotCalculator | None = None,
+) -> list[dict]:
+    """``sector_series`` rows from newest-first ``cot_data`` rows per market."""
+    calc = calc or CotCalculator()
+    groups = cot_settings.report_groups[report_type]
+
+    sectors: list[str] = []
+    member: list[int] = []
+    computed: list[dict] = []
+    for code in sorted(market_rows):
+        rows = market_rows[code]
+        if not rows:
+            continue
+        sector = categorize_market(rows[0].get("market_and_exchange") or code, categories)[0]
+        if sector not in sectors:
+            sectors.append(sector)
+        member.append(sectors.index(sector))
+        computed.append(calc.compute_columns(rows, report_type, SECTOR_PROJECTION))
+    if not computed:
+        return []
+
+    dates = sorted({d for c in computed for d in c["dates"]})
+    axis = np.array(dates, dtype=object)
+    n_markets, n_weeks = len(computed), len(dates)
+
+    positions = [np.searchsorted(axis, np.array(c["dates"], dtype=object)) for c in computed]
+
+    def matrix(column: str) -> np.ndarray:
+        out = np.full((n_markets, n_weeks), np.nan)
+        for i, c in enumerate(computed):
+            out[i, positions[i]] = np.array(c["columns"][column], dtype=np.float64)
+        return out
+
+    reported = np.zeros((n_markets, n_weeks))
+    for i, pos in enumerate(positions):
+        reported[i, pos] = 1.0
+
+    membership = np.zeros((len(sectors), n_markets))
+    membership[member, np.arange(n_markets)] = 1.0
+
+    def total(values: np.ndarray, present: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Sector sums of *values* where *present* (NaN where no market contributes), and counts."""
+        sums = membership @ np.where(present, values, 0.0)
+        counts = membership @ present.astype(np.float64)
+        return np.where(counts > 0, sums, np.nan), counts
+
+    oi = matrix("open_interest")
+    has_oi = ~np.isnan(oi) & (oi != 0)
+    oi_total, _ = total(oi, ~np.isnan(oi))
+    markets = membership @ reported
+
+    series: dict[str, np.ndarray] = {}
+    for g in groups:
+        gk = g["key"]
+        net = matrix(f"{gk}_net")
+        has_net = ~np.isnan(net)
+        series[f"{gk}_net"], _ = total(net, has_net)
+        weighted_net, _ = total(net, has_net & has_oi)
+        weighted_oi, _ = total(oi, has_net & has_oi)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            series[f"{gk}_pct_oi"] = np.round(weighted_net / weighted_oi * 100, 1)
+        index = matrix(f"cot_index_{gk}_1y")
+        index_sum, index_count = total(index, ~np.isnan(index))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            series[f"{gk}_cot_1y"] = np.round(index_sum / index_count, 1)
+
+    out: list[dict] = []
+    for k, sector in sorted(enumerate(sectors), key=lambda ks: ks[1]):
+        for t in np.flatnonzero(markets[k]).tolist():
+            row = {
+                "sector": sector,
+                "report_date": dates[t],
+                "markets": int(markets[k, t]),
+                "open_interest": _value(oi_total[k, t]),
+            }
+            for key, values in series.items():
+                v = _value(values[k, t])
+                row[key] = int(v) if v is not None and key.endswith("_net") else v
+            out.append(row)
+    return out
+
+
+def _value(v: float) -> float | None:
+    return None if np.isnan(v) else float(v)
+
+
+class SectorAggregates:
+    """Builds and reads sector aggregate series for a report variant."""
+
+    def __init__(self, store: CotStorage, calc: CotCalculator | None = None) -> None:
+        self.store = store
+        self.calc = calc or CotCalculator()
+
+    def compute(self, report_type: str, subtype: str) -> list[dict]:
+        groups = cot_settings.report_groups[report_type]
+        market_rows = self.store.get_all_market_data_bulk(
+            report_type, subtype, columns=SECTOR_PROJECTION.query_columns(groups),
+        )
+        return sector_rows(report_type, market_rows, cot_settings.market_categories, self.calc)
+
+    def update(self, report_type: str, subtype: str) -> int:
+        """Recompute and store the variant's sector series; returns the rows written."""
+        written = self.store.replace_sector_series(
+            report_type, subtype, self.compute(report_type, subtype),
+        )
+        logger.info("Sector series %s/%s: %d rows written", report_type, subtype, written)
+        return written
+
+    def get_sectors(
+        self,
+        report_type: str,
+        subtype: str,
+        markets: dict[str, str],
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[dict]:
+        """Sector series, oldest → newest, one columnar entry per sector.
+
+        *markets* maps the variant's market codes to names (for sector
+        membership).
+        """
+        if self.store.has_sector_series(report_type, subtype):
+            rows = self.store.get_sector_series(report_type, subtype, date_from, date_to)
+        else:
+            rows = [
+                r for r in self.compute(report_type, subtype)
+                if (not date_from or r["report_date"] >= date_from)
+                and (not date_to or r["report_date"] <= date_to)
+            ]
+
+        categories = cot_settings.market_categories
+        members: dict[str, list[str]] = {}
+        for code, name in sorted(markets.items()):
+            members.setdefault(categorize_market(name, categories)[0], []).append(code)
+
+        groups = cot_settings.report_groups[report_type]
+        by_sector: dict[str, dict] = {}
+        for r in rows:
+            entry = by_sector.get(r["sector"])
+            if entry is None:
+                entry = by_sector[r["sector"]] = {
+                    "sector": r["sector"],
+                    "display": categories.get(r["sector"], {}).get("display", "Other"),
+                    "markets": members.get(r["sector"], []),
+                    "dates": [],
+                    "markets_reporting": [],
+                    "open_interest": [],
+                    "groups": {
+                        g["key"]: {name: [] for name in SECTOR_SERIES.values()} for g in groups
+                    },
+                }
+            entry["dates"].append(r["report_date"])
+            entry["markets_reporting"].append(r["markets"])
+            entry["open_interest"].append(r["open_interest"])
+            for g in groups:
+                cols = entry["groups"][g["key"]]
+                for suffix, name in SECTOR_SERIES.items():
+                    cols[name].append(r[f"{g['key']}_{suffix}"])
+        return list(by_sector.values())
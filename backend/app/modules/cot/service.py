@@ -6,33 +6,35 @@ Delegates payload construction to CotPayloadBuilder.
 """
 
 import logging
+from dataclasses import replace
+
+import numpy as np
 
 from app.modules.cot.config import cot_settings
 from app.modules.cot.storage import CotStorage
 from app.modules.cot.calculator import CotCalculator
 from app.modules.cot.builder import CotPayloadBuilder
+from app.modules.cot.alerts import MAX_RULES_PER_USER, validate_rule
+from app.modules.cot.analytics import (
+    CONCENTRATION_COLUMNS, DEFAULT_DISPLAY_RANGE, DISPLAY_RANGES, NO_COMM_GROUP,
+    dashboard_analytics, percentile_series,
+)
+from app.modules.cot.backtest import SIGNAL_PROJECTION, SignalPanel
+from app.modules.cot.correlation import PositioningMatrix
+from app.modules.cot.market_index import (
+    MarketIndex, classify_sector, get_market_index, primary_report,
+)
+from app.modules.cot.projection import FULL_PROJECTION, FieldProjection
+from app.modules.cot.ranks import RANK_KINDS, MarketRanks
+from app.modules.cot.screener_index import ScreenerIndex
+from app.modules.cot.search_index import get_search_index
+from app.modules.cot.sectors import SectorAggregates
+from app.modules.cot.snapshots import ScreenerSnapshots
 from app.modules.prices.service import PriceService
-from app.utils.categories import build_market_meta
+from app.utils.categories import build_market_meta, categorize_market
 
 logger = logging.getLogger(__name__)
 
-# Maps backend category → frontend sector label
-_CATEGORY_TO_SECTOR: dict[str, str] = {
-    "currencies": "Currencies",
-    "crypto": "Crypto",
-    "metals": "Metals",
-    "energy": "Energy",
-    "grains": "Grains",
-    "softs": "Softs",
-    "livestock": "Livestock",
-    "indices": "Indices",
-    "rates": "Rates",
-}
-
-# Primary report type heuristic: use disagg for commodities, legacy for financial
-_COMMODITY_SECTORS = {"Metals", "Energy", "Grains", "Softs", "Livestock"}
-_FINANCIAL_SECTORS = {"Currencies", "Crypto", "Indices", "Rates"}
-
 # Spec/comm group mapping per report type
 _SPEC_GROUP: dict[str, str] = {"legacy": "g1", "disagg": "g3", "tff": "g3"}
 # NOTE: TFF has no single "commercial" equivalent — g1 (Dealers) is used as a
@@ -40,6 +42,18 @@ _SPEC_GROUP: dict[str, str] = {"legacy": "g1", "disagg": "g3", "tff": "g3"}
 # overrides this via assetConfig (e.g. Indices use g2 = Asset Managers as comm).
 _COMM_GROUP: dict[str, str] = {"legacy": "g2", "disagg": "g1", "tff": "g1"}
 
+# Per-group kinds served by the dashboard and the raw columns behind them
+_DASHBOARD_KIND_COLS: dict[str, tuple[str, ...]] = {
+    "long": ("long",),
+    "short": ("short",),
+    "spread": ("spread",),
+    "net": ("long", "short"),
+    "change_long": ("long_change",),
+    "change_short": ("short_change",),
+}
+_DASHBOARD_KINDS = frozenset(_DASHBOARD_KIND_COLS)
+_CONCENTRATION_COLS = ("conc_top4_long", "conc_top4_short", "conc_top8_long", "conc_top8_short")
+
 
 class CotService:
     """Read-only service for COT API responses."""
@@ -75,12 +89,31 @@ class CotService:
             for m in markets
         ]
 
+    def search_markets(self, query: str, limit: int = 10) -> list[dict]:
+        """Markets matching *query* across all variants (see ``MarketSearchIndex``)."""
+        return get_search_index(self.store).search(query, limit)
+
     # ------------------------------------------------------------------
     # Single market detail
     # ------------------------------------------------------------------
 
-    def get_market_detail(self, code: str, report_type: str, subtype: str) -> dict | None:
-        raw_rows = self.store.get_market_data(code, report_type, subtype)
+    def get_market_detail(
+        self,
+        code: str,
+        report_type: str,
+        subtype: str,
+        projection: FieldProjection | None = None,
+        columnar: bool = False,
+    ) -> dict | None:
+        projection = projection or FULL_PROJECTION
+        groups = projection.select_groups(cot_settings.report_groups[report_type])
+        raw_rows = self.store.get_market_data(
+            code, report_type, subtype,
+            columns=projection.query_columns(groups),
+            date_from=projection.date_from,
+            date_to=projection.date_to,
+            history=projection.history_rows(groups),
+        )
         if not raw_rows:
             return None
 
@@ -95,16 +128,35 @@ class CotService:
             if not prices:
                 prices = None
 
-        return self._builder.build_market_detail(
+        payload = self._builder.build_market_detail(
             code, name, exchange_code, report_type, subtype, raw_rows, prices,
+            projection=projection, columnar=columnar,
         )
+        if payload is not None:
+            # Explicit null so the field survives response_model_exclude_unset
+            payload.setdefault("prices", None)
+        return payload
 
     # ------------------------------------------------------------------
     # Screener
     # ------------------------------------------------------------------
 
-    def get_screener(self, report_type: str, subtype: str) -> list[dict]:
-        all_data = self.store.get_all_market_data_bulk(report_type, subtype)
+    def _screener_columns(self, report_type: str, projection: FieldProjection) -> list[str] | None:
+        groups = projection.select_groups(cot_settings.report_groups[report_type])
+        return projection.query_columns(groups)
+
+    def get_screener(
+        self,
+        report_type: str,
+        subtype: str,
+        projection: FieldProjection | None = None,
+    ) -> list[dict]:
+        projection = projection or FULL_PROJECTION
+        all_data = self.store.get_all_market_data_bulk(
+            report_type, subtype,
+            columns=self._screener_columns(report_type, projection),
+            date_to=projection.date_to,
+        )
         if not all_data:
             return []
 
@@ -117,15 +169,51 @@ class CotService:
             exchange_code = raw_rows[0].get("exchange_code", "")
 
             entry = self._builder.build_screener_entry(
-                code, name, exchange_code, report_type, raw_rows,
+                code, name, exchange_code, report_type, raw_rows, projection,
             )
             if entry:
                 screener_rows.append(entry)
 
         return screener_rows
 
+    def get_screener_as_of(
+        self,
+        report_type: str,
+        subtype: str,
+        as_of: str,
+        projection: FieldProjection | None = None,
+    ) -> list[dict]:
+        """Screener as of a past report date, read from the materialised snapshots.
+
+        Until the variant has been snapshotted (first pipeline run after
+        the upgrade) this falls back to the live screener with ``to=as_of``.
+        """
+        snapshots = ScreenerSnapshots(self.store, self.calc)
+        if not snapshots.has_snapshots(report_type, subtype):
+            projection = replace(projection or FULL_PROJECTION, date_to=as_of)
+            return self.get_screener(report_type, subtype, projection)
+        codes = self._market_index().codes(report_type, subtype)
+        return snapshots.get_screener(report_type, subtype, codes, as_of, projection)
+
+    def get_screener_index(
+        self,
+        report_type: str,
+        subtype: str,
+        projection: FieldProjection | None = None,
+        as_of: str | None = None,
+    ) -> ScreenerIndex:
+        """Full screener wrapped in a ``ScreenerIndex`` for filter / sort / top-N queries."""
+        if as_of is not None:
+            return ScreenerIndex(self.get_screener_as_of(report_type, subtype, as_of, projection))
+        return ScreenerIndex(self.get_screener(report_type, subtype, projection))
+
     def get_screener_page(
-        self, report_type: str, subtype: str, limit: int, offset: int,
+        self,
+        report_type: str,
+        subtype: str,
+        limit: int,
+        offset: int,
+        projection: FieldProjection | None = None,
     ) -> tuple[list[dict], int]:
         """SQL-paginated screener: only process markets for the requested page.
 
@@ -139,7 +227,12 @@ class CotService:
         if not codes:
             return [], total
 
-        bulk = self.store.get_bulk_for_codes(codes, report_type, subtype)
+        projection = projection or FULL_PROJECTION
+        bulk = self.store.get_bulk_for_codes(
+            codes, report_type, subtype,
+            columns=self._screener_columns(report_type, projection),
+            date_to=projection.date_to,
+        )
         rows: list[dict] = []
         for code in codes:
             raw_rows = bulk.get(code, [])
@@ -148,7 +241,7 @@ class CotService:
             name = raw_rows[0].get("market_and_exchange") or code
             exchange_code = raw_rows[0].get("exchange_code", "")
             entry = self._builder.build_screener_entry(
-                code, name, exchange_code, report_type, raw_rows,
+                code, name, exchange_code, report_type, raw_rows, projection,
             )
             if entry:
                 rows.append(entry)
@@ -178,9 +271,9 @@ class CotService:
 
                 name = raw_rows[0].get("market_and_exchange") or code
                 exchange_code = raw_rows[0].get("exchange_code", "")
-                sector = self._classify_sector(name)
-                available = self.store.get_available_reports(code)
-                primary = self._primary_report(sector, available)
+                sector = classify_sector(name)
+                available = self._market_index().available_reports(code)
+                primary = primary_report(sector, available)
 
                 # Only include if this report type IS the primary one
                 if rt != primary:
@@ -215,110 +308,342 @@ class CotService:
                 variants[f"{rt}_{st}"] = self.store.get_db_stats(rt, st)
         return {"overall": overall, "variants": variants}
 
+    def get_pipeline_runs(self, limit: int = 10) -> list[dict]:
+        """Latest recorded pipeline runs, newest first."""
+        return self.store.get_pipeline_runs(limit)
+
     # ------------------------------------------------------------------
     # Dashboard (new 3-page flow)
     # ------------------------------------------------------------------
 
-    def _classify_sector(self, market_name: str) -> str:
-        """Classify a market into a sector using keyword matching."""
-        name_upper = market_name.upper()
-        for cat_key, cat_info in cot_settings.market_categories.items():
-            for kw in cat_info["keywords"]:
-                if kw in name_upper:
-                    return _CATEGORY_TO_SECTOR.get(cat_key, "Other")
-        return "Other"
-
-    def _primary_report(self, sector: str, available: list[str]) -> str:
-        """Pick the best report type for a market given available data."""
-        if sector in _COMMODITY_SECTORS and "disagg" in available:
-            return "disagg"
-        if sector in _FINANCIAL_SECTORS and "tff" in available:
-            return "tff"
-        # fallback
-        if "legacy" in available:
-            return "legacy"
-        return available[0] if available else "legacy"
+    def _market_index(self) -> MarketIndex:
+        return get_market_index(self.store)
+
+    def data_version(self, report_type: str, subtype: str) -> str | None:
+        """Latest report date of a variant (None when it has no data)."""
+        return self._market_index().last_date(report_type, subtype)
+
+    # ------------------------------------------------------------------
+    # Concentration ranking
+    # ------------------------------------------------------------------
+
+    def get_concentration_index(self, report_type: str, subtype: str) -> ScreenerIndex:
+        """Latest concentration ratios of every market, indexed for ranking.
+
+        Each row also carries the 1Y percentile rank of every ratio
+        (``top4_long_percentile`` …).
+        """
+        lookback = DISPLAY_RANGES["1Y"]
+        all_data = self.store.get_all_market_data_bulk(
+            report_type, subtype, columns=list(_CONCENTRATION_COLS),
+        )
+        categories = cot_settings.market_categories
+        rows: list[dict] = []
+        for code, raw_rows in all_data.items():
+            latest = raw_rows[0] if raw_rows else None
+            if latest is None or all(latest.get(c) is None for c in _CONCENTRATION_COLS):
+                continue
+            name = latest.get("market_and_exchange") or code
+            cat_key, cat_display = categorize_market(name, categories)
+            row = {
+                "code": code,
+                "name": name,
+                "exchange_code": latest.get("exchange_code", ""),
+                "category": cat_key,
+                "category_display": cat_display,
+                "date": latest.get("report_date"),
+            }
+            for key, column in CONCENTRATION_COLUMNS.items():
+                values = np.array(
+                    [r.get(column) for r in raw_rows[:lookback]], dtype=np.float64,
+                )
+                rank = percentile_series(values, lookback)[0]
+                row[key] = latest.get(column)
+                row[f"{key}_percentile"] = None if np.isnan(rank) else float(rank)
+            rows.append(row)
+        return ScreenerIndex(rows)
+
+    # ------------------------------------------------------------------
+    # Sector aggregates
+    # ------------------------------------------------------------------
+
+    def get_sectors(
+        self,
+        report_type: str,
+        subtype: str,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[dict]:
+        """Sector aggregate series of a variant (stored by the pipeline)."""
+        markets = self._market_index().names(report_type, subtype)
+        return SectorAggregates(self.store, self.calc).get_sectors(
+            report_type, subtype, markets, date_from, date_to,
+        )
+
+    # ------------------------------------------------------------------
+    # Alert rules
+    # ------------------------------------------------------------------
+
+    def get_alert_rules(self, user_id: str) -> list[dict]:
+        return [_alert_rule(r) for r in self.store.get_alert_rules(user_id)]
+
+    def create_alert_rule(
+        self,
+        user_id: str,
+        report_type: str,
+        subtype: str,
+        kind: str,
+        name: str | None = None,
+        condition: str | None = None,
+        group: str | None = None,
+        signal: str | None = None,
+        code: str | None = None,
+    ) -> dict:
+        """Validate and store a rule; it is evaluated after the next pipeline run.
+
+        Raises:
+            ValueError: On an invalid rule, an unknown market or too many rules.
+        """
+        fields = validate_rule(report_type, kind, condition, group, signal)
+        if code is not None and code not in self._market_index().codes(report_type, subtype):
+            raise ValueError(f"Market '{code}' has no {report_type}/{subtype} data")
+        if self.store.count_alert_rules(user_id) >= MAX_RULES_PER_USER:
+            raise ValueError(f"At most {MAX_RULES_PER_USER} alert rules per user")
+        rule = self.store.create_alert_rule({
+            "user_id": user_id, "name": name, "report_type": report_type, "subtype": subtype,
+            "cftc_contract_code": code, **fields,
+        })
+        return _alert_rule(rule)
+
+    def delete_alert_rule(self, user_id: str, rule_id: int) -> bool:
+        return self.store.delete_alert_rule(user_id, rule_id)
+
+    def get_alerts(
+        self, user_id: str, limit: int = 50, offset: int = 0, unread_only: bool = False,
+    ) -> tuple[list[dict], int]:
+        rows, total = self.store.get_alerts(user_id, limit, offset, unread_only)
+        return [
+            {
+                "id": r["id"],
+                "rule_id": r["rule_id"],
+                "rule_name": r["rule_name"],
+                "kind": r["kind"],
+                "report_type": r["report_type"],
+                "subtype": r["subtype"],
+                "code": r["cftc_contract_code"],
+                "name": r["market_and_exchange"] or r["cftc_contract_code"],
+                "date": r["report_date"],
+                "value": r["value"],
+                "previous": r["previous"],
+                "group": r["group_key"],
+                "signal": r["signal"],
+                "read": bool(r["is_read"]),
+                "created_at": r["created_at"],
+            }
+            for r in rows
+        ], total
+
+    def mark_alerts_read(self, user_id: str, ids: list[int] | None = None) -> int:
+        return self.store.mark_alerts_read(user_id, ids)
+
+    # ------------------------------------------------------------------
+    # Cross-market correlation
+    # ------------------------------------------------------------------
+
+    def get_positioning_matrix(
+        self, report_type: str, subtype: str, series: str, group: str | None = None,
+    ) -> PositioningMatrix:
+        """(markets × weeks) matrix of one series of *group* (default: the spec group).
+
+        Raises:
+            ValueError: On an unknown series or a group the report type lacks.
+        """
+        groups = cot_settings.report_groups[report_type]
+        group = group or _SPEC_GROUP.get(report_type, "g1")
+        if group not in {g["key"] for g in groups}:
+            raise ValueError(f"Unknown group '{group}' for {report_type}")
+        projection = PositioningMatrix.projection(group, series)
+        market_rows = self.store.get_all_market_data_bulk(
+            report_type, subtype, columns=projection.query_columns(projection.select_groups(groups)),
+        )
+        return PositioningMatrix.build(
+            report_type, group, series, market_rows, cot_settings.market_categories, self.calc,
+        )
+
+    # ------------------------------------------------------------------
+    # Signal backtest
+    # ------------------------------------------------------------------
+
+    def get_signal_panel(self, report_type: str, subtype: str) -> SignalPanel:
+        """Crowded-signal backtest panel of a variant.
+
+        Uses the shared price cache only (no downloads); markets without
+        cached bars are left out.
+        """
+        groups = cot_settings.report_groups[report_type]
+        market_rows = self.store.get_all_market_data_bulk(
+            report_type, subtype, columns=SIGNAL_PROJECTION.query_columns(groups),
+        )
+        prices = self.price_service.get_all_cached(list(market_rows)) if self.price_service else {}
+        return SignalPanel.build(report_type, groups, market_rows, prices, self.calc)
 
     def get_dashboard(
         self,
         code: str,
         report_type: str | None = None,
         subtype: str = "fo",
+        projection: FieldProjection | None = None,
+        columnar: bool = False,
     ) -> dict | None:
         """Build the dashboard payload for a single market.
 
         If *report_type* is None, auto-detect the primary report type.
+        Availability, sector and primary report come from the in-memory
+        market index, so the only query is the one for the chosen rows.
+        An optional *projection* limits the per-group columns and the
+        date range of ``weeks`` / ``prices``.  With *columnar*, ``weeks``
+        is replaced by ``columns`` (one array per series, plus ``dates``).
         Returns a dict matching the DashboardResponse schema, or None if
         no data is found.
         """
-        # 1. Determine available report types
-        available_reports = self.store.get_available_reports(code)
-        if not available_reports:
+        projection = projection or FULL_PROJECTION
+
+        # 1. Resolve availability, identity and report type
+        entry = self._market_index().get(code)
+        target = entry.resolve(report_type, subtype) if entry else None
+        if target is None:
             return None
 
-        # 2. Fetch the first available data to get name/exchange
-        sample_rt = available_reports[0]
-        sample_rows = self.store.get_market_data(code, sample_rt, subtype)
-        if not sample_rows:
-            # Try "co" if "fo" has no data
-            subtype = "co"
-            sample_rows = self.store.get_market_data(code, sample_rt, subtype)
-            if not sample_rows:
-                return None
-
-        market_name = sample_rows[0].get("market_and_exchange") or code
-        exchange_code = sample_rows[0].get("exchange_code", "")
-        sector = self._classify_sector(market_name)
-
-        # 3. Select report type
-        primary = self._primary_report(sector, available_reports)
-        rt = report_type if report_type and report_type in available_reports else primary
-
-        # 4. Load all weekly rows for this report type / subtype
-        raw_rows = self.store.get_market_data(code, rt, subtype)
-        if not raw_rows:
+        # 2. Load weekly rows for this report type / subtype
+        series = self.store.get_bulk_columns(
+            [code], target["report_type"], target["subtype"],
+            columns=self._dashboard_query_columns(projection),
+            date_from=projection.date_from,
+            date_to=projection.date_to,
+        ).get(code)
+        if not series:
             return None
 
-        # 5. Build flat weeks list (oldest → newest for frontend)
-        weeks: list[dict] = []
-        for r in reversed(raw_rows):  # storage returns newest→oldest
-            week: dict = {
-                "date": r.get("report_date"),
-                "open_interest": r.get("open_interest") or 0,
-                "oi_change": r.get("oi_change") or 0,
-            }
-            # Add g1..g5 data
-            for gi in range(1, 6):
-                pfx = f"g{gi}"
-                long_val = r.get(f"{pfx}_long")
-                # Only add groups that have data
-                if long_val is not None:
-                    week[f"{pfx}_long"] = long_val or 0
-                    week[f"{pfx}_short"] = r.get(f"{pfx}_short") or 0
-                    week[f"{pfx}_spread"] = r.get(f"{pfx}_spread") or 0
-                    week[f"{pfx}_net"] = (long_val or 0) - (r.get(f"{pfx}_short") or 0)
-                    week[f"{pfx}_change_long"] = r.get(f"{pfx}_long_change") or 0
-                    week[f"{pfx}_change_short"] = r.get(f"{pfx}_short_change") or 0
-            weeks.append(week)
-
-        # 6. Groups metadata
-        groups = cot_settings.report_groups.get(rt, [])
-
-        # 7. Prices
+        return self.build_dashboard(
+            target, series, self._dashboard_prices(code), projection, columnar,
+        )
+
+    # ------------------------------------------------------------------
+    # Dashboard batch (POST /cot/batch)
+    # ------------------------------------------------------------------
+
+    def load_dashboard_batch(
+        self,
+        items: list[tuple[str, str | None, str]],
+        projection: FieldProjection | None = None,
+    ) -> list[dict | None]:
+        """Load everything needed to build several dashboards at once.
+
+        *items* are ``(code, report_type | None, subtype)`` tuples with the
+        same semantics as :meth:`get_dashboard`.  Markets are resolved from
+        the market index, rows are loaded with one ``IN (...)`` query per
+        (report_type, subtype) variant, and prices come from the shared
+        in-memory cache.
+
+        Returns one job per item (None if the market has no data); pass
+        each job to :meth:`build_dashboard_job`.  Jobs hold no DB handles,
+        so they can be built on any thread.
+        """
+        projection = projection or FULL_PROJECTION
+        index = self._market_index()
+
+        targets: list[dict | None] = []
+        for code, report_type, subtype in items:
+            entry = index.get(code)
+            targets.append(entry.resolve(report_type, subtype) if entry else None)
+
+        by_variant: dict[tuple[str, str], list[str]] = {}
+        for t in targets:
+            if t is not None:
+                codes_for = by_variant.setdefault((t["report_type"], t["subtype"]), [])
+                if t["code"] not in codes_for:
+                    codes_for.append(t["code"])
+
+        columns = self._dashboard_query_columns(projection)
+        loaded: dict[tuple[str, str, str], dict[str, tuple]] = {}
+        for (rt, st), variant_codes in by_variant.items():
+            bulk = self.store.get_bulk_columns(
+                variant_codes, rt, st,
+                columns=columns,
+                date_from=projection.date_from,
+                date_to=projection.date_to,
+            )
+            for code, series in bulk.items():
+                loaded[(code, rt, st)] = series
+
+        codes = list(dict.fromkeys(code for code, _, _ in items))
+        cached_prices = self.price_service.get_all_cached(codes) if self.price_service else {}
+
+        jobs: list[dict | None] = []
+        for t in targets:
+            series = loaded.get((t["code"], t["report_type"], t["subtype"])) if t else None
+            if not series:
+                jobs.append(None)
+                continue
+            jobs.append({
+                "target": t,
+                "series": series,
+                "prices": cached_prices.get(t["code"]),
+            })
+        return jobs
+
+    def build_dashboard_job(
+        self,
+        job: dict,
+        projection: FieldProjection | None = None,
+        columnar: bool = False,
+    ) -> dict:
+        """Build one dashboard from a :meth:`load_dashboard_batch` job.
+
+        Prices missing from the shared cache are fetched here, so a slow
+        download only delays its own market.
+        """
+        prices = job["prices"]
+        if prices is None:
+            prices = self._dashboard_prices(job["target"]["code"])
+        return self.build_dashboard(job["target"], job["series"], prices, projection, columnar)
+
+    def build_dashboard(
+        self,
+        target: dict,
+        series: dict[str, tuple],
+        price_data: list[dict] | None,
+        projection: FieldProjection | None = None,
+        columnar: bool = False,
+    ) -> dict:
+        """Assemble the dashboard payload from pre-fetched columns (oldest → newest)."""
+        projection = projection or FULL_PROJECTION
+        rt = target["report_type"]
+
+        # 3. Weekly series (oldest → newest for frontend)
+        dates, columns, gaps = self._dashboard_columns(series, self._dashboard_groups(projection))
+        if columnar:
+            weeks: dict = {"columns": {"dates": dates, **columns}}
+        else:
+            weeks = {"weeks": self._dashboard_weeks(dates, columns, gaps)}
+
+        # 4. Groups metadata
+        groups = projection.select_groups(cot_settings.report_groups.get(rt, []))
+
+        # 5. Prices
         prices: list[dict] = []
-        if self.price_service and self.price_service.has_ticker(code):
-            price_data = self.price_service.get_prices(code)
-            if price_data:
-                for p in price_data:
-                    prices.append({"date": p["date"], "close": p["close"]})
+        if price_data:
+            for p in price_data:
+                if projection.has_range and not projection.in_range(p["date"]):
+                    continue
+                prices.append({"date": p["date"], "close": p["close"]})
 
-        # 8. Concentration (from latest week's data)
+        # 6. Concentration (from latest week's data)
         concentration = None
-        latest_row = raw_rows[0]  # newest first
-        c4l = latest_row.get("conc_top4_long")
-        c4s = latest_row.get("conc_top4_short")
-        c8l = latest_row.get("conc_top8_long")
-        c8s = latest_row.get("conc_top8_short")
+        latest = len(dates) - 1
+        c4l, c4s, c8l, c8s = (
+            series[c][latest] if c in series else None for c in _CONCENTRATION_COLS
+        )
         if any(v is not None for v in (c4l, c4s, c8l, c8s)):
             concentration = {
                 "top4_long_pct": c4l,
@@ -327,29 +652,236 @@ class CotService:
                 "top8_short_pct": c8s,
             }
 
-        # 9. Meta
-        latest_date = raw_rows[0].get("report_date", "")
+        # 7. Meta
         spec_group = _SPEC_GROUP.get(rt, "g1")
         comm_group = _COMM_GROUP.get(rt, "g2")
 
         return {
             "market": {
-                "code": code,
-                "name": market_name,
-                "exchange_code": exchange_code,
-                "sector": sector,
-                "primary_report": primary,
+                "code": target["code"],
+                "name": target["name"],
+                "exchange_code": target["exchange_code"],
+                "sector": target["sector"],
+                "primary_report": target["primary_report"],
                 "spec_group": spec_group,
                 "comm_group": comm_group,
-                "available_reports": available_reports,
+                "available_reports": target["available_reports"],
             },
             "groups": groups,
-            "weeks": weeks,
+            **weeks,
             "prices": prices,
             "concentration": concentration,
             "meta": {
-                "data_as_of": latest_date,
+                "data_as_of": dates[latest] or "",
+                "published_at": None,
+                "latest_week_index": latest,
+            },
+        }
+
+    # ------------------------------------------------------------------
+    # Dashboard analytics (GET /cot/dashboard/{code}/analytics)
+    # ------------------------------------------------------------------
+
+    def resolve_dashboard(
+        self, code: str, report_type: str | None = None, subtype: str = "fo",
+    ) -> dict | None:
+        """Resolve the dashboard target (served report type, subtype, last date) of *code*."""
+        entry = self._market_index().get(code)
+        return entry.resolve(report_type, subtype) if entry else None
+
+    def get_dashboard_analytics(
+        self,
+        code: str,
+        report_type: str | None = None,
+        subtype: str = "fo",
+        display_range: str = DEFAULT_DISPLAY_RANGE,
+        spec_group: str | None = None,
+        comm_group: str | None = None,
+    ) -> dict | None:
+        """Dashboard analytics for a single market, computed server-side.
+
+        Market resolution is the same as :meth:`get_dashboard`.  The spec /
+        comm groups default to the report type's mapping; pass
+        ``comm_group=NO_COMM_GROUP`` for markets without a commercial side.
+        Returns None if no data is found.
+
+        Raises:
+            ValueError: On a spec / comm group the served report type lacks.
+        """
+        target = self.resolve_dashboard(code, report_type, subtype)
+        if target is None:
+            return None
+        rt = target["report_type"]
+        spec = spec_group or _SPEC_GROUP.get(rt, "g1")
+        comm = comm_group or _COMM_GROUP.get(rt, "g2")
+        if comm == NO_COMM_GROUP:
+            comm = None
+        known = {g["key"] for g in cot_settings.report_groups[rt]}
+        for group in (spec, comm):
+            if group is not None and group not in known:
+                raise ValueError(f"Unknown group '{group}' for {rt}")
+
+        kinds: dict[str, set[str]] = {spec: {"long", "short", "net"}}
+        if comm:
+            kinds.setdefault(comm, set()).add("net")
+        dash_groups = [(pfx, frozenset(k)) for pfx, k in kinds.items()]
+        columns = ["open_interest", "oi_change", *_CONCENTRATION_COLS]
+        for pfx in kinds:
+            columns.extend((f"{pfx}_long", f"{pfx}_short"))
+
+        series = self.store.get_bulk_columns(
+            [code], rt, target["subtype"], columns=columns,
+        ).get(code)
+        if not series:
+            return None
+
+        dates, cols, _ = self._dashboard_columns(series, dash_groups)
+        ranks = MarketRanks.build(dates, cols)
+        cols.update((c, series[c]) for c in _CONCENTRATION_COLS)
+        analytics = dashboard_analytics(
+            dates, cols, self._dashboard_prices(code) or [], spec, comm, display_range,
+        )
+        rank_keys = [f"{spec}_{kind}" for kind in RANK_KINDS] + ([f"{comm}_net"] if comm else [])
+        return {
+            "market": {
+                "code": code,
+                "report_type": rt,
+                "subtype": target["subtype"],
+                "spec_group": spec,
+                "comm_group": comm,
+            },
+            **analytics,
+            "ranks": ranks.summary(rank_keys),
+            "meta": {
+                "data_as_of": dates[-1] or "",
                 "published_at": None,
-                "latest_week_index": len(weeks) - 1,
+                "latest_week_index": len(dates) - 1,
             },
         }
+
+    def spec_group(self, report_type: str) -> str:
+        """Default speculative group of a report type."""
+        return _SPEC_GROUP.get(report_type, "g1")
+
+    def get_market_ranks(self, code: str, report_type: str, subtype: str) -> MarketRanks | None:
+        """Percentile-rank history of every group's net / long / short series.
+
+        Built once per data version by the caller's cache; None if the
+        market has no data in the variant.
+        """
+        groups = [g["key"] for g in cot_settings.report_groups[report_type]]
+        columns = ["open_interest", "oi_change"] + [f"{g}_{side}" for g in groups for side in ("long", "short")]
+        series = self.store.get_bulk_columns([code], report_type, subtype, columns=columns).get(code)
+        if not series:
+            return None
+        dates, cols, _ = self._dashboard_columns(
+            series, [(g, frozenset(RANK_KINDS)) for g in groups],
+        )
+        return MarketRanks.build(dates, cols)
+
+    # ------------------------------------------------------------------
+    # Dashboard helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _dashboard_groups(projection: FieldProjection) -> list[tuple[str, frozenset[str]]]:
+        return [
+            (f"g{gi}", projection.group_kinds(f"g{gi}") & _DASHBOARD_KINDS)
+            for gi in range(1, 6)
+        ]
+
+    def _dashboard_query_columns(self, projection: FieldProjection) -> list[str] | None:
+        """Raw columns behind the dashboard payload (None = all)."""
+        if projection.fields is None:
+            return None
+        columns = ["open_interest", "oi_change", *_CONCENTRATION_COLS]
+        for pfx, kinds in self._dashboard_groups(projection):
+            columns.append(f"{pfx}_long")  # group presence check
+            for kind in kinds:
+                columns.extend(f"{pfx}_{c}" for c in _DASHBOARD_KIND_COLS[kind])
+        return columns
+
+    def _dashboard_prices(self, code: str) -> list[dict] | None:
+        if self.price_service and self.price_service.has_ticker(code):
+            return self.price_service.get_prices(code)
+        return None
+
+    @staticmethod
+    def _dashboard_columns(
+        series: dict[str, tuple],
+        dash_groups: list[tuple[str, frozenset[str]]],
+    ) -> tuple[list, dict[str, list], list[int]]:
+        """Dashboard weekly series as ``(dates, columns, gaps)``.
+
+        Missing values count as 0.  A group is included if it has data
+        in some week; in weeks where its ``long`` is missing all its
+        columns hold None and the week index is listed in *gaps*.
+        """
+        def values(name: str) -> np.ndarray:
+            return np.nan_to_num(np.array(series[name], dtype=np.float64))
+
+        columns: dict[str, list] = {
+            "open_interest": values("open_interest").tolist(),
+            "oi_change": values("oi_change").tolist(),
+        }
+        gaps: set[int] = set()
+        for pfx, kinds in dash_groups:
+            if not kinds:
+                continue
+            longs = np.array(series[f"{pfx}_long"], dtype=np.float64)
+            present = ~np.isnan(longs)
+            if not present.any():
+                continue
+
+            arrays: dict[str, np.ndarray] = {}
+            if "long" in kinds:
+                arrays["long"] = np.nan_to_num(longs)
+            if "short" in kinds:
+                arrays["short"] = values(f"{pfx}_short")
+            if "spread" in kinds:
+                arrays["spread"] = values(f"{pfx}_spread")
+            if "net" in kinds:
+                arrays["net"] = np.nan_to_num(longs) - values(f"{pfx}_short")
+            if "change_long" in kinds:
+                arrays["change_long"] = values(f"{pfx}_long_change")
+            if "change_short" in kinds:
+                arrays["change_short"] = values(f"{pfx}_short_change")
+
+            missing = np.flatnonzero(~present).tolist()
+            gaps.update(missing)
+            for kind, arr in arrays.items():
+                col = arr.tolist()
+                for i in missing:
+                    col[i] = None
+                columns[f"{pfx}_{kind}"] = col
+
+        return list(series["report_date"]), columns, sorted(gaps)
+
+    @staticmethod
+    def _dashboard_weeks(dates: list, columns: dict[str, list], gaps: list[int]) -> list[dict]:
+        """Pivot dashboard columns into per-week dicts (missing groups omitted)."""
+        keys = ("date", *columns)
+        weeks = [dict(zip(keys, week)) for week in zip(dates, *columns.values())]
+        for i in gaps:
+            weeks[i] = {k: v for k, v in weeks[i].items() if v is not None}
+        return weeks
+
+
+def _alert_rule(row: dict) -> dict:
+    """API shape of an ``alert_rules`` row."""
+    condition = None
+    if row["kind"] == "threshold":
+        condition = f"{row['column_name']}:{row['op']}:{row['value']:g}"
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "report_type": row["report_type"],
+        "subtype": row["subtype"],
+        "kind": row["kind"],
+        "condition": condition,
+        "group": row["group_key"],
+        "signal": row["signal"],
+        "code": row["cftc_contract_code"],
+        "enabled": bool(row["enabled"]),
+        "created_at": row["created_at"],
+    }
@@ -0,0 +1,203 @@
+"""
+COT module — Historical screener snapshots.
+=============================================
+Materialises the screener values of every market for every report week
+into ``screener_snapshots`` (one row per market per week), so the
+screener "as of" any past report date is a per-market index seek
+instead of a recomputation over the variant's history.
+
+Snapshots hold the row-level series, % net/OI change and the 1Y COT
+Index of each group; Crowded Level equals the 1Y index and its BUY/SELL
+signal is derived on read.  The first run computes each market's full
+history in one ``CotCalculator`` pass; later runs only compute the
+weeks newer than the market's latest snapshot (plus the 1Y lookback
+they depend on).
+"""
+
+import logging
+
+from app.modules.cot.calculator import CotCalculator
+from app.modules.cot.config import cot_settings
+from app.modules.cot.projection import FULL_PROJECTION, FieldProjection
+from app.modules.cot.storage import CotStorage
+from app.utils.categories import build_screener_row
+
+logger = logging.getLogger(__name__)
+
+# Everything the screener row needs, nothing else
+SNAPSHOT_PROJECTION = FieldProjection.parse(
+    "open_interest,oi_change,long,short,net,change,change_long,change_short,"
+    "pct_net_oi,cot_index_1y",
+)
+
+# Snapshot column suffix → calculator column ({g} = group key)
+_CALC_COLUMN: dict[str, str] = {
+    "long": "{g}_long",
+    "short": "{g}_short",
+    "net": "{g}_net",
+    "change": "{g}_change",
+    "change_long": "{g}_change_long",
+    "change_short": "{g}_change_short",
+    "pct_oi": "{g}_pct_net_oi",
+    "cot_1y": "cot_index_{g}_1y",
+}
+
+
+class ScreenerSnapshots:
+    """Builds and reads per-week screener snapshots for a report variant."""
+
+    def __init__(self, store: CotStorage, calc: CotCalculator | None = None) -> None:
+        self.store = store
+        self.calc = calc or CotCalculator()
+
+    # ------------------------------------------------------------------
+    # Materialisation
+    # ------------------------------------------------------------------
+
+    def update(
+        self,
+        report_type: str,
+        subtype: str,
+        rebuild: bool = False,
+        codes: set[str] | None = None,
+    ) -> int:
+        """Snapshot all weeks not yet materialised; returns the rows written.
+
+        With *rebuild*, existing snapshots of the variant are dropped and
+        every week is recomputed (e.g. after historical data was revised).
+        *codes* limits an incremental update to the markets whose data
+        changed (the others have nothing new to snapshot).
+        """
+        if rebuild:
+            self.store.delete_screener_snapshots(report_type, subtype)
+        heads = {} if rebuild else self.store.get_snapshot_heads(report_type, subtype)
+        groups = SNAPSHOT_PROJECTION.select_groups(cot_settings.report_groups[report_type])
+        columns = SNAPSHOT_PROJECTION.query_columns(groups)
+        if codes is not None and heads:
+            all_data = self.store.get_bulk_for_codes(sorted(codes), report_type, subtype, columns=columns)
+        else:
+            all_data = self.store.get_all_market_data_bulk(report_type, subtype, columns=columns)
+        # Rows a new week needs: its 1Y window, which also covers the previous week
+        history = cot_settings.cot_index_1y
+
+        snapshot_rows: list[dict] = []
+        for code, rows in all_data.items():
+            head = heads.get(code)
+            new = len(rows)
+            if head is not None:
+                new = next((i for i, r in enumerate(rows) if r["report_date"] <= head), len(rows))
+                rows = rows[:new + history]
+            if new:
+                snapshot_rows.extend(self._snapshot_rows(code, report_type, groups, rows, new))
+
+        written = self.store.upsert_screener_snapshots(report_type, subtype, snapshot_rows)
+        logger.info(
+            "Screener snapshots %s/%s: %d rows written (%s)",
+            report_type, subtype, written, "rebuild" if rebuild or not heads else "incremental",
+        )
+        return written
+
+    def _snapshot_rows(
+        self, code: str, report_type: str, groups: list[dict], rows: list[dict], new: int,
+    ) -> list[dict]:
+        """Snapshot rows of the *new* newest weeks of *rows* (newest first)."""
+        computed = self.calc.compute_columns(rows, report_type, SNAPSHOT_PROJECTION)
+        dates, columns = computed["dates"], computed["columns"]
+        n = len(dates)
+
+        out: dict[str, list] = {
+            "report_date": dates[:new],
+            "open_interest": columns["open_interest"][:new],
+            "oi_change": columns["oi_change"][:new],
+        }
+        for g in groups:
+            gk = g["key"]
+            for field, calc_col in _CALC_COLUMN.items():
+                out[f"{gk}_{field}"] = columns[calc_col.format(g=gk)][:new]
+            pct = columns[f"{gk}_pct_net_oi"]
+            out[f"{gk}_pct_oi_change"] = [
+                round(pct[i] - pct[i + 1], 1)
+                if i + 1 < n and pct[i] is not None and pct[i + 1] is not None else None
+                for i in range(new)
+            ]
+
+        keys = list(out)
+        return [
+            {"cftc_contract_code": code, **dict(zip(keys, values))}
+            for values in zip(*out.values())
+        ]
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def has_snapshots(self, report_type: str, subtype: str) -> bool:
+        return self.store.has_screener_snapshots(report_type, subtype)
+
+    def get_screener(
+        self,
+        report_type: str,
+        subtype: str,
+        codes: list[str],
+        as_of: str,
+        projection: FieldProjection | None = None,
+    ) -> list[dict]:
+        """Screener rows as of *as_of*: each market's latest week on or before it.
+
+        Same rows as the live screener with ``to=as_of``; markets whose
+        latest week is older than the projection's ``date_from`` are
+        skipped.
+        """
+        projection = projection or FULL_PROJECTION
+        groups = projection.select_groups(cot_settings.report_groups[report_type])
+        categories = cot_settings.market_categories
+        allowed = projection.screener_keys(groups)
+
+        screener_rows: list[dict] = []
+        for snap in self.store.get_screener_snapshot(report_type, subtype, codes, as_of):
+            if projection.date_from and snap["report_date"] < projection.date_from:
+                continue
+            code = snap["cftc_contract_code"]
+            row = build_screener_row(
+                code,
+                snap["market_and_exchange"] or code,
+                snap["exchange_code"],
+                report_type,
+                self._latest_week(snap, groups, projection),
+                {},
+                groups,
+                categories=categories,
+            )
+            for g in groups:
+                row[f"{g['key']}_pct_oi_change"] = snap[f"{g['key']}_pct_oi_change"]
+            if allowed is not None:
+                row = {k: v for k, v in row.items() if k in allowed}
+            screener_rows.append(row)
+        return screener_rows
+
+    @staticmethod
+    def _latest_week(snap: dict, groups: list[dict], projection: FieldProjection) -> dict:
+        """Snapshot row in the calculator's week layout (as ``build_screener_row`` expects).
+
+        Crowded Level is only filled when the projection asks for it, so
+        row signals match the live screener.
+        """
+        week: dict = {
+            "date": snap["report_date"],
+            "open_interest": snap["open_interest"],
+            "oi_change": snap["oi_change"],
+        }
+        for g in groups:
+            gk = g["key"]
+            for field, calc_col in _CALC_COLUMN.items():
+                week[calc_col.format(g=gk)] = snap[f"{gk}_{field}"]
+            if "crowded" not in projection.group_kinds(gk):
+                continue
+            level = snap[f"{gk}_cot_1y"]
+            week[f"crowded_{gk}"] = {
+                "value": level,
+                "signal": (
+                    CotCalculator._determine_signal(level, g["role"]) if level is not None else None
+                ),
+            }
+        return week
@@ -0,0 +1,172 @@
+"""
+COT module — Pipelined stage chain.
+=====================================
+Runs a linear chain of stages over a stream of items.  Each stage is a
+function ``item → iterable of items`` for the next stage; the last
+stage's output is discarded.
+
+Threaded (default): one thread per stage, connected by bounded queues,
+so downloading item *n + 1* overlaps parsing item *n*, storing item
+*n - 1* and so on — wall time approaches the slowest stage instead of
+the sum of all of them, and a slow consumer back-pressures its producer
+instead of buffering without limit.
+
+Serial: every item is pushed through the whole chain on the calling
+thread before the next one is produced (for debugging / profiling).
+
+A stage may be a generator: its outputs move downstream as they are
+yielded.  A stage that raises on one item is logged and skips the rest
+of that item's outputs; the chain keeps running.  A ``BaseException``
+(``KeyboardInterrupt``, ``SystemExit``) ends that stage: its thread
+drains its inbox and still passes the end-of-stream marker on, so no
+thread is left blocked, and ``run_stages`` re-raises it once all
+threads have joined.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 2
+
+_DONE = object()  # end-of-stream marker
+
+
+@dataclass
+class Stage:
+    """One step of the chain.
+
+    ``start`` runs once before the stage sees its first item — in the
+    stage's own thread when threaded, so e.g. a bulk download can begin
+    while upstream stages are still busy.
+    """
+
+    name: str
+    fn: Callable[[object], Iterable | None]
+    start: Callable[[], None] | None = None
+    busy: float = field(default=0.0, init=False)  # seconds spent in start / fn
+    items: int = field(default=0, init=False)
+    errors: int = field(default=0, init=False)
+
+    def begin(self) -> None:
+        if self.start is None:
+            return
+        t0 = time.perf_counter()
+        try:
+            self.start()
+        except Exception as e:
+            self.errors += 1
+            logger.error("Stage %s failed to start: %s", self.name, e, exc_info=True)
+        finally:
+            self.busy += time.perf_counter() - t0
+
+    def process(self, item) -> Iterator:
+        """Outputs of *item*, streamed as the stage yields them.
+
+        Time blocked downstream (between outputs) is not counted as busy.
+        """
+        t0 = time.perf_counter()
+        try:
+            outputs = iter(self.fn(item) or ())
+            while True:
+                try:
+                    out = next(outputs)
+                except StopIteration:
+                    break
+                self.busy += time.perf_counter() - t0
+                yield out
+                t0 = time.perf_counter()
+        except Exception as e:
+            self.errors += 1
+            logger.error("Stage %s failed on %s: %s", self.name, item, e, exc_info=True)
+        finally:
+            self.items += 1
+            self.busy += time.perf_counter() - t0
+
+
+def run_stages(
+    stages: list[Stage],
+    source: Iterable,
+    serial: bool = False,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+) -> dict:
+    """Feed every item of *source* through *stages*.
+
+    Returns:
+        ``{"seconds": wall time, "stages": {name: {"busy", "items", "errors"}}}``
+    """
+    t0 = time.perf_counter()
+    if serial:
+        _run_serial(stages, source)
+    else:
+        _run_threaded(stages, source, queue_size)
+    return {
+        "seconds": round(time.perf_counter() - t0, 2),
+        "stages": {
+            s.name: {"busy": round(s.busy, 2), "items": s.items, "errors": s.errors}
+            for s in stages
+        },
+    }
+
+
+def _run_serial(stages: list[Stage], source: Iterable) -> None:
+    for stage in stages:
+        stage.begin()
+
+    def push(depth: int, item) -> None:
+        if depth < len(stages):
+            for out in stages[depth].process(item):
+                push(depth + 1, out)
+
+    for item in source:
+        push(0, item)
+
+
+def _run_threaded(stages: list[Stage], source: Iterable, queue_size: int) -> None:
+    inboxes = [queue.Queue(maxsize=queue_size) for _ in stages]
+    fatal: list[BaseException] = []  # what stopped a stage thread, re-raised here
+
+    def loop(i: int) -> None:
+        stage = stages[i]
+        inbox = inboxes[i]
+        outbox = inboxes[i + 1] if i + 1 < len(stages) else None
+        try:
+            stage.begin()
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    return
+                for out in stage.process(item):
+                    if outbox is not None:
+                        outbox.put(out)
+        except BaseException as e:
+            stage.errors += 1
+            fatal.append(e)
+            logger.error("Stage %s stopped: %r", stage.name, e)
+            # Keep consuming so upstream never blocks on a full queue
+            while inbox.get() is not _DONE:
+                pass
+        finally:
+            if outbox is not None:
+                outbox.put(_DONE)
+
+    threads = [
+        threading.Thread(target=loop, args=(i,), name=f"cot-stage-{s.name}", daemon=True)
+        for i, s in enumerate(stages)
+    ]
+    for t in threads:
+        t.start()
+    try:
+        for item in source:
+            inboxes[0].put(item)
+    finally:
+        inboxes[0].put(_DONE)
+        for t in threads:
+            t.join()
+    if fatal:
+        raise fatal[0]
@@ -4,6 +4,7 @@ COT module — SQLite data access layer.
 All database operations for COT data live here.
 """
 
+import json
 import sqlite3
 import logging
 from contextlib import contextmanager
@@ -16,6 +17,14 @@ from app.core.migrations import run_migrations
 
 logger = logging.getLogger(__name__)
 
+# Per-group columns of screener_snapshots (g1_long, ..., g5_cot_1y)
+SNAPSHOT_GROUP_FIELDS: tuple[str, ...] = (
+    "long", "short", "net", "change", "change_long", "change_short",
+    "pct_oi", "pct_oi_change", "cot_1y",
+)
+# Per-group columns of sector_series (g1_net, ..., g5_cot_1y)
+SECTOR_GROUP_FIELDS: tuple[str, ...] = ("net", "pct_oi", "cot_1y")
+
 
 class CotStorage:
     """SQLite-backed storage for COT data, supporting multiple report types."""
@@ -45,6 +54,9 @@ class CotStorage:
         "conc_top8_long", "conc_top8_short",
     ]
 
+    # UNIQUE key of cot_data
+    _UNIQUE_COLS = ("cftc_contract_code", "report_date", "report_type", "subtype")
+
     # Columns actually used by CotCalculator (avoids SELECT *)
     _QUERY_COLS = [
         "report_date", "cftc_contract_code", "market_and_exchange", "exchange_code",
@@ -59,6 +71,44 @@ class CotStorage:
     ]
 
     _QUERY_COLS_SQL = ", ".join(_QUERY_COLS)
+    _QUERY_COL_SET = frozenset(_QUERY_COLS)
+
+    # Identity columns always selected, even for projected queries
+    _KEY_COLS = frozenset({
+        "report_date", "cftc_contract_code", "market_and_exchange",
+        "exchange_code", "cftc_commodity_code",
+    })
+
+    # Columns of screener_snapshots (besides report_type / subtype)
+    SNAPSHOT_COLS = [
+        "cftc_contract_code", "report_date", "open_interest", "oi_change",
+        *(f"g{gi}_{f}" for gi in range(1, 6) for f in SNAPSHOT_GROUP_FIELDS),
+    ]
+
+    # Columns of sector_series (besides report_type / subtype)
+    SECTOR_COLS = [
+        "sector", "report_date", "markets", "open_interest",
+        *(f"g{gi}_{f}" for gi in range(1, 6) for f in SECTOR_GROUP_FIELDS),
+    ]
+
+    # Columns of alert_rules / alerts written by the API and the alert engine
+    ALERT_RULE_COLS = [
+        "user_id", "name", "report_type", "subtype", "kind", "column_name", "op", "value",
+        "group_key", "signal", "cftc_contract_code",
+    ]
+    ALERT_COLS = [
+        "rule_id", "user_id", "report_type", "subtype", "cftc_contract_code", "report_date",
+        "value", "previous", "group_key", "signal",
+    ]
+
+    # Columns of pipeline_runs written by the pipeline (besides id)
+    PIPELINE_RUN_COLS = [
+        "started_at", "finished_at", "status", "error", "mode", "force_reload", "duration_sec",
+        "bytes_downloaded", "rows_parsed", "rows_upserted", "rows_changed",
+        "export_files_written", "export_bytes_written",
+        "years_skipped", "price_cache_hits", "export_files_unchanged",
+        "peak_rss_mb", "stages", "variants",
+    ]
 
     def __init__(
         self,
@@ -106,20 +156,57 @@ class CotStorage:
     # ------------------------------------------------------------------
 
     def upsert_rows(self, rows: list[dict]) -> int:
-        """Insert rows (list of dicts). On conflict, replace."""
+        """Insert rows (list of dicts). On conflict, update the stored row.
+
+        Rows identical to the stored ones are left untouched.
+
+        Returns:
+            The number of rows inserted or changed.
+        """
+        return sum(self.upsert_market_rows(rows).values())
+
+    def upsert_market_rows(self, rows: list[dict]) -> dict[str, int]:
+        """``upsert_rows``, counted per market.
+
+        Returns:
+            ``{cftc_contract_code: rows inserted or changed}`` of the
+            markets that changed (unchanged markets are left out).
+        """
         if not rows:
-            return 0
+            return {}
 
         cols_str = ", ".join(self._DATA_COLS)
         placeholders = ", ".join(["?"] * len(self._DATA_COLS))
-        sql = f"INSERT OR REPLACE INTO cot_data ({cols_str}) VALUES ({placeholders})"
+        values_cols = [c for c in self._DATA_COLS if c not in self._UNIQUE_COLS]
+        sql = (
+            f"INSERT INTO cot_data ({cols_str}) VALUES ({placeholders}) "
+            f"ON CONFLICT({', '.join(self._UNIQUE_COLS)}) DO UPDATE SET "
+            + ", ".join(f"{c} = excluded.{c}" for c in values_cols)
+            + f" WHERE ({', '.join(f'cot_data.{c}' for c in values_cols)})"
+            f" IS NOT ({', '.join(f'excluded.{c}' for c in values_cols)})"
+        )
+
+        by_code: dict[str, list[tuple]] = {}
+        for row in rows:
+            by_code.setdefault(row.get("cftc_contract_code"), []).append(
+                tuple(row.get(c) for c in self._DATA_COLS)
+            )
 
+        changed: dict[str, int] = {}
         with self._conn() as conn:
-            values = [tuple(row.get(c) for c in self._DATA_COLS) for row in rows]
-            conn.executemany(sql, values)
+            # One statement batch per market, so total_changes attributes the changes
+            for code, values in by_code.items():
+                before = conn.total_changes
+                conn.executemany(sql, values)
+                n = conn.total_changes - before
+                if n:
+                    changed[code] = n
             conn.commit()
-            logger.debug("Upserted %d rows", len(values))
-            return len(values)
+        logger.debug(
+            "Upserted %d rows of %d markets (%d rows of %d markets changed)",
+            len(rows), len(by_code), sum(changed.values()), len(changed),
+        )
+        return changed
 
     # ------------------------------------------------------------------
     # Download log
@@ -143,31 +230,143 @@ class CotStorage:
             )
             conn.commit()
 
+    # ------------------------------------------------------------------
+    # Pipeline checkpoints
+    # ------------------------------------------------------------------
+
+    def set_checkpoint(
+        self,
+        report_type: str,
+        subtype: str,
+        unit: str,
+        state: str,
+        artifact: str | None = None,
+        rows_count: int | None = None,
+    ) -> None:
+        """Record that *unit* of a variant reached *state*; an existing
+        artifact / row count is kept unless a new one is given."""
+        with self._conn() as conn:
+            conn.execute(
+                """INSERT INTO pipeline_checkpoints
+                   (report_type, subtype, unit, state, artifact, rows_count, updated)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(report_type, subtype, unit) DO UPDATE SET
+                       state = excluded.state,
+                       artifact = COALESCE(excluded.artifact, artifact),
+                       rows_count = COALESCE(excluded.rows_count, rows_count),
+                       updated = excluded.updated""",
+                (report_type, subtype, unit, state, artifact, rows_count, datetime.now().isoformat()),
+            )
+            conn.commit()
+
+    def get_checkpoints(self, report_type: str, subtype: str) -> dict[str, dict]:
+        """unit → ``{state, artifact, rows_count, updated}`` of a variant."""
+        with self._conn() as conn:
+            cur = conn.cursor()
+            cur.row_factory = None
+            cur.execute(
+                """SELECT unit, state, artifact, rows_count, updated FROM pipeline_checkpoints
+                   WHERE report_type = ? AND subtype = ?""",
+                (report_type, subtype),
+            )
+            return {
+                unit: {"state": state, "artifact": artifact, "rows_count": rows, "updated": updated}
+                for unit, state, artifact, rows, updated in cur.fetchall()
+            }
+
+    def clear_checkpoints(self, report_type: str, subtype: str) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                "DELETE FROM pipeline_checkpoints WHERE report_type=? AND subtype=?",
+                (report_type, subtype),
+            )
+            conn.commit()
+
     # ------------------------------------------------------------------
     # Querying
     # ------------------------------------------------------------------
 
-    def get_market_data(self, cftc_code: str, report_type: str, subtype: str) -> list[dict]:
-        """All weekly rows for a market, sorted newest → oldest."""
+    def _select_sql(self, columns: list[str] | None) -> str:
+        """SELECT list for a column projection (None = all query columns)."""
+        if columns is None:
+            return self._QUERY_COLS_SQL
+        unknown = set(columns) - self._QUERY_COL_SET
+        if unknown:
+            raise ValueError(f"Unknown columns: {sorted(unknown)}")
+        wanted = self._KEY_COLS.union(columns)
+        return ", ".join(c for c in self._QUERY_COLS if c in wanted)
+
+    def get_market_data(
+        self,
+        cftc_code: str,
+        report_type: str,
+        subtype: str,
+        columns: list[str] | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        history: int = 0,
+    ) -> list[dict]:
+        """Weekly rows for a market, sorted newest → oldest.
+
+        Args:
+            columns: Subset of query columns to select (None = all).
+            date_from / date_to: Inclusive ISO date bounds.
+            history: Extra rows older than *date_from* to include, so that
+                rolling windows (COT Index, WCI) stay exact at the range start.
+        """
+        select = self._select_sql(columns)
+        where = "cftc_contract_code = ? AND report_type = ? AND subtype = ?"
+        params: list = [cftc_code, report_type, subtype]
+        if date_to:
+            where += " AND report_date <= ?"
+            params.append(date_to)
+
         with self._conn() as conn:
             conn.row_factory = sqlite3.Row
+            if date_from:
+                cur = conn.execute(
+                    f"""SELECT {select} FROM cot_data
+                       WHERE {where} AND report_date >= ?
+                       ORDER BY report_date DESC""",
+                    [*params, date_from],
+                )
+                rows = [dict(r) for r in cur.fetchall()]
+                if history > 0:
+                    cur = conn.execute(
+                        f"""SELECT {select} FROM cot_data
+                           WHERE {where} AND report_date < ?
+                           ORDER BY report_date DESC LIMIT ?""",
+                        [*params, date_from, history],
+                    )
+                    rows.extend(dict(r) for r in cur.fetchall())
+                return rows
+
             cur = conn.execute(
-                f"""SELECT {self._QUERY_COLS_SQL} FROM cot_data
-                   WHERE cftc_contract_code = ? AND report_type = ? AND subtype = ?
+                f"""SELECT {select} FROM cot_data
+                   WHERE {where}
                    ORDER BY report_date DESC""",
-                (cftc_code, report_type, subtype),
+                params,
             )
             return [dict(r) for r in cur.fetchall()]
 
-    def get_all_market_data_bulk(self, report_type: str, subtype: str) -> dict[str, list[dict]]:
+    def get_all_market_data_bulk(
+        self,
+        report_type: str,
+        subtype: str,
+        columns: list[str] | None = None,
+        date_to: str | None = None,
+    ) -> dict[str, list[dict]]:
         """All rows for a variant, grouped by market code (for screener)."""
+        select = self._select_sql(columns)
+        date_sql = " AND report_date <= ?" if date_to else ""
+        params = [report_type, subtype] + ([date_to] if date_to else [])
         with self._conn() as conn:
             conn.row_factory = sqlite3.Row
             cur = conn.execute(
-                f"""SELECT {self._QUERY_COLS_SQL} FROM cot_data
-                   WHERE report_type = ? AND subtype = ?
+                f"""SELECT {select} FROM cot_data
+                   WHERE report_type = ? AND subtype = ?{date_sql}
                    ORDER BY cftc_contract_code, report_date DESC""",
-                (report_type, subtype),
+                params,
             )
             result: dict[str, list[dict]] = {}
             for row in cur:
@@ -202,20 +401,28 @@ class CotStorage:
             return [row[0] for row in cur.fetchall()]
 
     def get_bulk_for_codes(
-        self, codes: list[str], report_type: str, subtype: str,
+        self,
+        codes: list[str],
+        report_type: str,
+        subtype: str,
+        columns: list[str] | None = None,
+        date_to: str | None = None,
     ) -> dict[str, list[dict]]:
         """Load rows for a specific set of market codes (paginated screener)."""
         if not codes:
             return {}
+        select = self._select_sql(columns)
         placeholders = ",".join(["?"] * len(codes))
+        date_sql = " AND report_date <= ?" if date_to else ""
+        params = [report_type, subtype, *codes] + ([date_to] if date_to else [])
         with self._conn() as conn:
             conn.row_factory = sqlite3.Row
             cur = conn.execute(
-                f"""SELECT {self._QUERY_COLS_SQL} FROM cot_data
+                f"""SELECT {select} FROM cot_data
                    WHERE report_type = ? AND subtype = ?
-                     AND cftc_contract_code IN ({placeholders})
+                     AND cftc_contract_code IN ({placeholders}){date_sql}
                    ORDER BY cftc_contract_code, report_date DESC""",
-                [report_type, subtype, *codes],
+                params,
             )
             result: dict[str, list[dict]] = {}
             for row in cur:
@@ -224,6 +431,54 @@ class CotStorage:
                 result.setdefault(code, []).append(d)
             return result
 
+    def get_bulk_columns(
+        self,
+        codes: list[str],
+        report_type: str,
+        subtype: str,
+        columns: list[str] | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> dict[str, dict[str, tuple]]:
+        """Weekly rows for a set of market codes as columns, oldest → newest.
+
+        Returns ``{code: {column: (v0, v1, ...)}}`` — one tuple per selected
+        column, without building a dict per row.
+        """
+        if not codes:
+            return {}
+        select = self._select_sql(columns)
+        placeholders = ",".join(["?"] * len(codes))
+        date_sql = ""
+        params = [report_type, subtype, *codes]
+        if date_from:
+            date_sql += " AND report_date >= ?"
+            params.append(date_from)
+        if date_to:
+            date_sql += " AND report_date <= ?"
+            params.append(date_to)
+        with self._conn() as conn:
+            cur = conn.cursor()
+            cur.row_factory = None
+            cur.execute(
+                f"""SELECT {select} FROM cot_data
+                   WHERE report_type = ? AND subtype = ?
+                     AND cftc_contract_code IN ({placeholders}){date_sql}
+                   ORDER BY cftc_contract_code, report_date""",
+                params,
+            )
+            names = [d[0] for d in cur.description]
+            code_idx = names.index("cftc_contract_code")
+            rows = cur.fetchall()
+
+        result: dict[str, dict[str, tuple]] = {}
+        start = 0
+        for end in range(1, len(rows) + 1):
+            if end == len(rows) or rows[end][code_idx] != rows[start][code_idx]:
+                result[rows[start][code_idx]] = dict(zip(names, zip(*rows[start:end])))
+                start = end
+        return result
+
     def get_all_markets(self, report_type: str, subtype: str) -> list[dict]:
         """Distinct markets for a report variant."""
         with self._conn() as conn:
@@ -285,12 +540,344 @@ class CotStorage:
             )
             return [row[0] for row in cur.fetchall()]
 
+    def get_market_variants(self) -> list[dict]:
+        """One row per (code, report_type, subtype) with the latest identity.
+
+        Feeds the in-memory market index (``market_index.MarketIndex``).
+        """
+        with self._conn() as conn:
+            cur = conn.cursor()
+            cur.row_factory = None
+            # SQLite takes bare columns from the row that holds MAX(report_date)
+            cur.execute(
+                """SELECT cftc_contract_code, report_type, subtype,
+                          MAX(report_date), market_and_exchange, exchange_code,
+                          cftc_commodity_code
+                   FROM cot_data
+                   GROUP BY cftc_contract_code, report_type, subtype"""
+            )
+            return [
+                {
+                    "code": code, "report_type": rt, "subtype": st,
+                    "last_date": last_date, "name": name, "exchange_code": exchange_code,
+                    "commodity_code": commodity_code,
+                }
+                for code, rt, st, last_date, name, exchange_code, commodity_code in cur.fetchall()
+            ]
+
+    # ------------------------------------------------------------------
+    # Screener snapshots
+    # ------------------------------------------------------------------
+
+    def get_snapshot_heads(self, report_type: str, subtype: str) -> dict[str, str]:
+        """Latest snapshotted report date per market code."""
+        with self._conn() as conn:
+            cur = conn.execute(
+                """SELECT cftc_contract_code, MAX(report_date)
+                   FROM screener_snapshots
+                   WHERE report_type = ? AND subtype = ?
+                   GROUP BY cftc_contract_code""",
+                (report_type, subtype),
+            )
+            return dict(cur.fetchall())
+
+    def has_screener_snapshots(self, report_type: str, subtype: str) -> bool:
+        with self._conn() as conn:
+            cur = conn.execute(
+                "SELECT 1 FROM screener_snapshots WHERE report_type=? AND subtype=? LIMIT 1",
+                (report_type, subtype),
+            )
+            return cur.fetchone() is not None
+
+    def upsert_screener_snapshots(self, report_type: str, subtype: str, rows: list[dict]) -> int:
+        """Insert snapshot rows (``SNAPSHOT_COLS`` keys). On conflict, replace."""
+        if not rows:
+            return 0
+        cols = ["report_type", "subtype", *self.SNAPSHOT_COLS]
+        sql = (
+            f"INSERT OR REPLACE INTO screener_snapshots ({', '.join(cols)}) "
+            f"VALUES ({', '.join(['?'] * len(cols))})"
+        )
+        with self._conn() as conn:
+            conn.executemany(
+                sql, [(report_type, subtype, *(r.get(c) for c in self.SNAPSHOT_COLS)) for r in rows],
+            )
+            conn.commit()
+            return len(rows)
+
+    def get_screener_snapshot(
+        self, report_type: str, subtype: str, codes: list[str], as_of: str,
+    ) -> list[dict]:
+        """Snapshot row of each market's latest week on or before *as_of*, by code.
+
+        Each market is one primary-key seek; name and exchange come from
+        the matching ``cot_data`` row.
+        """
+        if not codes:
+            return []
+        select = ", ".join(f"s.{c}" for c in self.SNAPSHOT_COLS)
+        with self._conn() as conn:
+            cur = conn.cursor()
+            cur.row_factory = None
+            cur.execute(
+                f"""SELECT c.market_and_exchange, c.exchange_code, {select}
+                   FROM json_each(?) m
+                   JOIN screener_snapshots s
+                     ON s.report_type = ? AND s.subtype = ?
+                    AND s.cftc_contract_code = m.value
+                    AND s.report_date = (
+                        SELECT MAX(report_date) FROM screener_snapshots
+                        WHERE report_type = ? AND subtype = ?
+                          AND cftc_contract_code = m.value AND report_date <= ?
+                    )
+                   LEFT JOIN cot_data c
+                     ON c.cftc_contract_code = s.cftc_contract_code
+                    AND c.report_date = s.report_date
+                    AND c.report_type = s.report_type AND c.subtype = s.subtype
+                   ORDER BY s.cftc_contract_code""",
+                (json.dumps(sorted(codes)), report_type, subtype, report_type, subtype, as_of),
+            )
+            names = ["market_and_exchange", "exchange_code", *self.SNAPSHOT_COLS]
+            return [dict(zip(names, row)) for row in cur.fetchall()]
+
+    def delete_screener_snapshots(self, report_type: str, subtype: str) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                "DELETE FROM screener_snapshots WHERE report_type=? AND subtype=?",
+                (report_type, subtype),
+            )
+            conn.commit()
+
+    # ------------------------------------------------------------------
+    # Sector series
+    # ------------------------------------------------------------------
+
+    def replace_sector_series(self, report_type: str, subtype: str, rows: list[dict]) -> int:
+        """Replace all sector rows of a variant (``SECTOR_COLS`` keys)."""
+        cols = ["report_type", "subtype", *self.SECTOR_COLS]
+        sql = (
+            f"INSERT INTO sector_series ({', '.join(cols)}) "
+            f"VALUES ({', '.join(['?'] * len(cols))})"
+        )
+        with self._conn() as conn:
+            conn.execute(
+                "DELETE FROM sector_series WHERE report_type=? AND subtype=?",
+                (report_type, subtype),
+            )
+            conn.executemany(
+                sql, [(report_type, subtype, *(r.get(c) for c in self.SECTOR_COLS)) for r in rows],
+            )
+            conn.commit()
+            return len(rows)
+
+    def has_sector_series(self, report_type: str, subtype: str) -> bool:
+        with self._conn() as conn:
+            cur = conn.execute(
+                "SELECT 1 FROM sector_series WHERE report_type=? AND subtype=? LIMIT 1",
+                (report_type, subtype),
+            )
+            return cur.fetchone() is not None
+
+    def get_sector_series(
+        self,
+        report_type: str,
+        subtype: str,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[dict]:
+        """Sector rows of a variant, ordered by sector then date (oldest first)."""
+        date_sql = ""
+        params: list = [report_type, subtype]
+        if date_from:
+            date_sql += " AND report_date >= ?"
+            params.append(date_from)
+        if date_to:
+            date_sql += " AND report_date <= ?"
+            params.append(date_to)
+        with self._conn() as conn:
+            cur = conn.cursor()
+            cur.row_factory = None
+            cur.execute(
+                f"""SELECT {', '.join(self.SECTOR_COLS)} FROM sector_series
+                   WHERE report_type = ? AND subtype = ?{date_sql}
+                   ORDER BY sector, report_date""",
+                params,
+            )
+            return [dict(zip(self.SECTOR_COLS, row)) for row in cur.fetchall()]
+
+    # ------------------------------------------------------------------
+    # Alert rules / alerts
+    # ------------------------------------------------------------------
+
+    def create_alert_rule(self, rule: dict) -> dict:
+        """Insert a rule (``ALERT_RULE_COLS`` keys); returns the stored row."""
+        with self._conn() as conn:
+            cur = conn.execute(
+                f"INSERT INTO alert_rules ({', '.join(self.ALERT_RULE_COLS)}) "
+                f"VALUES ({', '.join(['?'] * len(self.ALERT_RULE_COLS))})",
+                [rule.get(c) for c in self.ALERT_RULE_COLS],
+            )
+            conn.commit()
+            rule_id = cur.lastrowid
+        return self.get_alert_rules(rule["user_id"], rule_id=rule_id)[0]
+
+    def get_alert_rules(
+        self,
+        user_id: str | None = None,
+        rule_id: int | None = None,
+        enabled_only: bool = False,
+    ) -> list[dict]:
+        """Rules of one user (or of everyone), oldest first."""
+        where, params = [], []
+        if user_id is not None:
+            where.append("user_id = ?")
+            params.append(user_id)
+        if rule_id is not None:
+            where.append("id = ?")
+            params.append(rule_id)
+        if enabled_only:
+            where.append("enabled = 1")
+        where_sql = f" WHERE {' AND '.join(where)}" if where else ""
+        with self._conn() as conn:
+            conn.row_factory = sqlite3.Row
+            cur = conn.execute(f"SELECT * FROM alert_rules{where_sql} ORDER BY id", params)
+            return [dict(r) for r in cur.fetchall()]
+
+    def count_alert_rules(self, user_id: str) -> int:
+        with self._conn() as conn:
+            cur = conn.execute("SELECT COUNT(*) FROM alert_rules WHERE user_id = ?", (user_id,))
+            return cur.fetchone()[0]
+
+    def delete_alert_rule(self, user_id: str, rule_id: int) -> bool:
+        """Delete a user's rule and its alerts; False if the user has no such rule."""
+        with self._conn() as conn:
+            cur = conn.execute(
+                "DELETE FROM alert_rules WHERE id = ? AND user_id = ?", (rule_id, user_id),
+            )
+            if not cur.rowcount:
+                return False
+            conn.execute("DELETE FROM alerts WHERE rule_id = ?", (rule_id,))
+            conn.commit()
+            return True
+
+    def get_recent_snapshots(self, report_type: str, subtype: str, weeks: int = 2) -> list[dict]:
+        """Snapshot rows of the variant's *weeks* latest report dates (``SNAPSHOT_COLS`` keys)."""
+        with self._conn() as conn:
+            cur = conn.cursor()
+            cur.row_factory = None
+            cur.execute(
+                f"""SELECT {', '.join(self.SNAPSHOT_COLS)} FROM screener_snapshots
+                   WHERE report_type = ? AND subtype = ? AND report_date IN (
+                       SELECT DISTINCT report_date FROM screener_snapshots
+                       WHERE report_type = ? AND subtype = ?
+                       ORDER BY report_date DESC LIMIT ?
+                   )
+                   ORDER BY cftc_contract_code, report_date DESC""",
+                (report_type, subtype, report_type, subtype, weeks),
+            )
+            return [dict(zip(self.SNAPSHOT_COLS, row)) for row in cur.fetchall()]
+
+    def insert_alerts(self, rows: list[dict]) -> int:
+        """Insert triggered alerts (``ALERT_COLS`` keys); already stored ones are skipped.
+
+        Returns the number of new alerts.
+        """
+        if not rows:
+            return 0
+        with self._conn() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                f"INSERT OR IGNORE INTO alerts ({', '.join(self.ALERT_COLS)}) "
+                f"VALUES ({', '.join(['?'] * len(self.ALERT_COLS))})",
+                [[r.get(c) for c in self.ALERT_COLS] for r in rows],
+            )
+            conn.commit()
+            return conn.total_changes - before
+
+    def get_alerts(
+        self, user_id: str, limit: int = 50, offset: int = 0, unread_only: bool = False,
+    ) -> tuple[list[dict], int]:
+        """A user's alerts, newest report date first, with rule and market names."""
+        read_sql = " AND a.is_read = 0" if unread_only else ""
+        with self._conn() as conn:
+            total = conn.execute(
+                f"SELECT COUNT(*) FROM alerts a WHERE a.user_id = ?{read_sql}", (user_id,),
+            ).fetchone()[0]
+            conn.row_factory = sqlite3.Row
+            cur = conn.execute(
+                f"""SELECT a.*, r.name AS rule_name, r.kind, c.market_and_exchange
+                   FROM alerts a
+                   JOIN alert_rules r ON r.id = a.rule_id
+                   LEFT JOIN cot_data c
+                     ON c.cftc_contract_code = a.cftc_contract_code
+                    AND c.report_date = a.report_date
+                    AND c.report_type = a.report_type AND c.subtype = a.subtype
+                   WHERE a.user_id = ?{read_sql}
+                   ORDER BY a.report_date DESC, a.id DESC
+                   LIMIT ? OFFSET ?""",
+                (user_id, limit if limit > 0 else -1, offset),
+            )
+            return [dict(r) for r in cur.fetchall()], total
+
+    def mark_alerts_read(self, user_id: str, ids: list[int] | None = None) -> int:
+        """Mark a user's alerts (all, or *ids*) as read; returns the rows updated."""
+        id_sql = " AND id IN (SELECT value FROM json_each(?))" if ids is not None else ""
+        params: list = [user_id] + ([json.dumps(ids)] if ids is not None else [])
+        with self._conn() as conn:
+            cur = conn.execute(
+                f"UPDATE alerts SET is_read = 1 WHERE user_id = ? AND is_read = 0{id_sql}", params,
+            )
+            conn.commit()
+            return cur.rowcount
+
+    # ------------------------------------------------------------------
+    # Pipeline run history
+    # ------------------------------------------------------------------
+
+    def insert_pipeline_run(self, run: dict) -> int:
+        """Store one pipeline run (``PIPELINE_RUN_COLS`` keys; ``stages`` /
+        ``variants`` as dicts); returns its id."""
+        values = [
+            json.dumps(run.get(c)) if c in ("stages", "variants") else run.get(c)
+            for c in self.PIPELINE_RUN_COLS
+        ]
+        with self._conn() as conn:
+            cur = conn.execute(
+                f"INSERT INTO pipeline_runs ({', '.join(self.PIPELINE_RUN_COLS)}) "
+                f"VALUES ({', '.join(['?'] * len(self.PIPELINE_RUN_COLS))})",
+                values,
+            )
+            conn.commit()
+            return cur.lastrowid
+
+    def get_pipeline_runs(self, limit: int = 10) -> list[dict]:
+        """The *limit* latest pipeline runs, newest first."""
+        with self._conn() as conn:
+            conn.row_factory = sqlite3.Row
+            cur = conn.execute(
+                "SELECT * FROM pipeline_runs ORDER BY started_at DESC, id DESC LIMIT ?", (limit,),
+            )
+            runs = [dict(r) for r in cur.fetchall()]
+        for run in runs:
+            for key in ("stages", "variants"):
+                run[key] = json.loads(run[key]) if run[key] else {}
+            run["force_reload"] = bool(run["force_reload"])
+        return runs
+
     def delete_report_data(self, report_type: str, subtype: str) -> None:
         with self._conn() as conn:
             conn.execute(
                 "DELETE FROM cot_data WHERE report_type=? AND subtype=?",
                 (report_type, subtype),
             )
+            conn.execute(
+                "DELETE FROM screener_snapshots WHERE report_type=? AND subtype=?",
+                (report_type, subtype),
+            )
+            conn.execute(
+                "DELETE FROM sector_series WHERE report_type=? AND subtype=?",
+                (report_type, subtype),
+            )
             conn.execute(
                 "DELETE FROM download_log WHERE report_type=? AND subtype=?",
                 (report_type, subtype),
@@ -114,6 +114,8 @@ class PriceSettings:
     """Price download configuration."""
 
     price_years: int = field(default_factory=lambda: env_int("PRICE_YEARS", 3))
+    # Days before a ticker's last stored bar that an incremental update re-fetches (revisions)
+    price_overlap_days: int = field(default_factory=lambda: env_int("PRICE_OVERLAP_DAYS", 7))
 
     @cached_property
     def ticker_map(self) -> dict[str, str]:
@@ -2,8 +2,9 @@
 Prices module — Daily price update scheduler.
 ================================================
 Downloads fresh OHLCV data every day at 00:00 Kyiv time
-and re-exports all JSON files so the frontend always has
+and re-exports the per-ticker price files so the frontend always has
 up-to-date price bars without waiting for the weekly COT run.
+The work runs in a worker process (``price_update_job``).
 """
 
 import logging
@@ -28,6 +29,7 @@ class PriceUpdateManager:
             "last_status": None,
             "last_error": None,
             "last_duration_sec": None,
+            "progress": None,  # latest progress event of the running update
         }
         self._on_complete_callbacks: list[Callable] = []
 
@@ -36,7 +38,11 @@ class PriceUpdateManager:
     # ------------------------------------------------------------------
 
     def on_complete(self, callback: Callable) -> None:
-        """Register a callback to run after a successful price update."""
+        """Register a callback to run after a successful or partial price update.
+
+        Called with the ``(code, variant)`` keys of the markets whose
+        prices file changed (``app.modules.cot.changes``).
+        """
         self._on_complete_callbacks.append(callback)
 
     # ------------------------------------------------------------------
@@ -58,15 +64,20 @@ class PriceUpdateManager:
     # ------------------------------------------------------------------
 
     def run_price_update(self) -> None:
-        """Download all prices, update cache, and re-export JSON files.
+        """Download all prices, update the store, and re-export the price files.
 
         Designed to be called by the scheduler or triggered manually.
+        With ``WORKER_PROCESS`` (default) the work runs in a worker process
+        (``price_update_job``); only the changed codes come back, and are
+        dropped from this process's price cache (re-read from the price
+        store on demand) before the completion callbacks fire.
         """
         with self._lock:
             if self._state["running"]:
                 logger.warning("Price update already running, skipping")
                 return
             self._state["running"] = True
+            self._state["progress"] = None
 
         t0 = datetime.now(timezone.utc)
         logger.info("=" * 60)
@@ -74,50 +85,28 @@ class PriceUpdateManager:
         logger.info("=" * 60)
 
         try:
-            # Lazy imports to avoid circular dependencies at module load
-            from app.modules.prices.service import PriceService
-            from app.modules.cot.storage import CotStorage
-            from app.modules.cot.exporter import CotExporter
-            from app.modules.cot.config import cot_settings
-            from app.core.logging import setup_logging
-
-            log_file = settings.log_dir / "price_update.log"
-            setup_logging(verbose=False, log_file=log_file)
-
-            # 1. Collect all market codes from DB
-            store = CotStorage()
-            all_codes: set[str] = set()
-            for rt in cot_settings.report_types:
-                for st in cot_settings.subtypes:
-                    for m in store.get_all_markets(rt, st):
-                        all_codes.add(m["code"])
-
-            if not all_codes:
-                logger.warning("No market codes found in DB — skipping price update")
+            if settings.worker_process:
+                from app.core.worker import run_in_worker
+                result = run_in_worker(
+                    f"{__name__}:price_update_job", on_progress=self._on_progress,
+                    name="price-update",
+                )
+            else:
+                result = price_update_job(self._on_progress)
+
+            if result["status"] == "skipped":
                 self._finish(t0, "skipped", None)
                 return
 
-            # 2. Download all prices (populates the class-level cache)
-            price_svc = PriceService()
-            price_data = price_svc.refresh_all(list(all_codes))
-            logger.info("Downloaded prices for %d/%d markets", len(price_data), len(all_codes))
-
-            # 3. Re-export JSON files with fresh prices
-            #    COT data stays the same; only the price bars are updated.
-            exporter = CotExporter(store, price_service=None)
-            for rt in cot_settings.report_types:
-                for st in cot_settings.subtypes:
-                    try:
-                        exporter.export_all(rt, st, price_data=price_data)
-                    except (OSError, ValueError, KeyError) as e:
-                        logger.error("Export failed %s/%s: %s", rt, st, e, exc_info=True)
-
-            self._finish(t0, "success", None)
+            # Bars the worker stored are read lazily from the price store
+            from app.modules.prices.service import PriceService
+            PriceService.invalidate(result["price_codes"])
+            self._finish(t0, result["status"], result.get("error"))
 
-            # Notify listeners (e.g. API cache invalidation)
+            # Notify listeners (e.g. API cache invalidation) of what changed
             for cb in self._on_complete_callbacks:
                 try:
-                    cb()
+                    cb(result["changes"])
                 except Exception as e:
                     logger.error("Post-price-update callback failed: %s", e)
 
@@ -125,6 +114,10 @@ class PriceUpdateManager:
             logger.error("Daily price update failed: %s", e, exc_info=True)
             self._finish(t0, "error", str(e))
 
+    def _on_progress(self, event: dict) -> None:
+        with self._lock:
+            self._state["progress"] = event
+
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
@@ -139,7 +132,77 @@ class PriceUpdateManager:
                 "last_error": error,
                 "last_duration_sec": round(duration, 1),
             })
-        logger.info("Daily price update finished — %s (%.1fs)", status, duration)
+        if status == "partial":
+            logger.warning("Daily price update finished — partial (%.1fs): %s", duration, error)
+        else:
+            logger.info("Daily price update finished — %s (%.1fs)", status, duration)
+
+
+def price_update_job(progress: Callable[[dict], None]) -> dict:
+    """The price update itself (worker process entry point).
+
+    Returns:
+        ``{"status": "success" | "partial" | "skipped", "price_codes": {code, ...},
+        "changes": {(code, variant), ...}}`` — *price_codes* are the codes
+        whose stored bars changed, *changes* the markets whose prices file
+        was rewritten; ``partial`` (with ``"error"``) means the export failed.
+    """
+    # Lazy imports to avoid circular dependencies at module load
+    from app.modules.prices.service import PriceService
+    from app.modules.cot.storage import CotStorage
+    from app.modules.cot.exporter import CotExporter
+    from app.modules.cot.config import cot_settings
+    from app.modules.cot.changes import market_keys
+    from app.modules.prices.config import price_settings
+    from app.core.logging import setup_logging
+
+    log_file = settings.log_dir / "price_update.log"
+    setup_logging(verbose=False, log_file=log_file)
+
+    # 1. Collect all market codes from DB
+    store = CotStorage()
+    variant_codes: dict[tuple[str, str], set[str]] = {
+        (rt, st): {m["code"] for m in store.get_all_markets(rt, st)}
+        for rt in cot_settings.report_types
+        for st in cot_settings.subtypes
+    }
+    all_codes: set[str] = set().union(*variant_codes.values())
+
+    if not all_codes:
+        logger.warning("No market codes found in DB — skipping price update")
+        return {"status": "skipped", "price_codes": set(), "changes": set()}
+
+    # 2. Download all prices into the price store
+    progress({"step": "downloading", "markets": len(all_codes)})
+    price_svc = PriceService()
+    price_data = price_svc.refresh_all(list(all_codes))
+    logger.info("Downloaded prices for %d/%d markets", len(price_data), len(all_codes))
+
+    # 3. Re-export the per-ticker price files
+    #    COT data stays the same, and market files only reference
+    #    their prices file, so nothing else needs rewriting.
+    progress({"step": "exporting", "markets": len(price_data)})
+    error = None
+    try:
+        result = CotExporter(store, price_service=None).export_prices(price_data)
+        changed_tickers = set(result["changed_tickers"])
+    except OSError as e:
+        logger.error("Price export failed: %s", e, exc_info=True)
+        error = f"Price export failed: {e}"
+        # Unknown what got written: the API cache still holds the old bars
+        changed_tickers = {price_settings.ticker_map.get(c) for c in price_data}
+
+    # 4. The markets (of every variant) that got new bars
+    changed = {c for c in price_data if price_settings.ticker_map.get(c) in changed_tickers}
+    changes = set()
+    for (rt, st), codes in variant_codes.items():
+        changes |= market_keys(codes & changed, rt, st)
+    logger.info("Prices changed for %d markets (%d market variants)", len(changed), len(changes))
+
+    return {
+        "status": "partial" if error else "success", "error": error,
+        "price_codes": price_svc.changed_codes, "changes": changes,
+    }
 
 
 # Module-level singleton
@@ -7,15 +7,26 @@ and delegates to the appropriate downloader.
 Includes a **class-level in-memory cache** so that the daily
 scheduled job can populate it once, and every subsequent consumer
 (COT pipeline, API endpoints) reads near-instantly.
+
+Behind it, every downloaded bar is kept in the persistent price store
+(``store.py``): a cache miss — e.g. the first request after a restart —
+reads the store instead of Yahoo, and downloads are incremental (only
+the bars after a ticker's last stored date, minus a few days of overlap
+to pick up revisions).  Reads never download: keeping the store current
+is the scheduled jobs' work (``refresh_all``), so a request never waits
+on Yahoo, whatever the exchange calendar or a lagging ticker.
 """
 
 import logging
 import threading
 import time
+from collections.abc import Iterable
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
 
 from app.modules.prices.config import price_settings
-from app.modules.prices.yahoo import YahooDownloader
+from app.modules.prices.store import PriceStore
+from app.modules.prices.yahoo import YahooDownloader, history_start
 
 logger = logging.getLogger(__name__)
 
@@ -40,9 +51,19 @@ class PriceService:
     _price_cache: dict[str, _CacheEntry] = {}
     _cache_lock = threading.Lock()
 
-    def __init__(self) -> None:
+    def __init__(self, store: PriceStore | None = None) -> None:
         self._ticker_map = price_settings.ticker_map
         self._downloader = YahooDownloader()
+        self._store_instance = store
+        # Codes whose stored bars a download of this instance inserted or revised
+        self.changed_codes: set[str] = set()
+
+    @property
+    def _store(self) -> PriceStore:
+        """The persistent price store (opened on first use)."""
+        if self._store_instance is None:
+            self._store_instance = PriceStore()
+        return self._store_instance
 
     # ------------------------------------------------------------------
     # Ticker helpers
@@ -70,26 +91,19 @@ class PriceService:
     # ------------------------------------------------------------------
 
     def get_prices(self, cftc_code: str) -> list[dict]:
-        """Return cached bars if fresh, otherwise download and cache."""
-        now = time.time()
-        with self._cache_lock:
-            if cftc_code in self._price_cache:
-                bars, ts = self._price_cache[cftc_code]
-                if now - ts < PRICE_CACHE_TTL:
-                    return bars
+        """Return cached bars if fresh, else the stored bars (no network calls).
 
-        bars = self.download_prices(cftc_code)
-        if bars:
-            with self._cache_lock:
-                self._price_cache[cftc_code] = (bars, time.time())
-        return bars
+        Empty for a code without a ticker or without stored bars yet.
+        """
+        return self.get_all_cached([cftc_code]).get(cftc_code, [])
 
     # ------------------------------------------------------------------
     # Bulk cache read (no network calls)
     # ------------------------------------------------------------------
 
     def get_all_cached(self, cftc_codes: list[str]) -> dict[str, list[dict]]:
-        """Return all cached (non-expired) bars for the given codes."""
+        """Return all cached (non-expired) bars for the given codes, reading
+        codes missing from the memory cache from the price store."""
         now = time.time()
         result: dict[str, list[dict]] = {}
         with self._cache_lock:
@@ -99,6 +113,27 @@ class PriceService:
                     bars, ts = entry
                     if now - ts < PRICE_CACHE_TTL:
                         result[code] = bars
+        stored = self._read_stored([c for c in cftc_codes if c not in result])
+        if stored:
+            self.cache_prices(stored)
+            result.update(stored)
+        return result
+
+    def _read_stored(self, cftc_codes: list[str]) -> dict[str, list[dict]]:
+        """Stored bars of the price window for the codes that have a ticker and bars."""
+        by_ticker: dict[str, list[str]] = {}
+        for code in cftc_codes:
+            if code in self._ticker_map:
+                by_ticker.setdefault(self._ticker_map[code], []).append(code)
+        if not by_ticker:
+            return {}
+        window = history_start()
+        result: dict[str, list[dict]] = {}
+        for ticker in self._store.last_dates(list(by_ticker)):
+            bars = self._store.get_bars(ticker, window)
+            if bars:
+                for code in by_ticker[ticker]:
+                    result[code] = bars
         return result
 
     # ------------------------------------------------------------------
@@ -111,13 +146,28 @@ class PriceService:
         Used by the daily scheduled job.
         """
         result = self.download_all(cftc_codes)
-        now = time.time()
-        with self._cache_lock:
-            for code, bars in result.items():
-                self._price_cache[code] = (bars, now)
-        logger.info("Price cache updated: %d entries", len(result))
+        self.cache_prices(result)
         return result
 
+    @classmethod
+    def cache_prices(cls, price_data: dict[str, list[dict]]) -> None:
+        """Store freshly downloaded bars (e.g. from a worker process) in the cache."""
+        now = time.time()
+        with cls._cache_lock:
+            for code, bars in price_data.items():
+                cls._price_cache[code] = (bars, now)
+        logger.info("Price cache updated: %d entries", len(price_data))
+
+    @classmethod
+    def invalidate(cls, cftc_codes: Iterable[str]) -> None:
+        """Drop *cftc_codes* from the cache; the next read loads them from the store.
+
+        Used by the API process after a worker stored new bars for them.
+        """
+        with cls._cache_lock:
+            dropped = sum(cls._price_cache.pop(code, None) is not None for code in cftc_codes)
+        logger.info("Price cache invalidated: %d entries", dropped)
+
     # ------------------------------------------------------------------
     # Bulk download (original logic, no cache writes)
     # ------------------------------------------------------------------
@@ -127,6 +177,14 @@ class PriceService:
 
         Deduplicates by ticker symbol so the same instrument is only
         downloaded once even when several CFTC codes share a ticker.
+        Tickers already in the price store only fetch the bars from
+        ``PRICE_OVERLAP_DAYS`` before their last stored date; if a
+        re-fetched bar before the last stored day differs from the stored
+        one, the history was back-adjusted (split or dividend, with
+        ``auto_adjust``) and the whole window is downloaded again.  The
+        new bars are stored and each code gets the stored price window (so
+        a failed or empty download still returns the bars kept so far).
+        Codes whose stored bars changed are added to ``changed_codes``.
         """
         eligible = [c for c in cftc_codes if self.has_ticker(c)]
         logger.info("Downloading prices for %d/%d markets...", len(eligible), len(cftc_codes))
@@ -142,10 +200,25 @@ class PriceService:
 
         results: dict[str, list[dict]] = {}
         max_workers = min(MAX_PRICE_DOWNLOAD_WORKERS, len(unique_tickers)) if unique_tickers else 1
+        window = history_start()
+        last_dates = self._store.last_dates(unique_tickers) if unique_tickers else {}
+        overlap = timedelta(days=price_settings.price_overlap_days)
+        full: set[str] = set()  # stored tickers re-downloaded in full
 
         def _download_one(ticker: str) -> tuple[str, list[dict]]:
-            return ticker, self._downloader.download(ticker)
-
+            last = last_dates.get(ticker)
+            if not last or last < window:
+                return ticker, self._downloader.download(ticker)
+            start = max(window, (date.fromisoformat(last) - overlap).isoformat())
+            bars = self._downloader.download(ticker, start=start)
+            if self._back_adjusted(ticker, bars, start, last):
+                logger.info("%s: history back-adjusted — re-downloading the full window", ticker)
+                full.add(ticker)
+                bars = self._downloader.download(ticker) or bars
+            return ticker, bars
+
+        fetched_bars = 0
+        # Downloads run in the pool; the store is written from this thread only
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             futures = {executor.submit(_download_one, t): t for t in unique_tickers}
             for i, future in enumerate(as_completed(futures), 1):
@@ -153,14 +226,39 @@ class PriceService:
                 codes = ticker_to_codes[ticker]
                 try:
                     _, bars = future.result()
-                    if bars:
-                        for code in codes:
-                            results[code] = bars
-                    logger.info("[%d/%d] %s → %s (%d bars)",
-                               i, len(unique_tickers), codes[0], ticker, len(bars))
+                    fetched_bars += len(bars)
+                    changed = self._store.upsert_bars(ticker, bars)
+                    if changed:
+                        self.changed_codes.update(codes)
+                    logger.info("[%d/%d] %s → %s (%d bars fetched, %d new or revised)",
+                               i, len(unique_tickers), codes[0], ticker, len(bars), changed)
                 except (OSError, ValueError, KeyError, RuntimeError) as e:
                     logger.warning("[%d/%d] %s → %s failed: %s",
                                   i, len(unique_tickers), codes[0], ticker, e)
-
-        logger.info("Done: %d/%d markets got price data", len(results), len(eligible))
+                bars = self._store.get_bars(ticker, window)
+                if bars:
+                    for code in codes:
+                        results[code] = bars
+
+        if unique_tickers:
+            self._store.prune(window)
+        logger.info(
+            "Done: %d/%d markets got price data (%d bars fetched, %d/%d tickers incremental)",
+            len(results), len(eligible), fetched_bars,
+            sum(1 for t in unique_tickers if last_dates.get(t, "") >= window and t not in full),
+            len(unique_tickers),
+        )
         return results
+
+    def _back_adjusted(self, ticker: str, bars: list[dict], start: str, last: str) -> bool:
+        """Whether re-fetched *bars* before *last* differ from the stored ones.
+
+        The last stored day itself may legitimately be revised (a bar
+        stored before the close); older ones only change when Yahoo
+        back-adjusts the whole history.
+        """
+        fetched = {b["date"]: b for b in bars if b["date"] < last}
+        if not fetched:
+            return False
+        stored = {b["date"]: b for b in self._store.get_bars(ticker, start) if b["date"] < last}
+        return any(stored.get(d) != b for d, b in fetched.items())
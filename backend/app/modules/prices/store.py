@@ -0,0 +1,90 @@
+"""
+Prices module — Persistent price store.
+=========================================
+Daily OHLCV bars per Yahoo ticker in the ``price_bars`` table of the
+SQLite database, so price history survives restarts and the daily job
+only has to fetch the days after each ticker's last stored bar.
+"""
+
+import logging
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.database import managed_connection
+from app.core.migrations import run_migrations
+
+logger = logging.getLogger(__name__)
+
+
+class PriceStore:
+    """SQLite-backed storage for daily price bars."""
+
+    BAR_COLS = ["date", "open", "high", "low", "close", "volume"]
+
+    def __init__(self, db_path: str | Path | None = None) -> None:
+        self.db_path = str(db_path or settings.db_path)
+        with self._conn() as conn:
+            run_migrations(conn)
+
+    @contextmanager
+    def _conn(self):
+        with managed_connection(self.db_path) as conn:
+            yield conn
+
+    def last_dates(self, tickers: list[str] | None = None) -> dict[str, str]:
+        """Date of the newest stored bar per ticker (all tickers, or *tickers*)."""
+        where = f"WHERE ticker IN ({','.join(['?'] * len(tickers))}) " if tickers is not None else ""
+        with self._conn() as conn:
+            cur = conn.cursor()
+            cur.row_factory = None
+            cur.execute(
+                f"SELECT ticker, MAX(date) FROM price_bars {where}GROUP BY ticker",
+                tickers or [],
+            )
+            return dict(cur.fetchall())
+
+    def get_bars(self, ticker: str, date_from: str | None = None) -> list[dict]:
+        """Stored bars of *ticker* (from *date_from*), oldest first."""
+        with self._conn() as conn:
+            conn.row_factory = sqlite3.Row
+            cur = conn.execute(
+                f"""SELECT {', '.join(self.BAR_COLS)} FROM price_bars
+                   WHERE ticker = ? AND date >= ?
+                   ORDER BY date""",
+                (ticker, date_from or ""),
+            )
+            return [dict(row) for row in cur]
+
+    def upsert_bars(self, ticker: str, bars: list[dict]) -> int:
+        """Insert or update *ticker*'s bars; identical bars are left untouched.
+
+        Returns:
+            The number of bars inserted or changed.
+        """
+        if not bars:
+            return 0
+        values_cols = self.BAR_COLS[1:]
+        sql = (
+            f"INSERT INTO price_bars (ticker, {', '.join(self.BAR_COLS)}) "
+            f"VALUES (?, {', '.join(['?'] * len(self.BAR_COLS))}) "
+            "ON CONFLICT(ticker, date) DO UPDATE SET "
+            + ", ".join(f"{c} = excluded.{c}" for c in values_cols)
+            + f" WHERE ({', '.join(f'price_bars.{c}' for c in values_cols)})"
+            f" IS NOT ({', '.join(f'excluded.{c}' for c in values_cols)})"
+        )
+        with self._conn() as conn:
+            before = conn.total_changes
+            conn.executemany(sql, [(ticker, *(b.get(c) for c in self.BAR_COLS)) for b in bars])
+            conn.commit()
+            return conn.total_changes - before
+
+    def prune(self, before: str) -> int:
+        """Delete bars older than *before* (outside the price window); returns the count."""
+        with self._conn() as conn:
+            cur = conn.execute("DELETE FROM price_bars WHERE date < ?", (before,))
+            conn.commit()
+            if cur.rowcount:
+                logger.info("Pruned %d price bars before %s", cur.rowcount, before)
+            return cur.rowcount
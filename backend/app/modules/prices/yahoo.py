@@ -20,27 +20,37 @@ MAX_RETRIES = 3
 RETRY_BACKOFF_BASE = 2  # seconds — doubles on each retry
 
 
+def history_start(years: int | None = None) -> str:
+    """First date (``YYYY-MM-DD``) of a *years* price window (default ``PRICE_YEARS``)."""
+    yrs = years or price_settings.price_years
+    return (datetime.now() - timedelta(days=yrs * 365 + PRICE_DOWNLOAD_BUFFER_DAYS)).strftime("%Y-%m-%d")
+
+
 class YahooDownloader:
     """Downloads daily price data from Yahoo Finance."""
 
-    def download(self, ticker_symbol: str, years: int | None = None) -> list[dict]:
+    def download(
+        self, ticker_symbol: str, years: int | None = None, start: str | None = None,
+    ) -> list[dict]:
         """
         Download daily OHLCV bars for a ticker with retry + backoff.
 
+        *start* (``YYYY-MM-DD``) fetches only the bars from that date on
+        (incremental update); otherwise the last *years* are fetched.
+
         Returns:
             List of dicts: [{date, open, high, low, close, volume}, ...]
             Sorted oldest-first. Empty list on failure.
         """
-        yrs = years or price_settings.price_years
+        start = start or history_start(years)
 
         for attempt in range(1, MAX_RETRIES + 1):
             try:
                 end_date = datetime.now()
-                start_date = end_date - timedelta(days=yrs * 365 + PRICE_DOWNLOAD_BUFFER_DAYS)
 
                 ticker = yf.Ticker(ticker_symbol)
                 df = ticker.history(
-                    start=start_date.strftime("%Y-%m-%d"),
+                    start=start,
                     end=end_date.strftime("%Y-%m-%d"),
                     interval="1d",
                     auto_adjust=True,
@@ -7,6 +7,7 @@ Usage:
     python -m scripts.auto_update
     python scripts/auto_update.py --force
     python scripts/auto_update.py --dry-run
+    python scripts/auto_update.py --force --resume
 """
 
 import sys
@@ -73,6 +74,8 @@ def main() -> int:
 
     ap = argparse.ArgumentParser(description="COT Auto-Update (cron entry point)")
     ap.add_argument("--force", action="store_true", help="Force full re-download")
+    ap.add_argument("--resume", action="store_true",
+                    help="Continue an interrupted run from its checkpoints")
     ap.add_argument("--dry-run", action="store_true", help="Check health only")
     ap.add_argument("--verbose", "-v", action="store_true", help="Debug logging")
     ap.add_argument("--no-prices", action="store_true", help="Skip price download")
@@ -102,7 +105,7 @@ def main() -> int:
         print(f"Records: {health['total_records']}, Markets: {health['total_markets']}")
         return 0 if health["is_fresh"] else 2
 
-    if not args.force and not health["needs_update"]:
+    if not args.force and not args.resume and not health["needs_update"]:
         logger.info("Data is fresh, no update needed.")
         return 0
 
@@ -122,6 +125,7 @@ def main() -> int:
             report_types=types,
             subtypes=subs,
             skip_prices=args.no_prices,
+            resume=args.resume,
         )
 
         new_health = check_data_health(store)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark: JSON vs binary (COTB) market payloads.
+Usage:
+    python -m scripts.bench_binary_format
+    python scripts/bench_binary_format.py --report-type disagg --code 088691
+    python scripts/bench_binary_format.py --json
+
+Builds the columnar market detail payload of a few markets from the
+local SQLite DB (with synthetic daily price bars, so the price table is
+measured too) and compares JSON against the binary format of
+``app/modules/cot/binary.py``: size (raw / gzip / brotli), encode time
+and parse time (``json.loads`` vs ``binary.decode``).
+"""
+
+import gzip
+import json
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Ensure the project root (backend/) is on sys.path
+_PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from app.modules.cot import binary
+from app.modules.cot.builder import CotPayloadBuilder
+from app.modules.cot.calculator import CotCalculator
+from app.modules.cot.storage import CotStorage
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+FORMATS = ("json", "binary")
+PRICE_YEARS = 3
+
+
+def _best_ms(fn, repeat: int) -> float:
+    """Best wall time of *repeat* calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def _synthetic_prices(years: int) -> list[dict]:
+    """Daily bars shaped like the Yahoo downloader's output."""
+    bars, close, day = [], 100.0, date.today() - timedelta(days=365 * years)
+    while day <= date.today():
+        if day.weekday() < 5:
+            close = round(close * (1 + ((day.toordinal() * 7919) % 201 - 100) / 10000), 4)
+            bars.append({
+                "date": day.isoformat(), "open": close, "high": round(close * 1.01, 4),
+                "low": round(close * 0.99, 4), "close": close, "volume": day.toordinal() % 90000,
+            })
+        day += timedelta(days=1)
+    return bars
+
+
+def _measure(payload: dict, repeat: int) -> dict:
+    encoders = {
+        "json": lambda: json.dumps(payload, separators=(",", ":")).encode(),
+        "binary": lambda: binary.encode(payload),
+    }
+    decoders = {"json": json.loads, "binary": binary.decode}
+
+    out: dict = {}
+    for fmt in FORMATS:
+        body = encoders[fmt]()
+        out[fmt] = {
+            "bytes": len(body),
+            "gzip_bytes": len(gzip.compress(body, compresslevel=9)),
+            "brotli_bytes": len(brotli.compress(body, quality=11)) if brotli else 0,
+            "encode_ms": _best_ms(encoders[fmt], repeat),
+            "parse_ms": _best_ms(lambda body=body, fmt=fmt: decoders[fmt](body), repeat),
+        }
+    return out
+
+
+def run(report_type: str, subtype: str, codes: list[str], repeat: int) -> dict:
+    store = CotStorage()
+    builder = CotPayloadBuilder(store, CotCalculator())
+    if not codes:
+        codes = [m["code"] for m in store.get_all_markets(report_type, subtype)[:5]]
+    prices = _synthetic_prices(PRICE_YEARS)
+
+    results: dict = {}
+    for code in codes:
+        raw_rows = store.get_market_data(code, report_type, subtype)
+        if not raw_rows:
+            continue
+        name = raw_rows[0].get("market_and_exchange") or code
+        exchange_code = raw_rows[0].get("exchange_code", "")
+        payload = builder.build_market_detail(
+            code, name, exchange_code, report_type, subtype, raw_rows, prices, columnar=True,
+        )
+        if payload is None:
+            continue
+        results[code] = {"weeks": len(raw_rows), "bars": len(prices), **_measure(payload, repeat)}
+    return results
+
+
+def print_report(results: dict) -> None:
+    metrics = ("bytes", "gzip_bytes", "brotli_bytes", "encode_ms", "parse_ms")
+    print()
+    print("=" * 78)
+    print("  BINARY FORMAT BENCHMARK (JSON vs COTB, columnar detail + price bars)")
+    print("=" * 78)
+    for code, entry in results.items():
+        js, bn = entry["json"], entry["binary"]
+        print(f"\n  {code} ({entry['weeks']} weeks, {entry['bars']} bars)")
+        print(f"    {'metric':<18}{'json':>14}{'binary':>14}{'ratio':>10}")
+        for m in metrics:
+            ratio = bn[m] / js[m] if js[m] else 0.0
+            fmt = "{:>14,.0f}" if m.endswith("bytes") else "{:>14.3f}"
+            print(f"    {m:<18}{fmt.format(js[m])}{fmt.format(bn[m])}{ratio:>10.2f}")
+    print()
+
+
+def main() -> int:
+    import argparse
+    ap = argparse.ArgumentParser(description="JSON vs binary payload benchmark")
+    ap.add_argument("--report-type", default="legacy", choices=["legacy", "disagg", "tff"])
+    ap.add_argument("--subtype", default="fo", choices=["fo", "co"])
+    ap.add_argument("--code", action="append", default=[], help="Market code (repeatable)")
+    ap.add_argument("--repeat", type=int, default=5, help="Timing repetitions (best of)")
+    ap.add_argument("--json", action="store_true", help="Output as JSON")
+    args = ap.parse_args()
+
+    results = run(args.report_type, args.subtype, args.code, args.repeat)
+    if not results:
+        print("No data for this report type / subtype", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark: row vs columnar weekly-series payloads.
+Usage:
+    python -m scripts.bench_payload_formats
+    python scripts/bench_payload_formats.py --report-type disagg --code 088691
+    python scripts/bench_payload_formats.py --json
+
+Builds the market detail and dashboard payloads of a few markets in both
+``format=rows`` and ``format=columnar`` from the local SQLite DB and
+compares payload size (raw / gzip), build time, and encode / decode time
+(plain ``json`` and the API response models).  Prices are left out.
+"""
+
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+# Ensure the project root (backend/) is on sys.path
+_PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from pydantic import TypeAdapter
+
+from app.modules.cot.builder import CotPayloadBuilder
+from app.modules.cot.calculator import CotCalculator
+from app.modules.cot.schemas import DashboardPayload, MarketDetailPayload
+from app.modules.cot.service import CotService
+from app.modules.cot.storage import CotStorage
+
+FORMATS = ("rows", "columnar")
+
+
+def _best_ms(fn, repeat: int) -> float:
+    """Best wall time of *repeat* calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def _measure(build, adapter: TypeAdapter, repeat: int) -> dict:
+    payload = build()
+    body = json.dumps(payload, separators=(",", ":")).encode()
+
+    def encode_model():
+        return adapter.dump_json(adapter.validate_python(payload), exclude_unset=True)
+
+    return {
+        "bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body, compresslevel=6)),
+        "build_ms": _best_ms(build, repeat),
+        "json_encode_ms": _best_ms(lambda: json.dumps(payload, separators=(",", ":")), repeat),
+        "model_encode_ms": _best_ms(encode_model, repeat),
+        "json_decode_ms": _best_ms(lambda: json.loads(body), repeat),
+    }
+
+
+def run(report_type: str, subtype: str, codes: list[str], repeat: int) -> dict:
+    store = CotStorage()
+    builder = CotPayloadBuilder(store, CotCalculator())
+    if not codes:
+        codes = [m["code"] for m in store.get_all_markets(report_type, subtype)[:5]]
+
+    detail_adapter = TypeAdapter(MarketDetailPayload)
+    dashboard_adapter = TypeAdapter(DashboardPayload)
+    dash_groups = [
+        (f"g{gi}", frozenset({"long", "short", "spread", "net", "change_long", "change_short"}))
+        for gi in range(1, 6)
+    ]
+
+    results: dict = {}
+    for code in codes:
+        raw_rows = store.get_market_data(code, report_type, subtype)
+        if not raw_rows:
+            continue
+        series = store.get_bulk_columns([code], report_type, subtype)[code]
+        name = raw_rows[0].get("market_and_exchange") or code
+        exchange_code = raw_rows[0].get("exchange_code", "")
+
+        entry: dict = {"weeks": len(raw_rows), "detail": {}, "dashboard": {}}
+        for fmt in FORMATS:
+            columnar = fmt == "columnar"
+
+            def build_detail(
+                columnar=columnar, code=code, name=name,
+                exchange_code=exchange_code, raw_rows=raw_rows,
+            ):
+                return builder.build_market_detail(
+                    code, name, exchange_code, report_type, subtype, raw_rows,
+                    columnar=columnar,
+                )
+
+            def build_dashboard(
+                columnar=columnar, code=code, name=name,
+                exchange_code=exchange_code, series=series,
+            ):
+                dates, columns, gaps = CotService._dashboard_columns(series, dash_groups)
+                if columnar:
+                    weeks: dict = {"columns": {"dates": dates, **columns}}
+                else:
+                    weeks = {"weeks": CotService._dashboard_weeks(dates, columns, gaps)}
+                return {
+                    "market": {
+                        "code": code, "name": name, "exchange_code": exchange_code,
+                        "sector": "Other", "primary_report": report_type,
+                        "spec_group": "g1", "comm_group": "g2",
+                        "available_reports": [report_type],
+                    },
+                    "groups": [],
+                    **weeks,
+                    "prices": [],
+                    "meta": {"data_as_of": dates[-1], "latest_week_index": len(dates) - 1},
+                }
+
+            entry["detail"][fmt] = _measure(build_detail, detail_adapter, repeat)
+            entry["dashboard"][fmt] = _measure(build_dashboard, dashboard_adapter, repeat)
+        results[code] = entry
+    return results
+
+
+def print_report(results: dict) -> None:
+    metrics = ("bytes", "gzip_bytes", "build_ms", "json_encode_ms", "model_encode_ms", "json_decode_ms")
+    print()
+    print("=" * 78)
+    print("  PAYLOAD FORMAT BENCHMARK (rows vs columnar)")
+    print("=" * 78)
+    for code, entry in results.items():
+        for view in ("detail", "dashboard"):
+            rows, cols = entry[view]["rows"], entry[view]["columnar"]
+            print(f"\n  {code} {view} ({entry['weeks']} weeks)")
+            print(f"    {'metric':<18}{'rows':>14}{'columnar':>14}{'ratio':>10}")
+            for m in metrics:
+                ratio = cols[m] / rows[m] if rows[m] else 0.0
+                fmt = "{:>14,.0f}" if m.endswith("bytes") else "{:>14.2f}"
+                print(f"    {m:<18}{fmt.format(rows[m])}{fmt.format(cols[m])}{ratio:>10.2f}")
+    print()
+
+
+def main() -> int:
+    import argparse
+    ap = argparse.ArgumentParser(description="Row vs columnar payload benchmark")
+    ap.add_argument("--report-type", default="legacy", choices=["legacy", "disagg", "tff"])
+    ap.add_argument("--subtype", default="fo", choices=["fo", "co"])
+    ap.add_argument("--code", action="append", default=[], help="Market code (repeatable)")
+    ap.add_argument("--repeat", type=int, default=5, help="Timing repetitions (best of)")
+    ap.add_argument("--json", action="store_true", help="Output as JSON")
+    args = ap.parse_args()
+
+    results = run(args.report_type, args.subtype, args.code, args.repeat)
+    if not results:
+        print("No data for this report type / subtype", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
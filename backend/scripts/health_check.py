@@ -22,6 +22,9 @@ from app.core.config import settings
 from app.modules.cot.config import cot_settings
 from app.modules.cot.storage import CotStorage
 
+# Pipeline runs listed in the report
+RECENT_RUNS = 5
+
 
 class DataHealthChecker:
     """Checks COT data health: SQLite DB + exported JSON files."""
@@ -39,6 +42,7 @@ class DataHealthChecker:
             "variants": {},
             "needs_update": False,
             "issues": [],
+            "recent_runs": [],
             "status": "unknown",
         }
 
@@ -61,6 +65,14 @@ class DataHealthChecker:
                 if v.get("needs_update"):
                     health["needs_update"] = True
 
+        health["recent_runs"] = self._recent_runs()
+        last = health["recent_runs"][0] if health["recent_runs"] else None
+        if last and last["status"] != "success":
+            health["issues"].append(
+                f"Last pipeline run ({last['started_at'][:16]}) {last['status']}"
+                + (f": {last['error']}" if last.get("error") else "")
+            )
+
         if not health["issues"]:
             health["status"] = "healthy"
         elif any(v.get("status") == "error" for v in health["variants"].values()):
@@ -72,6 +84,17 @@ class DataHealthChecker:
 
         return health
 
+    def _recent_runs(self, limit: int = RECENT_RUNS) -> list[dict]:
+        """Latest pipeline runs (newest first) with per-stage busy seconds."""
+        try:
+            runs = self.store.get_pipeline_runs(limit)
+        except sqlite3.Error:
+            return []
+        for run in runs:
+            run["stage_seconds"] = {name: s.get("busy") for name, s in run.pop("stages").items()}
+            run.pop("variants")
+        return runs
+
     def _check_variant(self, report_type: str, subtype: str) -> dict:
         v: dict = {
             "report_type": report_type,
@@ -167,6 +190,22 @@ class DataHealthChecker:
                 print(f"      • {issue}")
             print()
 
+        if health["recent_runs"]:
+            print("  Recent pipeline runs:")
+            for run in health["recent_runs"]:
+                stages = "  ".join(f"{k}={v:.1f}s" for k, v in run["stage_seconds"].items() if v is not None)
+                print(
+                    f"      {run['started_at'][:16]}  {run['status']:<8}"
+                    f"{run['duration_sec'] or 0:>8.1f}s  "
+                    f"{(run['bytes_downloaded'] or 0) / 1e6:.1f} MB in, "
+                    f"{run['rows_changed'] or 0} rows changed, "
+                    f"{run['export_files_written'] or 0} files out, "
+                    f"RSS {run['peak_rss_mb'] or '-'} MiB"
+                )
+                if stages:
+                    print(f"          {stages}")
+            print()
+
         if health["issues"]:
             print(f"  Total issues: {len(health['issues'])}")
         else:
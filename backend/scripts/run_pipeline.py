@@ -7,6 +7,9 @@ Usage:
     python scripts/run_pipeline.py --force
     python scripts/run_pipeline.py --type legacy --subtype fo
     python scripts/run_pipeline.py --no-prices
+    python scripts/run_pipeline.py --rebuild-snapshots
+    python scripts/run_pipeline.py --serial
+    python scripts/run_pipeline.py --force --resume
 """
 
 import sys
@@ -34,6 +37,12 @@ def main() -> None:
     ap.add_argument("--subtype", type=str, default=None,
                     help="Only this subtype (fo/co)")
     ap.add_argument("--no-prices", action="store_true", help="Skip Yahoo Finance download")
+    ap.add_argument("--rebuild-snapshots", action="store_true",
+                    help="Recompute all historical screener snapshots")
+    ap.add_argument("--resume", action="store_true",
+                    help="Continue an interrupted run from its checkpoints")
+    ap.add_argument("--serial", action="store_true",
+                    help="Run stages one at a time instead of pipelined")
     ap.add_argument("--verbose", "-v", action="store_true", help="Debug logging")
     ap.add_argument("--log-file", type=str, default=None, help="Log to file")
     args = ap.parse_args()
@@ -56,6 +65,9 @@ def main() -> None:
             report_types=types,
             subtypes=subs,
             skip_prices=args.no_prices,
+            rebuild_snapshots=args.rebuild_snapshots,
+            serial=args.serial or None,
+            resume=args.resume,
         )
     except Exception as e:
         logger.error("Pipeline failed: %s", e, exc_info=True)
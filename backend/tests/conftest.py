@@ -2,9 +2,13 @@
 Shared test fixtures.
 """
 
-import pytest
+import random
+import sqlite3
+from datetime import date, timedelta
 from pathlib import Path
 
+import pytest
+
 
 @pytest.fixture
 def tmp_db(tmp_path: Path) -> Path:
@@ -47,3 +51,148 @@ def sample_cot_row() -> dict:
         "g3_pct_long": 12.5,
         "g3_pct_short": 10.0,
     }
+
+
+# ------------------------------------------------------------------
+# Synthetic COT database
+# ------------------------------------------------------------------
+
+COT_START = date(2021, 1, 5)   # a Tuesday, like every report date
+COT_WEEKS = 200
+COT_MARKETS = [
+    ("088691", "GOLD - COMMODITY EXCHANGE INC.", "CMX"),
+    ("067651", "CRUDE OIL, LIGHT SWEET - NEW YORK MERCANTILE EXCHANGE", "NYME"),
+    ("099741", "EURO FX - CHICAGO MERCANTILE EXCHANGE", "CME"),
+    ("001602", "WHEAT-SRW - CHICAGO BOARD OF TRADE", "CBT"),
+    ("999999", "MYSTERY THING - NOWHERE", "XX"),
+    ("084691", "SILVER - COMMODITY EXCHANGE INC.", "CMX"),
+    ("023651", "NATURAL GAS - NEW YORK MERCANTILE EXCHANGE", "NYME"),
+]
+# (report_type, subtype) variants present; 001602 only has legacy/co rows
+# (no futures-only data), so its dashboards fall back to "co".
+COT_VARIANTS = [("legacy", "fo"), ("legacy", "co"), ("disagg", "fo")]
+
+
+def cot_report_dates(weeks: int = COT_WEEKS) -> list[str]:
+    return [(COT_START + timedelta(weeks=w)).isoformat() for w in range(weeks)]
+
+
+def make_cot_rows(seed: int = 7, weeks: int = COT_WEEKS) -> list[dict]:
+    """Deterministic random-walk rows for every market and variant.
+
+    Market ``999999`` has a null ``g1_long`` in week 100 and no report
+    in week 150 (a gap); ``084691`` starts reporting in week 30.
+    """
+    rng = random.Random(seed)
+    dates = cot_report_dates(weeks)
+    rows = []
+    for rt, st in COT_VARIANTS:
+        n_groups = 3 if rt == "legacy" else 5
+        for code, name, exchange in COT_MARKETS:
+            if code == "001602" and st == "fo":
+                continue
+            state = {f"g{i}": [rng.randint(1000, 90000), rng.randint(1000, 90000)]
+                     for i in range(1, n_groups + 1)}
+            oi = 300000
+            for w, d in enumerate(dates):
+                d_oi = rng.randint(-5000, 5000)
+                oi += d_oi
+                row = {
+                    "report_type": rt, "subtype": st, "report_date": d,
+                    "cftc_contract_code": code, "market_and_exchange": name,
+                    "exchange_code": exchange, "cftc_commodity_code": code[:3],
+                    "open_interest": float(oi), "oi_change": float(d_oi),
+                }
+                for gk, (long_, short) in state.items():
+                    dl, ds = rng.randint(-4000, 4000), rng.randint(-4000, 4000)
+                    long_, short = max(0, long_ + dl), max(0, short + ds)
+                    state[gk] = [long_, short]
+                    row[f"{gk}_long"] = float(long_)
+                    row[f"{gk}_short"] = float(short)
+                    row[f"{gk}_spread"] = float(rng.randint(0, 5000))
+                    row[f"{gk}_long_change"] = float(dl)
+                    row[f"{gk}_short_change"] = float(ds)
+                for col in ("conc_top4_long", "conc_top4_short", "conc_top8_long", "conc_top8_short"):
+                    row[col] = round(rng.uniform(10, 60), 1)
+                if code == "084691" and w < 30:
+                    continue
+                if code == "999999":
+                    if w == 100:
+                        row["g1_long"] = None
+                    if w == 150:
+                        continue
+                rows.append(row)
+    return rows
+
+
+@pytest.fixture(scope="session")
+def cot_db_template(tmp_path_factory) -> Path:
+    """A populated COT database, built once per session (do not write to it)."""
+    from app.modules.cot.storage import CotStorage
+
+    path = tmp_path_factory.mktemp("cot") / "template.db"
+    store = CotStorage(db_path=path)
+    store.upsert_rows(make_cot_rows())
+    return path
+
+
+@pytest.fixture
+def cot_db(cot_db_template: Path, tmp_path: Path) -> Path:
+    """A private copy of the populated COT database."""
+    path = tmp_path / "cot.db"
+    src = sqlite3.connect(cot_db_template)
+    dst = sqlite3.connect(path)
+    src.backup(dst)
+    src.close()
+    dst.close()
+    return path
+
+
+class NoPrices:
+    """PriceService stand-in without any ticker."""
+
+    def has_ticker(self, code: str) -> bool:
+        return False
+
+    def get_prices(self, code: str) -> list[dict] | None:
+        return None
+
+    def get_all_cached(self, codes) -> dict:
+        return {}
+
+
+@pytest.fixture
+def cot_service(cot_db: Path):
+    from app.modules.cot.calculator import CotCalculator
+    from app.modules.cot.service import CotService
+    from app.modules.cot.storage import CotStorage
+
+    return CotService(CotStorage(db_path=cot_db), CotCalculator(), NoPrices())
+
+
+@pytest.fixture
+def api_client(cot_service):
+    """TestClient for the app, authenticated, served from ``cot_db``."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.middleware.auth import get_current_active_user
+    from app.modules.cot.dependencies import get_cot_service
+    from app.modules.cot.router import invalidate_cot_caches
+
+    class _User:
+        id = "00000000-0000-0000-0000-000000000001"
+        role = "admin"
+        is_active = True
+
+        def has_permission(self, permission: str) -> bool:
+            return True
+
+    app.dependency_overrides[get_current_active_user] = lambda: _User()
+    app.dependency_overrides[get_cot_service] = lambda: cot_service
+    invalidate_cot_caches()
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+        invalidate_cot_caches()
@@ -0,0 +1,191 @@
+/**
+ * Generates analytics_cases.json — reference outputs of the frontend
+ * dashboard formulas (frontend/src/apps/cot/utils/calculations.ts) that
+ * tests/test_analytics.py compares app/modules/cot/analytics.py against.
+ *
+ * Uses the frontend's TypeScript devDependency:
+ *
+ *     (cd frontend && npm install)
+ *     node backend/tests/fixtures/make_analytics_cases.mjs
+ */
+
+import { writeFileSync, readFileSync } from 'node:fs';
+import { createRequire } from 'node:module';
+import { dirname, resolve } from 'node:path';
+import { fileURLToPath } from 'node:url';
+
+const here = dirname(fileURLToPath(import.meta.url));
+const frontend = resolve(here, '../../../frontend');
+const ts = createRequire(resolve(frontend, 'package.json'))('typescript');
+
+const source = readFileSync(resolve(frontend, 'src/apps/cot/utils/calculations.ts'), 'utf8');
+const { outputText } = ts.transpileModule(source, {
+    compilerOptions: { module: ts.ModuleKind.ESNext, target: ts.ScriptTarget.ES2022 },
+});
+const calc = await import(`data:text/javascript;base64,${Buffer.from(outputText).toString('base64')}`);
+
+// ─── Deterministic inputs ────────────────────────────────────
+
+let seed = 20240607;
+function rand() {
+    // mulberry32
+    seed = (seed + 0x6d2b79f5) | 0;
+    let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+    t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+}
+const randint = (lo, hi) => lo + Math.floor(rand() * (hi - lo + 1));
+
+function walk(n, { start = 0, step = 5000, nullEvery = 0, zeroEvery = 0 } = {}) {
+    const out = [];
+    let v = start;
+    for (let i = 0; i < n; i++) {
+        v += randint(-step, step);
+        if (nullEvery && i % nullEvery === nullEvery - 1) out.push(null);
+        else if (zeroEvery && i % zeroEvery === zeroEvery - 1) out.push(0);
+        else out.push(v);
+    }
+    return out;
+}
+
+function dates(n) {
+    // newest first, weekly Tuesdays
+    const out = [];
+    const d = new Date(Date.UTC(2025, 5, 3));
+    for (let i = 0; i < n; i++) {
+        out.push(new Date(d.getTime() - i * 7 * 86400000).toISOString().slice(0, 10));
+    }
+    return out;
+}
+
+// ─── Primitives ──────────────────────────────────────────────
+
+const roundInputs = [
+    -2.5, -1.5, -0.5, -0.49, 0, 0.5, 1.5, 2.5, 2.4999999, 12.45 * 10, -12.45 * 10,
+    0.1 + 0.2, 1e15 + 0.5, -7.5000001, 33.35 * 10, 99.95 * 10,
+];
+const jsRound = roundInputs.map((x) => ({ x, round: Math.round(x) }));
+
+const windows = [
+    [],
+    [5],
+    [3, 3, 3, 3],
+    [1, 2, 3, 4, 5, 6, 7, 8],
+    [-10, 0, 10, 20, 30, 40],
+    [0.1, 0.2, 0.3, 0.7, 1.1],
+    walk(52, { step: 9000 }),
+    walk(156, { start: -20000, step: 3000 }),
+    Array.from({ length: 7 }, (_, i) => [-3, 7, 7, 7, 12, -3, 0][i]),
+];
+const primitives = [];
+for (const window of windows) {
+    const candidates = window.length ? [window[0], Math.min(...window), Math.max(...window)] : [0];
+    candidates.push((window[0] ?? 0) + 0.5, -1e9, 1e9);
+    for (const value of candidates) {
+        primitives.push({
+            value,
+            window,
+            percentile: calc.calcPercentile(value, window),
+            zScore: calc.calcZScore(value, window),
+            cotIndex: calc.calcCotIndex(value, window),
+        });
+    }
+}
+
+// ─── Series (newest first, null = missing week) ──────────────
+
+const seriesInputs = [
+    [],
+    [null],
+    [1200],
+    [1200, null],
+    [1200, 800],
+    [null, 5, 6, 7],
+    [4, 4, 4, 4, 4],
+    walk(30, { step: 4000, nullEvery: 4 }),
+    walk(60, { step: 2500, zeroEvery: 9 }),
+    walk(300, { start: 10000, step: 6000, nullEvery: 37 }),
+    [null, ...walk(80, { step: 3000 })],
+];
+const lookbacks = [4, 13, 52, 260];
+const series = seriesInputs.map((s) => ({
+    series: s,
+    byLookback: lookbacks.map((lookback) => ({
+        lookback,
+        metrics: calc.computeSeriesMetrics(s, lookback),
+        percentileSeries: calc.calcPercentileSeries(s, lookback),
+        zScoreSeries: calc.calcZScoreSeries(s, lookback),
+        histogram: calc.buildHistogram(s, lookback),
+        thresholds: [0, 5, 17].map((start) => ({
+            start,
+            p5: calc.getPercentileThreshold(s, start, lookback, 5),
+            p95: calc.getPercentileThreshold(s, start, lookback, 95),
+        })),
+    })),
+    tripleLookback: calc.calcTripleLookback(s),
+}));
+
+// ─── Week lists ──────────────────────────────────────────────
+
+function makeWeeks(n, { nullEvery = 0, zeroOiEvery = 0 } = {}) {
+    const ds = dates(n);
+    const specNet = walk(n, { step: 6000, zeroEvery: 7 });
+    const commNet = walk(n, { step: 6000 });
+    const oi = walk(n, { start: 250000, step: 4000 });
+    const weeks = ds.map((date, i) => {
+        const long = randint(0, 80000);
+        const w = {
+            date,
+            open_interest: zeroOiEvery && i % zeroOiEvery === 0 ? 0 : oi[i],
+            g1_net: specNet[i],
+            g2_net: commNet[i],
+            g1_long: long,
+            g1_short: i % 11 === 5 ? 0 : randint(0, 80000),
+        };
+        if (i % 11 === 5) w.g1_long = 0;
+        if (nullEvery && i % nullEvery === 3) {
+            w.g1_net = null;
+            w.g1_long = null;
+        }
+        if (nullEvery && i % nullEvery === 6) w.g2_net = null;
+        return w;
+    });
+    // prices on most report dates (some missing), price 0 changes included
+    const prices = [];
+    let close = 1800;
+    for (const [i, date] of ds.entries()) {
+        close += i % 5 === 2 ? 0 : randint(-30, 30);
+        if (i % 9 !== 4) prices.push({ date, close });
+    }
+    return { weeks, prices };
+}
+
+const weekInputs = [
+    makeWeeks(0),
+    makeWeeks(1),
+    makeWeeks(2),
+    makeWeeks(3),
+    makeWeeks(40, { nullEvery: 10 }),
+    makeWeeks(120, { nullEvery: 17, zeroOiEvery: 23 }),
+];
+const weekCases = weekInputs.map(({ weeks, prices }) => ({
+    weeks,
+    prices,
+    velocity: calc.calcVelocity(weeks, 'g1'),
+    flips: calc.detectFlips(weeks, prices, 'g1'),
+    oiSignals: calc.calcOISignals(weeks, prices),
+    marketPower: calc.calcMarketPower(weeks, 'g1'),
+    longShortBias: calc.calcLongShortBias(weeks, 'g1'),
+    byLookback: [13, 52].map((lookback) => ({
+        lookback,
+        divergence: calc.calcSentimentDivergence(weeks, 'g1', 'g2', lookback),
+        divergenceNoComm: calc.calcSentimentDivergence(weeks, 'g1', null, lookback),
+        spreadPercentile: calc.calcSpreadPercentile(weeks, 'g1', 'g2', lookback),
+        spreadPercentileNoComm: calc.calcSpreadPercentile(weeks, 'g1', null, lookback),
+    })),
+}));
+
+writeFileSync(
+    resolve(here, 'analytics_cases.json'),
+    JSON.stringify({ jsRound, primitives, series, weekCases }) + '\n',
+);
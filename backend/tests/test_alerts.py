@@ -0,0 +1,228 @@
+"""
+Alert rules: compiled predicates against a rule-by-rule scan, and
+one alert per (rule, market, week).
+"""
+
+import math
+import operator
+import random
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.modules.cot.alerts import (
+    ALERT_COLUMNS,
+    AlertEngine,
+    CompiledRules,
+    column_group,
+    expand_slices,
+    newly_satisfied,
+)
+from app.modules.cot.config import cot_settings
+from app.modules.cot.snapshots import ScreenerSnapshots
+from app.modules.cot.storage import CotStorage
+from tests.conftest import cot_report_dates, make_cot_rows
+
+OPS = {"gt": operator.gt, "gte": operator.ge, "lt": operator.lt, "lte": operator.le, "eq": operator.eq}
+GROUPS = cot_settings.report_groups["legacy"]
+ROLE_SIGN = {"commercial": 1, "speculative": -1, "small": -1}
+COLUMNS = ["cot_g1_1y", "cot_g2_1y", "crowded_g3", "g1_net", "open_interest"]
+
+
+def _holds(op: str, value: float, threshold: float) -> bool:
+    return not math.isnan(value) and OPS[op](value, threshold)
+
+
+def _fires(op: str, current: float, previous: float, threshold: float) -> bool:
+    return _holds(op, current, threshold) and not _holds(op, previous, threshold)
+
+
+def _signal(value: float, role: str) -> int:
+    if math.isnan(value):
+        return 0
+    sign = ROLE_SIGN.get(role, 0)
+    if value >= cot_settings.crowded_buy_threshold:
+        return sign
+    if value <= cot_settings.crowded_sell_threshold:
+        return -sign
+    return 0
+
+
+def _brute_force(rules: list[dict], codes: list[str], current: dict, previous: dict) -> set[tuple]:
+    """Every rule checked against every market it watches."""
+    hits = set()
+    for r in rules:
+        if r["cftc_contract_code"] is None:
+            markets = range(len(codes))
+        else:
+            markets = [codes.index(r["cftc_contract_code"])] if r["cftc_contract_code"] in codes else []
+        for m in markets:
+            if r["kind"] == "threshold":
+                col = ALERT_COLUMNS[r["column_name"]]
+                if _fires(r["op"], current[col][m], previous[col][m], r["value"]):
+                    hits.add((r["id"], m, column_group(r["column_name"]), None, col))
+                continue
+            for g in GROUPS:
+                if r["group_key"] is not None and g["key"] != r["group_key"]:
+                    continue
+                col = f"{g['key']}_cot_1y"
+                now = _signal(current[col][m], g["role"])
+                if now == 0 or now == _signal(previous[col][m], g["role"]):
+                    continue
+                signal = "BUY" if now > 0 else "SELL"
+                if r["signal"] in (None, signal):
+                    hits.add((r["id"], m, g["key"], signal, col))
+                    break
+    return hits
+
+
+def _values(rng: random.Random, column: str, n: int) -> np.ndarray:
+    """Coarse values (so that eq rules and ties hit), with NaN cells."""
+    scale = 1 if "_1y" in column else 1000
+    return np.array([
+        math.nan if rng.random() < 0.1 else float(rng.randrange(0, 101, 5) * scale)
+        for _ in range(n)
+    ])
+
+
+def _random_rules(rng: random.Random, codes: list[str], n: int) -> list[dict]:
+    rules = []
+    for rid in range(1, n + 1):
+        code = rng.choice([None, None, *codes, "000000"])  # "000000" did not report
+        if rng.random() < 0.2:
+            rules.append({
+                "id": rid, "user_id": "u", "kind": "signal_flip", "cftc_contract_code": code,
+                "column_name": None, "op": None, "value": None,
+                "group_key": rng.choice([None, *(g["key"] for g in GROUPS)]),
+                "signal": rng.choice([None, "BUY", "SELL"]),
+            })
+            continue
+        column = rng.choice(COLUMNS)
+        scale = 1 if "1y" in column or "crowded" in column else 1000
+        rules.append({
+            "id": rid, "user_id": "u", "kind": "threshold", "cftc_contract_code": code,
+            "column_name": column, "op": rng.choice(list(OPS)),
+            "value": float(rng.randrange(0, 101, 5) * scale),
+            "group_key": None, "signal": None,
+        })
+    return rules
+
+
+@pytest.mark.parametrize("op", list(OPS))
+@pytest.mark.parametrize("seed", range(5))
+def test_newly_satisfied_matches_brute_force(op, seed):
+    rng = random.Random(seed)
+    thresholds = np.sort([float(rng.randrange(0, 21)) for _ in range(rng.randint(0, 30))])
+    current = np.array([math.nan if rng.random() < 0.15 else rng.randrange(-2, 23) / 1.0 for _ in range(60)])
+    previous = np.array([math.nan if rng.random() < 0.15 else rng.randrange(-2, 23) / 1.0 for _ in range(60)])
+    current[:5] = previous[:5]  # unchanged values fire nothing
+
+    rows, positions = expand_slices(*newly_satisfied(thresholds, op, current, previous))
+    got = list(zip(rows.tolist(), positions.tolist(), strict=True))
+    expected = [
+        (i, k)
+        for i in range(len(current)) for k, t in enumerate(thresholds)
+        if _fires(op, current[i], previous[i], t)
+    ]
+    assert len(got) == len(set(got))
+    assert sorted(got) == expected
+    assert all(i >= 5 for i, _ in got)
+
+
+def test_expand_slices_with_empty_rows():
+    rows, positions = expand_slices(np.array([2, 0, 3, 5]), np.array([4, 0, 3, 6]))
+    assert rows.tolist() == [0, 0, 3]
+    assert positions.tolist() == [2, 3, 5]
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_compiled_rules_match_brute_force(seed):
+    rng = random.Random(seed)
+    codes = [f"{i:06d}" for i in range(1, 41)]
+    snapshot_cols = {ALERT_COLUMNS[c] for c in COLUMNS} | {f"{g['key']}_cot_1y" for g in GROUPS}
+    current = {c: _values(rng, c, len(codes)) for c in snapshot_cols}
+    previous = {c: _values(rng, c, len(codes)) for c in snapshot_cols}
+    rules = _random_rules(rng, codes, 150)
+
+    got = CompiledRules.compile(rules).evaluate(codes, current, previous, GROUPS)
+    assert len(got) == len(set(got))  # at most one hit per (rule, market)
+    assert set(got) == _brute_force(rules, codes, current, previous)
+    assert {rules[rid - 1]["kind"] for rid, *_ in got} == {"threshold", "signal_flip"}
+
+
+# ---------------------------------------------------------------------------
+# AlertEngine over stored snapshots
+# ---------------------------------------------------------------------------
+
+DATES = cot_report_dates()
+ROWS = [r for r in make_cot_rows() if (r["report_type"], r["subtype"]) == ("legacy", "fo")]
+
+
+def _stored_alerts(db: Path) -> set[tuple[int, str, str]]:
+    conn = sqlite3.connect(db)
+    try:
+        return set(conn.execute("SELECT rule_id, cftc_contract_code, report_date FROM alerts"))
+    finally:
+        conn.close()
+
+
+def _expected_alerts(store: CotStorage, rules: list[dict]) -> set[tuple[int, str, str]]:
+    """Brute force over the two newest snapshot weeks of legacy/fo."""
+    snapshots = store.get_recent_snapshots("legacy", "fo", weeks=2)
+    latest = max(s["report_date"] for s in snapshots)
+    codes = sorted({s["cftc_contract_code"] for s in snapshots if s["report_date"] == latest})
+    columns = {ALERT_COLUMNS[c] for c in COLUMNS} | {f"{g['key']}_cot_1y" for g in GROUPS}
+    current = {c: np.full(len(codes), np.nan) for c in columns}
+    previous = {c: np.full(len(codes), np.nan) for c in columns}
+    for s in snapshots:
+        if s["cftc_contract_code"] in codes:
+            target = current if s["report_date"] == latest else previous
+            for c in columns:
+                if s[c] is not None:
+                    target[c][codes.index(s["cftc_contract_code"])] = s[c]
+    return {
+        (rid, codes[m], latest)
+        for rid, m, *_ in _brute_force(rules, codes, current, previous)
+    }
+
+
+def test_engine_fires_once_per_rule_market_week(tmp_path: Path):
+    db = tmp_path / "alerts.db"
+    store = CotStorage(db_path=db)
+    store.upsert_rows([r for r in ROWS if r["report_date"] <= DATES[150]])
+    snapshots = ScreenerSnapshots(store)
+    snapshots.update("legacy", "fo")
+
+    rng = random.Random(11)
+    codes = sorted({r["cftc_contract_code"] for r in ROWS})
+    rules = []
+    for rule in _random_rules(rng, codes, 120):
+        if rule["kind"] == "threshold" and "1y" not in rule["column_name"]:
+            rule["value"] *= 5  # nets / open interest in the fixture's range
+        stored = store.create_alert_rule({
+            **{k: v for k, v in rule.items() if k != "id"},
+            "report_type": "legacy", "subtype": "fo",
+        })
+        rules.append({**rule, "id": stored["id"]})
+
+    engine = AlertEngine(store)
+    expected = _expected_alerts(store, rules)
+    assert engine.run() == len(expected)
+    assert _stored_alerts(db) == expected
+    # The same week again → nothing new
+    assert engine.run() == 0
+    assert engine.run({("legacy", "fo")}) == 0
+    assert _stored_alerts(db) == expected
+
+    # Week by week, a condition that keeps holding does not fire again
+    seen = set(expected)
+    for date in DATES[151:160]:
+        store.upsert_rows([r for r in ROWS if r["report_date"] == date])
+        snapshots.update("legacy", "fo")
+        week = _expected_alerts(store, rules)
+        assert engine.run() == len(week)
+        seen |= week
+        assert _stored_alerts(db) == seen
+    assert len(seen) > len(expected) > 0
@@ -0,0 +1,152 @@
+"""
+Dashboard analytics vs the frontend formulas.
+
+The expected values in ``fixtures/analytics_cases.json`` are produced by
+the TypeScript functions in ``frontend/src/apps/cot/utils/calculations.ts``
+(see ``fixtures/make_analytics_cases.mjs``); the server-side port must
+match them exactly, including JS rounding and NaN gaps.
+"""
+
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.modules.cot import analytics
+
+CASES = json.loads((Path(__file__).parent / "fixtures" / "analytics_cases.json").read_text())
+
+
+def _array(values: list) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _nullable(values: np.ndarray) -> list:
+    return [None if math.isnan(v) else v for v in values.tolist()]
+
+
+def _snake(row: dict) -> dict:
+    out = {}
+    for key, value in row.items():
+        snake = "".join(f"_{c.lower()}" if c.isupper() else c for c in key)
+        out[snake] = value
+    return out
+
+
+def _week_columns(case: dict) -> tuple[list[str], dict[str, np.ndarray], dict[str, float]]:
+    weeks = case["weeks"]
+    dates = [w["date"] for w in weeks]
+    cols = {
+        key: _array([w.get(key) for w in weeks])
+        for key in ("open_interest", "g1_net", "g2_net", "g1_long", "g1_short")
+    }
+    prices = {p["date"]: p["close"] for p in case["prices"]}
+    return dates, cols, prices
+
+
+# ------------------------------------------------------------------
+# Primitives
+# ------------------------------------------------------------------
+
+@pytest.mark.parametrize("case", CASES["jsRound"], ids=lambda c: repr(c["x"]))
+def test_js_round(case):
+    assert analytics.js_round(case["x"]) == case["round"]
+    assert analytics.js_round(np.array([case["x"]]))[0] == case["round"]
+
+
+def test_js_round_keeps_nan():
+    assert math.isnan(analytics.js_round(float("nan")))
+
+
+@pytest.mark.parametrize("case", CASES["primitives"])
+def test_percentile_z_score_cot_index(case):
+    window = np.array(case["window"], dtype=np.float64)
+    assert analytics.percentile(case["value"], window) == case["percentile"]
+    assert analytics.z_score(case["value"], window) == case["zScore"]
+    assert analytics.cot_index(case["value"], window) == case["cotIndex"]
+
+
+# ------------------------------------------------------------------
+# Series
+# ------------------------------------------------------------------
+
+@pytest.mark.parametrize("case", CASES["series"], ids=lambda c: f"n={len(c['series'])}")
+def test_series_functions(case):
+    series = _array(case["series"])
+    for expected in case["byLookback"]:
+        lookback = expected["lookback"]
+
+        metrics = analytics.series_metrics(series, lookback)
+        if expected["metrics"] is None:
+            assert metrics is None
+        else:
+            assert metrics == _snake(expected["metrics"])
+
+        assert _nullable(analytics.percentile_series(series, lookback)) \
+            == expected["percentileSeries"]
+        assert _nullable(analytics.z_score_series(series, lookback)) == expected["zScoreSeries"]
+        assert analytics.histogram(series, lookback) == [_snake(b) for b in expected["histogram"]]
+        for t in expected["thresholds"]:
+            assert analytics.percentile_threshold(series, t["start"], lookback, 5) == t["p5"]
+            assert analytics.percentile_threshold(series, t["start"], lookback, 95) == t["p95"]
+
+    assert analytics.triple_lookback(series) == [_snake(r) for r in case["tripleLookback"]]
+
+
+# ------------------------------------------------------------------
+# Week lists
+# ------------------------------------------------------------------
+
+@pytest.mark.parametrize("case", CASES["weekCases"], ids=lambda c: f"n={len(c['weeks'])}")
+def test_week_functions(case):
+    dates, cols, prices = _week_columns(case)
+    net, longs, shorts, oi = cols["g1_net"], cols["g1_long"], cols["g1_short"], cols["open_interest"]
+
+    assert analytics.velocity(dates, net) == [_snake(r) for r in case["velocity"]]
+    assert analytics.flips(dates, net, prices) == [_snake(r) for r in case["flips"]]
+    assert analytics.oi_signals(dates, oi, prices) == [_snake(r) for r in case["oiSignals"]]
+    assert analytics.market_power(dates, longs, shorts, oi) \
+        == [_snake(r) for r in case["marketPower"]]
+    assert analytics.long_short_bias(dates, longs, shorts) \
+        == [_snake(r) for r in case["longShortBias"]]
+
+    for expected in case["byLookback"]:
+        lookback = expected["lookback"]
+        assert analytics.sentiment_divergence(dates, net, cols["g2_net"], lookback) \
+            == [_snake(r) for r in expected["divergence"]]
+        assert analytics.spread_percentile(net, cols["g2_net"], lookback) \
+            == expected["spreadPercentile"]
+
+
+@pytest.mark.parametrize("case", CASES["weekCases"], ids=lambda c: f"n={len(c['weeks'])}")
+def test_dashboard_without_comm_group(case):
+    """No commercial group: no divergence points and no spread percentile."""
+    dates, cols, _ = _week_columns(case)
+    columns = {k: _nullable(v[::-1]) for k, v in cols.items()}
+    result = analytics.dashboard_analytics(dates[::-1], columns, case["prices"], "g1", None, "1Y")
+    for expected in case["byLookback"]:
+        assert expected["divergenceNoComm"] == []
+        assert expected["spreadPercentileNoComm"] is None
+    assert result["sentiment_divergence"] == []
+    assert result["spread_percentile"] is None
+
+
+def test_dashboard_matches_point_functions():
+    """The bundle slices the point series to the display range, oldest first."""
+    case = CASES["weekCases"][-1]
+    dates, cols, prices = _week_columns(case)
+    columns = {k: _nullable(v[::-1]) for k, v in cols.items()}
+    result = analytics.dashboard_analytics(
+        dates[::-1], columns, case["prices"], "g1", "g2", "1Y",
+    )
+    shown = dates[:52]
+    net = cols["g1_net"]
+    assert result["lookback_weeks"] == 52
+    assert result["velocity"] == analytics.velocity(shown, net[:52])[::-1]
+    assert result["flips"] == analytics.flips(shown, net[:52], prices)
+    assert result["sentiment_divergence"] == \
+        analytics.sentiment_divergence(dates, net, cols["g2_net"], 52)[:52][::-1]
+    assert result["triple_lookback"] == analytics.triple_lookback(net)
+    assert result["histogram"] == analytics.histogram(net[:52], 52)
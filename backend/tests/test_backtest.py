@@ -0,0 +1,137 @@
+"""
+Crowded-signal backtest: signal / forward-return alignment.
+"""
+
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.modules.cot.backtest import HORIZONS, SignalPanel, forward_returns
+from app.modules.cot.config import cot_settings
+from app.modules.cot.storage import CotStorage
+
+CODES = ["088691", "067651", "999999"]
+
+
+def _bars(code: str, start: date, days: int) -> list[dict]:
+    """Weekday closes (with a few missing days), as the price cache stores them."""
+    rng = random.Random(code)
+    bars, close = [], 100.0
+    for i in range(days):
+        d = start + timedelta(days=i)
+        close *= 1 + rng.uniform(-0.02, 0.02)
+        if d.weekday() < 5 and rng.random() > 0.05:
+            bars.append({"date": d.isoformat(), "close": round(close, 4)})
+    return bars
+
+
+def _naive_return(week: str, bars: list[dict], weeks: int) -> float:
+    """Last close on/before the report date → last close on/before date + N weeks."""
+    exit_date = (date.fromisoformat(week) + timedelta(weeks=weeks)).isoformat()
+    if not bars or exit_date > bars[-1]["date"]:
+        return float("nan")
+    entry = [b for b in bars if b["date"] <= week]
+    exit_ = [b for b in bars if b["date"] <= exit_date]
+    if not entry or len(exit_) <= len(entry):
+        return float("nan")
+    return (exit_[-1]["close"] / entry[-1]["close"] - 1.0) * 100.0
+
+
+@pytest.mark.parametrize("weeks", [1, 4, 13])
+def test_forward_returns_match_naive(weeks):
+    bars = _bars("x", date(2021, 3, 1), 400)
+    week_dates = [(date(2021, 1, 5) + timedelta(weeks=w)).isoformat() for w in range(70)]
+    # a report on a day with no bar and one after the bars end
+    week_dates += ["2021-06-06", "2022-12-27"]
+    got = forward_returns(
+        np.array(week_dates, dtype="datetime64[D]"),
+        np.array([b["date"] for b in bars], dtype="datetime64[D]"),
+        np.array([b["close"] for b in bars]),
+        weeks,
+    )
+    expected = np.array([_naive_return(d, bars, weeks) for d in week_dates])
+    np.testing.assert_allclose(got, expected, rtol=0, atol=1e-9)
+    assert np.isnan(got[0])              # before the first bar
+    assert not np.isnan(got).all()
+
+
+@pytest.fixture
+def panel_inputs(cot_db):
+    store = CotStorage(db_path=cot_db)
+    market_rows = store.get_all_market_data_bulk("legacy", "fo")
+    market_rows = {c: market_rows[c] for c in CODES}
+    prices = {c: _bars(c, date(2020, 12, 1), 1450) for c in CODES[:2]}
+    prices[CODES[2]] = _bars(CODES[2], date(2022, 6, 1), 500)  # bars start late, end early
+    return market_rows, prices
+
+
+def _brute_force(cot_service, prices: dict, mode: str) -> dict[str, dict]:
+    """Per-group events and signed returns from the calculator's crowded signals."""
+    groups = cot_settings.report_groups["legacy"]
+    out = {g["key"]: {"buy": 0, "sell": 0, **{h: [] for h in HORIZONS}} for g in groups}
+    for code in CODES:
+        weeks = cot_service.get_market_detail(code, "legacy", "fo")["weeks"][::-1]  # oldest first
+        for g in groups:
+            gk = g["key"]
+            prev = 0
+            for w in weeks:
+                crowded = w.get(f"crowded_{gk}") or {}
+                sig = {"BUY": 1, "SELL": -1}.get(crowded.get("signal"), 0)
+                is_event = sig != 0 and (mode == "weekly" or sig != prev)
+                prev = sig
+                if crowded.get("value") is None or not is_event:
+                    continue
+                out[gk]["buy" if sig > 0 else "sell"] += 1
+                for h, n in HORIZONS.items():
+                    r = _naive_return(w["date"], prices[code], n)
+                    if not np.isnan(r):
+                        out[gk][h].append(r * sig)
+    return out
+
+
+@pytest.mark.parametrize("mode", ["onset", "weekly"])
+def test_run_matches_calculator_signals(cot_service, panel_inputs, mode):
+    market_rows, prices = panel_inputs
+    panel = SignalPanel.build("legacy", cot_settings.report_groups["legacy"], market_rows, prices)
+    result = panel.run(cot_settings.crowded_buy_threshold, cot_settings.crowded_sell_threshold, mode)
+    expected = _brute_force(cot_service, prices, mode)
+
+    assert result["events"] == sum(e["buy"] + e["sell"] for e in expected.values())
+    for g in result["groups"]:
+        exp = expected[g["key"]]
+        assert (g["buy_signals"], g["sell_signals"]) == (exp["buy"], exp["sell"])
+        for h in HORIZONS:
+            stats = g["horizons"][h]["all"]
+            assert stats["count"] == len(exp[h])
+            if exp[h]:
+                values = np.array(exp[h])
+                assert stats["avg_return"] == pytest.approx(values.mean(), abs=0.006)
+                assert stats["hit_rate"] == round(float((values > 0).sum()) / len(values) * 100, 1)
+
+
+def test_market_breakdown_sums_to_groups(panel_inputs):
+    market_rows, prices = panel_inputs
+    panel = SignalPanel.build("legacy", cot_settings.report_groups["legacy"], market_rows, prices)
+    result = panel.run(75, 25, "weekly")
+    for g in result["groups"]:
+        markets = [m for m in result["markets"] if m["group"] == g["key"]]
+        assert sum(m["signals"] for m in markets) == g["buy_signals"] + g["sell_signals"]
+        for h in HORIZONS:
+            assert sum(m["horizons"][h]["count"] for m in markets) == g["horizons"][h]["all"]["count"]
+
+    only = panel.run(75, 25, "weekly", code=CODES[0], group="g2")
+    assert {m["code"] for m in only["markets"]} <= {CODES[0]}
+    assert [g["key"] for g in only["groups"]] == ["g2"]
+
+
+def test_markets_without_bars_are_left_out(panel_inputs):
+    market_rows, prices = panel_inputs
+    prices = {CODES[0]: prices[CODES[0]]}
+    panel = SignalPanel.build("legacy", cot_settings.report_groups["legacy"], market_rows, prices)
+    assert panel.codes == [CODES[0]]
+    with pytest.raises(ValueError, match="No price-backed data"):
+        panel.run(80, 20, code=CODES[1])
+    with pytest.raises(ValueError, match="mode"):
+        panel.run(80, 20, mode="daily")
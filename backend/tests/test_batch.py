@@ -0,0 +1,121 @@
+"""
+POST /cot/batch: NDJSON lines per market, in completion order, equal to GET /cot/dashboard/{code}.
+"""
+
+import json
+import threading
+
+import pytest
+
+URL = "/api/v1/cot/batch"
+ITEMS = [
+    {"code": "088691", "report_type": "legacy"},
+    {"code": "067651", "report_type": "disagg"},
+    {"code": "001602", "subtype": "co"},
+    {"code": "099741"},
+]
+
+
+def _lines(response) -> list[dict]:
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def _dashboard(api_client, item: dict, params: dict) -> dict:
+    query = {k: v for k, v in item.items() if k != "code"} | params
+    r = api_client.get(f"/api/v1/cot/dashboard/{item['code']}", params=query)
+    assert r.status_code == 200
+    return r.json()
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"format": "columnar"},
+    {"fields": "net,cot_index_1y", "from": "2023-01-01"},
+    {"fields": "g1_spread", "format": "columnar", "to": "2022-06-30"},
+])
+def test_lines_equal_single_dashboards(api_client, params):
+    lines = _lines(api_client.post(URL, params=params, json={"items": ITEMS}))
+    assert sorted(line["index"] for line in lines) == list(range(len(ITEMS)))
+
+    batch = {line["index"]: line for line in lines}
+    for i, item in enumerate(ITEMS):
+        assert (batch[i]["code"], batch[i]["status"]) == (item["code"], 200)
+        assert "error" not in batch[i]
+        expected = _dashboard(api_client, item, params)
+        assert batch[i]["data"] == expected
+        if params.get("format") == "columnar":
+            assert "columns" in expected and "weeks" not in expected
+
+
+def test_cached_markets_come_first(api_client):
+    _dashboard(api_client, ITEMS[2], {})  # cached by the single request
+    lines = _lines(api_client.post(URL, json={"items": ITEMS}))
+    assert lines[0]["index"] == 2
+    assert lines[0]["data"] == _dashboard(api_client, ITEMS[2], {})
+
+
+def test_lines_arrive_in_completion_order(api_client, cot_service, monkeypatch):
+    # The first market's build waits until the second one's is done
+    build = cot_service.build_dashboard_job
+    second_built = threading.Event()
+
+    def ordered_build(job, projection=None, columnar=False):
+        code = job["target"]["code"]
+        if code == "088691":
+            assert second_built.wait(10)
+        data = build(job, projection, columnar)
+        if code == "067651":
+            second_built.set()
+        return data
+
+    monkeypatch.setattr(cot_service, "build_dashboard_job", ordered_build)
+    lines = _lines(api_client.post(URL, json={"items": ITEMS[:2]}))
+    assert [line["index"] for line in lines] == [1, 0]
+    assert all(line["status"] == 200 for line in lines)
+
+
+def test_missing_market_is_a_404_line(api_client):
+    items = [ITEMS[0], {"code": "000000"}, {"code": "ZZZ", "report_type": "tff"}]
+    batch = {line["index"]: line for line in _lines(api_client.post(URL, json={"items": items}))}
+
+    assert batch[0]["status"] == 200
+    for i in (1, 2):
+        assert batch[i] == {
+            "index": i, "code": items[i]["code"], "status": 404,
+            "error": f"Market '{items[i]['code']}' not found",
+        }
+        assert api_client.get(f"/api/v1/cot/dashboard/{items[i]['code']}").status_code == 404
+
+
+def test_failed_build_is_a_500_line(api_client, cot_service, monkeypatch):
+    def broken(job, projection=None, columnar=False):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(cot_service, "build_dashboard_job", broken)
+    lines = _lines(api_client.post(URL, json={"items": ITEMS[:1]}))
+    assert lines == [{"index": 0, "code": "088691", "status": 500, "error": "Internal error"}]
+
+
+@pytest.mark.parametrize("body", [
+    {"items": []},
+    {},
+    {"items": [{"code": "088691", "subtype": "xx"}]},
+    {"items": [{"code": "088691", "extra": 1}]},
+])
+def test_invalid_body_is_a_422(api_client, body):
+    assert api_client.post(URL, json=body).status_code == 422
+
+
+@pytest.mark.parametrize("params", [{"fields": "net,nope"}, {"format": "nope"}, {"from": "2024-13-01"}])
+def test_invalid_query_is_a_422(api_client, params):
+    assert api_client.post(URL, params=params, json={"items": ITEMS}).status_code == 422
+
+
+def test_batch_size_is_limited(api_client, monkeypatch):
+    from app.modules.cot.config import cot_settings
+
+    monkeypatch.setitem(cot_settings.__dict__, "batch_max_markets", 2)
+    r = api_client.post(URL, json={"items": ITEMS[:3]})
+    assert r.status_code == 422 and "At most 2" in r.json()["detail"]
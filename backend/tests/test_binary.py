@@ -0,0 +1,161 @@
+"""
+Binary payload format: encode → decode equals the JSON payload.
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from app.modules.cot import binary
+from app.modules.cot.router import wants_binary
+
+BINARY = {"Accept": binary.MEDIA_TYPE}
+
+
+def _as_json(values: np.ndarray) -> list:
+    """A decoded array as the JSON list it stands for (None for missing)."""
+    if values.dtype.kind == "M":
+        return [None if np.isnat(v) else str(v) for v in values]
+    if values.dtype == object:
+        return values.tolist()
+    if values.dtype.kind == "i":
+        return [None if v == binary.INT32_MISSING else v for v in values.tolist()]
+    return [None if math.isnan(v) else v for v in values.tolist()]
+
+
+def _assert_series_equal(name: str, got: np.ndarray, expected: list) -> None:
+    values = _as_json(got)
+    assert len(values) == len(expected), name
+    for i, (a, b) in enumerate(zip(values, expected, strict=True)):
+        if isinstance(b, float) and math.isnan(b):
+            b = None
+        if b is None or isinstance(b, str) or got.dtype.kind != "f":
+            assert a == b, (name, i)
+        else:
+            # f4 series keep float32 precision
+            assert a == pytest.approx(b, rel=1e-6 if got.dtype == np.float32 else 0), (name, i)
+
+
+def _assert_round_trip(encoded: bytes, payload: dict) -> None:
+    decoded = binary.decode(encoded)
+    for table in ("columns", "prices"):
+        rows = payload.get(table)
+        if isinstance(rows, list):  # price bars → columns
+            rows = {k: [bar.get(k) for bar in rows] for k in rows[0]} if rows else None
+        if not rows:
+            assert table not in decoded
+            continue
+        assert list(decoded[table]) == list(rows)
+        for name, values in rows.items():
+            _assert_series_equal(name, decoded[table][name], values)
+    meta = {k: v for k, v in payload.items() if k not in ("columns", "prices")}
+    assert {k: v for k, v in decoded.items() if k not in ("columns", "prices")} == meta
+
+
+@pytest.mark.parametrize("url", [
+    "/api/v1/cot/markets/legacy/fo/999999",
+    "/api/v1/cot/markets/legacy/fo/088691?from=2023-01-01&fields=crowded,net",
+    "/api/v1/cot/markets/disagg/fo/084691",
+    "/api/v1/cot/dashboard/999999?report_type=legacy",
+    "/api/v1/cot/dashboard/001602?subtype=co",
+    "/api/v1/cot/dashboard/067651?report_type=disagg&from=2022-06-01",
+])
+def test_endpoint_binary_equals_json(api_client, url):
+    sep = "&" if "?" in url else "?"
+    json_payload = api_client.get(f"{url}{sep}format=columnar").json()
+    r = api_client.get(url, headers=BINARY)
+    assert r.status_code == 200 and r.headers["content-type"] == binary.MEDIA_TYPE
+    _assert_round_trip(r.content, json_payload)
+
+
+@pytest.mark.parametrize(("accept", "expected"), [
+    (None, False),
+    ("", False),
+    ("application/octet-stream", True),
+    ("Application/Octet-Stream ; q=0.9", True),
+    ("application/json, application/octet-stream;q=0.1", False),
+    ("application/octet-stream;q=0.1, application/json", False),
+    ("application/json;q=0.5, application/octet-stream", True),
+    ("application/octet-stream, application/json", False),  # a tie is JSON
+    ("*/*", False),
+    ("text/html,application/xhtml+xml,*/*;q=0.8", False),
+    ("application/*;q=0.2, application/octet-stream", True),
+    ("application/octet-stream;q=0", False),
+    ("application/octet-stream;q=0.3, */*;q=0.1", True),
+    ("application/octet-stream;q=0.3, application/*;q=0.5", False),  # JSON matches application/*
+    ("*/*;q=0.5, application/octet-stream;q=0.4", False),
+    ("application/octet-stream;q=0.2, application/*;q=0.9, application/json;q=0.1", True),  # most specific range
+    ("application/octet-stream;q=abc", False),
+    ("application/octet-streamx, application/json", False),
+])
+def test_wants_binary_compares_q_values(accept, expected):
+    assert wants_binary(accept) is expected
+
+
+def test_json_preferred_in_accept_gets_json(api_client):
+    url = "/api/v1/cot/dashboard/088691?report_type=legacy"
+    r = api_client.get(url, headers={"Accept": f"application/json, {binary.MEDIA_TYPE};q=0.1"})
+    assert r.status_code == 200 and r.headers["content-type"] == "application/json"
+    assert r.json() == api_client.get(url).json()
+
+    r = api_client.get(url, headers={"Accept": f"application/json;q=0.1, {binary.MEDIA_TYPE}"})
+    assert r.headers["content-type"] == binary.MEDIA_TYPE
+
+
+def test_detail_has_null_cells_and_crowded_signals(api_client):
+    columns = binary.decode(
+        api_client.get("/api/v1/cot/markets/legacy/fo/999999", headers=BINARY).content,
+    )["columns"]
+    # week 100 of the fixture has no g1 long
+    assert columns["g1_net"].dtype == np.int32
+    assert int((columns["g1_net"] == binary.INT32_MISSING).sum()) == 1
+    signals = set(columns["crowded_g1_signal"].tolist())
+    assert None in signals and signals - {None} <= {"BUY", "SELL"} and signals - {None}
+
+
+def test_synthetic_payload_round_trip():
+    payload = {
+        "market": {"code": "000001", "name": "NO COMMERCIALS", "spec_group": "g1", "comm_group": None},
+        "groups": [{"key": "g1", "name": "Large Speculators"}],
+        "columns": {
+            "dates": ["2024-01-02", "2024-01-09", "2024-01-16", "2024-01-23"],
+            "open_interest": [100000, 2_147_483_647, None, 98000],      # i4 with a missing cell
+            "oi_change": [None, None, None, None],                        # all missing
+            "g1_net": [1.5, float("nan"), -2.25, None],                   # f4, NaN and null
+            "g1_pct_oi": [0.1, 0.2, 0.3, 0.4],
+            "big": [3_000_000_000, 1, 2, 3],                              # beyond i4 → f4
+            "crowded_g1": [85.0, 10.5, None, 50.0],
+            "crowded_g1_signal": ["SELL", "BUY", None, None],
+            "crowded_g2_signal": [None, None, None, None],
+        },
+        "prices": [
+            {"date": "2024-01-02", "close": 2050.123456789},
+            {"date": "2024-01-03", "close": None},
+        ],
+        "concentration": None,
+        "meta": {"data_as_of": "2024-01-23", "latest_week_index": 3},
+    }
+    encoded = binary.encode(payload)
+    _assert_round_trip(encoded, payload)
+
+    decoded = binary.decode(encoded)
+    assert decoded["market"]["comm_group"] is None
+    assert decoded["columns"]["open_interest"].dtype == np.int32
+    assert decoded["columns"]["big"].dtype == np.float32
+    assert decoded["prices"]["close"].dtype == np.float64
+    assert decoded["prices"]["close"][0] == 2050.123456789  # f8 price bars are exact
+
+    # Every array starts 8-aligned
+    header_end = len(encoded) - sum(-(-a.nbytes // 8) * 8 for t in ("columns", "prices") for a in decoded[t].values())
+    assert header_end % 8 == 0
+
+
+def test_decode_rejects_other_payloads():
+    encoded = binary.encode({"columns": {"dates": ["2024-01-02"]}})
+    with pytest.raises(ValueError, match="Truncated"):
+        binary.decode(encoded[:5])
+    with pytest.raises(ValueError, match="Not a COTB"):
+        binary.decode(b"JSON" + encoded[4:])
+    with pytest.raises(ValueError, match="Unsupported COTB version"):
+        binary.decode(encoded[:4] + b"\x09\x00" + encoded[6:])
@@ -0,0 +1,112 @@
+"""
+Cache invalidation after a pipeline run: only the changed markets' entries go.
+"""
+
+import pytest
+
+from app.core.cache import TTLCache
+from app.modules.cot import router as cot_router
+from app.modules.cot.changes import market_keys
+
+API = "/api/v1/cot"
+CACHES = {
+    "market": cot_router._market_cache,
+    "dashboard": cot_router._dashboard_cache,
+    "analytics": cot_router._analytics_cache,
+    "ranks": cot_router._ranks_cache,
+    "screener": cot_router._screener_cache,
+    "markets": cot_router._markets_list_cache,
+}
+
+
+def test_invalidate_prefixes():
+    cache = TTLCache(name="test")
+    for key in ("market:088691:legacy:fo:rows:", "market:088691:legacy:co:rows:",
+                "market:0886910:legacy:fo:rows:", "dashboard:088691:legacy:fo:", "x:market:088691:"):
+        cache.set(key, key)
+
+    assert cache.invalidate_prefixes([]) == 0
+    assert cache.invalidate_prefixes(["market:088691:legacy:fo:", "market:099741:"]) == 1
+    assert cache.get("market:088691:legacy:fo:rows:") is None
+    # Prefixes match at the start only, up to the separator
+    assert cache.get("market:0886910:legacy:fo:rows:") is not None
+    assert cache.get("x:market:088691:") is not None
+    assert cache.invalidate_prefixes(iter(["market:088691:", "dashboard:"])) == 2
+    assert cache.invalidate_prefixes(["market:088691:"]) == 0
+    assert {k for k in ("market:0886910:legacy:fo:rows:", "x:market:088691:") if cache.get(k)} == {
+        "market:0886910:legacy:fo:rows:", "x:market:088691:",
+    }
+
+
+def _keys() -> dict[str, set[str]]:
+    return {name: set(cache._store) for name, cache in CACHES.items()}
+
+
+@pytest.fixture
+def warm(api_client) -> dict[str, set[str]]:
+    """Cache entries of three markets, one of them (001602) combined-only."""
+    urls = [f"{API}/markets/legacy/fo", f"{API}/markets/legacy/co", f"{API}/screener/legacy/fo",
+            f"{API}/screener/legacy/co"]
+    for code in ("088691", "067651", "001602"):
+        st = "co" if code == "001602" else "fo"
+        urls += [
+            f"{API}/markets/legacy/{st}/{code}",
+            f"{API}/dashboard/{code}",                    # auto report type, fo (→ co for 001602)
+            f"{API}/dashboard/{code}?report_type=legacy",
+            f"{API}/dashboard/{code}/analytics",
+            f"{API}/dashboard/{code}/rank",
+        ]
+    for url in urls:
+        assert api_client.get(url).status_code == 200, url
+    keys = _keys()
+    assert any(k.startswith("dashboard:001602:auto:fo:") for k in keys["dashboard"])
+    return keys
+
+
+def _of(keys: dict[str, set[str]], code: str) -> dict[str, set[str]]:
+    return {name: {k for k in ks if f":{code}:" in k} for name, ks in keys.items()}
+
+
+def test_fallback_subtype_entries_are_dropped(warm):
+    cot_router.invalidate_cot_caches(market_keys(["001602"], "legacy", "co"))
+    after = _keys()
+
+    # Every entry of 001602 is gone, the fo-requested dashboards served from co included
+    assert not any(_of(after, "001602").values())
+    # Other markets' entries stay; the variant's cross-market lists go
+    for code in ("088691", "067651"):
+        assert _of(after, code) == _of(warm, code)
+    assert after["markets"] == warm["markets"] - {k for k in warm["markets"] if "legacy:co" in k}
+    assert not [k for k in after["screener"] if k.startswith("screener:legacy:co:")]
+    assert [k for k in after["screener"] if k.startswith("screener:legacy:fo:")]
+
+
+def test_only_the_changed_market_is_dropped(warm):
+    cot_router.invalidate_cot_caches(market_keys(["088691"], "legacy", "fo"))
+    after = _keys()
+
+    dropped = {name: warm[name] - after[name] for name in CACHES}
+    for name in ("market", "dashboard", "analytics", "ranks"):
+        # Its legacy entries and auto-detected dashboards; 088691 defaults to disagg
+        assert dropped[name] == {
+            k for k in _of(warm, "088691")[name] if k.split(":")[2] in ("legacy", "auto")
+        }, name
+    assert _of(after, "088691")["analytics"] and _of(after, "088691")["ranks"]
+    assert _of(after, "001602") == _of(warm, "001602")
+    assert _of(after, "067651") == _of(warm, "067651")
+    assert [k for k in after["screener"] if k.startswith("screener:legacy:co:")]
+
+
+def test_price_changes_keep_ranks_and_lists(warm):
+    cot_router.invalidate_price_caches(market_keys(["001602"], "legacy", "co"))
+    after = _keys()
+    assert not _of(after, "001602")["dashboard"] and not _of(after, "001602")["analytics"]
+    assert _of(after, "001602")["ranks"] == _of(warm, "001602")["ranks"]
+    assert after["screener"] == warm["screener"] and after["markets"] == warm["markets"]
+
+
+def test_no_changes_keeps_everything_and_none_clears_all(warm):
+    cot_router.invalidate_cot_caches(set())
+    assert _keys() == warm
+    cot_router.invalidate_cot_caches()
+    assert not any(_keys().values())
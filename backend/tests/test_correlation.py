@@ -0,0 +1,83 @@
+"""
+Positioning correlation against pandas.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.modules.cot.correlation import (
+    correlation_payload,
+    pairwise_correlation,
+    rolling_correlation,
+    rolling_payload,
+)
+
+
+def _series(n: int, seed: int, nan_every: int = 0, scale: float = 1e5) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    values = np.cumsum(rng.normal(0, 1, n)) * scale
+    if nan_every:
+        values[nan_every - 1::nan_every] = np.nan
+    return values
+
+
+@pytest.mark.parametrize("window,min_periods", [(26, 26), (52, 20), (13, 2), (156, 26)])
+def test_rolling_matches_pandas(window, min_periods):
+    a = _series(300, 1, nan_every=7)
+    b = 0.6 * _series(300, 1) + _series(300, 2, nan_every=11)
+    b[100:130] = np.nan  # a long gap
+    got = rolling_correlation(a, b, window, min_periods)
+    expected = pd.Series(a).rolling(window, min_periods=min_periods).corr(pd.Series(b)).to_numpy()
+
+    assert np.isnan(got[:window - 1]).all()
+    np.testing.assert_allclose(got[window - 1:], expected[window - 1:], rtol=0, atol=1e-9)
+
+
+def test_rolling_short_or_flat_input():
+    a = _series(20, 3)
+    assert np.isnan(rolling_correlation(a, a, 26)).all()
+    flat = np.full(60, 5.0)
+    assert np.isnan(rolling_correlation(flat, _series(60, 4), 26)[25:]).all()
+
+
+@pytest.mark.parametrize("min_periods", [2, 26, 150])
+def test_pairwise_matches_pandas(min_periods):
+    values = np.vstack([
+        _series(200, 5),
+        _series(200, 6, nan_every=5),
+        -0.8 * _series(200, 5) + _series(200, 7, scale=2e4),
+        np.concatenate((np.full(120, np.nan), _series(80, 8))),  # late starter
+        np.full(200, 42.0),                                      # no variance
+        _series(200, 9, scale=1e-3),                            # tiny scale
+    ])
+    got = pairwise_correlation(values, min_periods)
+    expected = pd.DataFrame(values.T).corr(min_periods=min_periods).to_numpy()
+    np.testing.assert_allclose(got, expected, rtol=0, atol=1e-9)
+
+
+def test_matrix_from_store_matches_pandas(cot_service):
+    matrix = cot_service.get_positioning_matrix("legacy", "fo", "net", "g1")
+    assert "999999" in matrix.codes  # the market with a gap and a null cell
+
+    frame = pd.DataFrame(matrix.values.T, index=matrix.dates, columns=matrix.codes)
+    expected = frame.corr(min_periods=26).round(4)
+    payload = correlation_payload(matrix, 26)
+    got = pd.DataFrame(payload["matrix"], index=matrix.codes, columns=matrix.codes, dtype=float)
+    pd.testing.assert_frame_equal(got, expected, check_exact=False, atol=1e-4, rtol=0)
+
+    rolling = rolling_payload(matrix, "088691", "999999", 52, 26)
+    exp = frame["088691"].rolling(52, min_periods=26).corr(frame["999999"])
+    exp = exp.iloc[51:].dropna().round(4)
+    assert [p["date"] for p in rolling["points"]] == exp.index.tolist()
+    np.testing.assert_allclose([p["correlation"] for p in rolling["points"]], exp.to_numpy(), atol=1e-4)
+
+
+def test_select_window(cot_service):
+    matrix = cot_service.get_positioning_matrix("legacy", "fo", "cot_index_1y", "g2")
+    part = matrix.select(codes=["067651", "088691"], date_to="2023-06-30", window=52)
+    assert part.codes == ["067651", "088691"]
+    assert len(part.dates) == 52 and part.dates[-1] <= "2023-06-30"
+    end = matrix.dates.index(part.dates[-1]) + 1
+    rows = [matrix.codes.index(c) for c in part.codes]
+    np.testing.assert_array_equal(part.values, matrix.values[rows, end - 52:end])
@@ -0,0 +1,47 @@
+"""
+Dashboard analytics endpoint: group overrides.
+"""
+
+import pytest
+
+URL = "/api/v1/cot/dashboard/{code}/analytics"
+
+
+def test_default_groups(api_client):
+    r = api_client.get(URL.format(code="088691"), params={"report_type": "legacy"})
+    assert r.status_code == 200
+    assert r.json()["market"] == {
+        "code": "088691", "report_type": "legacy", "subtype": "fo",
+        "spec_group": "g1", "comm_group": "g2",
+    }
+
+
+def test_group_overrides(api_client):
+    r = api_client.get(
+        URL.format(code="067651"),
+        params={"report_type": "disagg", "spec_group": "g4", "comm_group": "none"},
+    )
+    assert r.status_code == 200
+    body = r.json()
+    assert (body["market"]["spec_group"], body["market"]["comm_group"]) == ("g4", None)
+    assert body["sentiment_divergence"] == [] and body["spread_percentile"] is None
+
+
+@pytest.mark.parametrize("params", [
+    {"report_type": "legacy", "spec_group": "g4"},
+    {"report_type": "legacy", "comm_group": "g5"},
+])
+def test_group_missing_from_report_type_is_422(api_client, params):
+    r = api_client.get(URL.format(code="088691"), params=params)
+    assert r.status_code == 422
+    assert "Unknown group" in r.json()["detail"]
+
+
+def test_groups_checked_against_served_variant(api_client):
+    """001602 has no legacy/fo rows: the dashboard falls back to legacy/co."""
+    url = URL.format(code="001602")
+    r = api_client.get(url, params={"report_type": "legacy", "spec_group": "g3"})
+    assert r.status_code == 200
+    assert r.json()["market"]["subtype"] == "co"
+    r = api_client.get(url, params={"report_type": "legacy", "spec_group": "g5"})
+    assert r.status_code == 422
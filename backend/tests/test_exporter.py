@@ -0,0 +1,271 @@
+"""
+Incremental export: manifest hashes, unchanged files skipped, orphans deleted.
+"""
+
+import gzip
+import hashlib
+import json
+import multiprocessing
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from app.modules.cot import binary
+from app.modules.cot.exporter import MANIFEST_FILE, MANIFEST_LOCK_FILE, CotExporter
+from app.modules.cot.storage import CotStorage
+from app.modules.prices.config import price_settings
+
+VARIANT = ("legacy", "fo")
+BARS = [{"date": "2024-01-02", "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10}]
+
+
+def _exporter(cot_db: Path, out: Path, **kwargs) -> CotExporter:
+    exporter = CotExporter(CotStorage(db_path=cot_db), output_dir=out, workers=kwargs.get("workers", 1))
+    exporter.precompress = kwargs.get("precompress", False)
+    exporter.binary = kwargs.get("binary", True)
+    return exporter
+
+
+def _export(exporter: CotExporter, codes: set[str] | None = None) -> dict:
+    return exporter.export_all(*VARIANT, price_data={}, codes=codes)
+
+
+def _files(out: Path) -> dict[str, tuple[int, int]]:
+    """Exported file → inode / mtime stamp (changes when the file is replaced)."""
+    return {
+        p.name: (p.stat().st_ino, p.stat().st_mtime_ns)
+        for p in out.iterdir() if p.name not in (MANIFEST_FILE, MANIFEST_LOCK_FILE)
+    }
+
+
+def _manifest(out: Path) -> dict[str, str]:
+    return json.loads((out / MANIFEST_FILE).read_text())["files"]
+
+
+def _revise(cot_db: Path, code: str) -> None:
+    """Change the newest legacy/fo week of one market."""
+    conn = sqlite3.connect(cot_db)
+    conn.execute(
+        """UPDATE cot_data SET g1_long = g1_long + 1000
+           WHERE cftc_contract_code = ? AND report_type = ? AND subtype = ? AND report_date = (
+               SELECT MAX(report_date) FROM cot_data
+               WHERE cftc_contract_code = ? AND report_type = ? AND subtype = ?)""",
+        (code, *VARIANT, code, *VARIANT),
+    )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def exported(cot_db: Path, tmp_path: Path) -> Path:
+    out = tmp_path / "export"
+    stats = _export(_exporter(cot_db, out))
+    assert stats["written"] == stats["markets"] * 2 + 3 and stats["unchanged"] == 0
+    return out
+
+
+def test_manifest_hashes_every_file(exported: Path):
+    manifest = _manifest(exported)
+    assert set(manifest) == set(_files(exported))
+    for name, digest in manifest.items():
+        assert hashlib.sha256((exported / name).read_bytes()).hexdigest() == digest
+    assert not [n for n in _files(exported) if n.endswith(".tmp")]
+
+
+def test_unchanged_files_are_skipped(cot_db: Path, exported: Path):
+    before = _files(exported)
+    for codes in (None, set(), {"088691", "067651"}):
+        stats = _export(_exporter(cot_db, exported), codes)  # manifest reloaded from disk
+        assert (stats["written"], stats["deleted"]) == (0, 0)
+        assert stats["unchanged"] > 0 and stats["bytes_written"] == 0
+    assert _files(exported) == before
+
+
+@pytest.mark.parametrize("codes", [None, {"088691"}])
+def test_only_changed_files_are_rewritten(cot_db: Path, exported: Path, codes):
+    before = _files(exported)
+    _revise(cot_db, "088691")
+    stats = _export(_exporter(cot_db, exported), codes)
+
+    after = _files(exported)
+    changed = {n for n in after if after[n] != before.get(n)}
+    assert {n.split(".")[0] for n in changed} == {"market_088691_legacy_fo", "screener_legacy_fo"}
+    assert stats["written"] == 3  # market .json / .bin, screener
+    manifest = _manifest(exported)
+    for name in changed:
+        if name in manifest:
+            assert hashlib.sha256((exported / name).read_bytes()).hexdigest() == manifest[name]
+
+
+def test_missing_file_is_rewritten(cot_db: Path, exported: Path):
+    (exported / "market_067651_legacy_fo.json").unlink()
+    stats = _export(_exporter(cot_db, exported), codes=set())
+    assert stats["written"] == 1
+    assert (exported / "market_067651_legacy_fo.json").exists()
+
+
+def test_missing_sibling_is_rewritten(cot_db: Path, exported: Path, monkeypatch):
+    monkeypatch.setattr(
+        "app.modules.cot.exporter._COMPRESSORS",
+        {".gz": lambda body: gzip.compress(body, compresslevel=1, mtime=0)},
+    )
+    (exported / "market_067651_legacy_fo.json.br").write_bytes(b"stale")
+    stats = _export(_exporter(cot_db, exported, precompress=True))
+    assert stats["written"] == stats["markets"] * 2 + 3  # every file lacked its sibling
+    assert not (exported / "market_067651_legacy_fo.json.br").exists()
+    body = (exported / "market_067651_legacy_fo.json").read_bytes()
+    assert gzip.decompress((exported / "market_067651_legacy_fo.json.gz").read_bytes()) == body
+
+    (exported / "markets_legacy_fo.json.gz").unlink()
+    stats = _export(_exporter(cot_db, exported, precompress=True))
+    assert stats["written"] == 1
+    assert (exported / "markets_legacy_fo.json.gz").exists()
+
+
+def test_orphans_are_deleted(cot_db: Path, exported: Path):
+    # A market that left the database, a stray file, and another variant's file
+    conn = sqlite3.connect(cot_db)
+    conn.execute(
+        "DELETE FROM cot_data WHERE cftc_contract_code = ? AND report_type = ? AND subtype = ?",
+        ("999999", *VARIANT),
+    )
+    conn.commit()
+    conn.close()
+    (exported / "market_123456_legacy_fo.json").write_text("{}")
+    (exported / "market_123456_legacy_fo.json.gz").write_bytes(b"")
+    (exported / "market_123456_legacy_co.json").write_text("{}")
+
+    stats = _export(_exporter(cot_db, exported), codes=set())
+    names = set(_files(exported))
+    assert stats["deleted"] == 3  # 999999 .json / .bin, 123456 .json
+    assert not {n for n in names if n.startswith(("market_999999_", "market_123456_legacy_fo"))}
+    assert "market_123456_legacy_co.json" in names
+    assert not [f for f in _manifest(exported) if f.startswith("market_999999_")]
+    markets = json.loads((exported / "markets_legacy_fo.json").read_text())
+    assert "999999" not in {m["code"] for m in markets}
+
+
+def test_binary_files_deleted_when_disabled(cot_db: Path, exported: Path):
+    stats = _export(_exporter(cot_db, exported, binary=False))
+    assert stats["written"] == 0 and stats["deleted"] == stats["markets"]
+    assert not [n for n in _files(exported) if ".bin" in n]
+    assert not [f for f in _manifest(exported) if f.endswith(".bin")]
+
+
+def _prices_file(code: str, ext: str = "json") -> str:
+    return CotExporter._prices_file(price_settings.ticker_map[code], ext)
+
+
+def test_prices_file_per_ticker(cot_db: Path, tmp_path: Path):
+    out = tmp_path / "export"
+    cl = [{**bar, "close": 70.0} for bar in BARS]
+    price_data = {"088691": BARS, "088695": BARS, "067651": cl, "999999": BARS, "099741": []}
+    stats = _exporter(cot_db, out).export_prices(price_data)
+
+    # One file (+ .bin) per ticker with bars: GC=F shared by two codes, none for unmapped codes
+    assert _prices_file("088691") == "prices_GC_F.json"
+    assert _prices_file("088695") == _prices_file("088691")
+    assert set(_files(out)) == {_prices_file(c, ext) for c in ("088691", "067651") for ext in ("json", "bin")}
+    assert (stats["tickers"], stats["written"]) == (2, 4)
+    assert sorted(stats["changed_tickers"]) == sorted(stats["new_tickers"]) == ["CL=F", "GC=F"]
+    assert json.loads((out / _prices_file("067651")).read_text()) == cl
+    decoded = binary.decode((out / _prices_file("088691", "bin")).read_bytes())
+    assert decoded["ticker"] == "GC=F" and decoded["prices"]["close"].tolist() == [1.5]
+    for name, digest in _manifest(out).items():
+        assert hashlib.sha256((out / name).read_bytes()).hexdigest() == digest
+
+    # Unchanged bars are skipped; an empty download keeps the previous file
+    before = _files(out)
+    stats = _exporter(cot_db, out).export_prices({"088691": BARS, "067651": []})
+    assert (stats["written"], stats["unchanged"], stats["changed_tickers"]) == (0, 2, [])
+    assert _files(out) == before
+
+    # Only the changed ticker is rewritten; files of unmapped tickers are deleted
+    (out / "prices_ZZZ.json").write_text("[]")
+    stats = _exporter(cot_db, out).export_prices({"088691": BARS, "067651": BARS})
+    assert (stats["written"], stats["changed_tickers"], stats["new_tickers"]) == (2, ["CL=F"], [])
+    assert stats["deleted"] == 1 and not (out / "prices_ZZZ.json").exists()
+    after = _files(out)
+    assert {n for n in after if after[n] != before[n]} == {_prices_file("067651", ext) for ext in ("json", "bin")}
+
+
+def test_market_files_point_at_their_prices_file(cot_db: Path, tmp_path: Path):
+    out = tmp_path / "export"
+    price_data = {"088691": BARS, "067651": BARS, "099741": []}
+    _exporter(cot_db, out).export_all(*VARIANT, price_data=price_data)
+
+    for code in ("088691", "067651", "099741", "999999"):
+        payload = json.loads((out / f"market_{code}_legacy_fo.json").read_text())
+        decoded = binary.decode((out / f"market_{code}_legacy_fo.bin").read_bytes())
+        assert "prices" not in payload  # bars are never embedded
+        if price_data.get(code):
+            assert payload["prices_file"] == _prices_file(code)
+            assert decoded["prices_file"] == _prices_file(code, "bin")
+        else:
+            assert "prices_file" not in payload and "prices_file" not in decoded
+
+
+def _contents(out: Path) -> dict[str, bytes]:
+    return {name: (out / name).read_bytes() for name in _files(out)}
+
+
+def test_sharded_export_is_byte_identical(cot_db: Path, tmp_path: Path):
+    outs = {n: tmp_path / f"export_{n}" for n in (1, 2)}
+    for n, out in outs.items():
+        with _exporter(cot_db, out, workers=n) as exporter:
+            stats = exporter.export_all(*VARIANT, price_data={"088691": BARS})
+        assert stats["workers"] == n and stats["written"] == stats["markets"] * 2 + 3
+    assert _contents(outs[2]) == _contents(outs[1])
+    assert _manifest(outs[2]) == _manifest(outs[1])
+
+    # Incremental runs shard only the changed markets, with the same result
+    _revise(cot_db, "088691")
+    for n, out in outs.items():
+        with _exporter(cot_db, out, workers=n) as exporter:
+            assert exporter.export_all(*VARIANT, price_data={"088691": BARS}, codes={"088691", "067651"})[
+                "written"
+            ] == 3
+    assert _contents(outs[2]) == _contents(outs[1])
+    assert _manifest(outs[2]) == _manifest(outs[1])
+
+
+def test_interleaved_exporters_keep_each_others_entries(cot_db: Path, exported: Path):
+    # The pipeline worker's exporter is open while the price worker exports
+    pipeline_side = _exporter(cot_db, exported)
+    price_side = _exporter(cot_db, exported)
+    assert price_side.export_prices({"088691": BARS})["written"] == 2
+    prices_files = {n for n in _manifest(exported) if n.startswith("prices_")}
+    assert prices_files
+
+    _revise(cot_db, "088691")
+    assert _export(pipeline_side, {"088691"})["written"] == 3
+    manifest = _manifest(exported)
+    assert prices_files <= set(manifest)
+    for name, digest in manifest.items():
+        assert hashlib.sha256((exported / name).read_bytes()).hexdigest() == digest
+
+    # Nothing is rewritten on the next runs of either side
+    assert _exporter(cot_db, exported).export_prices({"088691": BARS})["written"] == 0
+    assert _export(_exporter(cot_db, exported))["written"] == 0
+
+
+def _save_entries(cot_db: str, out: str, prefix: str, n: int) -> None:
+    """Process-pool job: write and save *n* files one manifest save at a time."""
+    exporter = CotExporter(CotStorage(db_path=cot_db), output_dir=out, workers=1)
+    exporter.precompress = False
+    for i in range(n):
+        exporter._write_file(f"{prefix}_{i}.json", f"{prefix}{i}".encode())
+        exporter._save_manifest()
+
+
+def test_concurrent_saves_lose_no_entries(cot_db: Path, tmp_path: Path):
+    out = tmp_path / "export"
+    _exporter(cot_db, out)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=2, mp_context=ctx) as pool:
+        futures = [pool.submit(_save_entries, str(cot_db), str(out), p, 40) for p in ("a", "b")]
+        for future in futures:
+            future.result()
+    assert set(_manifest(out)) == {f"{p}_{i}.json" for p in ("a", "b") for i in range(40)}
@@ -0,0 +1,248 @@
+"""
+Pipeline checkpoints: an interrupted run resumes from its last completed unit.
+"""
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.modules.cot import pipeline as pipeline_module
+from app.modules.cot.config import cot_settings
+from app.modules.cot.pipeline import CotPipeline
+from app.modules.cot.storage import CotStorage
+from tests.conftest import make_cot_rows
+
+VARIANT = ("legacy", "fo")
+YEARS = list(range(datetime.now().year - cot_settings.years_to_download + 1, datetime.now().year + 1))
+
+
+class Crash(Exception):
+    """Stands in for the process dying mid-download."""
+
+
+def _rows_by_year() -> dict[int, list[dict]]:
+    """The fixture's legacy/fo weeks, one fixture year per pipeline year."""
+    rows = [r for r in make_cot_rows() if (r["report_type"], r["subtype"]) == VARIANT]
+    source = sorted({int(r["report_date"][:4]) for r in rows})
+    out: dict[int, list[dict]] = {}
+    for i, year in enumerate(YEARS):
+        src = str(source[i % len(source)])
+        out[year] = [
+            {**r, "report_date": f"{year}{r['report_date'][4:]}"}
+            for r in rows if r["report_date"].startswith(src)
+        ]
+    return out
+
+
+ROWS = _rows_by_year()
+
+
+class FakeDownloader:
+    def __init__(self, crash_before: int | None = None) -> None:
+        self.crash_before = crash_before
+        self.downloads: list[int] = []
+        self.bytes_downloaded = 0
+
+    def iter_years(self, report_type, subtype, skip_years=None):
+        for year in YEARS:
+            if skip_years and year in skip_years:
+                continue
+            if year == self.crash_before:
+                raise Crash(f"killed before {year}")
+            self.downloads.append(year)
+            yield year, f"Y{year}"
+
+    def download_current_week(self, report_type, subtype):
+        return None
+
+
+class FakeParser:
+    def __init__(self, fail: set[int] = frozenset()) -> None:
+        self.fail = set(fail)
+        self.parsed: list[int] = []
+
+    def parse_yearly_csv(self, text, report_type, subtype):
+        year = int(text[1:])
+        self.parsed.append(year)
+        if year in self.fail:
+            raise ValueError(f"bad archive {year}")
+        return [dict(r) for r in ROWS[year]]
+
+
+class NoPriceService:
+    changed_codes: frozenset[str] = frozenset()
+
+    def refresh_all(self, codes):
+        return {}
+
+    def get_all_cached(self, codes):
+        return {}
+
+
+@pytest.fixture
+def env(tmp_path: Path, monkeypatch) -> SimpleNamespace:
+    """Pipeline paths under *tmp_path*, no network."""
+    db = tmp_path / "cot.db"
+    monkeypatch.setitem(settings.__dict__, "db_path", db)
+    monkeypatch.setitem(settings.__dict__, "json_output_dir", tmp_path / "export")
+    monkeypatch.setattr("app.modules.cot.checkpoints.settings", SimpleNamespace(base_dir=tmp_path))
+    monkeypatch.setattr(pipeline_module, "PriceService", NoPriceService)
+    monkeypatch.setattr("app.modules.cot.exporter._COMPRESSORS", {})
+    return SimpleNamespace(db=db, artifacts=tmp_path / "data" / "checkpoints", export=tmp_path / "export")
+
+
+def _pipeline(downloader: FakeDownloader, parser: FakeParser) -> CotPipeline:
+    pipeline = CotPipeline()
+    pipeline.downloader, pipeline.parser = downloader, parser
+    resets = []
+    delete = pipeline.store.delete_report_data
+    pipeline.store.delete_report_data = lambda rt, st: (resets.append((rt, st)), delete(rt, st))
+    pipeline.resets = resets
+    return pipeline
+
+
+def _run(pipeline: CotPipeline, **kwargs) -> dict:
+    return pipeline.run(
+        report_types=[VARIANT[0]], subtypes=[VARIANT[1]], serial=True, skip_prices=True, **kwargs,
+    )
+
+
+def _checkpoints(db: Path) -> dict[str, str]:
+    return {unit: entry["state"] for unit, entry in CotStorage(db_path=db).get_checkpoints(*VARIANT).items()}
+
+
+def _stored_dates(db: Path) -> set[str]:
+    conn = sqlite3.connect(db)
+    try:
+        return {d for (d,) in conn.execute(
+            "SELECT DISTINCT report_date FROM cot_data WHERE report_type = ? AND subtype = ?", VARIANT,
+        )}
+    finally:
+        conn.close()
+
+
+def _all_dates() -> set[str]:
+    return {r["report_date"] for rows in ROWS.values() for r in rows}
+
+
+def _interrupted_load(env: SimpleNamespace) -> None:
+    """A full reload that stores year 1, fails to parse year 2 and dies before year 3."""
+    pipeline = _pipeline(FakeDownloader(crash_before=YEARS[2]), FakeParser(fail={YEARS[1]}))
+    run = _run(pipeline, force_reload=True)
+    assert run["status"] == "partial"
+    assert pipeline.resets == [VARIANT]
+    assert _checkpoints(env.db) == {
+        "reset": "stored", f"year:{YEARS[0]}": "stored", f"year:{YEARS[1]}": "downloaded",
+    }
+    assert sorted(p.name for p in env.artifacts.iterdir()) == [
+        f"legacy_fo_year_{y}.csv" for y in YEARS[:2]
+    ]
+    assert not env.export.exists() or not list(env.export.glob("market_*"))  # never exported
+
+
+def test_resume_continues_from_last_unit(env):
+    _interrupted_load(env)
+    downloader, parser = FakeDownloader(), FakeParser()
+    pipeline = _pipeline(downloader, parser)
+    run = _run(pipeline, force_reload=True, resume=True)
+
+    assert run["status"] == "success"
+    assert pipeline.resets == []                          # the wipe is not repeated
+    assert downloader.downloads == YEARS[2:]              # year 1 stored, year 2 kept
+    assert parser.parsed == YEARS[1:]                     # the kept archive re-parsed from disk
+    assert run["variants"]["legacy_fo"]["years_resumed"] == 1
+    assert _stored_dates(env.db) == _all_dates()
+
+    # A clean finish clears checkpoints and artifacts, and exports every market
+    assert _checkpoints(env.db) == {}
+    assert not list(env.artifacts.glob("*.csv"))
+    codes = {r["cftc_contract_code"] for rows in ROWS.values() for r in rows}
+    assert {p.name for p in env.export.glob("market_*_legacy_fo.json")} == {
+        f"market_{c}_legacy_fo.json" for c in codes
+    }
+    assert {code for code, _ in pipeline.changes} == codes
+
+
+def test_resume_skips_a_finished_variant(env):
+    _interrupted_load(env)
+    _run(_pipeline(FakeDownloader(), FakeParser()), force_reload=True, resume=True)
+    # Checkpoints of a finished variant left by a run that failed elsewhere
+    store = CotStorage(db_path=env.db)
+    store.set_checkpoint(*VARIANT, "export", "exported")
+
+    downloader, parser = FakeDownloader(), FakeParser()
+    pipeline = _pipeline(downloader, parser)
+    run = _run(pipeline, force_reload=True, resume=True)
+    assert run["status"] == "success"
+    assert (downloader.downloads, parser.parsed, pipeline.resets) == ([], [], [])
+    assert {code for code, _ in pipeline.changes} == {
+        r["cftc_contract_code"] for rows in ROWS.values() for r in rows
+    }
+
+
+def test_interrupted_without_resume_is_refreshed_in_full(env):
+    _interrupted_load(env)
+    downloader, parser = FakeDownloader(), FakeParser()
+    pipeline = _pipeline(downloader, parser)
+    run = _run(pipeline)  # no resume, no force_reload
+
+    assert pipeline._checkpoints.interrupted == {VARIANT}
+    assert run["status"] == "success"
+    assert pipeline.resets == []
+    # Leftovers are discarded: year 2 is downloaded again, year 1 is in download_log
+    assert downloader.downloads == YEARS[1:]
+    assert _stored_dates(env.db) == _all_dates()
+    assert _checkpoints(env.db) == {}
+    assert not list(env.artifacts.glob("*.csv"))
+    # What the interrupted run stored was never exported: every market is
+    codes = {r["cftc_contract_code"] for rows in ROWS.values() for r in rows}
+    assert {code for code, _ in pipeline.changes} == codes
+    assert len(list(env.export.glob("market_*_legacy_fo.json"))) == len(codes)
+
+
+def test_failed_resume_keeps_checkpoints(env):
+    _interrupted_load(env)
+    pipeline = _pipeline(FakeDownloader(crash_before=YEARS[3]), FakeParser())
+    run = _run(pipeline, force_reload=True, resume=True)
+    assert run["status"] == "partial"
+    assert _checkpoints(env.db) == {
+        "reset": "stored", **{f"year:{y}": "stored" for y in YEARS[:3]},
+    }
+    # Artifacts are kept until a run finishes
+    assert {p.name for p in env.artifacts.glob("*.csv")} == {
+        f"legacy_fo_year_{y}.csv" for y in YEARS[:3]
+    }
+
+
+def _stage_counters(run: dict) -> dict[str, tuple[int, int]]:
+    return {name: (s["items"], s["errors"]) for name, s in run["stages"].items()}
+
+
+@pytest.mark.parametrize("failing", [False, True])
+def test_threaded_run_matches_serial(env, failing):
+    """Threaded mode (the production default) stores, counts and fails like serial."""
+    runs = {}
+    for serial in (True, False):
+        CotStorage(db_path=env.db).delete_report_data(*VARIANT)
+        fail = {YEARS[1]} if failing else set()
+        pipeline = _pipeline(FakeDownloader(), FakeParser(fail=fail))
+        run = pipeline.run(
+            report_types=[VARIANT[0]], subtypes=[VARIANT[1]], serial=serial, skip_prices=True,
+            force_reload=True,
+        )
+        runs[serial] = run
+        assert run["mode"] == ("serial" if serial else "pipelined")
+        assert run["status"] == ("partial" if failing else "success")
+        expected = _all_dates() - ({r["report_date"] for r in ROWS[YEARS[1]]} if failing else set())
+        assert _stored_dates(env.db) == expected
+        if failing:
+            assert _checkpoints(env.db)[f"year:{YEARS[1]}"] == "downloaded"
+
+    assert _stage_counters(runs[False]) == _stage_counters(runs[True])
+    assert _stage_counters(runs[False])["parse"][1] == int(failing)
+    for key in ("rows_parsed", "rows_upserted"):
+        assert runs[False][key] == runs[True][key], key
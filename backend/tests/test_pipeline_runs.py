@@ -0,0 +1,113 @@
+"""
+Pipeline run records: the stored row, /status and the health check's recent runs.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.modules.cot.metrics import RunMetrics
+from app.modules.cot.storage import CotStorage
+from scripts.health_check import DataHealthChecker
+from tests import test_pipeline_resume as resume
+from tests.test_pipeline_resume import ROWS, YEARS, FakeDownloader, FakeParser, _pipeline, _run
+
+env = resume.env  # pipeline paths under tmp_path, no network
+
+STAGES = ("download", "parse", "store")
+
+
+def _row(started: datetime, status: str = "success", error: str | None = None) -> dict:
+    """A recorded run started at *started* with fixed stage timings."""
+    metrics = RunMetrics("pipelined", force_reload=False)
+    metrics.started_at = started
+    metrics.add("legacy", "fo", rows_parsed=10, rows_changed=2)
+    metrics.add_seconds("legacy", "fo", "parse", 1.234)
+    stages = {name: {"items": 3, "errors": 0, "busy": 0.5 + i} for i, name in enumerate(STAGES)}
+    return metrics.record(stages, status, error)
+
+
+def _save(store: CotStorage, count: int, **kwargs) -> list[int]:
+    """Store *count* runs a day apart, oldest first; returns their ids."""
+    t0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [store.insert_pipeline_run(_row(t0 + timedelta(days=i), **kwargs)) for i in range(count)]
+
+
+def test_run_metrics_record_totals_the_variants():
+    metrics = RunMetrics("serial", force_reload=True)
+    metrics.add("legacy", "fo", rows_parsed=5, rows_upserted=5, export_files_written=2)
+    metrics.add("disaggregated", "fo", rows_parsed=7, rows_changed=3)
+    metrics.add_prices(price_cache_hits=4, export_files_written=1)
+    with metrics.timer("legacy", "fo", "parse"):
+        pass
+    row = metrics.record({"parse": {"items": 2, "errors": 0, "busy": 0.1}}, "success")
+
+    assert set(row) == set(CotStorage.PIPELINE_RUN_COLS)
+    assert (row["mode"], row["force_reload"], row["status"], row["error"]) == ("serial", 1, "success", None)
+    assert (row["rows_parsed"], row["rows_upserted"], row["rows_changed"]) == (12, 5, 3)
+    assert (row["export_files_written"], row["price_cache_hits"]) == (3, 4)
+    assert set(row["variants"]) == {"legacy_fo", "disaggregated_fo", "prices"}
+    assert set(row["variants"]["legacy_fo"]["seconds"]) == {"parse"}
+
+
+def test_pipeline_run_row_is_stored(env):
+    run = _run(_pipeline(FakeDownloader(), FakeParser()), force_reload=True)
+    stored = CotStorage(db_path=env.db).get_pipeline_runs(10)
+
+    assert len(stored) == 1 and stored[0]["id"] == run["id"]
+    row = stored[0]
+    assert (row["status"], row["error"], row["mode"], row["force_reload"]) == ("success", None, "serial", True)
+    assert row["rows_parsed"] == sum(len(rows) for rows in ROWS.values())
+    assert row["stages"] and row["stages"] == run["stages"]
+    for stage in row["stages"].values():
+        assert stage["errors"] == 0 and stage["items"] > 0 and stage["busy"] >= 0
+    assert row["variants"]["legacy_fo"]["years_fetched"] == len(YEARS)
+    assert row["variants"]["legacy_fo"]["seconds"]
+
+
+def test_partial_run_row_records_stage_errors(env):
+    _run(_pipeline(FakeDownloader(), FakeParser(fail={YEARS[0]})), force_reload=True)
+    row = CotStorage(db_path=env.db).get_pipeline_runs(1)[0]
+    assert row["status"] == "partial"
+    assert sum(s["errors"] for s in row["stages"].values()) == 1
+
+
+def test_pipeline_runs_are_listed_newest_first(tmp_path):
+    store = CotStorage(db_path=tmp_path / "cot.db")
+    assert store.get_pipeline_runs() == []
+    ids = _save(store, 4)
+    runs = store.get_pipeline_runs(3)
+    assert [r["id"] for r in runs] == ids[:0:-1]
+    assert runs[0]["stages"]["store"] == {"items": 3, "errors": 0, "busy": 2.5}
+    assert runs[0]["variants"]["legacy_fo"]["seconds"] == {"parse": 1.23}
+    assert runs[0]["force_reload"] is False
+
+
+def test_status_returns_the_latest_runs(api_client, cot_db):
+    ids = _save(CotStorage(db_path=cot_db), 3)
+
+    body = api_client.get("/api/v1/cot/status", params={"runs": 2}).json()
+    assert [r["id"] for r in body["runs"]] == [ids[2], ids[1]]
+    assert body["runs"][0]["stages"]["download"] == {"items": 3, "errors": 0, "busy": 0.5}
+    assert body["runs"][0]["status"] == "success"
+
+    assert api_client.get("/api/v1/cot/status", params={"runs": 0}).json()["runs"] == []
+    assert api_client.get("/api/v1/cot/status", params={"runs": 101}).status_code == 422
+
+
+def test_health_check_reports_recent_runs(cot_db, monkeypatch):
+    monkeypatch.setitem(settings.__dict__, "db_path", cot_db)
+    store = CotStorage(db_path=cot_db)
+    _save(store, 2)
+    checker = DataHealthChecker(store)
+
+    runs = checker._recent_runs(limit=5)
+    assert len(runs) == 2
+    assert runs[0]["stage_seconds"] == {"download": 0.5, "parse": 1.5, "store": 2.5}
+    assert "stages" not in runs[0] and "variants" not in runs[0]
+    assert not any("Last pipeline run" in i for i in checker.check_health()["issues"])
+
+    # A failed latest run is an issue
+    store.insert_pipeline_run(_row(datetime(2025, 2, 1, tzinfo=timezone.utc), "error", "disk full"))
+    health = checker.check_health()
+    assert health["recent_runs"][0]["status"] == "error"
+    assert "Last pipeline run (2025-02-01T00:00) error: disk full" in health["issues"]
@@ -0,0 +1,220 @@
+"""
+Persistent price store: incremental downloads with overlap, revised and back-adjusted bars, pruning.
+"""
+
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+from app.modules.prices.config import price_settings
+from app.modules.prices.service import PriceService
+from app.modules.prices.store import PriceStore
+from app.modules.prices.yahoo import history_start
+
+TICKERS = {"088691": "GC=F", "088692": "GC=F", "067651": "CL=F"}
+
+
+def _bar(day: str, close: float = 100.0) -> dict:
+    return {"date": day, "open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 10}
+
+
+def _last_weekday() -> str:
+    """The newest bar the fake history serves: the last weekday before today."""
+    day = date.today() - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day.isoformat()
+
+
+def _days(first: str, last: str) -> list[str]:
+    """Weekdays from *first* to *last*."""
+    day, end, out = date.fromisoformat(first), date.fromisoformat(last), []
+    while day <= end:
+        if day.weekday() < 5:
+            out.append(day.isoformat())
+        day += timedelta(days=1)
+    return out
+
+
+class FakeYahoo:
+    """Serves *history* per ticker from *start* on and records each request."""
+
+    def __init__(self, history: dict[str, list[dict]]) -> None:
+        self.history = history
+        self.requests: list[tuple[str, str | None]] = []
+
+    def download(self, ticker_symbol, years=None, start=None):
+        self.requests.append((ticker_symbol, start))
+        first = start or history_start(years)
+        return [dict(b) for b in self.history.get(ticker_symbol, []) if b["date"] >= first]
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> PriceStore:
+    return PriceStore(db_path=tmp_path / "prices.db")
+
+
+@pytest.fixture
+def make_service(store: PriceStore, monkeypatch):
+    monkeypatch.setattr(PriceService, "_price_cache", {})
+
+    def make(history: dict[str, list[dict]]) -> PriceService:
+        service = PriceService(store=store)
+        service._ticker_map = dict(TICKERS)
+        service._downloader = FakeYahoo(history)
+        return service
+
+    return make
+
+
+def _history(last: str | None = None) -> dict[str, list[dict]]:
+    """Both tickers' bars over the price window, up to *last* (default the last weekday)."""
+    days = _days(history_start(), last or _last_weekday())
+    return {t: [_bar(d) for d in days] for t in ("GC=F", "CL=F")}
+
+
+def test_first_download_fetches_the_window_once_per_ticker(make_service, store):
+    history = _history()
+    service = make_service(history)
+    result = service.download_all(list(TICKERS) + ["999999"])
+
+    assert sorted(service._downloader.requests) == [("CL=F", None), ("GC=F", None)]
+    assert set(result) == set(TICKERS)
+    assert result["088691"] == result["088692"] == history["GC=F"]
+    assert store.last_dates() == {"GC=F": _last_weekday(), "CL=F": _last_weekday()}
+
+
+def test_incremental_download_refetches_the_overlap(make_service, store):
+    days = _days(history_start(), _last_weekday())
+    make_service(_history(last=days[-20])).download_all(list(TICKERS))
+
+    service = make_service(_history())
+    result = service.download_all(list(TICKERS))
+    start = (date.fromisoformat(days[-20]) - timedelta(days=price_settings.price_overlap_days)).isoformat()
+    assert sorted(service._downloader.requests) == [("CL=F", start), ("GC=F", start)]
+    assert [b["date"] for b in result["067651"]] == days
+    assert store.last_dates()["GC=F"] == days[-1]
+
+
+def test_changed_codes_are_the_codes_with_new_or_revised_bars(make_service):
+    days = _days(history_start(), _last_weekday())
+    first = make_service(_history(last=days[-2]))
+    first.download_all(list(TICKERS))
+    assert first.changed_codes == set(TICKERS)
+
+    # Only GC=F gets a new bar; both codes mapped to it changed
+    history = _history(last=days[-2])
+    history["GC=F"].append(_bar(days[-1]))
+    service = make_service(history)
+    service.download_all(list(TICKERS))
+    assert service.changed_codes == {"088691", "088692"}
+
+    unchanged = make_service(history)
+    unchanged.download_all(list(TICKERS))
+    assert unchanged.changed_codes == set()
+
+
+def test_revised_bars_are_upserted(make_service, store):
+    make_service(_history()).download_all(list(TICKERS))
+    days = _days(history_start(), _last_weekday())
+
+    revised = _history()
+    revised["GC=F"][-3] = _bar(days[-3], 123.5)
+    assert store.upsert_bars("GC=F", revised["GC=F"][-10:]) == 1
+    assert store.upsert_bars("GC=F", revised["GC=F"][-10:]) == 0  # identical bars untouched
+
+    # A revision inside the overlap replaces the stored bar on the next run
+    revised["CL=F"][-2] = _bar(days[-2], 77.0)
+    result = make_service(revised).download_all(["067651"])
+    assert result["067651"][-2] == _bar(days[-2], 77.0)
+    assert store.get_bars("CL=F", days[-2])[0]["close"] == 77.0
+    assert len(store.get_bars("GC=F")) == len(days)
+    assert store.get_bars("GC=F", days[-3])[0]["close"] == 123.5
+
+
+def test_bars_before_the_window_are_pruned(make_service, store):
+    window = history_start()
+    before = date.fromisoformat(window) - timedelta(days=1)
+    old = [_bar(d) for d in _days((before - timedelta(days=30)).isoformat(), before.isoformat())]
+    store.upsert_bars("GC=F", old)
+    store.upsert_bars("XX", old)  # a ticker no longer mapped
+
+    service = make_service(_history())
+    result = service.download_all(["088691"])
+    # Bars ending before the window count as no stored history: a full download
+    assert service._downloader.requests == [("GC=F", None)]
+    assert result["088691"][0]["date"] >= window
+    # Pruning covers every ticker, unmapped ones included
+    assert store.get_bars("GC=F")[0]["date"] >= window
+    assert "XX" not in store.last_dates()
+    assert store.prune(window) == 0
+
+
+def test_get_prices_reads_the_store_without_downloading(make_service):
+    history = _history()
+    make_service(history).download_all(list(TICKERS))
+    PriceService._price_cache.clear()  # a restart
+
+    service = make_service(history)
+    assert service.get_prices("088691") == history["GC=F"]
+    assert service.get_all_cached(["067651", "999999"]) == {"067651": history["CL=F"]}
+    assert service._downloader.requests == []
+
+
+def test_get_prices_never_downloads(make_service):
+    days = _days(history_start(), _last_weekday())
+    make_service(_history(last=days[-4])).download_all(list(TICKERS))
+    PriceService._price_cache.clear()
+
+    # Stale stored bars are served as they are; refreshing is the scheduler's job
+    service = make_service(_history())
+    assert service.get_prices("088691")[-1]["date"] == days[-4]
+    assert service.get_all_cached(["067651"])["067651"][-1]["date"] == days[-4]
+    # Nothing stored, or no ticker: no bars rather than a download
+    assert service.get_prices("099741") == [] and service.get_prices("999999") == []
+    assert service._downloader.requests == []
+
+
+def _adjusted(history: dict[str, list[dict]], ticker: str, factor: float) -> dict[str, list[dict]]:
+    """*history* with *ticker*'s prices back-adjusted by *factor* (all but the newest bar)."""
+    bars = [_bar(b["date"], b["close"] * factor) for b in history[ticker][:-1]]
+    return {**history, ticker: [*bars, history[ticker][-1]]}
+
+
+def test_back_adjusted_history_is_downloaded_in_full(make_service, store):
+    days = _days(history_start(), _last_weekday())
+    make_service(_history(last=days[-10])).download_all(list(TICKERS))
+
+    # A split: every GC=F bar before today's changes; CL=F is untouched
+    history = _adjusted(_history(), "GC=F", 0.5)
+    service = make_service(history)
+    result = service.download_all(list(TICKERS))
+    requests = sorted(service._downloader.requests, key=lambda r: (r[0], r[1] or ""))
+    start = (date.fromisoformat(days[-10]) - timedelta(days=price_settings.price_overlap_days)).isoformat()
+    assert requests == [("CL=F", start), ("GC=F", None), ("GC=F", start)]
+    assert result["088691"] == history["GC=F"]
+    assert store.get_bars("GC=F")[0]["close"] == 50.0
+
+    # Adjusted history stored: the next run is incremental again
+    service = make_service(history)
+    service.download_all(list(TICKERS))
+    assert sorted(service._downloader.requests) == [
+        ("CL=F", (date.fromisoformat(days[-1]) - timedelta(days=price_settings.price_overlap_days)).isoformat()),
+        ("GC=F", (date.fromisoformat(days[-1]) - timedelta(days=price_settings.price_overlap_days)).isoformat()),
+    ]
+    assert service.changed_codes == set()
+
+
+def test_revised_last_bar_is_not_a_back_adjustment(make_service, store):
+    days = _days(history_start(), _last_weekday())
+    make_service(_history()).download_all(list(TICKERS))
+
+    # The newest stored bar was taken before the close and is revised
+    history = _history()
+    history["GC=F"][-1] = _bar(days[-1], 101.0)
+    service = make_service(history)
+    service.download_all(["088691"])
+    assert [start is not None for _, start in service._downloader.requests] == [True]
+    assert store.get_bars("GC=F", days[-1])[0]["close"] == 101.0
+    assert service.changed_codes == {"088691"}
@@ -0,0 +1,173 @@
+"""
+Field projection and date-range slicing (FieldProjection, CotStorage._select_sql).
+"""
+
+import pytest
+
+from app.modules.cot.projection import FieldProjection
+from app.modules.cot.storage import CotStorage
+from tests.conftest import cot_report_dates
+
+DATES = cot_report_dates()
+
+# fields / from / to combinations, incl. rolling indices that need history rows
+PROJECTIONS = [
+    ("net", None, None),
+    ("g1_cot_index_3y,oi_pct", None, None),
+    ("cot_index_1y,crowded,wci", "2022-06-01", None),
+    ("g2_cot_index_3y,g1_cot_index_3m", "2023-01-01", "2023-06-30"),
+    ("pct_net_oi,g3_change", None, "2022-01-01"),
+    ("net,g1_net,open_interest", DATES[60], DATES[60]),
+    (None, "2024-01-01", None),
+]
+
+
+def _by_date(payload: dict) -> dict[str, dict]:
+    return {w["date"]: w for w in payload["weeks"]}
+
+
+@pytest.mark.parametrize("fields,date_from,date_to", PROJECTIONS)
+def test_projected_detail_is_subset_of_full(cot_service, fields, date_from, date_to):
+    full = cot_service.get_market_detail("088691", "legacy", "fo")
+    projection = FieldProjection.parse(fields, date_from, date_to)
+    part = cot_service.get_market_detail("088691", "legacy", "fo", projection)
+
+    full_weeks = _by_date(full)
+    expected_dates = [d for d in full_weeks if projection.in_range(d)] if projection.has_range \
+        else list(full_weeks)
+    assert [w["date"] for w in part["weeks"]] == expected_dates
+    for week in part["weeks"]:
+        reference = full_weeks[week["date"]]
+        assert set(week) <= set(reference)
+        assert week == {k: reference[k] for k in week}
+
+    if fields is not None:
+        assert any(set(w) < set(full_weeks[w["date"]]) for w in part["weeks"])
+    if not projection.has_range:
+        for stat, values in part["stats"].items():
+            assert values == {k: full["stats"][stat][k] for k in values}
+
+
+def test_rolling_indices_exact_at_range_start(cot_service):
+    """The first week of a range is computed over the full lookback window."""
+    full = _by_date(cot_service.get_market_detail("067651", "disagg", "fo"))
+    start = DATES[170]
+    projection = FieldProjection.parse("cot_index_3y,wci", start, None)
+    assert projection.history_rows(
+        projection.select_groups([{"key": "g1"}])) >= 156
+
+    part = cot_service.get_market_detail("067651", "disagg", "fo", projection)
+    first = part["weeks"][-1]
+    assert first["date"] == start
+    for gk in ("g1", "g3", "g5"):
+        assert first[f"cot_index_{gk}_3y"] == full[start][f"cot_index_{gk}_3y"]
+        assert first[f"wci_{gk}"] == full[start][f"wci_{gk}"]
+
+
+def test_projected_dashboard_is_subset_of_full(cot_service):
+    full = _by_date(cot_service.get_dashboard("088691", "legacy", "fo"))
+    projection = FieldProjection.parse("g3_net,long", "2023-03-01", None)
+    part = cot_service.get_dashboard("088691", "legacy", "fo", projection)
+    assert part["weeks"]
+    for week in part["weeks"]:
+        assert week["date"] >= "2023-03-01"
+        assert week == {k: full[week["date"]][k] for k in week}
+
+
+# ------------------------------------------------------------------
+# Date edges
+# ------------------------------------------------------------------
+
+def test_range_before_first_week_is_empty(cot_service):
+    projection = FieldProjection.parse("net", None, "2020-12-31")
+    assert cot_service.get_market_detail("088691", "legacy", "fo", projection) is None
+
+
+def test_range_after_last_week_is_empty(cot_service):
+    projection = FieldProjection.parse("net", "2030-01-01", None)
+    assert cot_service.get_market_detail("088691", "legacy", "fo", projection) is None
+
+
+def test_range_on_non_report_days(cot_service):
+    # 2022-01-02 is a Sunday, 2022-03-07 a Monday
+    projection = FieldProjection.parse("net", "2022-01-02", "2022-03-07")
+    weeks = cot_service.get_market_detail("088691", "legacy", "fo", projection)["weeks"]
+    assert weeks[-1]["date"] == "2022-01-04"
+    assert weeks[0]["date"] == "2022-03-01"
+    assert len(weeks) == 9
+
+
+def test_range_on_first_and_last_week(cot_service):
+    projection = FieldProjection.parse("net", DATES[0], DATES[-1])
+    weeks = cot_service.get_market_detail("088691", "legacy", "fo", projection)["weeks"]
+    assert len(weeks) == len(DATES)
+
+
+def test_screener_as_of_edges(api_client):
+    url = "/api/v1/cot/screener/legacy/fo"
+    # Before the first report
+    assert api_client.get(url, params={"as_of": "2020-12-31"}).status_code == 404
+    # Non-report day → the previous report
+    rows = api_client.get(url, params={"as_of": "2022-03-07"}).json()["items"]
+    assert {r["date"] for r in rows} == {"2022-03-01"}
+    # On the first report
+    rows = api_client.get(url, params={"as_of": DATES[0]}).json()["items"]
+    assert {r["date"] for r in rows} == {DATES[0]}
+    # After the last report → latest
+    rows = api_client.get(url, params={"as_of": "2030-01-01"}).json()["items"]
+    latest = api_client.get(url).json()["items"]
+    assert rows == latest
+
+
+# ------------------------------------------------------------------
+# Validation
+# ------------------------------------------------------------------
+
+@pytest.mark.parametrize("params", [
+    {"fields": "bogus"},
+    {"fields": "net,g6_net"},
+    {"fields": "g1_bogus"},
+    {"from": "2024-13-01"},
+    {"from": "2024-02-01", "to": "2024-01-01"},
+])
+def test_detail_rejects_invalid_projection(api_client, params):
+    r = api_client.get("/api/v1/cot/markets/legacy/fo/088691", params=params)
+    assert r.status_code == 422
+
+
+def test_screener_rejects_unknown_field(api_client):
+    r = api_client.get("/api/v1/cot/screener/legacy/fo", params={"fields": "net,nope"})
+    assert r.status_code == 422
+    assert "nope" in r.json()["detail"]
+
+
+@pytest.mark.parametrize("fields", ["spread", "net,g1_spread"])
+def test_spread_is_dashboard_only(api_client, fields):
+    for url in ("/api/v1/cot/markets/legacy/fo/088691", "/api/v1/cot/screener/legacy/fo"):
+        r = api_client.get(url, params={"fields": fields})
+        assert r.status_code == 422, url
+        assert "spread" in r.json()["detail"]
+
+    r = api_client.get("/api/v1/cot/dashboard/088691", params={"report_type": "legacy", "fields": fields})
+    assert r.status_code == 200
+    week = r.json()["weeks"][0]
+    assert week["g1_spread"] is not None
+    assert ("g2_spread" in week) == (fields == "spread")
+
+
+def test_parse_normalises_tokens():
+    projection = FieldProjection.parse(" NET , g1_net,oi_pct ", None, None)
+    assert projection.fields == frozenset({"net", "oi_pct"})
+    assert projection.cache_key == FieldProjection.parse("oi_pct,net").cache_key
+
+
+def test_select_sql(tmp_db):
+    store = CotStorage(db_path=tmp_db)
+    assert store._select_sql(None) == store._QUERY_COLS_SQL
+
+    cols = store._select_sql(["g1_long", "open_interest"]).split(", ")
+    assert {"g1_long", "open_interest", *store._KEY_COLS} == set(cols)
+    assert cols == [c for c in store._QUERY_COLS if c in cols]
+
+    with pytest.raises(ValueError, match="bogus"):
+        store._select_sql(["g1_long", "bogus"])
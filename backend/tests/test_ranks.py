@@ -0,0 +1,118 @@
+"""
+Percentile-rank histories against ``analytics.percentile`` / ``z_score``.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from app.modules.cot.analytics import percentile, z_score
+from app.modules.cot.ranks import MarketRanks, RankHistory
+
+
+def _expected(values: np.ndarray, week: int, lookback: int, value: float | None = None):
+    """(percentile, z-score) by sorting the window, None where undefined."""
+    value = values[week] if value is None else value
+    window = values[max(week - lookback + 1, 0):week + 1]
+    window = window[~np.isnan(window)]
+    if np.isnan(value) or len(window) < 2:
+        return None, None
+    return percentile(value, window), z_score(value, window)
+
+
+def _series(rng: random.Random, n: int) -> np.ndarray:
+    """Coarse values (ties), NaN gaps and a flat stretch."""
+    values = np.array([
+        np.nan if rng.random() < 0.08 else float(rng.randrange(-40, 41) * 250)
+        for _ in range(n)
+    ])
+    values[n // 3:n // 3 + 12] = 1250.0
+    return values
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("lookback", [2, 3, 13, 52, 156, 1000])
+def test_rank_history_matches_sorted_window(seed, lookback):
+    rng = random.Random(seed)
+    values = _series(rng, 300)
+    history = RankHistory(values)
+    assert len(history) == int((~np.isnan(values)).sum())
+
+    for week in range(len(values)):
+        probe = rng.choice([None, float(rng.randrange(-50, 51) * 250), 1250.0, -1e9, 1e9])
+        for value in (None, probe):
+            exp_pct, exp_z = _expected(values, week, lookback, value)
+            got_pct = history.percentile(week, lookback, value)
+            got_z = history.z_score(week, lookback, value)
+            assert got_pct == exp_pct, (week, value)
+            if exp_z is None:
+                assert got_z is None
+            else:
+                assert got_z == pytest.approx(exp_z, abs=0.01 + 1e-9), (week, value)
+
+
+def test_rank_history_edge_cases():
+    assert RankHistory(np.array([])).percentile(0, 52) is None
+    single = RankHistory(np.array([5.0]))
+    assert single.percentile(0, 52) is None and single.z_score(0, 52) is None
+    flat = RankHistory(np.full(10, 3.0))
+    assert flat.z_score(9, 52) == 0.0 and flat.percentile(9, 52) == percentile(3.0, np.full(10, 3.0))
+
+
+@pytest.mark.parametrize("code", ["088691", "999999", "084691"])
+@pytest.mark.parametrize("lookback", [26, 52, 156])
+def test_market_ranks_match_detail_weeks(cot_service, code, lookback):
+    ranks = cot_service.get_market_ranks(code, "legacy", "fo")
+    weeks = cot_service.get_market_detail(code, "legacy", "fo")["weeks"][::-1]  # oldest first
+    assert ranks.dates == [w["date"] for w in weeks]
+
+    for gk in ("g1", "g2"):
+        for kind in ("net", "long"):
+            key = f"{gk}_{kind}"
+            values = np.array([np.nan if w.get(key) is None else w[key] for w in weeks], dtype=float)
+            for week in range(0, len(weeks), 7):
+                result = ranks.rank(key, lookback, weeks[week]["date"])
+                exp_pct, exp_z = _expected(values, week, lookback)
+                assert result["percentile"] == exp_pct
+                assert result["z_score"] == (None if exp_z is None else pytest.approx(exp_z, abs=0.01))
+                assert result["observations"] == int(
+                    (~np.isnan(values[max(week - lookback + 1, 0):week + 1])).sum()
+                )
+
+
+def test_market_ranks_queries():
+    ranks = MarketRanks.build(
+        ["2024-01-02", "2024-01-09", "2024-01-16", "2024-01-23"],
+        {"g1_net": [1.0, None, 3.0, 2.0], "g1_pct_oi": [1, 2, 3, 4], "open_interest": [9, 9, 9, 9]},
+    )
+    assert set(ranks.series) == {"g1_net"}
+
+    # Between report dates → the week before; hypothetical value
+    result = ranks.rank("g1_net", 52, date="2024-01-20", value=2.5)
+    assert result["date"] == "2024-01-16" and result["observations"] == 2
+    assert result["percentile"] == percentile(2.5, np.array([1.0, 3.0]))
+
+    summary = ranks.summary(["g1_net", "g9_net"], lookbacks=(2, 52))
+    assert summary["date"] == "2024-01-23" and list(summary["series"]) == ["g1_net"]
+    assert summary["series"]["g1_net"]["percentile"] == [
+        percentile(2.0, np.array([3.0, 2.0])), percentile(2.0, np.array([1.0, 3.0, 2.0])),
+    ]
+
+    with pytest.raises(ValueError, match="No 'g2_net' series"):
+        ranks.rank("g2_net", 52)
+    with pytest.raises(ValueError, match="No data on or before"):
+        ranks.rank("g1_net", 52, date="2023-12-31")
+
+
+def test_rank_endpoint(api_client):
+    r = api_client.get("/api/v1/cot/dashboard/088691/rank", params={"report_type": "legacy", "lookback": 52})
+    assert r.status_code == 200
+    body = r.json()
+    assert (body["report_type"], body["series"], body["observations"]) == ("legacy", "g1_net", 52)
+    assert 1 <= body["percentile"] <= 99
+
+    r = api_client.get(
+        "/api/v1/cot/dashboard/088691/rank", params={"report_type": "legacy", "date": "1999-01-01"},
+    )
+    assert r.status_code == 422
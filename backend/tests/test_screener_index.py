@@ -0,0 +1,138 @@
+"""
+Screener filter / sort / top-N (ScreenerIndex) against a brute-force scan.
+"""
+
+import operator
+import random
+
+import pytest
+
+from app.modules.cot.screener_index import ScreenerIndex, ScreenerQuery
+
+OPS = {"gt": operator.gt, "gte": operator.ge, "lt": operator.lt, "lte": operator.le, "eq": operator.eq}
+CATEGORIES = ["metals", "energy", "grains", "currencies", None]
+
+
+def _rows(n: int = 200, seed: int = 3) -> list[dict]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        row = {
+            "code": f"{i:06d}",
+            "name": rng.choice(["GOLD", "CRUDE", "WHEAT", "EURO", "BITCOIN"]) + f" {i % 7}",
+            "category": rng.choice(CATEGORIES),
+            # coarse values so that ties and eq filters hit
+            "cot_g1_1y": rng.choice([None, *range(0, 101, 5)]),
+            "g3_net": rng.choice([None, rng.randint(-50000, 50000)]),
+            "open_interest": float(rng.randint(1000, 500000)),
+            "signal_g1": rng.choice([None, "BUY", "SELL"]),
+            "signal_g3": rng.choice([None, "BUY", "SELL"]),
+            "signals": [],
+        }
+        rows.append(row)
+    return rows
+
+
+def _brute_force(rows: list[dict], query: ScreenerQuery, limit: int, offset: int):
+    def keep(row: dict) -> bool:
+        if query.categories is not None and (row.get("category") or "other") not in query.categories:
+            return False
+        if query.signal is not None:
+            groups = [query.signal_group] if query.signal_group else ["g1", "g3"]
+            if not any(row.get(f"signal_{g}") == query.signal for g in groups):
+                return False
+        for f in query.filters:
+            v = row.get(f.column)
+            if v is None or not OPS[f.op](v, f.value):
+                return False
+        return True
+
+    matched = [r for r in rows if keep(r)]
+    if query.sort is not None:
+        present = [r for r in matched if r.get(query.sort) is not None]
+        missing = [r for r in matched if r.get(query.sort) is None]
+        if isinstance(present[0][query.sort] if present else 0, str):
+            present.sort(key=lambda r: r[query.sort])
+            if query.descending:
+                present.reverse()
+        else:
+            sign = -1 if query.descending else 1
+            present.sort(key=lambda r: sign * r[query.sort])
+        matched = present + missing
+    end = offset + limit if limit > 0 else None
+    return matched[offset:end], len(matched)
+
+
+QUERIES = [
+    {},
+    {"sort": "cot_g1_1y"},
+    {"sort": "cot_g1_1y", "order": "asc"},
+    {"sort": "g3_net", "filters": ["cot_g1_1y:gte:80"]},
+    {"sort": "name", "order": "asc"},
+    {"sort": "name"},
+    {"category": "metals,energy"},
+    {"category": "other", "sort": "open_interest"},
+    {"signal": "buy"},
+    {"signal": "SELL", "signal_group": "g3", "sort": "cot_g1_1y", "order": "asc"},
+    {"filters": ["cot_g1_1y:eq:50"]},
+    {"filters": ["cot_g1_1y:gt:20", "cot_g1_1y:lt:60", "g3_net:lte:0"]},
+    {"filters": ["open_interest:gt:1e9"]},
+    {"category": "grains", "signal": "BUY", "filters": ["g3_net:gte:-10000"], "sort": "g3_net"},
+]
+
+
+@pytest.mark.parametrize("params", QUERIES)
+@pytest.mark.parametrize("limit,offset", [(0, 0), (10, 0), (10, 25), (5, 1000)])
+def test_query_matches_brute_force(params, limit, offset):
+    rows = _rows()
+    index = ScreenerIndex(rows)
+    query = ScreenerQuery.parse(
+        params.get("sort"), params.get("order", "desc"), params.get("category"),
+        params.get("signal"), params.get("signal_group"), params.get("filters"),
+    )
+    got, total = index.query(query, limit, offset)
+    expected, expected_total = _brute_force(rows, query, limit, offset)
+    assert total == expected_total
+    assert [r["code"] for r in got] == [r["code"] for r in expected]
+
+
+def test_unknown_and_non_numeric_columns():
+    index = ScreenerIndex(_rows(20))
+    with pytest.raises(ValueError, match="Unknown screener column"):
+        index.query(ScreenerQuery.parse(sort="nope"))
+    with pytest.raises(ValueError, match="not numeric"):
+        index.query(ScreenerQuery.parse(filters=["name:gt:1"]))
+
+
+@pytest.mark.parametrize("params", [
+    {"order": "up"},
+    {"signal": "HOLD"},
+    {"signal": "BUY", "signal_group": "g9"},
+    {"signal_group": "g1"},
+    {"filters": ["cot_g1_1y:gte"]},
+    {"filters": ["cot_g1_1y:ge:5"]},
+    {"filters": ["cot_g1_1y:gte:abc"]},
+])
+def test_parse_rejects(params):
+    with pytest.raises(ValueError):
+        ScreenerQuery.parse(
+            params.get("sort"), params.get("order", "desc"), params.get("category"),
+            params.get("signal"), params.get("signal_group"), params.get("filters"),
+        )
+
+
+@pytest.mark.parametrize("as_of", ["2022-03-07", "2023-06-13", "2030-01-01"])
+def test_as_of_index_matches_brute_force(cot_service, as_of):
+    """Filter / sort on the as-of screener equals a scan of the screener up to as_of."""
+    from app.modules.cot.projection import FieldProjection
+
+    index = cot_service.get_screener_index("disagg", "fo", as_of=as_of)
+    rows = cot_service.get_screener("disagg", "fo", FieldProjection.parse(None, None, as_of))
+    assert {r["code"]: r for r in index.rows} == {r["code"]: r for r in rows}
+
+    query = ScreenerQuery.parse(sort="cot_g3_1y", filters=["g3_net:gt:-1e9"])
+    got, total = index.query(query)
+    expected, expected_total = _brute_force(index.rows, query, 0, 0)
+    assert total == expected_total
+    assert [r["code"] for r in got] == [r["code"] for r in expected]
+    assert got and all(r["date"] <= as_of for r in got)
@@ -0,0 +1,140 @@
+"""
+Market search ranking against a brute-force scan.
+"""
+
+import random
+import re
+
+import pytest
+
+from app.modules.cot.search_index import MIN_SIMILARITY, MarketSearchIndex
+
+WORDS = [
+    "GOLD", "GOLDMAN", "SILVER", "CRUDE", "OIL", "LIGHT", "SWEET", "WHEAT", "SRW", "HRW",
+    "CORN", "EURO", "FX", "E-MINI", "S&P", "500", "NATURAL", "GAS", "COPPER", "BITCOIN",
+]
+EXCHANGES = ["COMMODITY EXCHANGE INC.", "NEW YORK MERCANTILE EXCHANGE", "CHICAGO BOARD OF TRADE"]
+TIERS = ["identifier", "name_prefix", "name", "field"]
+SCORES = {"identifier": 100.0, "name_prefix": 80.0, "name": 60.0, "field": 40.0}
+
+
+def _tokens(text: str) -> list[str]:
+    return re.findall(r"[A-Z0-9]+", text.upper())
+
+
+def _trigrams(text: str) -> set[str]:
+    return {w[i:i + 3] for w in (f" {t} " for t in _tokens(text)) for i in range(len(w) - 2)}
+
+
+def _markets(n: int = 150, seed: int = 5) -> list[dict]:
+    rng = random.Random(seed)
+    markets = []
+    for i in range(n):
+        name = " ".join(rng.sample(WORDS, rng.randint(1, 4)))
+        names = sorted({name, *([" ".join(rng.sample(WORDS, 2))] if rng.random() < 0.2 else [])})
+        ticker = rng.choice([None, f"{name[:2]}=F", f"{i % 30:02d}X-USD"])
+        markets.append({
+            "code": f"{rng.randint(0, 999999):06d}" if i else "088691",
+            "name": name,
+            "names": names,
+            "exchange_code": rng.choice(EXCHANGES).split()[0][:4],
+            "commodity_code": rng.choice(["", f"{i:03d}", "088"]),
+            "ticker": ticker,
+            "sector": "other",
+        })
+    # unique codes, as in the market index
+    return list({m["code"]: m for m in markets}.values())
+
+
+def _brute_force(markets: list[dict], query: str, limit: int) -> list[tuple[str, str, float]]:
+    """(code, match, score) of the best *limit* markets, rule by rule."""
+    tokens = _tokens(query)
+    if not tokens or limit <= 0:
+        return []
+    phrase = " ".join(tokens)
+
+    def key(m: dict) -> tuple:
+        name = " ".join(_tokens(m["name"]))
+        return len(name), name, m["code"]
+
+    def tier(m: dict) -> str | None:
+        ticker = m["ticker"] or ""
+        identifiers = {
+            s.upper() for s in (m["code"], m["commodity_code"], ticker, re.split(r"[=\-.]", ticker)[0]) if s
+        }
+        if query.strip().upper() in identifiers or "".join(tokens) in identifiers:
+            return "identifier"
+        words = {w for name in m["names"] for w in _tokens(name)}
+        if any(" ".join(_tokens(name)).startswith(phrase) for name in m["names"]):
+            return "name_prefix"
+        if all(any(w.startswith(t) for w in words) for t in tokens):
+            return "name"
+        fields = words | set(_tokens(m["exchange_code"])) | set(_tokens(ticker)) | identifiers
+        if all(any(f.startswith(t) for f in fields) for t in tokens):
+            return "field"
+        return None
+
+    ordered = sorted(markets, key=key)
+    tiered = [(TIERS.index(t), pos, m, t) for pos, m in enumerate(ordered) if (t := tier(m))]
+    out = [(m["code"], t, SCORES[t]) for *_, m, t in sorted(tiered, key=lambda x: x[:2])][:limit]
+    if len(out) < limit:
+        wanted = _trigrams(query)
+        taken = {code for code, *_ in out}
+        fuzzy = []
+        for pos, m in enumerate(ordered):
+            text = " ".join([*m["names"], m["code"], m["commodity_code"], m["ticker"] or ""])
+            similarity = len(wanted & _trigrams(text)) / len(wanted) if wanted else 0.0
+            if similarity >= MIN_SIMILARITY and m["code"] not in taken:
+                fuzzy.append((-similarity, pos, m["code"], round(30.0 * similarity, 1)))
+        out += [(code, "fuzzy", score) for _, _, code, score in sorted(fuzzy)[:limit - len(out)]]
+    return out
+
+
+def _queries(markets: list[dict], seed: int = 9) -> list[str]:
+    rng = random.Random(seed)
+    queries = ["gold", "GOLD", "gol", "crude oil", "oil crude", "e-mini s&p", "s&p 500", "088691",
+               "088", "GO=F", "go", "x-usd", "comm", "euro fx", "  wheat  ", "wheta", "silvr",
+               "natral gas", "bitcoin", "zzz", "", "!!", "500"]
+    for m in rng.sample(markets, 25):
+        name = m["name"]
+        queries.append(name[:rng.randint(1, len(name))].lower())
+        queries.append(rng.choice(_tokens(name))[:3])
+        if m["ticker"]:
+            queries.append(m["ticker"])
+    return queries
+
+
+@pytest.mark.parametrize("limit", [1, 5, 10, 200])
+def test_search_matches_brute_force(limit):
+    markets = _markets()
+    index = MarketSearchIndex(markets)
+    seen = set()
+    for query in _queries(markets):
+        got = [(r["code"], r["match"], r["score"]) for r in index.search(query, limit)]
+        assert got == _brute_force(markets, query, limit), query
+        seen |= {kind for _, kind, _ in got}
+    assert seen == {*TIERS, "fuzzy"}
+
+
+def test_search_result_fields():
+    markets = _markets(20)
+    result = MarketSearchIndex(markets).search("088691")[0]
+    assert result["code"] == "088691" and result["match"] == "identifier"
+    assert "names" not in result
+    assert result["ticker"] == next(m["ticker"] for m in markets if m["code"] == "088691")
+    assert MarketSearchIndex(markets).search("gold", limit=0) == []
+
+
+def test_search_over_stored_markets(cot_service):
+    gold = cot_service.search_markets("gold")
+    assert gold[0]["code"] == "088691" and gold[0]["match"] == "name_prefix"
+    assert set(gold[0]["available_reports"]) == {"legacy", "disagg"}
+    assert {(v["report_type"], v["subtype"]) for v in gold[0]["variants"]} == {
+        ("legacy", "fo"), ("legacy", "co"), ("disagg", "fo"),
+    }
+
+    wheat = cot_service.search_markets("001602")
+    assert [(r["code"], r["match"]) for r in wheat] == [("001602", "identifier")]
+    assert [v["subtype"] for v in wheat[0]["variants"]] == ["co"]  # only a combined report
+
+    assert cot_service.search_markets("wheta")[0]["code"] == "001602"
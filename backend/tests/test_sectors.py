@@ -0,0 +1,70 @@
+"""
+Sector aggregates against per-market sums.
+"""
+
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+from app.modules.cot.config import cot_settings
+from app.modules.cot.sectors import SectorAggregates
+from app.utils.categories import categorize_market
+
+
+def _brute_force(cot_service, report_type: str, subtype: str) -> dict[tuple[str, str], dict]:
+    """(sector, date) → sums over the markets' calculator weeks."""
+    groups = [g["key"] for g in cot_settings.report_groups[report_type]]
+    cells: dict[tuple[str, str], list[dict]] = defaultdict(list)
+    for market in cot_service.get_markets(report_type, subtype):
+        detail = cot_service.get_market_detail(market["code"], report_type, subtype)
+        sector = categorize_market(detail["market"]["name"], cot_settings.market_categories)[0]
+        for week in detail["weeks"]:
+            cells[(sector, week["date"])].append(week)
+
+    out = {}
+    for key, weeks in cells.items():
+        oi = [w["open_interest"] for w in weeks if w.get("open_interest") is not None]
+        row = {"markets": len(weeks), "open_interest": float(sum(oi)) if oi else None}
+        for gk in groups:
+            nets = [w[f"{gk}_net"] for w in weeks if w.get(f"{gk}_net") is not None]
+            row[f"{gk}_net"] = sum(nets) if nets else None
+            both = [w for w in weeks if w.get(f"{gk}_net") is not None and w.get("open_interest")]
+            row[f"{gk}_pct_oi"] = (
+                round(sum(w[f"{gk}_net"] for w in both) / sum(w["open_interest"] for w in both) * 100, 1)
+                if both else None
+            )
+            index = [w[f"cot_index_{gk}_1y"] for w in weeks if w.get(f"cot_index_{gk}_1y") is not None]
+            row[f"{gk}_cot_1y"] = float(np.mean(index)) if index else None
+        out[key] = row
+    return out
+
+
+@pytest.mark.parametrize("report_type,subtype", [("legacy", "fo"), ("disagg", "fo")])
+def test_sector_rows_are_sums_of_markets(cot_service, report_type, subtype):
+    rows = SectorAggregates(cot_service.store).compute(report_type, subtype)
+    expected = _brute_force(cot_service, report_type, subtype)
+    assert {r["markets"] for r in rows} == {1, 2}
+
+    assert {(r["sector"], r["report_date"]) for r in rows} == set(expected)
+    for r in rows:
+        exp = expected[(r["sector"], r["report_date"])]
+        for key, value in exp.items():
+            if key.endswith("_cot_1y") and value is not None:
+                assert r[key] == pytest.approx(value, abs=0.05 + 1e-9), key
+            else:
+                assert r[key] == value, (r["sector"], r["report_date"], key)
+
+
+def test_stored_series_match_computed(cot_service):
+    aggregates = SectorAggregates(cot_service.store)
+    live = cot_service.get_sectors("legacy", "fo", "2023-01-01", "2023-12-31")
+    assert aggregates.update("legacy", "fo") > 0
+    stored = cot_service.get_sectors("legacy", "fo", "2023-01-01", "2023-12-31")
+    assert stored == live
+
+    metals = next(s for s in stored if s["sector"] == "metals")
+    assert metals["markets"] == ["084691", "088691"]
+    assert set(metals["markets_reporting"]) == {2}
+    assert all("2023-01-01" <= d <= "2023-12-31" for d in metals["dates"])
+    assert len(metals["groups"]["g1"]["net"]) == len(metals["dates"])
@@ -0,0 +1,110 @@
+"""
+Screener snapshots: incremental updates equal a full rebuild.
+"""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from app.modules.cot.calculator import CotCalculator
+from app.modules.cot.projection import FieldProjection
+from app.modules.cot.service import CotService
+from app.modules.cot.snapshots import ScreenerSnapshots
+from app.modules.cot.storage import CotStorage
+from tests.conftest import NoPrices, cot_report_dates, make_cot_rows
+
+DATES = cot_report_dates()
+ROWS = make_cot_rows()
+
+
+def _snapshot_table(db: Path, report_type: str, subtype: str) -> list[tuple]:
+    conn = sqlite3.connect(db)
+    try:
+        return conn.execute(
+            """SELECT * FROM screener_snapshots WHERE report_type = ? AND subtype = ?
+               ORDER BY cftc_contract_code, report_date""",
+            (report_type, subtype),
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def _store(db: Path, until: str | None = None) -> CotStorage:
+    store = CotStorage(db_path=db)
+    store.upsert_rows([r for r in ROWS if until is None or r["report_date"] <= until])
+    return store
+
+
+@pytest.fixture
+def rebuilt(tmp_path: Path) -> Path:
+    """Snapshots of the full history, built in one pass."""
+    db = tmp_path / "rebuilt.db"
+    written = ScreenerSnapshots(_store(db)).update("disagg", "fo", rebuild=True)
+    assert written == len([r for r in ROWS if r["report_type"] == "disagg"])
+    return db
+
+
+def test_incremental_equals_rebuild(tmp_path: Path, rebuilt: Path):
+    db = tmp_path / "incremental.db"
+    store = _store(db, until=DATES[120])
+    snapshots = ScreenerSnapshots(store)
+    snapshots.update("disagg", "fo")
+
+    # Week by week, then the rest in one go
+    for date in DATES[121:125]:
+        store.upsert_rows([r for r in ROWS if r["report_date"] == date])
+        assert snapshots.update("disagg", "fo") > 0
+    store.upsert_rows([r for r in ROWS if r["report_date"] > DATES[124]])
+    snapshots.update("disagg", "fo")
+
+    assert _snapshot_table(db, "disagg", "fo") == _snapshot_table(rebuilt, "disagg", "fo")
+    # Nothing new → nothing written
+    assert snapshots.update("disagg", "fo") == 0
+
+
+def test_incremental_for_changed_codes(tmp_path: Path, rebuilt: Path):
+    db = tmp_path / "incremental.db"
+    store = _store(db, until=DATES[150])
+    snapshots = ScreenerSnapshots(store)
+    snapshots.update("disagg", "fo")
+
+    new_rows = [r for r in ROWS if r["report_date"] > DATES[150]]
+    store.upsert_rows(new_rows)
+    codes = {r["cftc_contract_code"] for r in new_rows if r["report_type"] == "disagg"}
+    snapshots.update("disagg", "fo", codes=codes)
+
+    assert _snapshot_table(db, "disagg", "fo") == _snapshot_table(rebuilt, "disagg", "fo")
+
+
+def test_rebuild_picks_up_revised_history(tmp_path: Path, rebuilt: Path):
+    db = tmp_path / "revised.db"
+    store = _store(db)
+    revised = next(
+        r for r in ROWS
+        if r["report_type"] == "disagg" and r["subtype"] == "fo" and r["report_date"] == DATES[60]
+    )
+    store.upsert_rows([{**revised, "g3_long": revised["g3_long"] + 12345}])
+    snapshots = ScreenerSnapshots(store)
+    snapshots.update("disagg", "fo")
+    store.upsert_rows([revised])
+    snapshots.update("disagg", "fo", rebuild=True)
+
+    assert _snapshot_table(db, "disagg", "fo") == _snapshot_table(rebuilt, "disagg", "fo")
+
+
+@pytest.mark.parametrize("as_of", [DATES[0], "2022-03-07", DATES[150], DATES[-1], "2030-01-01"])
+@pytest.mark.parametrize("fields", [None, "crowded,g3_net", "pct_net_oi"])
+def test_snapshot_screener_equals_live(rebuilt: Path, as_of: str, fields: str | None):
+    store = CotStorage(db_path=rebuilt)
+    codes = sorted({r["cftc_contract_code"] for r in ROWS if r["report_type"] == "disagg"})
+    projection = FieldProjection.parse(fields)
+
+    service = CotService(store, CotCalculator(), NoPrices())
+    live = service.get_screener("disagg", "fo", FieldProjection.parse(fields, None, as_of))
+    snap = ScreenerSnapshots(store).get_screener("disagg", "fo", codes, as_of, projection)
+
+    def by_code(rows: list[dict]) -> dict:
+        return {r["code"]: r for r in rows}
+
+    assert by_code(snap) == by_code(live)
@@ -0,0 +1,75 @@
+"""
+Stage chain: threaded and serial runs give the same outputs and counters.
+"""
+
+import threading
+
+import pytest
+
+from app.modules.cot.stages import Stage, run_stages
+
+
+def _chain(sink: list, fail_on: int | None = None, stop_on: int | None = None) -> list[Stage]:
+    """double → split (fails on *fail_on*) → collect (stopped by *stop_on*)."""
+    started = []
+
+    def split(x):
+        if x == fail_on:
+            raise ValueError(f"bad item {x}")
+        yield x
+        yield x + 1
+
+    def collect(x):
+        if x == stop_on:
+            raise SystemExit("stopped")
+        sink.append(x)
+
+    return [
+        Stage("double", lambda x: [x * 2], start=lambda: started.append("double")),
+        Stage("split", split),
+        Stage("collect", collect),
+    ]
+
+
+def _counters(stats: dict) -> dict:
+    return {name: (s["items"], s["errors"]) for name, s in stats["stages"].items()}
+
+
+@pytest.mark.parametrize("fail_on", [None, 4])
+def test_threaded_equals_serial(fail_on):
+    results = {}
+    for serial in (True, False):
+        sink = []
+        stats = run_stages(_chain(sink, fail_on=fail_on), range(20), serial=serial, queue_size=1)
+        results[serial] = (sorted(sink), _counters(stats))
+    assert results[True] == results[False]
+
+    sink, counters = results[False]
+    assert sink == sorted(v for x in range(20) if x * 2 != fail_on for v in (x * 2, x * 2 + 1))
+    assert counters["double"] == (20, 0)
+    assert counters["split"] == (20, 1 if fail_on is not None else 0)
+    assert counters["collect"] == (len(sink), 0)
+
+
+def test_threaded_keeps_item_order():
+    sink = []
+    run_stages(_chain(sink), range(50), queue_size=1)
+    assert sink == [v for x in range(50) for v in (x * 2, x * 2 + 1)]
+
+
+def test_stopped_stage_does_not_hang_the_chain():
+    sink = []
+    done = threading.Event()
+    raised = []
+
+    def run():
+        try:
+            run_stages(_chain(sink, stop_on=6), range(100), queue_size=1)
+        except BaseException as e:
+            raised.append(e)
+        done.set()
+
+    threading.Thread(target=run, daemon=True).start()
+    assert done.wait(10), "run_stages hung after a stage thread stopped"
+    assert len(raised) == 1 and isinstance(raised[0], SystemExit)
+    assert sink == [0, 1, 2, 3, 4, 5]
@@ -0,0 +1,122 @@
+"""
+Out-of-process jobs: worker results, failures and deaths; how the managers record them.
+"""
+
+import os
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.core.worker import run_in_worker
+from app.modules.cot import scheduler as cot_scheduler
+from app.modules.prices import scheduler as price_scheduler
+from app.modules.prices.service import PriceService
+
+JOBS = __name__
+
+
+def echo_job(progress, value):
+    progress({"step": "one"})
+    progress({"step": "two"})
+    return {"value": value, "pid": os.getpid()}
+
+
+def failing_job(progress):
+    progress({"step": "one"})
+    raise ValueError("bad archive")
+
+
+def dying_job(progress):
+    progress({"step": "one"})
+    os._exit(3)  # like an OOM kill: no result, no traceback
+
+
+def test_result_and_progress_come_back():
+    events = []
+    result = run_in_worker(f"{JOBS}:echo_job", on_progress=events.append, name="test", value=[1, {"a": 2}])
+    assert result["value"] == [1, {"a": 2}]
+    assert result["pid"] != os.getpid()
+    assert events == [{"step": "one"}, {"step": "two"}]
+
+
+def test_progress_callback_errors_are_ignored():
+    def broken(event):
+        raise KeyError(event["missing"])
+
+    assert run_in_worker(f"{JOBS}:echo_job", on_progress=broken, value=1)["value"] == 1
+
+
+def test_job_exception_is_raised_in_the_caller():
+    events = []
+    with pytest.raises(RuntimeError, match="ValueError: bad archive"):
+        run_in_worker(f"{JOBS}:failing_job", on_progress=events.append)
+    assert events == [{"step": "one"}]
+
+
+def test_dead_worker_is_reported():
+    t0 = time.monotonic()
+    with pytest.raises(RuntimeError, match=r"exited without a result \(exit code 3\)"):
+        run_in_worker(f"{JOBS}:dying_job", name="doomed")
+    assert time.monotonic() - t0 < 30
+
+
+def test_unknown_target_is_an_error():
+    with pytest.raises(RuntimeError, match="AttributeError"):
+        run_in_worker(f"{JOBS}:no_such_job")
+
+
+# ------------------------------------------------------------------
+# Managers (in-process jobs)
+# ------------------------------------------------------------------
+
+@pytest.fixture
+def in_process(monkeypatch):
+    monkeypatch.setitem(settings.__dict__, "worker_process", False)
+    monkeypatch.setattr(PriceService, "_price_cache", {})
+    PriceService.cache_prices({"088691": [{"date": "2024-01-02"}], "067651": [{"date": "2024-01-02"}]})
+
+
+@pytest.mark.parametrize("status", ["success", "partial"])
+def test_pipeline_manager_records_the_run_status(in_process, monkeypatch, status):
+    changes = {("088691", "legacy_fo")}
+    monkeypatch.setattr(cot_scheduler, "pipeline_job", lambda progress, force: {
+        "run_id": 7, "status": status, "price_codes": {"088691"}, "changes": changes,
+    })
+    manager = cot_scheduler.CotUpdateManager()
+    seen = []
+    manager.on_pipeline_complete(seen.append)
+    manager.run_pipeline()
+
+    state = manager.get_status()
+    assert (state["running"], state["last_status"], state["last_run_id"]) == (False, status, 7)
+    assert (state["last_error"] is None) == (status == "success")
+    assert seen == [changes]
+    # Only the changed code leaves the API's price cache; it is re-read from the store
+    assert set(PriceService._price_cache) == {"067651"}
+
+
+def test_pipeline_manager_records_errors(in_process, monkeypatch):
+    def job(progress, force):
+        raise RuntimeError("Worker 'cot-pipeline' exited without a result (exit code -9)")
+
+    monkeypatch.setattr(cot_scheduler, "pipeline_job", job)
+    manager = cot_scheduler.CotUpdateManager()
+    seen = []
+    manager.on_pipeline_complete(seen.append)
+    manager.run_pipeline()
+    state = manager.get_status()
+    assert state["last_status"] == "error" and "exit code -9" in state["last_error"]
+    assert seen == [] and set(PriceService._price_cache) == {"088691", "067651"}
+
+
+@pytest.mark.parametrize(("status", "error"), [("success", None), ("partial", "Price export failed: disk full")])
+def test_price_manager_records_the_run_status(in_process, monkeypatch, status, error):
+    monkeypatch.setattr(price_scheduler, "price_update_job", lambda progress: {
+        "status": status, "error": error, "price_codes": {"067651"}, "changes": set(),
+    })
+    manager = price_scheduler.PriceUpdateManager()
+    manager.run_price_update()
+    state = manager.get_status()
+    assert (state["last_status"], state["last_error"]) == (status, error)
+    assert set(PriceService._price_cache) == {"088691"}